@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Name: graphql_stub.py
+Description: Serve a netbox-like GraphQL endpoint from fixture data, offline
+
+A test double for netbox's /graphql/ endpoint, for exercising
+lib/netbox_tools/graphql.py (and the scripts' --graphql option) without a
+netbox.  It understands the subset of GraphQL that netbox_tools sends:
+one or more root fields (e.g. device_list), each with a nested selection
+of fields.  Arguments (e.g. filters) are ignored.  Each root field returns
+its fixture list, with every object cut down to the selected fields.  As
+netbox does, selecting a field the objects lack is an error.
+
+Fixtures are a JSON file holding an object keyed on root field, e.g.
+{"device_list": [{"id": "1", "name": "leaf_1", ...}, ...]}, or, with
+--devices, that many generated devices.
+
+The stub can also be used in-process:
+
+from graphql_stub import StubServer, generate_devices
+
+with StubServer({"device_list": generate_devices(100)}) as stub:
+    client = GraphQLClient(stub.url)
+    ...
+
+Example Usage:
+
+./graphql_stub.py --devices 5000                 # serves on port 8001
+./graphql_stub.py --fixtures devices.json --port 9000
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import re
+import sys
+import threading
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB_DIR = os.path.join(REPO_DIR, "lib")
+# so that netbox_tools is found without PYTHONPATH=../lib
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+# pylint: disable=wrong-import-position
+from netbox_tools.logger import log_message
+
+OUR_VERSION = 101
+
+DEFAULT_PORT = 8001
+
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[A-Za-z_][A-Za-z0-9_]*|[{}()]|\S')
+
+
+def get_parser():
+    """
+    return an argparse parser object
+    """
+    help_fixtures = "JSON file holding an object keyed on root field"
+    help_fixtures += " (e.g. device_list) whose values are lists of objects."
+    help_devices = "Serve this many generated devices as device_list."
+    help_port = f"Port to listen on. Default: {DEFAULT_PORT}."
+
+    ex_prefix = "Example: "
+    ex_fixtures = f"{ex_prefix} --fixtures devices.json"
+    ex_devices = f"{ex_prefix} --devices 5000"
+    ex_port = f"{ex_prefix} --port 9000"
+
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Serve a netbox-like GraphQL endpoint offline"
+    )
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+
+    optional.add_argument(
+        "--fixtures",
+        dest="fixtures",
+        required=False,
+        default=None,
+        help=f"{help_fixtures} {ex_fixtures}",
+    )
+    optional.add_argument(
+        "--devices",
+        dest="devices",
+        type=int,
+        required=False,
+        default=None,
+        help=f"{help_devices} {ex_devices}",
+    )
+    optional.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        required=False,
+        default=DEFAULT_PORT,
+        help=f"{help_port} {ex_port}",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parser.parse_args()
+
+
+def log(*args):
+    """
+    simple logger
+    """
+    log_message(args, version=OUR_VERSION)
+
+
+def generate_devices(count):
+    """
+    Return a list of count devices, shaped as netbox 4's GraphQL API
+    returns them
+    """
+    devices = []
+    for index in range(1, count + 1):
+        role = "spine" if index % 10 == 0 else "leaf"
+        devices.append(
+            {
+                "id": str(index),
+                "name": f"{role}_{index}",
+                "serial": f"SN{index:08d}",
+                "status": "active",
+                "role": {"name": role},
+                "device_role": {"name": role},
+                "location": {"name": f"row-{index % 4}"},
+                "device_type": {"model": "N9K-C9336C-FX2"},
+                "primary_ip4": {
+                    "id": str(index),
+                    "address": f"10.0.{index // 250}.{index % 250 + 1}/24",
+                },
+                "tags": [{"name": "admin", "slug": "admin"}] if index % 2 else [],
+            }
+        )
+    return devices
+
+
+def parse_selection(query):
+    """
+    Return the selection set of query (a GraphQL document) as a dictionary
+    keyed on field name, whose values are the field's selection set, or
+    None for leaf fields.  Arguments are skipped.
+    """
+    tokens = TOKEN_RE.findall(query)
+    position = 0
+
+    def skip_arguments():
+        nonlocal position
+        depth = 0
+        while position < len(tokens):
+            token = tokens[position]
+            position += 1
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def selection_set():
+        nonlocal position
+        # position is just past "{"
+        fields = {}
+        while position < len(tokens):
+            token = tokens[position]
+            position += 1
+            if token == "}":
+                return fields
+            name = token
+            selection = None
+            if position < len(tokens) and tokens[position] == "(":
+                skip_arguments()
+            if position < len(tokens) and tokens[position] == "{":
+                position += 1
+                selection = selection_set()
+            fields[name] = selection
+        raise ValueError("Unterminated selection set")
+
+    # skip the operation type, name, and variable definitions
+    while position < len(tokens) and tokens[position] != "{":
+        if tokens[position] == "(":
+            skip_arguments()
+        else:
+            position += 1
+    if position == len(tokens):
+        raise ValueError("Query has no selection set")
+    position += 1
+    return selection_set()
+
+
+def project(value, selection, path):
+    """
+    Return value cut down to selection (see parse_selection()).
+    Raise KeyError if value lacks a selected field.
+    """
+    if selection is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, selection, path) for item in value]
+    result = {}
+    for name, child in selection.items():
+        if name not in value:
+            raise KeyError(f"Cannot query field '{name}' on {path}")
+        result[name] = project(value[name], child, f"{path}.{name}")
+    return result
+
+
+def execute(fixtures, query):
+    """
+    Return the GraphQL response (a dictionary) to query, answered from
+    fixtures
+    """
+    try:
+        selection = parse_selection(query)
+        data = {}
+        for root, child in selection.items():
+            if root not in fixtures:
+                raise KeyError(f"Cannot query field '{root}' on type 'Query'")
+            data[root] = project(fixtures[root], child, root)
+    except (KeyError, ValueError) as error:
+        return {"data": None, "errors": [{"message": error.args[0]}]}
+    return {"data": data}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Answer POST /graphql/ from self.server.fixtures
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+            result = execute(self.server.fixtures, payload["query"])
+            status = 200
+        except (ValueError, KeyError, TypeError) as error:
+            result = {"errors": [{"message": f"Malformed request: {error}"}]}
+            status = 400
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    """
+    GraphQL stub served from a background thread.
+
+    fixtures: dictionary keyed on root field, e.g. device_list
+    port: port to listen on.  Default: any free port
+    """
+
+    def __init__(self, fixtures, port=0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.fixtures = fixtures
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        return the url of the GraphQL endpoint
+        """
+        return f"http://127.0.0.1:{self._server.server_address[1]}/graphql/"
+
+    def serve(self):
+        """
+        serve until stop() is called, or KeyboardInterrupt
+        """
+        self._server.serve_forever()
+
+    def start(self):
+        """
+        start serving from a background thread
+        """
+        self._thread = threading.Thread(target=self.serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        stop serving
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def load_fixtures():
+    """
+    Return the fixtures requested with --fixtures and/or --devices
+    """
+    fixtures = {}
+    if cfg.fixtures is not None:
+        try:
+            with open(cfg.fixtures, "r", encoding="utf-8") as handle:
+                fixtures.update(json.load(handle))
+        except (OSError, ValueError) as _general_exception:
+            log(
+                f"exiting. Unable to load {cfg.fixtures}.",
+                f"Exception detail: {_general_exception}",
+            )
+            sys.exit(1)
+    if cfg.devices is not None:
+        fixtures["device_list"] = generate_devices(cfg.devices)
+    if len(fixtures) == 0:
+        log("exiting. Set --fixtures and/or --devices.")
+        sys.exit(1)
+    return fixtures
+
+
+if __name__ == "__main__":
+    cfg = get_parser()
+    stub = StubServer(load_fixtures(), cfg.port)
+    log(f"serving {stub.url}")
+    try:
+        stub.serve()
+    except KeyboardInterrupt:
+        stub.stop()
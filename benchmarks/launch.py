@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Name: launch.py
+Description: Run a script of this repository with a given config.yml
+
+netbox_tools reads config.yml from the path set in
+lib/netbox_tools/config/netbox_config.py.  suite.py runs each script
+against a stub, with its own config.yml, so this launcher points
+netbox_tools at that config.yml, then runs the script as __main__, with
+the remaining arguments.  lib must be on PYTHONPATH.
+
+Example Usage:
+
+PYTHONPATH=../lib ./launch.py /tmp/config.yml ../scripts/tags_print.py
+PYTHONPATH=../lib ./launch.py /tmp/config.yml ../scripts/device_count.py --group_by role
+"""
+import os
+import runpy
+import sys
+from netbox_tools.config import netbox_config
+
+OUR_VERSION = 100
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"usage: {sys.argv[0]} <config.yml> <script.py> [script args]")
+        sys.exit(1)
+    netbox_config.config_file = os.path.abspath(sys.argv[1])
+    script = os.path.abspath(sys.argv[2])
+    sys.argv = sys.argv[2:]
+    # as if the script had been run directly
+    sys.path[0] = os.path.dirname(script)
+    runpy.run_path(script, run_name="__main__")
@@ -0,0 +1,1663 @@
+#!/usr/bin/env python3
+"""
+Name: netbox_stub.py
+Description: Serve a netbox-like REST API from memory, for the benchmarks
+
+A stand-in for netbox's REST API, holding its objects in memory, so that
+the scripts of this repository can be benchmarked (see suite.py) without
+a netbox, and without the benchmark measuring netbox's database.  It
+implements the subset of the API that pynetbox and netbox_tools use,
+shaped as netbox 3.7 returns it.  3.7 is the last version to accept the
+device_role field that netbox_tools sends for devices (it accepts, and
+renders, both role and device_role).  The stub serves:
+
+- GET /api/ (the API-Version header, read by pynetbox) and /api/status/
+- for each endpoint of ENDPOINTS (devices, interfaces, ip-addresses,
+  cables, vlans, tags, etc), and any other /api/<app>/<endpoint>/:
+    - GET of the list, with filters, pagination (limit, offset), ordering,
+      brief, fields, and exclude
+    - GET, PATCH, PUT, DELETE of /api/<app>/<endpoint>/<id>/
+    - POST, PATCH, PUT, DELETE of lists, as netbox's bulk operations
+    - OPTIONS, whose actions.POST lists the choices of the choice fields
+      (see pynetbox's Endpoint.choices())
+- POST /graphql/, answered by graphql_stub.execute() from the devices held
+
+Objects are rendered as netbox renders them: foreign keys (e.g. a device's
+site) as nested brief objects, choice fields as {value, label}, tags as
+nested objects, cable terminations as {object_type, object_id, object}.
+Foreign keys and choices are validated, as are unique fields (e.g. the
+name of a device in its site), so failures surface as netbox's would
+(status 400).
+
+Filters: exact matches on fields (several values match any of them),
+field_id filters on foreign keys, filters on foreign keys by name or slug
+(e.g. devices?site=site_1), tag (by slug), address (ip addresses, with or
+without the mask), q (substring of the name), and the lookups gt, gte,
+lt, lte, n, ic, ie, isw (e.g. id__gt=10).  As netbox does, filters the
+stub does not know are ignored.  They are counted in the statistics,
+since they return more objects than intended.
+
+Lookups by field are served from indexes built on first use, so that
+inventories of 100k objects stay fast.
+
+Injectable latency: every request sleeps latency_ms, plus a random
+0-jitter_ms, plus per_object_ms per object returned or written, to mimic
+a remote netbox.  The sleep is outside the stub's lock, so concurrent
+requests overlap, as they would against netbox.
+
+Statistics (requests by method, endpoint, and status, bytes sent, and
+ignored filters) are available from NetboxStub.stats(), or GET
+/_stub/stats.
+
+The stub can be used in-process:
+
+from netbox_stub import NetboxStub
+
+with NetboxStub(latency_ms=5) as stub:
+    # point netbox_url in config.yml at stub.url; any token is accepted
+    ...
+    print(stub.stats())
+
+Example Usage:
+
+./netbox_stub.py                                 # serves on port 8002
+./netbox_stub.py --port 9000 --latency_ms 20 --jitter_ms 10
+"""
+import argparse
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB_DIR = os.path.join(REPO_DIR, "lib")
+# so that netbox_tools is found without PYTHONPATH=../lib
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+# pylint: disable=wrong-import-position
+from netbox_tools.logger import log_message
+from graphql_stub import execute
+
+OUR_VERSION = 102
+
+DEFAULT_PORT = 8002
+NETBOX_VERSION = "3.7"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# responses larger than this are compressed, if the client accepts gzip
+GZIP_MIN_BYTES = 1024
+
+# query parameters that are not filters
+CONTROL_PARAMS = ("limit", "offset", "brief", "fields", "exclude", "ordering")
+LOOKUPS = ("gt", "gte", "lt", "lte", "n", "ic", "ie", "isw")
+
+SITE_STATUS = ("planned", "staging", "active", "decommissioning", "retired")
+DEVICE_STATUS = (
+    "offline",
+    "active",
+    "planned",
+    "staged",
+    "failed",
+    "inventory",
+    "decommissioning",
+)
+RACK_STATUS = ("reserved", "available", "planned", "active", "deprecated")
+INTERFACE_TYPES = (
+    "virtual",
+    "bridge",
+    "lag",
+    "100base-tx",
+    "1000base-t",
+    "2.5gbase-t",
+    "5gbase-t",
+    "10gbase-t",
+    "1000base-x-sfp",
+    "10gbase-x-sfpp",
+    "25gbase-x-sfp28",
+    "40gbase-x-qsfpp",
+    "100gbase-x-qsfp28",
+    "400gbase-x-qsfpdd",
+    "other",
+)
+INTERFACE_MODES = ("access", "tagged", "tagged-all")
+DUPLEX = ("half", "full", "auto")
+CONSOLE_TYPES = ("de-9", "db-25", "rj-11", "rj-12", "rj-45", "usb-a", "usb-b")
+CONSOLE_TYPES += ("usb-c", "usb-mini-b", "usb-micro-b", "other")
+CONSOLE_SPEEDS = (1200, 2400, 4800, 9600, 19200, 38400, 57600, 115200)
+IP_STATUS = ("active", "reserved", "deprecated", "dhcp", "slaac")
+IP_ROLES = ("loopback", "secondary", "anycast", "vip", "vrrp", "hsrp", "glbp")
+IP_ROLES += ("carp",)
+PREFIX_STATUS = ("container", "active", "reserved", "deprecated")
+VLAN_STATUS = ("active", "reserved", "deprecated")
+CABLE_TYPES = ("cat3", "cat5", "cat5e", "cat6", "cat6a", "cat7", "cat7a", "cat8")
+CABLE_TYPES += ("dac-active", "dac-passive", "coaxial", "mmf", "mmf-om3")
+CABLE_TYPES += ("mmf-om4", "smf", "smf-os1", "smf-os2", "aoc", "power")
+CABLE_STATUS = ("connected", "planned", "decommissioning")
+LENGTH_UNITS = ("km", "m", "cm", "mi", "ft", "in")
+VM_STATUS = ("offline", "active", "planned", "staged", "failed")
+VM_STATUS += ("decommissioning",)
+
+
+def endpoint(
+    fks=None,
+    lists=None,
+    choices=None,
+    required=(),
+    unique=(),
+    defaults=None,
+    display="name",
+    brief=("name", "slug"),
+    aliases=None,
+):
+    """
+    Return the specification of an endpoint.
+
+    fks: dictionary of foreign key field: path of the endpoint it refers to
+    lists: the same, for fields holding a list of foreign keys (e.g. tags)
+    choices: dictionary of choice field: tuple of valid values
+    required: fields that must be set on creation
+    unique: tuples of fields whose values must be unique together
+    defaults: dictionary of the other fields of the endpoint's objects, and
+        their default values
+    display: field rendered as display
+    brief: fields, besides id, url, and display, of brief renderings
+    aliases: dictionary of deprecated field name: field it stands for,
+        accepted in payloads and filters, and rendered
+    """
+    return {
+        "fks": fks or {},
+        "lists": lists or {},
+        "choices": choices or {},
+        "required": required,
+        "unique": unique,
+        "defaults": defaults or {},
+        "display": display,
+        "brief": brief,
+        "aliases": aliases or {},
+    }
+
+
+TAGGED = {"tags": "extras/tags"}
+COMMON = {"description": "", "comments": "", "custom_fields": {}, "tags": []}
+
+ENDPOINTS = {
+    "extras/tags": endpoint(
+        required=("name", "slug"),
+        unique=(("name",), ("slug",)),
+        defaults={"color": "9e9e9e", "description": "", "object_types": []},
+        brief=("name", "slug", "color"),
+    ),
+    "dcim/sites": endpoint(
+        fks={"region": "dcim/regions", "group": "dcim/site-groups"},
+        lists=TAGGED,
+        choices={"status": SITE_STATUS},
+        required=("name", "slug"),
+        unique=(("name",), ("slug",)),
+        defaults={
+            **COMMON,
+            "status": "active",
+            "region": None,
+            "group": None,
+            "tenant": None,
+            "facility": "",
+            "time_zone": None,
+            "physical_address": "",
+            "shipping_address": "",
+            "latitude": None,
+            "longitude": None,
+        },
+    ),
+    "dcim/locations": endpoint(
+        fks={"site": "dcim/sites", "parent": "dcim/locations"},
+        lists=TAGGED,
+        choices={"status": SITE_STATUS},
+        required=("name", "slug", "site"),
+        unique=(("site", "name"), ("site", "slug")),
+        defaults={**COMMON, "status": "active", "parent": None, "tenant": None},
+    ),
+    "dcim/racks": endpoint(
+        fks={"site": "dcim/sites", "location": "dcim/locations"},
+        lists=TAGGED,
+        choices={"status": RACK_STATUS},
+        required=("name", "site"),
+        unique=(("location", "name"),),
+        defaults={
+            **COMMON,
+            "status": "active",
+            "location": None,
+            "role": None,
+            "tenant": None,
+            "facility_id": None,
+            "serial": "",
+            "asset_tag": None,
+            "u_height": 42,
+        },
+        brief=("name",),
+    ),
+    "dcim/manufacturers": endpoint(
+        lists=TAGGED,
+        required=("name", "slug"),
+        unique=(("name",), ("slug",)),
+        defaults={"description": "", "custom_fields": {}, "tags": []},
+    ),
+    "dcim/device-types": endpoint(
+        fks={"manufacturer": "dcim/manufacturers"},
+        lists=TAGGED,
+        required=("manufacturer", "model", "slug"),
+        unique=(("manufacturer", "model"), ("manufacturer", "slug")),
+        defaults={
+            **COMMON,
+            "part_number": "",
+            "u_height": 1.0,
+            "is_full_depth": True,
+            "subdevice_role": None,
+            "airflow": None,
+        },
+        display="model",
+        brief=("manufacturer", "model", "slug"),
+    ),
+    "dcim/device-roles": endpoint(
+        lists=TAGGED,
+        required=("name", "slug"),
+        unique=(("name",), ("slug",)),
+        defaults={
+            "color": "9e9e9e",
+            "vm_role": True,
+            "description": "",
+            "custom_fields": {},
+            "tags": [],
+        },
+    ),
+    "dcim/devices": endpoint(
+        fks={
+            "device_type": "dcim/device-types",
+            "role": "dcim/device-roles",
+            "site": "dcim/sites",
+            "location": "dcim/locations",
+            "rack": "dcim/racks",
+            "cluster": "virtualization/clusters",
+            "primary_ip4": "ipam/ip-addresses",
+            "primary_ip6": "ipam/ip-addresses",
+            "oob_ip": "ipam/ip-addresses",
+        },
+        lists=TAGGED,
+        choices={"status": DEVICE_STATUS},
+        required=("device_type", "role", "site"),
+        unique=(("site", "name"),),
+        defaults={
+            **COMMON,
+            "name": None,
+            "status": "active",
+            "serial": "",
+            "asset_tag": None,
+            "location": None,
+            "rack": None,
+            "position": None,
+            "face": None,
+            "airflow": None,
+            "platform": None,
+            "tenant": None,
+            "cluster": None,
+            "virtual_chassis": None,
+            "vc_position": None,
+            "primary_ip4": None,
+            "primary_ip6": None,
+            "oob_ip": None,
+            "config_template": None,
+            "local_context_data": None,
+        },
+        brief=("name",),
+        aliases={"device_role": "role"},
+    ),
+    "dcim/interfaces": endpoint(
+        fks={
+            "device": "dcim/devices",
+            "parent": "dcim/interfaces",
+            "lag": "dcim/interfaces",
+            "untagged_vlan": "ipam/vlans",
+        },
+        lists={**TAGGED, "tagged_vlans": "ipam/vlans"},
+        choices={"type": INTERFACE_TYPES, "mode": INTERFACE_MODES, "duplex": DUPLEX},
+        required=("device", "name", "type"),
+        unique=(("device", "name"),),
+        defaults={
+            "description": "",
+            "custom_fields": {},
+            "tags": [],
+            "label": "",
+            "enabled": True,
+            "parent": None,
+            "lag": None,
+            "mtu": None,
+            "mac_address": None,
+            "speed": None,
+            "duplex": None,
+            "wwn": None,
+            "mgmt_only": False,
+            "mode": None,
+            "untagged_vlan": None,
+            "tagged_vlans": [],
+            "mark_connected": False,
+        },
+        brief=("device", "name", "cable"),
+    ),
+    "dcim/console-ports": endpoint(
+        fks={"device": "dcim/devices"},
+        lists=TAGGED,
+        choices={"type": CONSOLE_TYPES, "speed": CONSOLE_SPEEDS},
+        required=("device", "name"),
+        unique=(("device", "name"),),
+        defaults={
+            "description": "",
+            "custom_fields": {},
+            "tags": [],
+            "label": "",
+            "type": None,
+            "speed": None,
+            "mark_connected": False,
+        },
+        brief=("device", "name", "cable"),
+    ),
+    "dcim/console-server-ports": endpoint(
+        fks={"device": "dcim/devices"},
+        lists=TAGGED,
+        choices={"type": CONSOLE_TYPES, "speed": CONSOLE_SPEEDS},
+        required=("device", "name"),
+        unique=(("device", "name"),),
+        defaults={
+            "description": "",
+            "custom_fields": {},
+            "tags": [],
+            "label": "",
+            "type": None,
+            "speed": None,
+            "mark_connected": False,
+        },
+        brief=("device", "name", "cable"),
+    ),
+    "dcim/cables": endpoint(
+        lists=TAGGED,
+        choices={
+            "type": CABLE_TYPES,
+            "status": CABLE_STATUS,
+            "length_unit": LENGTH_UNITS,
+        },
+        required=("a_terminations", "b_terminations"),
+        defaults={
+            **COMMON,
+            "type": "",
+            "status": "connected",
+            "tenant": None,
+            "label": "",
+            "color": "",
+            "length": None,
+            "length_unit": None,
+        },
+        display="label",
+        brief=("label",),
+    ),
+    "ipam/ip-addresses": endpoint(
+        fks={"vrf": "ipam/vrfs", "nat_inside": "ipam/ip-addresses"},
+        lists=TAGGED,
+        choices={"status": IP_STATUS, "role": IP_ROLES},
+        required=("address",),
+        defaults={
+            **COMMON,
+            "vrf": None,
+            "tenant": None,
+            "status": "active",
+            "role": None,
+            "assigned_object_type": None,
+            "assigned_object_id": None,
+            "nat_inside": None,
+            "dns_name": "",
+        },
+        display="address",
+        brief=("address", "family"),
+    ),
+    "ipam/prefixes": endpoint(
+        fks={"site": "dcim/sites", "vrf": "ipam/vrfs", "vlan": "ipam/vlans"},
+        lists=TAGGED,
+        choices={"status": PREFIX_STATUS},
+        required=("prefix",),
+        defaults={
+            **COMMON,
+            "site": None,
+            "vrf": None,
+            "vlan": None,
+            "tenant": None,
+            "status": "active",
+            "role": None,
+            "is_pool": False,
+            "mark_utilized": False,
+        },
+        display="prefix",
+        brief=("prefix", "family"),
+    ),
+    "ipam/vlan-groups": endpoint(
+        lists=TAGGED,
+        required=("name", "slug"),
+        unique=(("name",), ("slug",)),
+        defaults={
+            "description": "",
+            "custom_fields": {},
+            "tags": [],
+            "scope_type": None,
+            "scope_id": None,
+            "min_vid": 1,
+            "max_vid": 4094,
+        },
+    ),
+    "ipam/vlans": endpoint(
+        fks={"site": "dcim/sites", "group": "ipam/vlan-groups"},
+        lists=TAGGED,
+        choices={"status": VLAN_STATUS},
+        required=("vid", "name"),
+        unique=(("group", "vid"), ("group", "name")),
+        defaults={
+            **COMMON,
+            "site": None,
+            "group": None,
+            "tenant": None,
+            "status": "active",
+            "role": None,
+        },
+        brief=("vid", "name"),
+    ),
+    "virtualization/cluster-types": endpoint(
+        lists=TAGGED,
+        required=("name", "slug"),
+        unique=(("name",), ("slug",)),
+        defaults={"description": "", "custom_fields": {}, "tags": []},
+    ),
+    "virtualization/cluster-groups": endpoint(
+        lists=TAGGED,
+        required=("name", "slug"),
+        unique=(("name",), ("slug",)),
+        defaults={"description": "", "custom_fields": {}, "tags": []},
+    ),
+    "virtualization/clusters": endpoint(
+        fks={
+            "type": "virtualization/cluster-types",
+            "group": "virtualization/cluster-groups",
+            "site": "dcim/sites",
+        },
+        lists=TAGGED,
+        choices={"status": SITE_STATUS},
+        required=("name", "type"),
+        unique=(("group", "name"),),
+        defaults={
+            **COMMON,
+            "group": None,
+            "site": None,
+            "status": "active",
+            "tenant": None,
+        },
+        brief=("name",),
+    ),
+    "virtualization/virtual-machines": endpoint(
+        fks={
+            "site": "dcim/sites",
+            "cluster": "virtualization/clusters",
+            "device": "dcim/devices",
+            "role": "dcim/device-roles",
+            "primary_ip4": "ipam/ip-addresses",
+            "primary_ip6": "ipam/ip-addresses",
+        },
+        lists=TAGGED,
+        choices={"status": VM_STATUS},
+        required=("name",),
+        unique=(("cluster", "name"),),
+        defaults={
+            **COMMON,
+            "status": "active",
+            "site": None,
+            "cluster": None,
+            "device": None,
+            "role": None,
+            "tenant": None,
+            "platform": None,
+            "primary_ip4": None,
+            "primary_ip6": None,
+            "vcpus": None,
+            "memory": None,
+            "disk": None,
+        },
+        brief=("name",),
+    ),
+    "virtualization/interfaces": endpoint(
+        fks={
+            "virtual_machine": "virtualization/virtual-machines",
+            "parent": "virtualization/interfaces",
+            "untagged_vlan": "ipam/vlans",
+        },
+        lists={**TAGGED, "tagged_vlans": "ipam/vlans"},
+        choices={"mode": INTERFACE_MODES},
+        required=("virtual_machine", "name"),
+        unique=(("virtual_machine", "name"),),
+        defaults={
+            "description": "",
+            "custom_fields": {},
+            "tags": [],
+            "enabled": True,
+            "parent": None,
+            "mtu": None,
+            "mac_address": None,
+            "mode": None,
+            "untagged_vlan": None,
+            "tagged_vlans": [],
+        },
+        brief=("virtual_machine", "name"),
+    ),
+}
+
+# the objects deleted along with an object, as netbox's on_delete=CASCADE
+CASCADE = {
+    "dcim/devices": (
+        ("dcim/interfaces", "device"),
+        ("dcim/console-ports", "device"),
+        ("dcim/console-server-ports", "device"),
+    ),
+    "virtualization/virtual-machines": (
+        ("virtualization/interfaces", "virtual_machine"),
+    ),
+}
+
+# the related object counts netbox renders, e.g. the device_count of a
+# site: endpoint: {field: ((path of the related objects, their foreign key),
+# ...)}
+COUNTS = {
+    "dcim/sites": {
+        "device_count": (("dcim/devices", "site"),),
+        "rack_count": (("dcim/racks", "site"),),
+        "prefix_count": (("ipam/prefixes", "site"),),
+        "vlan_count": (("ipam/vlans", "site"),),
+        "virtualmachine_count": (("virtualization/virtual-machines", "site"),),
+    },
+    "dcim/locations": {
+        "device_count": (("dcim/devices", "location"),),
+        "rack_count": (("dcim/racks", "location"),),
+    },
+    "dcim/manufacturers": {
+        "devicetype_count": (("dcim/device-types", "manufacturer"),),
+    },
+    "dcim/device-types": {"device_count": (("dcim/devices", "device_type"),)},
+    "dcim/device-roles": {
+        "device_count": (("dcim/devices", "role"),),
+        "virtualmachine_count": (("virtualization/virtual-machines", "role"),),
+    },
+    "ipam/vlan-groups": {"vlan_count": (("ipam/vlans", "group"),)},
+    "virtualization/clusters": {
+        "device_count": (("dcim/devices", "cluster"),),
+        "virtualmachine_count": (("virtualization/virtual-machines", "cluster"),),
+    },
+    "extras/tags": {
+        "tagged_items": tuple(
+            (path, "tags")
+            for path, spec in ENDPOINTS.items()
+            if "tags" in spec["lists"]
+        ),
+    },
+}
+
+# object_type of the objects that can be assigned ip addresses, or cabled
+OBJECT_TYPES = {
+    "dcim.interface": "dcim/interfaces",
+    "dcim.consoleport": "dcim/console-ports",
+    "dcim.consoleserverport": "dcim/console-server-ports",
+    "virtualization.vminterface": "virtualization/interfaces",
+}
+
+# fields by which foreign keys can be filtered, besides their id,
+# e.g. devices?site=site_1, interfaces?device=leaf_1
+FK_FILTER_FIELDS = ("name", "slug", "model")
+
+PATH_RE = re.compile(r"^/api/(?P<path>[a-z-]+/[a-z-]+)/(?:(?P<id>\d+)/)?$")
+
+
+def get_parser():
+    """
+    return an argparse parser object
+    """
+    help_port = f"Port to listen on. Default: {DEFAULT_PORT}."
+    help_latency_ms = "Milliseconds added to every request. Default: 0."
+    help_jitter_ms = "Random milliseconds, up to this, added to every request."
+    help_jitter_ms += " Default: 0."
+    help_per_object_ms = "Milliseconds added per object returned or written."
+    help_per_object_ms += " Default: 0."
+
+    ex_prefix = "Example: "
+    ex_port = f"{ex_prefix} --port 9000"
+    ex_latency_ms = f"{ex_prefix} --latency_ms 20"
+    ex_jitter_ms = f"{ex_prefix} --jitter_ms 10"
+    ex_per_object_ms = f"{ex_prefix} --per_object_ms 0.2"
+
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Serve a netbox-like REST API from memory"
+    )
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+
+    optional.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        required=False,
+        default=DEFAULT_PORT,
+        help=f"{help_port} {ex_port}",
+    )
+    optional.add_argument(
+        "--latency_ms",
+        dest="latency_ms",
+        type=float,
+        required=False,
+        default=0,
+        help=f"{help_latency_ms} {ex_latency_ms}",
+    )
+    optional.add_argument(
+        "--jitter_ms",
+        dest="jitter_ms",
+        type=float,
+        required=False,
+        default=0,
+        help=f"{help_jitter_ms} {ex_jitter_ms}",
+    )
+    optional.add_argument(
+        "--per_object_ms",
+        dest="per_object_ms",
+        type=float,
+        required=False,
+        default=0,
+        help=f"{help_per_object_ms} {ex_per_object_ms}",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parser.parse_args()
+
+
+def log(*args):
+    """
+    simple logger
+    """
+    log_message(args, version=OUR_VERSION)
+
+
+class StubError(Exception):
+    """
+    A request the stub rejects.  status: the http status to answer with,
+    detail: the body of the response
+    """
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def _host(address):
+    """
+    Return the address part of address (e.g. 10.1.1.1 for 10.1.1.1/24)
+    """
+    return str(address).split("/", 1)[0]
+
+
+def _spec(path):
+    """
+    Return the specification of the endpoint at path.  Endpoints not in
+    ENDPOINTS accept any field.
+    """
+    return ENDPOINTS.get(path) or endpoint()
+
+
+class Store:
+    """
+    The objects of the stub, and the operations of the REST API on them.
+    Not thread-safe: NetboxStub serializes calls with a lock.
+
+    base_url: url of the API (e.g. http://127.0.0.1:8002/api), used to
+        render the url of objects
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        # path: {id: raw object}.  Raw objects hold the values of foreign
+        # keys as ids.
+        self.objects = {}
+        self.next_id = {}
+        # path: {field: {key: set of ids}}, see _index()
+        self.indexes = {}
+        # (object_type, object_id): id of the cable terminating there
+        self.cabled = {}
+        self.unknown_filters = {}
+
+    # ---- storage
+
+    def _objects(self, path):
+        return self.objects.setdefault(path, {})
+
+    @staticmethod
+    def _keys(path, field, raw):
+        """
+        Return the index keys of field of raw
+        """
+        value = raw.get(field)
+        if isinstance(value, list):
+            return value
+        if field == "address" and path == "ipam/ip-addresses":
+            return [value, _host(value)]
+        if isinstance(value, dict):
+            return []
+        return [value]
+
+    def _index(self, path, field):
+        """
+        Return the index of field in path, a dictionary of value: set of
+        ids, building it on first use
+        """
+        indexes = self.indexes.setdefault(path, {})
+        if field not in indexes:
+            index = {}
+            for object_id, raw in self._objects(path).items():
+                for key in self._keys(path, field, raw):
+                    index.setdefault(key, set()).add(object_id)
+            indexes[field] = index
+        return indexes[field]
+
+    def _unindex(self, path, raw):
+        for field, index in self.indexes.get(path, {}).items():
+            for key in self._keys(path, field, raw):
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(raw["id"])
+                    if len(ids) == 0:
+                        del index[key]
+
+    def _reindex(self, path, raw):
+        for field, index in self.indexes.get(path, {}).items():
+            for key in self._keys(path, field, raw):
+                index.setdefault(key, set()).add(raw["id"])
+
+    def _find(self, path, field, value):
+        """
+        Return the set of ids of the objects of path whose field is value
+        """
+        return self._index(path, field).get(value, set())
+
+    # ---- rendering
+
+    def url(self, path, object_id):
+        return f"{self.base_url}/{path}/{object_id}/"
+
+    def _display(self, path, raw):
+        spec = _spec(path)
+        value = raw.get(spec["display"])
+        return str(value) if value is not None else f"{path} {raw['id']}"
+
+    def brief(self, path, object_id):
+        """
+        Return the brief rendering of object_id of path, as nested in other
+        objects
+        """
+        raw = self._objects(path).get(object_id)
+        if raw is None:
+            return None
+        spec = _spec(path)
+        result = {
+            "id": object_id,
+            "url": self.url(path, object_id),
+            "display": self._display(path, raw),
+        }
+        for field in spec["brief"]:
+            result[field] = self._render_field(path, spec, field, raw, nested=True)
+        return result
+
+    def _assigned_object(self, raw):
+        object_type = raw.get("assigned_object_type")
+        target = OBJECT_TYPES.get(object_type)
+        if target is None or raw.get("assigned_object_id") is None:
+            return None
+        return self.brief(target, raw["assigned_object_id"])
+
+    def _terminations(self, terminations):
+        result = []
+        for termination in terminations:
+            target = OBJECT_TYPES.get(termination["object_type"])
+            result.append(
+                {
+                    "object_type": termination["object_type"],
+                    "object_id": termination["object_id"],
+                    "object": self.brief(target, termination["object_id"]),
+                }
+            )
+        return result
+
+    def _cable(self, path, raw):
+        for object_type, target in OBJECT_TYPES.items():
+            if target == path:
+                cable_id = self.cabled.get((object_type, raw["id"]))
+                if cable_id is not None:
+                    return self.brief("dcim/cables", cable_id)
+        return None
+
+    def _render_field(self, path, spec, field, raw, nested=False):
+        value = raw.get(field)
+        if field in spec["fks"]:
+            if value is None:
+                return None
+            return self.brief(spec["fks"][field], value)
+        if field in spec["lists"]:
+            target = spec["lists"][field]
+            return [self.brief(target, item) for item in value or []]
+        if field in spec["choices"]:
+            if value is None or value == "":
+                return None if value is None else ""
+            return {"value": value, "label": str(value).title()}
+        if field in ("a_terminations", "b_terminations"):
+            return [] if nested else self._terminations(value or [])
+        if field == "cable":
+            return self._cable(path, raw)
+        if field == "family":
+            address = str(raw.get("address") or raw.get("prefix"))
+            family = 6 if ":" in address else 4
+            return {"value": family, "label": f"IPv{family}"}
+        return value
+
+    def render(self, path, raw, fields=None, exclude=()):
+        """
+        Return raw rendered as netbox's API does.  fields: if set, render
+        only these fields.  exclude: fields not to render.
+        """
+        spec = _spec(path)
+        result = {
+            "id": raw["id"],
+            "url": self.url(path, raw["id"]),
+            "display": self._display(path, raw),
+        }
+        names = [name for name in raw if name != "id"]
+        if path in (
+            "dcim/interfaces",
+            "dcim/console-ports",
+            "dcim/console-server-ports",
+        ):
+            names.append("cable")
+        if path == "ipam/ip-addresses":
+            names.append("family")
+        for name in names:
+            if name in exclude:
+                continue
+            result[name] = self._render_field(path, spec, name, raw)
+        for alias, name in spec["aliases"].items():
+            if name in result:
+                result[alias] = result[name]
+        if path == "ipam/ip-addresses":
+            result["assigned_object"] = self._assigned_object(raw)
+        for name, related in COUNTS.get(path, {}).items():
+            result[name] = sum(
+                len(self._find(child, field, raw["id"])) for child, field in related
+            )
+        result["created"] = raw.get("_created")
+        result["last_updated"] = raw.get("_updated")
+        result.pop("_created", None)
+        result.pop("_updated", None)
+        if fields:
+            result = {name: result.get(name) for name in fields}
+        return result
+
+    # ---- validation
+
+    def _resolve(self, target, value, field):
+        """
+        Return the id of the object of target that value (an id, or a
+        dictionary of attributes, as pynetbox sends records) refers to
+        """
+        if isinstance(value, dict):
+            if "id" in value:
+                value = value["id"]
+            else:
+                ids = None
+                for name, attribute in value.items():
+                    found = self._find(target, name, attribute)
+                    ids = found if ids is None else ids & found
+                if not ids or len(ids) != 1:
+                    raise StubError(
+                        400, {field: [f"Related object not found using {value}."]}
+                    )
+                return next(iter(ids))
+        try:
+            value = int(value)
+        except (TypeError, ValueError) as error:
+            raise StubError(400, {field: [f"Incorrect type: {value}."]}) from error
+        if value not in self._objects(target):
+            raise StubError(
+                400, {field: [f'Invalid pk "{value}" - object does not exist.']}
+            )
+        return value
+
+    def _clean(self, path, payload, existing=None):
+        """
+        Return the raw fields of payload (a dictionary of fields to write),
+        validated
+        """
+        if not isinstance(payload, dict):
+            raise StubError(400, {"non_field_errors": ["Expected a dictionary."]})
+        spec = _spec(path)
+        cleaned = {}
+        for field, value in payload.items():
+            if field in ("id", "url", "display", "created", "last_updated"):
+                continue
+            field = spec["aliases"].get(field, field)
+            if field in spec["fks"]:
+                if value is not None:
+                    value = self._resolve(spec["fks"][field], value, field)
+            elif field in spec["lists"]:
+                target = spec["lists"][field]
+                value = [self._resolve(target, item, field) for item in value or []]
+            elif field in spec["choices"]:
+                if isinstance(value, dict):
+                    value = value.get("value")
+                valid = spec["choices"][field]
+                if value not in (None, "") and value not in valid:
+                    raise StubError(400, {field: [f'"{value}" is not a valid choice.']})
+            elif field in ("a_terminations", "b_terminations"):
+                value = self._clean_terminations(field, value)
+            elif field == "assigned_object_id" and value is not None:
+                value = int(value)
+            cleaned[field] = value
+        if path == "ipam/ip-addresses":
+            self._check_assignment({**(existing or {}), **cleaned})
+        return cleaned
+
+    def _clean_terminations(self, field, terminations):
+        result = []
+        for termination in terminations or []:
+            object_type = termination.get("object_type")
+            target = OBJECT_TYPES.get(object_type)
+            if target is None:
+                raise StubError(400, {field: [f"Invalid object_type {object_type}."]})
+            object_id = self._resolve(target, termination.get("object_id"), field)
+            result.append({"object_type": object_type, "object_id": object_id})
+        return result
+
+    def _check_assignment(self, raw):
+        object_type = raw.get("assigned_object_type")
+        if object_type is None:
+            return
+        target = OBJECT_TYPES.get(object_type)
+        if target is None or raw.get("assigned_object_id") not in self._objects(target):
+            raise StubError(400, {"assigned_object_id": ["Related object not found."]})
+
+    def _check(self, path, raw, creating):
+        """
+        Check the required and unique fields of raw, about to be written
+        """
+        spec = _spec(path)
+        if creating:
+            missing = [
+                field for field in spec["required"] if raw.get(field) in (None, "")
+            ]
+            if missing:
+                raise StubError(
+                    400, {field: ["This field is required."] for field in missing}
+                )
+        for fields in spec["unique"]:
+            if any(raw.get(field) is None for field in fields):
+                continue
+            ids = None
+            for field in fields:
+                found = self._find(path, field, raw.get(field))
+                ids = found if ids is None else ids & found
+            if ids - {raw.get("id")}:
+                names = ", ".join(fields)
+                raise StubError(
+                    400,
+                    {"__all__": [f"{path} with this {names} already exists."]},
+                )
+        if path == "dcim/cables":
+            for field in ("a_terminations", "b_terminations"):
+                for termination in raw.get(field) or []:
+                    key = (termination["object_type"], termination["object_id"])
+                    if self.cabled.get(key, raw.get("id")) != raw.get("id"):
+                        raise StubError(
+                            400,
+                            {field: [f"{key} already has a cable."]},
+                        )
+
+    def _uncable(self, raw):
+        for field in ("a_terminations", "b_terminations"):
+            for termination in raw.get(field) or []:
+                key = (termination["object_type"], termination["object_id"])
+                if self.cabled.get(key) == raw["id"]:
+                    del self.cabled[key]
+
+    def _cable_ends(self, raw):
+        for field in ("a_terminations", "b_terminations"):
+            for termination in raw.get(field) or []:
+                key = (termination["object_type"], termination["object_id"])
+                self.cabled[key] = raw["id"]
+
+    # ---- operations
+
+    def create(self, path, payload):
+        """
+        Create an object of path from payload.  Return the raw object.
+        """
+        spec = _spec(path)
+        raw = {}
+        for field, value in spec["defaults"].items():
+            raw[field] = value.copy() if isinstance(value, (dict, list)) else value
+        raw.update(self._clean(path, payload))
+        self._check(path, raw, creating=True)
+        object_id = self.next_id.get(path, 1)
+        self.next_id[path] = object_id + 1
+        raw["id"] = object_id
+        raw["_created"] = raw["_updated"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._objects(path)[object_id] = raw
+        self._reindex(path, raw)
+        if path == "dcim/cables":
+            self._cable_ends(raw)
+        return raw
+
+    def update(self, path, object_id, payload):
+        """
+        Update object_id of path with payload.  Return the raw object.
+        """
+        raw = self.get(path, object_id)
+        cleaned = self._clean(path, payload, raw)
+        updated = {**raw, **cleaned}
+        self._check(path, updated, creating=False)
+        self._unindex(path, raw)
+        if path == "dcim/cables":
+            self._uncable(raw)
+        raw.update(cleaned)
+        raw["_updated"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._reindex(path, raw)
+        if path == "dcim/cables":
+            self._cable_ends(raw)
+        return raw
+
+    def restore(self, path, original):
+        """
+        Restore an object of path to original, a copy taken before it was
+        updated
+        """
+        raw = self.get(path, original["id"])
+        self._unindex(path, raw)
+        if path == "dcim/cables":
+            self._uncable(raw)
+        raw.clear()
+        raw.update(original)
+        self._reindex(path, raw)
+        if path == "dcim/cables":
+            self._cable_ends(raw)
+
+    def delete(self, path, object_id):
+        """
+        Delete object_id of path, and the objects that cascade from it
+        """
+        raw = self.get(path, object_id)
+        for child_path, field in CASCADE.get(path, ()):
+            for child_id in list(self._find(child_path, field, object_id)):
+                self.delete(child_path, child_id)
+        for object_type, target in OBJECT_TYPES.items():
+            if target == path:
+                cable_id = self.cabled.get((object_type, object_id))
+                if cable_id is not None:
+                    self.delete("dcim/cables", cable_id)
+        if path == "dcim/cables":
+            self._uncable(raw)
+        self._unindex(path, raw)
+        del self._objects(path)[object_id]
+
+    def get(self, path, object_id):
+        """
+        Return the raw object object_id of path
+        """
+        raw = self._objects(path).get(object_id)
+        if raw is None:
+            raise StubError(404, {"detail": "No object matches the given query."})
+        return raw
+
+    # ---- filtering
+
+    def _filter_ids(self, path, field, values):
+        """
+        Return the set of ids of the objects of path that match the filter
+        field=values (any of values), or None if the filter is unknown
+        """
+        spec = _spec(path)
+        ids = set()
+        if field == "id":
+            objects = self._objects(path)
+            return {int(value) for value in values if value.isdigit()} & set(objects)
+        if field == "tag":
+            for value in values:
+                for tag_id in self._find("extras/tags", "slug", value):
+                    ids |= self._find(path, "tags", tag_id)
+            return ids
+        if field == "address" and path == "ipam/ip-addresses":
+            for value in values:
+                ids |= self._find(path, "address", value)
+            return ids
+        if field.endswith("_id") and field[:-3] in {**spec["fks"], **spec["lists"]}:
+            for value in values:
+                key = None if value == "null" else int(value)
+                ids |= self._find(path, field[:-3], key)
+            return ids
+        if field in spec["fks"] or field in spec["lists"]:
+            target = {**spec["fks"], **spec["lists"]}[field]
+            for value in values:
+                if value == "null":
+                    ids |= self._find(path, field, None)
+                    continue
+                for name in FK_FILTER_FIELDS:
+                    for target_id in self._find(target, name, value):
+                        ids |= self._find(path, field, target_id)
+            return ids
+        known = set(spec["defaults"]) | set(spec["required"]) | set(spec["choices"])
+        if path not in ENDPOINTS:
+            known.add(field)
+        if field not in known:
+            return None
+        for value in values:
+            for key in self._filter_keys(value):
+                ids |= self._find(path, field, key)
+        return ids
+
+    @staticmethod
+    def _filter_keys(value):
+        """
+        Return the values a query parameter can match: itself, and as an
+        integer, boolean, or None
+        """
+        keys = [value]
+        if re.match(r"^-?\d+$", value):
+            keys.append(int(value))
+        lower = value.lower()
+        if lower in ("true", "false"):
+            keys.append(lower == "true")
+        if lower == "null":
+            keys.append(None)
+        return keys
+
+    @staticmethod
+    def _compare(lookup, actual, values):
+        if lookup == "n":
+            return str(actual) not in values
+        if lookup in ("ic", "ie", "isw"):
+            actual = str(actual or "").lower()
+            for value in values:
+                value = value.lower()
+                if lookup == "ic" and value in actual:
+                    return True
+                if lookup == "ie" and value == actual:
+                    return True
+                if lookup == "isw" and actual.startswith(value):
+                    return True
+            return False
+        if actual is None:
+            return False
+        try:
+            actual = float(actual)
+            value = float(values[0])
+        except (TypeError, ValueError):
+            return False
+        return {
+            "gt": actual > value,
+            "gte": actual >= value,
+            "lt": actual < value,
+            "lte": actual <= value,
+        }[lookup]
+
+    def select(self, path, params):
+        """
+        Return the list of raw objects of path matching the filters of
+        params (a dictionary of parameter: list of values), in order
+        """
+        objects = self._objects(path)
+        candidates = None
+        lookups = []
+        for name, values in params.items():
+            if name in CONTROL_PARAMS:
+                continue
+            if name == "q":
+                lookups.append((self._display_field(path), "ic", values))
+                continue
+            field, _, lookup = name.partition("__")
+            aliases = _spec(path)["aliases"]
+            if field in aliases or field[:-3] in aliases:
+                field = aliases.get(field) or f"{aliases[field[:-3]]}_id"
+            if lookup:
+                if lookup not in LOOKUPS:
+                    self._unknown(path, name)
+                    continue
+                lookups.append((field, lookup, values))
+                continue
+            ids = self._filter_ids(path, field, values)
+            if ids is None:
+                self._unknown(path, name)
+                continue
+            candidates = ids if candidates is None else candidates & ids
+        if candidates is None:
+            selected = list(objects.values())
+        else:
+            selected = [objects[object_id] for object_id in sorted(candidates)]
+        for field, lookup, values in lookups:
+            selected = [
+                raw for raw in selected if self._compare(lookup, raw.get(field), values)
+            ]
+        ordering = params.get("ordering")
+        if ordering:
+            for field in reversed(ordering[0].split(",")):
+                reverse = field.startswith("-")
+                field = field.lstrip("-")
+                selected.sort(
+                    key=lambda raw, field=field: (
+                        raw.get(field) is None,
+                        str(raw.get(field)),
+                    ),
+                    reverse=reverse,
+                )
+        return selected
+
+    def _display_field(self, path):
+        return _spec(path)["display"]
+
+    def _unknown(self, path, name):
+        key = f"{path}:{name}"
+        self.unknown_filters[key] = self.unknown_filters.get(key, 0) + 1
+
+    def fixtures(self):
+        """
+        Return the graphql_stub fixtures of the objects held: device_list,
+        shaped as netbox 4's GraphQL API returns devices
+        """
+        devices = []
+        for raw in self._objects("dcim/devices").values():
+            device = self.render("dcim/devices", raw)
+            device = json.loads(json.dumps(device), object_hook=_graphql_object)
+            device["device_role"] = device.get("role")
+            devices.append(device)
+        return {"device_list": devices}
+
+
+def _graphql_object(value):
+    """
+    json object_hook: render ids, and choices, as GraphQL does
+    """
+    if "id" in value:
+        value["id"] = str(value["id"])
+    if set(value) == {"value", "label"}:
+        return value["value"]
+    return value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Answer the REST API, and GraphQL, requests from self.server.stub
+    """
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately: without this, each response
+    # waits on the client's delayed ack
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def do_OPTIONS(self):
+        self._dispatch("OPTIONS")
+
+    def _dispatch(self, method):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        split = urlsplit(self.path)
+        params = parse_qs(split.query, keep_blank_values=True)
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = None
+        status, result, objects, endpoint_key = stub.handle(
+            method, split.path, params, payload
+        )
+        stub.delay(objects)
+        data = b"" if result is None else json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("API-Version", NETBOX_VERSION)
+        if result is not None:
+            self.send_header("Content-Type", "application/json")
+            if len(data) >= GZIP_MIN_BYTES and "gzip" in self.headers.get(
+                "Accept-Encoding", ""
+            ):
+                data = gzip.compress(data, compresslevel=1)
+                self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        stub.count(method, endpoint_key, status, len(data))
+
+    def log_message(self, *args):
+        pass
+
+
+class NetboxStub:
+    """
+    netbox REST API stand-in, served from a background thread.
+    See the module docstring.
+
+    port: port to listen on.  Default: any free port
+    latency_ms: milliseconds added to every request
+    jitter_ms: random milliseconds, up to this, added to every request
+    per_object_ms: milliseconds added per object returned or written
+    """
+
+    def __init__(self, port=0, latency_ms=0, jitter_ms=0, per_object_ms=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_object_ms = per_object_ms
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self.store = Store(f"{self.url}api")
+        self._stats = {"requests": {}, "statuses": {}, "bytes": 0}
+
+    @property
+    def url(self):
+        """
+        return the url of the stub, to set as netbox_url
+        """
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    # ---- statistics and latency
+
+    def count(self, method, endpoint_key, status, nbytes):
+        """
+        Record one request in the statistics
+        """
+        key = f"{method} {endpoint_key}"
+        with self._lock:
+            requests = self._stats["requests"]
+            requests[key] = requests.get(key, 0) + 1
+            statuses = self._stats["statuses"]
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            self._stats["bytes"] += nbytes
+
+    def stats(self):
+        """
+        Return the statistics: the number of requests in total, by method,
+        and by method and endpoint (e.g. GET dcim/devices/), by status,
+        the number of bytes sent, and the filters ignored, by endpoint
+        """
+        with self._lock:
+            requests = dict(self._stats["requests"])
+            methods = {}
+            for key, count in requests.items():
+                method = key.split(" ", 1)[0]
+                methods[method] = methods.get(method, 0) + count
+            return {
+                "total": sum(requests.values()),
+                "methods": methods,
+                "endpoints": requests,
+                "statuses": dict(self._stats["statuses"]),
+                "bytes": self._stats["bytes"],
+                "unknown_filters": dict(self.store.unknown_filters),
+            }
+
+    def delay(self, objects):
+        """
+        Sleep the injected latency of a request that returned or wrote
+        objects objects
+        """
+        delay_ms = self.latency_ms + self.per_object_ms * objects
+        if self.jitter_ms:
+            delay_ms += random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    # ---- requests
+
+    def handle(self, method, url_path, params, payload):
+        """
+        Answer a request.  Return a tuple: status, body (or None), the
+        number of objects returned or written, and the endpoint, for the
+        statistics.
+        """
+        if url_path in ("/api/", "/api"):
+            return 200, self._root(), 0, "api/"
+        if url_path == "/api/status/":
+            return 200, {"netbox-version": NETBOX_VERSION}, 0, "status/"
+        if url_path == "/_stub/stats/" or url_path == "/_stub/stats":
+            return 200, self.stats(), 0, "_stub/stats/"
+        if url_path == "/graphql/" and method == "POST":
+            with self._lock:
+                fixtures = self.store.fixtures()
+            query = (payload or {}).get("query", "")
+            result = execute(fixtures, query)
+            return 200, result, len(fixtures["device_list"]), "graphql/"
+        match = PATH_RE.match(url_path)
+        if match is None:
+            return 404, {"detail": "Not found."}, 0, "unknown"
+        path = match.group("path")
+        object_id = match.group("id")
+        endpoint_key = f"{path}/" if object_id is None else f"{path}/{{id}}/"
+        if path == "extras/object-changes" and method == "GET":
+            return 200, self._page([], params, url_path), 0, endpoint_key
+        try:
+            with self._lock:
+                if object_id is not None:
+                    status, result, objects = self._detail(
+                        method, path, int(object_id), payload, params
+                    )
+                else:
+                    status, result, objects = self._list(
+                        method, path, payload, params, url_path
+                    )
+        except StubError as error:
+            return error.status, error.detail, 0, endpoint_key
+        return status, result, objects, endpoint_key
+
+    def _root(self):
+        apps = sorted({path.split("/", 1)[0] for path in ENDPOINTS})
+        return {app: f"{self.url}api/{app}/" for app in apps}
+
+    def _render_params(self, params):
+        fields = None
+        if params.get("fields"):
+            fields = params["fields"][0].split(",")
+        exclude = set()
+        if params.get("exclude"):
+            exclude = set(params["exclude"][0].split(","))
+        brief = params.get("brief", ["false"])[0].lower() in ("1", "true")
+        return fields, exclude, brief
+
+    def _rendered(self, path, raw, params):
+        fields, exclude, brief = self._render_params(params)
+        if brief and not fields:
+            return self.store.brief(path, raw["id"])
+        return self.store.render(path, raw, fields, exclude)
+
+    def _detail(self, method, path, object_id, payload, params):
+        store = self.store
+        if method == "GET":
+            return 200, self._rendered(path, store.get(path, object_id), params), 1
+        if method in ("PATCH", "PUT"):
+            raw = store.update(path, object_id, payload or {})
+            return 200, store.render(path, raw), 1
+        if method == "DELETE":
+            store.delete(path, object_id)
+            return 204, None, 1
+        if method == "OPTIONS":
+            return 200, self._options(path), 0
+        raise StubError(405, {"detail": f'Method "{method}" not allowed.'})
+
+    def _list(self, method, path, payload, params, url_path):
+        store = self.store
+        if method == "GET":
+            selected = store.select(path, params)
+            page = self._page(selected, params, url_path)
+            page["results"] = [
+                self._rendered(path, raw, params) for raw in page["results"]
+            ]
+            return 200, page, len(page["results"])
+        if method == "OPTIONS":
+            return 200, self._options(path), 0
+        if method == "POST":
+            if isinstance(payload, list):
+                raws = self._all_or_nothing(path, [(None, item) for item in payload])
+                return 201, [store.render(path, raw) for raw in raws], len(raws)
+            raw = store.create(path, payload)
+            return 201, store.render(path, raw), 1
+        if method in ("PATCH", "PUT"):
+            if not isinstance(payload, list):
+                raise StubError(400, {"detail": "Expected a list of objects."})
+            operations = []
+            for item in payload:
+                if not isinstance(item, dict) or "id" not in item:
+                    raise StubError(400, {"detail": "Objects must include id."})
+                operations.append((int(item["id"]), item))
+            raws = self._all_or_nothing(path, operations)
+            return 200, [store.render(path, raw) for raw in raws], len(raws)
+        if method == "DELETE":
+            if not isinstance(payload, list):
+                raise StubError(400, {"detail": "Expected a list of objects."})
+            ids = []
+            for item in payload:
+                ids.append(int(item["id"] if isinstance(item, dict) else item))
+            for object_id in ids:
+                store.get(path, object_id)
+            for object_id in ids:
+                store.delete(path, object_id)
+            return 204, None, len(ids)
+        raise StubError(405, {"detail": f'Method "{method}" not allowed.'})
+
+    def _all_or_nothing(self, path, operations):
+        """
+        Run operations, a list of tuples (id, payload): creates of objects
+        of path if id is None, else updates.  Return the raw objects
+        written.  If one fails, undo those that succeeded, as netbox rolls
+        back the transaction of a bulk operation, and raise its error.
+        """
+        store = self.store
+        done = []
+        try:
+            for object_id, payload in operations:
+                if object_id is None:
+                    raw = store.create(path, payload)
+                    done.append((raw["id"], None))
+                else:
+                    original = dict(store.get(path, object_id))
+                    raw = store.update(path, object_id, payload)
+                    done.append((object_id, original))
+        except StubError:
+            for object_id, original in reversed(done):
+                if original is None:
+                    store.delete(path, object_id)
+                else:
+                    store.restore(path, original)
+            raise
+        return [store.get(path, object_id) for object_id, _ in done]
+
+    def _page(self, selected, params, url_path):
+        """
+        Return the page of selected requested by the limit and offset of
+        params, with links to the next and previous pages
+        """
+        try:
+            limit = int(params.get("limit", [DEFAULT_PAGE_SIZE])[0])
+            offset = int(params.get("offset", [0])[0])
+        except ValueError:
+            limit, offset = DEFAULT_PAGE_SIZE, 0
+        if limit <= 0 or limit > MAX_PAGE_SIZE:
+            limit = MAX_PAGE_SIZE
+        count = len(selected)
+
+        def link(page_offset):
+            query = {key: value for key, value in params.items() if key != "offset"}
+            query["limit"] = [str(limit)]
+            query["offset"] = [str(page_offset)]
+            return f"{self.url.rstrip('/')}{url_path}?{urlencode(query, doseq=True)}"
+
+        next_url = link(offset + limit) if offset + limit < count else None
+        previous_url = link(max(offset - limit, 0)) if offset > 0 else None
+        return {
+            "count": count,
+            "next": next_url,
+            "previous": previous_url,
+            "results": selected[offset : offset + limit],
+        }
+
+    @staticmethod
+    def _options(path):
+        spec = _spec(path)
+        post = {}
+        for field, values in spec["choices"].items():
+            post[field] = {
+                "type": "choice",
+                "choices": [
+                    {"value": value, "display_name": str(value).title()}
+                    for value in values
+                ],
+            }
+        return {"name": path, "actions": {"POST": post}}
+
+    # ---- serving
+
+    def serve(self):
+        """
+        serve until stop() is called, or KeyboardInterrupt
+        """
+        self._server.serve_forever()
+
+    def start(self):
+        """
+        start serving from a background thread
+        """
+        self._thread = threading.Thread(target=self.serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        stop serving
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == "__main__":
+    cfg = get_parser()
+    stub = NetboxStub(cfg.port, cfg.latency_ms, cfg.jitter_ms, cfg.per_object_ms)
+    log(f"serving {stub.url}api/")
+    try:
+        stub.serve()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Name: scenarios.py
+Description: Generate YAML inventories of a given size for the benchmarks
+
+generate(entities) returns an inventory, in the format described in
+../example.yml, holding about entities entities in total: a few tags,
+sites, locations, manufacturers, device types, and device roles, plus
+vlan groups and vlans (one vlan per 20 entities), and devices, each with
+a mgmt0 interface holding a mgmt ip address, and an Ethernet1/1
+interface cabled to that of its neighbor.  Most entities are devices,
+interfaces, ip addresses, and cables, since these dominate real
+inventories.
+
+The output is deterministic, so runs against different commits reconcile
+the same inventory.  mutate() changes the serial number of a percentage of
+the devices, to measure incremental runs.
+
+SCENARIOS maps the named scenarios of suite.py to their size.
+
+The generator can also be used in-process:
+
+from scenarios import generate, write_yaml
+
+write_yaml(generate(10000), "10k.yml")
+
+Example Usage:
+
+./scenarios.py --entities 10000 --output 10k.yml
+./scenarios.py --scenario 1k --output 1k.yml --changed 1
+"""
+import argparse
+import math
+import os
+import sys
+import yaml
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB_DIR = os.path.join(REPO_DIR, "lib")
+# so that netbox_tools is found without PYTHONPATH=../lib
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+# pylint: disable=wrong-import-position
+from netbox_tools.logger import log_message
+
+OUR_VERSION = 101
+
+SCENARIOS = {"1k": 1000, "10k": 10000, "100k": 100000}
+
+COLORS = ("blue", "cyan", "green", "indigo", "orange", "purple", "red", "teal")
+MANUFACTURERS = ("cisco", "arista", "juniper")
+MODELS = (
+    ("N9K-C9336C-FX2", "cisco"),
+    ("N9K-C93180YC-EX", "cisco"),
+    ("N9K-C9364D-GX2A", "cisco"),
+    ("DCS-7050SX3-48YC8", "arista"),
+    ("QFX5120-48Y", "juniper"),
+    ("QFX5220-32CD", "juniper"),
+)
+ROLES = ("leaf", "spine", "border", "mgmt")
+TAGS = 10
+DEVICES_PER_SITE = 2000
+LOCATIONS_PER_SITE = 4
+VLANS_PER_GROUP = 4000
+# entities per device: the device, two interfaces, an ip address, and half
+# a cable
+ENTITIES_PER_DEVICE = 4.5
+
+
+def get_parser():
+    """
+    return an argparse parser object
+    """
+    help_entities = "Approximate number of entities in the inventory."
+    help_scenario = f"Named scenario: {', '.join(SCENARIOS)}."
+    help_output = "File to write the inventory to."
+    help_changed = "Percentage of devices whose serial number is changed,"
+    help_changed += " e.g. to measure incremental runs. Default: 0."
+
+    ex_prefix = "Example: "
+    ex_entities = f"{ex_prefix} --entities 10000"
+    ex_scenario = f"{ex_prefix} --scenario 10k"
+    ex_output = f"{ex_prefix} --output 10k.yml"
+    ex_changed = f"{ex_prefix} --changed 1"
+
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Generate a YAML inventory for the benchmarks"
+    )
+
+    mandatory = parser.add_argument_group(title="MANDATORY SCRIPT ARGS")
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+
+    mandatory.add_argument(
+        "--output",
+        dest="output",
+        required=True,
+        help=f"{help_output} {ex_output}",
+    )
+    optional.add_argument(
+        "--entities",
+        dest="entities",
+        type=int,
+        required=False,
+        default=None,
+        help=f"{help_entities} {ex_entities}",
+    )
+    optional.add_argument(
+        "--scenario",
+        dest="scenario",
+        required=False,
+        default=None,
+        choices=SCENARIOS,
+        help=f"{help_scenario} {ex_scenario}",
+    )
+    optional.add_argument(
+        "--changed",
+        dest="changed",
+        type=float,
+        required=False,
+        default=0,
+        help=f"{help_changed} {ex_changed}",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parser.parse_args()
+
+
+def log(*args):
+    """
+    simple logger
+    """
+    log_message(args, version=OUR_VERSION)
+
+
+def device_count(entities):
+    """
+    Return the number of devices in an inventory of about entities entities
+    """
+    fixed = TAGS + len(MANUFACTURERS) + len(MODELS) + len(ROLES)
+    return max(int((entities - fixed - entities // 20) / ENTITIES_PER_DEVICE), 2)
+
+
+def mgmt_ip(index):
+    """
+    Return the mgmt ip address of device index (counting from 0)
+    """
+    return f"10.{index // 62500}.{index // 250 % 250}.{index % 250 + 1}/16"
+
+
+def mac_address(index, port):
+    """
+    Return the mac address of port (0 or 1) of device index
+    """
+    value = f"{index * 2 + port:012x}"
+    return ".".join([f"00{value[2:4]}", value[4:8], value[8:12]])
+
+
+def generate(entities):
+    """
+    Return an inventory of about entities entities (see the module docstring)
+    """
+    devices = device_count(entities)
+    sites = math.ceil(devices / DEVICES_PER_SITE)
+    vlans = entities // 20
+    groups = math.ceil(vlans / VLANS_PER_GROUP)
+    info = {
+        "tags": {},
+        "sites": {},
+        "locations": {},
+        "manufacturers": {},
+        "device_types": {},
+        "device_roles": {},
+        "vlan_groups": {},
+        "vlans": {},
+        "devices": {},
+        "interfaces": {},
+        "ip4_addresses": {},
+        "cables": {},
+    }
+    for index in range(TAGS):
+        name = f"tag_{index}"
+        info["tags"][name] = {"name": name, "color": COLORS[index % len(COLORS)]}
+    for index in range(sites):
+        name = f"site_{index}"
+        info["sites"][name] = {"name": name, "status": "active", "tags": ["tag_0"]}
+        for row in range(LOCATIONS_PER_SITE):
+            location = f"{name}_row_{row}"
+            info["locations"][location] = {"name": location, "site": name}
+    for name in MANUFACTURERS:
+        info["manufacturers"][name] = {"name": name}
+    for model, manufacturer in MODELS:
+        info["device_types"][model] = {
+            "model": model,
+            "manufacturer": manufacturer,
+            "u_height": 1,
+        }
+    for index, name in enumerate(ROLES):
+        info["device_roles"][name] = {
+            "name": name,
+            "color": COLORS[index % len(COLORS)],
+        }
+    for index in range(groups):
+        name = f"vlan_group_{index}"
+        info["vlan_groups"][name] = {"vlan_group": name, "min_vid": 2, "max_vid": 4094}
+    for index in range(vlans):
+        vid = index % VLANS_PER_GROUP + 2
+        info["vlans"][f"vlan_{index}"] = {
+            "vlan_name": f"vlan_{index}",
+            "vid": vid,
+            "group": f"vlan_group_{index // VLANS_PER_GROUP}",
+            "status": "active",
+        }
+    for index in range(devices):
+        name = f"device_{index}"
+        site = f"site_{index // DEVICES_PER_SITE}"
+        mgmt = f"{name}_mgmt0"
+        info["devices"][name] = {
+            "device": name,
+            "interface": mgmt,
+            "role": ROLES[index % len(ROLES)],
+            "type": MODELS[index % len(MODELS)][0],
+            "serial": f"SN{index:08d}",
+            "site": site,
+            "location": f"{site}_row_{index % LOCATIONS_PER_SITE}",
+            "tags": [f"tag_{index % TAGS}"],
+        }
+        info["interfaces"][mgmt] = {
+            "device": name,
+            "interface": "mgmt0",
+            "ip4": mgmt_ip(index),
+            "interface_mode": "access",
+            "interface_type": "1000base-t",
+            "mac_address": mac_address(index, 0),
+            "mgmt_only": True,
+        }
+        info["interfaces"][f"{name}_eth1_1"] = {
+            "device": name,
+            "interface": "Ethernet1/1",
+            "interface_mode": "access",
+            "interface_type": "100gbase-x-qsfp28",
+            "mac_address": mac_address(index, 1),
+            "mgmt_only": False,
+        }
+        info["ip4_addresses"][mgmt_ip(index)] = {
+            "ip4": mgmt_ip(index),
+            "status": "active",
+        }
+        if index % 2 == 1:
+            label = f"device_{index - 1}_eth1_1__{name}_eth1_1"
+            info["cables"][label] = {
+                "label": label,
+                "cable_type": "cat6",
+                "color": "blue",
+                "length": 3,
+                "length_unit": "m",
+                "port_a": f"device_{index - 1}_eth1_1",
+                "port_b": f"{name}_eth1_1",
+                "tags": ["tag_1"],
+            }
+    return info
+
+
+def mutate(info, percent):
+    """
+    Change the serial number of percent (e.g. 1) percent of the devices in
+    info, spread evenly.  Return the number of devices changed.
+    """
+    devices = list(info.get("devices") or {})
+    changed = int(len(devices) * percent / 100)
+    if changed == 0:
+        return 0
+    step = len(devices) / changed
+    for count in range(changed):
+        device = info["devices"][devices[int(count * step)]]
+        device["serial"] = f"{device['serial']}-changed"
+    return changed
+
+
+def entity_counts(info):
+    """
+    Return a dictionary of the number of entities of each type in info
+    """
+    return {key: len(value) for key, value in info.items()}
+
+
+def write_yaml(info, path):
+    """
+    Write info to path, as YAML
+    """
+    with open(path, "w", encoding="utf-8") as handle:
+        yaml.safe_dump(info, handle, default_flow_style=False, sort_keys=False)
+
+
+if __name__ == "__main__":
+    cfg = get_parser()
+    if (cfg.entities is None) == (cfg.scenario is None):
+        log("exiting. Set one of --entities or --scenario.")
+        sys.exit(1)
+    size = cfg.entities if cfg.entities is not None else SCENARIOS[cfg.scenario]
+    inventory = generate(size)
+    if cfg.changed:
+        log(f"changed {mutate(inventory, cfg.changed)} devices.")
+    write_yaml(inventory, cfg.output)
+    counts = entity_counts(inventory)
+    log(f"wrote {sum(counts.values())} entities to {cfg.output}: {counts}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Name: startup.py
+Description: Measure the startup cost of each script in ../scripts
+
+Each script is run with --version, which exits right after the script's
+imports and argument parsing, without contacting netbox.  Each run is
+timed, and python -X importtime is used to attribute import time to
+the top-level modules that were imported.
+
+Scripts that do not parse arguments (and so would contact netbox) are
+skipped.
+
+Run this before and after changes that touch imports, and compare.  For
+example, pynetbox, requests, and ansible should not appear among the
+heaviest imports, since netbox_tools imports them lazily (see
+lib/netbox_tools/lazy.py).
+
+Example Usage:
+
+./startup.py
+./startup.py --repeat 5 --top 3
+./startup.py --scripts '../scripts/device_*.py' --max_ms 300
+./startup.py --json startup.json
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB_DIR = os.path.join(REPO_DIR, "lib")
+# so that netbox_tools is found without PYTHONPATH=../lib
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+# pylint: disable=wrong-import-position
+from netbox_tools.logger import log_message
+
+OUR_VERSION = 101
+
+DEFAULT_SCRIPTS = os.path.join(REPO_DIR, "scripts", "*.py")
+DEFAULT_REPEAT = 3
+DEFAULT_TOP = 1
+
+
+def get_parser():
+    """
+    return an argparse parser object
+    """
+    help_scripts = "Glob matching the scripts to measure."
+    help_scripts += f" Default: {DEFAULT_SCRIPTS}."
+    help_repeat = "Number of runs per script.  The fastest run is reported."
+    help_repeat += f" Default: {DEFAULT_REPEAT}."
+    help_top = "Number of heaviest top-level imports to report per script."
+    help_top += f" Default: {DEFAULT_TOP}."
+    help_max_ms = "Exit with status 1 if any script takes longer than this"
+    help_max_ms += " many milliseconds to start."
+    help_json = "Also write the results to this file, as JSON."
+
+    ex_prefix = "Example: "
+    ex_scripts = f"{ex_prefix} --scripts '../scripts/device_*.py'"
+    ex_repeat = f"{ex_prefix} --repeat 5"
+    ex_top = f"{ex_prefix} --top 3"
+    ex_max_ms = f"{ex_prefix} --max_ms 300"
+    ex_json = f"{ex_prefix} --json startup.json"
+
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Measure the startup cost of each script"
+    )
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+
+    optional.add_argument(
+        "--scripts",
+        dest="scripts",
+        required=False,
+        default=DEFAULT_SCRIPTS,
+        help=f"{help_scripts} {ex_scripts}",
+    )
+    optional.add_argument(
+        "--repeat",
+        dest="repeat",
+        type=int,
+        required=False,
+        default=DEFAULT_REPEAT,
+        help=f"{help_repeat} {ex_repeat}",
+    )
+    optional.add_argument(
+        "--top",
+        dest="top",
+        type=int,
+        required=False,
+        default=DEFAULT_TOP,
+        help=f"{help_top} {ex_top}",
+    )
+    optional.add_argument(
+        "--max_ms",
+        dest="max_ms",
+        type=float,
+        required=False,
+        default=None,
+        help=f"{help_max_ms} {ex_max_ms}",
+    )
+    optional.add_argument(
+        "--json",
+        dest="json",
+        required=False,
+        default=None,
+        help=f"{help_json} {ex_json}",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parser.parse_args()
+
+
+def log(*args):
+    """
+    simple logger
+    """
+    log_message(args, version=OUR_VERSION)
+
+
+def parses_arguments(script):
+    """
+    Return True if script parses its arguments (and so handles --version)
+    """
+    with open(script, "r", encoding="utf-8") as handle:
+        return "argparse" in handle.read()
+
+
+def parse_importtime(stderr):
+    """
+    Parse the output of python -X importtime.
+
+    Return a tuple (total_us, top_level) where total_us is the total time
+    spent importing, in microseconds, and top_level is a dictionary, keyed
+    on top-level module name, of cumulative import time in microseconds.
+    """
+    total_us = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us = int(fields[0])
+        cumulative_us = int(fields[1])
+        name = fields[2].rstrip()
+        total_us += self_us
+        # top-level imports are indented by exactly one space
+        if name.startswith(" ") and not name.startswith("  "):
+            name = name.strip().split(".")[0]
+            top_level[name] = top_level.get(name, 0) + cumulative_us
+    return total_us, top_level
+
+
+def measure(script):
+    """
+    Run script --version cfg.repeat times.
+    Return a dictionary with the fastest run's wall time and import time
+    (in milliseconds), its heaviest top-level imports, and the script's
+    exit status.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (LIB_DIR, env.get("PYTHONPATH")) if path
+    )
+    command = [sys.executable, "-X", "importtime", script, "--version"]
+    best = None
+    for _ in range(max(cfg.repeat, 1)):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            command, env=env, capture_output=True, text=True, check=False
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if best is not None and wall_ms >= best["wall_ms"]:
+            continue
+        total_us, top_level = parse_importtime(completed.stderr)
+        heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)
+        best = {
+            "script": os.path.basename(script),
+            "wall_ms": round(wall_ms, 1),
+            "import_ms": round(total_us / 1000, 1),
+            "heaviest": [
+                [name, round(us / 1000, 1)] for name, us in heaviest[: cfg.top]
+            ],
+            "status": completed.returncode,
+        }
+    return best
+
+
+def print_results(results):
+    """
+    print one row per script, slowest first
+    """
+    fmt = "{:<45} {:>8} {:>9} {:>6}  {}"
+    print(fmt.format("script", "wall_ms", "import_ms", "status", "heaviest imports"))
+    print(fmt.format("-" * 45, "-" * 8, "-" * 9, "-" * 6, "-" * 30))
+    for result in sorted(results, key=lambda item: item["wall_ms"], reverse=True):
+        heaviest = ", ".join(f"{name} {ms}ms" for name, ms in result["heaviest"])
+        print(
+            fmt.format(
+                result["script"],
+                result["wall_ms"],
+                result["import_ms"],
+                result["status"],
+                heaviest,
+            )
+        )
+
+
+cfg = get_parser()
+scripts = sorted(glob.glob(cfg.scripts))
+if len(scripts) == 0:
+    log(f"exiting. No scripts match {cfg.scripts}")
+    sys.exit(1)
+results = []
+for script_path in scripts:
+    if not parses_arguments(script_path):
+        log(f"skipping {os.path.basename(script_path)}. It does not parse arguments.")
+        continue
+    results.append(measure(script_path))
+print_results(results)
+if cfg.json is not None:
+    with open(cfg.json, "w", encoding="utf-8") as json_file:
+        json.dump(results, json_file, indent=4)
+failed = [result for result in results if result["status"] != 0]
+if len(failed) != 0:
+    log(f"WARNING. {len(failed)} scripts exited with non-zero status.")
+if cfg.max_ms is not None:
+    slow = [result for result in results if result["wall_ms"] > cfg.max_ms]
+    if len(slow) != 0:
+        log(f"{len(slow)} scripts took longer than {cfg.max_ms}ms to start.")
+        sys.exit(1)
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Name: suite.py
+Description: Benchmark the scripts of this repository against a local netbox stand-in
+
+For each scenario, an inventory of that size is generated (see
+scenarios.py), a fresh netbox_stub.NetboxStub is started, and the runs of
+RUNS are made against it, in order.  Each run is a script of ../scripts,
+run in its own process through launch.py, with a config.yml pointing at
+the stub.  Credentials come from a credential agent (see
+lib/netbox_tools/credential_agent.py) started by the suite, so no vault
+is needed.
+
+The runs, in order:
+
+- entity_create: entity_create_update_all.py --full, against the empty
+  stub, so every entity is created
+- entity_unchanged: the same again, with nothing to change
+- interface_all, ip_address_all, cable_all: these scripts create the
+  interfaces, and cables, entity_create_update_all.py does not
+- <entity>_all: the other *_create_update_all.py scripts, with nothing
+  to change
+- entity_incremental: entity_create_update_all.py without --full, after
+  the serial number of 1% of the devices is changed (see --changed), so
+  only changed entities are reconciled
+- the print scripts (device_print_filtered.py, device_count.py, etc)
+
+For each run, the suite records:
+
+- status: the script's exit status
+- wall_s: wall time, in seconds
+- peak_rss_mb: peak resident set size of the script's process
+- requests: the requests the stub received during the run, in total, by
+  method, by endpoint (e.g. GET dcim/devices/), and by status
+- errors: the number of responses with status 400 or higher
+- unknown_filters: filters the stub ignored (see netbox_stub.py)
+- stub_cpu_s: CPU time of the suite's process (i.e. the stub) during the
+  run.  If it approaches wall_s, the stub, rather than the script, limits
+  the run.
+- stderr: the last lines the script wrote to stderr, if it failed
+
+Results are printed as a table, and, with --json, written as JSON, along
+with the git commit of the tree, whether it has uncommitted changes, and
+the settings, so that results of different commits can be compared.  With
+--baseline, the change of each run's wall time, peak rss, and request count
+relative to a previous --json file is printed.
+
+Example Usage:
+
+./suite.py --scenarios 1k --json results.json
+./suite.py --scenarios 1k,10k --latency_ms 5 --jitter_ms 5 --json new.json --baseline old.json
+./suite.py --scenarios 1k --runs 'entity_*,device_count'
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+LIB_DIR = os.path.join(REPO_DIR, "lib")
+# so that netbox_tools is found without PYTHONPATH=../lib
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+# pylint: disable=wrong-import-position
+from netbox_tools.credential_agent import CredentialAgent, stop_agent
+from netbox_tools.logger import log_message
+from netbox_stub import NetboxStub
+from scenarios import SCENARIOS, entity_counts, generate, mutate, write_yaml
+
+OUR_VERSION = 101
+
+SCRIPTS_DIR = os.path.join(REPO_DIR, "scripts")
+
+DEFAULT_SCENARIOS = "1k"
+DEFAULT_CHANGED = 1
+DEFAULT_TIMEOUT = 3600
+# lines of stderr kept in the results of failed runs
+STDERR_LINES = 20
+
+# name, script, arguments.  {yaml}, {changed_yaml}, and {state} are replaced
+# with the scenario's inventory, its mutated copy, and the state file of
+# entity_create_update_all.py
+RUNS = (
+    (
+        "entity_create",
+        "entity_create_update_all.py",
+        ("--yaml", "{yaml}", "--full", "--state", "{state}"),
+    ),
+    (
+        "entity_unchanged",
+        "entity_create_update_all.py",
+        ("--yaml", "{yaml}", "--full", "--state", "{state}"),
+    ),
+    ("interface_all", "interface_create_update_all.py", ("--yaml", "{yaml}")),
+    ("ip_address_all", "ip_address_create_update_all.py", ("--yaml", "{yaml}")),
+    ("cable_all", "cable_create_update_all.py", ("--yaml", "{yaml}")),
+    ("tag_all", "tag_create_update_all.py", ("--yaml", "{yaml}")),
+    ("site_all", "site_create_update_all.py", ("--yaml", "{yaml}")),
+    ("location_all", "location_create_update_all.py", ("--yaml", "{yaml}")),
+    ("manufacturer_all", "manufacturer_create_update_all.py", ("--yaml", "{yaml}")),
+    ("device_type_all", "device_type_create_update_all.py", ("--yaml", "{yaml}")),
+    ("role_all", "role_create_update_all.py", ("--yaml", "{yaml}")),
+    ("vlan_group_all", "vlan_group_create_update_all.py", ("--yaml", "{yaml}")),
+    ("vlan_all", "vlan_create_update_all.py", ("--yaml", "{yaml}")),
+    ("device_all", "device_create_update_all.py", ("--yaml", "{yaml}")),
+    (
+        "entity_incremental",
+        "entity_create_update_all.py",
+        ("--yaml", "{changed_yaml}", "--state", "{state}"),
+    ),
+    ("device_print_filtered", "device_print_filtered.py", ("--role", "leaf")),
+    ("device_count", "device_count.py", ("--group_by", "role")),
+    ("interfaces_print", "interfaces_print.py", ()),
+    ("ipam_addresses_print", "ipam_addresses_print.py", ()),
+    ("tags_print", "tags_print.py", ()),
+    ("sites_print", "sites_print.py", ()),
+    ("device_types_print", "device_types_print.py", ()),
+)
+
+
+def get_parser():
+    """
+    return an argparse parser object
+    """
+    help_scenarios = "Comma-separated scenarios to run, among"
+    help_scenarios += f" {', '.join(SCENARIOS)}, or numbers of entities."
+    help_scenarios += f" Default: {DEFAULT_SCENARIOS}."
+    help_runs = "Comma-separated names of the runs to make, or shell-style"
+    help_runs += " patterns matching them.  Runs that create objects later"
+    help_runs += " runs depend on (entity_create, interface_all, cable_all)"
+    help_runs += " are still made, but not reported.  Default: all."
+    help_latency_ms = "Milliseconds the stub adds to every request. Default: 0."
+    help_jitter_ms = "Random milliseconds, up to this, the stub adds to every"
+    help_jitter_ms += " request. Default: 0."
+    help_per_object_ms = "Milliseconds the stub adds per object returned or"
+    help_per_object_ms += " written. Default: 0."
+    help_changed = "Percentage of devices changed before entity_incremental."
+    help_changed += f" Default: {DEFAULT_CHANGED}."
+    help_timeout = "Seconds after which a run is killed."
+    help_timeout += f" Default: {DEFAULT_TIMEOUT}."
+    help_json = "Also write the results to this file, as JSON."
+    help_baseline = "Print the change of each run relative to this file,"
+    help_baseline += " written by a previous --json."
+
+    ex_prefix = "Example: "
+    ex_scenarios = f"{ex_prefix} --scenarios 1k,10k"
+    ex_runs = f"{ex_prefix} --runs 'entity_*,device_count'"
+    ex_latency_ms = f"{ex_prefix} --latency_ms 5"
+    ex_jitter_ms = f"{ex_prefix} --jitter_ms 5"
+    ex_per_object_ms = f"{ex_prefix} --per_object_ms 0.1"
+    ex_changed = f"{ex_prefix} --changed 5"
+    ex_timeout = f"{ex_prefix} --timeout 600"
+    ex_json = f"{ex_prefix} --json results.json"
+    ex_baseline = f"{ex_prefix} --baseline previous.json"
+
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Benchmark the scripts against a local netbox stand-in"
+    )
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+
+    optional.add_argument(
+        "--scenarios",
+        dest="scenarios",
+        required=False,
+        default=DEFAULT_SCENARIOS,
+        help=f"{help_scenarios} {ex_scenarios}",
+    )
+    optional.add_argument(
+        "--runs",
+        dest="runs",
+        required=False,
+        default=None,
+        help=f"{help_runs} {ex_runs}",
+    )
+    optional.add_argument(
+        "--latency_ms",
+        dest="latency_ms",
+        type=float,
+        required=False,
+        default=0,
+        help=f"{help_latency_ms} {ex_latency_ms}",
+    )
+    optional.add_argument(
+        "--jitter_ms",
+        dest="jitter_ms",
+        type=float,
+        required=False,
+        default=0,
+        help=f"{help_jitter_ms} {ex_jitter_ms}",
+    )
+    optional.add_argument(
+        "--per_object_ms",
+        dest="per_object_ms",
+        type=float,
+        required=False,
+        default=0,
+        help=f"{help_per_object_ms} {ex_per_object_ms}",
+    )
+    optional.add_argument(
+        "--changed",
+        dest="changed",
+        type=float,
+        required=False,
+        default=DEFAULT_CHANGED,
+        help=f"{help_changed} {ex_changed}",
+    )
+    optional.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        required=False,
+        default=DEFAULT_TIMEOUT,
+        help=f"{help_timeout} {ex_timeout}",
+    )
+    optional.add_argument(
+        "--json",
+        dest="json",
+        required=False,
+        default=None,
+        help=f"{help_json} {ex_json}",
+    )
+    optional.add_argument(
+        "--baseline",
+        dest="baseline",
+        required=False,
+        default=None,
+        help=f"{help_baseline} {ex_baseline}",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parser.parse_args()
+
+
+def log(*args):
+    """
+    simple logger
+    """
+    log_message(args, version=OUR_VERSION)
+
+
+def scenario_size(scenario):
+    """
+    Return the number of entities of scenario (a name of SCENARIOS, or a
+    number)
+    """
+    if scenario in SCENARIOS:
+        return SCENARIOS[scenario]
+    try:
+        return int(scenario)
+    except ValueError:
+        log(
+            f"exiting. Unknown scenario {scenario}.",
+            f"Expected one of {', '.join(SCENARIOS)}, or a number.",
+        )
+        sys.exit(1)
+
+
+def selected(name):
+    """
+    Return True if the run named name was selected with --runs
+    """
+    if cfg.runs is None:
+        return True
+    patterns = [pattern.strip() for pattern in cfg.runs.split(",")]
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def git_info():
+    """
+    Return the commit of the tree, and whether it has uncommitted changes
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, len(status.strip()) != 0
+
+
+def write_config(path, agent_socket, mirror_file):
+    """
+    Write the config.yml the scripts are run with
+    """
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("vault: /nonexistent\n")
+        handle.write("ssl_verify: False\n")
+        handle.write("disable_insecure_request_warnings: True\n")
+        handle.write(f"credential_agent_socket: {agent_socket}\n")
+        handle.write(f"mirror_file: {mirror_file}\n")
+
+
+def start_agent(url, path):
+    """
+    Start a credential agent serving url, and any token, on path
+    """
+    agent = CredentialAgent({"netbox_url": url, "netbox_token": "0" * 40}, path)
+    agent.bind()
+    threading.Thread(target=agent.serve, daemon=True).start()
+
+
+def request_delta(before, after):
+    """
+    Return the requests the stub received between the statistics before
+    and after (see NetboxStub.stats())
+    """
+
+    def delta(key):
+        return {
+            name: count - before[key].get(name, 0)
+            for name, count in after[key].items()
+            if count != before[key].get(name, 0)
+        }
+
+    statuses = delta("statuses")
+    return {
+        "total": after["total"] - before["total"],
+        "methods": delta("methods"),
+        "endpoints": delta("endpoints"),
+        "statuses": statuses,
+        "errors": sum(
+            count for status, count in statuses.items() if int(status) >= 400
+        ),
+        "unknown_filters": delta("unknown_filters"),
+    }
+
+
+def run_script(stub, config_path, script, args, stderr_path):
+    """
+    Run script with args, through launch.py.  Return its result (see the
+    module docstring).
+    """
+    command = [
+        sys.executable,
+        os.path.join(BENCHMARKS_DIR, "launch.py"),
+        config_path,
+        os.path.join(SCRIPTS_DIR, script),
+        *args,
+    ]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (LIB_DIR, env.get("PYTHONPATH")) if path
+    )
+    before = stub.stats()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    with open(stderr_path, "w", encoding="utf-8") as stderr:
+        process = subprocess.Popen(
+            command, env=env, stdout=subprocess.DEVNULL, stderr=stderr
+        )
+        timer = threading.Timer(cfg.timeout, process.kill)
+        timer.start()
+        try:
+            _, wait_status, usage = os.wait4(process.pid, 0)
+        finally:
+            timer.cancel()
+        process.returncode = os.waitstatus_to_exitcode(wait_status)
+    wall_s = time.perf_counter() - start
+    stub_cpu_s = time.process_time() - cpu_start
+    requests = request_delta(before, stub.stats())
+    # ru_maxrss is in kilobytes on Linux, and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    result = {
+        "status": process.returncode,
+        "wall_s": round(wall_s, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / divisor, 1),
+        "stub_cpu_s": round(stub_cpu_s, 3),
+        "requests": {
+            key: requests[key] for key in ("total", "methods", "endpoints", "statuses")
+        },
+        "errors": requests["errors"],
+        "unknown_filters": requests["unknown_filters"],
+    }
+    if process.returncode != 0:
+        with open(stderr_path, "r", encoding="utf-8", errors="replace") as handle:
+            result["stderr"] = handle.read().splitlines()[-STDERR_LINES:]
+    return result
+
+
+def run_scenario(scenario, work_dir):
+    """
+    Make the runs of RUNS against a fresh stub, on the inventory of
+    scenario.  Return the scenario's results.
+    """
+    size = scenario_size(scenario)
+    info = generate(size)
+    paths = {
+        "yaml": os.path.join(work_dir, f"{scenario}.yml"),
+        "changed_yaml": os.path.join(work_dir, f"{scenario}_changed.yml"),
+        "state": os.path.join(work_dir, f"{scenario}_state.json"),
+    }
+    write_yaml(info, paths["yaml"])
+    counts = entity_counts(info)
+    changed = mutate(info, cfg.changed)
+    write_yaml(info, paths["changed_yaml"])
+    results = {"entities": counts, "changed_devices": changed, "runs": []}
+    config_path = os.path.join(work_dir, f"{scenario}_config.yml")
+    agent_socket = os.path.join(work_dir, "agent", f"{scenario}.sock")
+    stderr_path = os.path.join(work_dir, f"{scenario}_stderr.txt")
+    setup = ("entity_create", "interface_all", "cable_all")
+    with NetboxStub(
+        latency_ms=cfg.latency_ms,
+        jitter_ms=cfg.jitter_ms,
+        per_object_ms=cfg.per_object_ms,
+    ) as stub:
+        start_agent(stub.url, agent_socket)
+        write_config(
+            config_path, agent_socket, os.path.join(work_dir, "mirror.sqlite3")
+        )
+        try:
+            for name, script, args in RUNS:
+                if not selected(name) and name not in setup:
+                    continue
+                log(f"{scenario}: {name}")
+                result = run_script(
+                    stub,
+                    config_path,
+                    script,
+                    [arg.format(**paths) for arg in args],
+                    stderr_path,
+                )
+                if selected(name):
+                    command = " ".join([script, *args])
+                    results["runs"].append({"name": name, "command": command, **result})
+                if result["status"] != 0:
+                    log(f"WARNING. {scenario}: {name} exited with {result['status']}.")
+        finally:
+            stop_agent(agent_socket)
+    return results
+
+
+def load_baseline():
+    """
+    Return the results of --baseline, or None
+    """
+    if cfg.baseline is None:
+        return None
+    try:
+        with open(cfg.baseline, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError) as _general_exception:
+        log(
+            f"exiting. Unable to load {cfg.baseline}.",
+            f"Exception detail: {_general_exception}",
+        )
+        sys.exit(1)
+
+
+def change(value, previous):
+    """
+    Return the change from previous to value, as a percentage string
+    """
+    if previous in (None, 0):
+        return ""
+    return f"{(value - previous) / previous * 100:+.0f}%"
+
+
+def print_results(results, baseline):
+    """
+    print one row per run, per scenario, with its change relative to
+    baseline, if any
+    """
+    fmt = "{:<24} {:>6} {:>9} {:>7} {:>8} {:>9} {:>7} {:>7} {:>7}"
+    for scenario, scenario_results in results["scenarios"].items():
+        entities = sum(scenario_results["entities"].values())
+        print(f"--- scenario {scenario}: {entities} entities ---")
+        print(
+            fmt.format(
+                "run",
+                "status",
+                "wall_s",
+                "rss_mb",
+                "requests",
+                "errors",
+                "d_wall",
+                "d_rss",
+                "d_req",
+            )
+        )
+        previous_runs = {}
+        if baseline is not None:
+            previous = baseline.get("scenarios", {}).get(scenario, {})
+            previous_runs = {run["name"]: run for run in previous.get("runs", [])}
+        for run in scenario_results["runs"]:
+            previous = previous_runs.get(run["name"], {})
+            print(
+                fmt.format(
+                    run["name"],
+                    run["status"],
+                    f"{run['wall_s']:.2f}",
+                    run["peak_rss_mb"],
+                    run["requests"]["total"],
+                    run["errors"],
+                    change(run["wall_s"], previous.get("wall_s")),
+                    change(run["peak_rss_mb"], previous.get("peak_rss_mb")),
+                    change(
+                        run["requests"]["total"],
+                        previous.get("requests", {}).get("total"),
+                    ),
+                )
+            )
+
+
+cfg = get_parser()
+baseline_results = load_baseline()
+commit_id, dirty = git_info()
+suite_results = {
+    "suite_version": OUR_VERSION,
+    "commit": commit_id,
+    "dirty": dirty,
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    "settings": {
+        "latency_ms": cfg.latency_ms,
+        "jitter_ms": cfg.jitter_ms,
+        "per_object_ms": cfg.per_object_ms,
+        "changed": cfg.changed,
+    },
+    "scenarios": {},
+}
+temporary_dir = tempfile.mkdtemp(prefix="netbox_tools_bench_")
+try:
+    for scenario_name in cfg.scenarios.split(","):
+        scenario_name = scenario_name.strip()
+        suite_results["scenarios"][scenario_name] = run_scenario(
+            scenario_name, temporary_dir
+        )
+finally:
+    shutil.rmtree(temporary_dir, ignore_errors=True)
+print_results(suite_results, baseline_results)
+if cfg.json is not None:
+    with open(cfg.json, "w", encoding="utf-8") as json_file:
+        json.dump(suite_results, json_file, indent=4)
+failed = [
+    run["name"]
+    for scenario_results in suite_results["scenarios"].values()
+    for run in scenario_results["runs"]
+    if run["status"] != 0
+]
+if len(failed) != 0:
+    log(f"WARNING. {len(failed)} runs exited with non-zero status: {', '.join(failed)}")
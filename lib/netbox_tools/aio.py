@@ -0,0 +1,471 @@
+"""
+Name: aio.py
+Description: asyncio netbox client, and async counterparts of the entity operations
+
+pynetbox, and the requests session it sends requests with, block the calling
+thread until each response arrives, so the threaded paths of this library
+keep at most one request in flight per thread.  Reconciling tens of
+thousands of objects is I/O-bound, and threads are an expensive way to wait.
+AsyncNetbox sends requests with the asyncio client of httpx instead, so that
+one thread keeps hundreds of requests in flight.  A bounded semaphore caps
+the requests in flight at concurrency.  Coroutines waiting for it hold no
+thread or connection, so any number of operations can be queued, e.g. with
+asyncio.gather().
+
+httpx is an optional dependency, needed only by this module:
+
+pip install httpx
+
+AsyncNetbox reads the url, token, and ssl verification of a netbox instance
+(see common.netbox()), and the retries and timeouts of transport.py
+(http_max_retries, http_backoff_factor, http_connect_timeout,
+http_read_timeout).  As in transport.py, connection errors are retried for
+every method, but 429/502/503/504 responses only for GET and DELETE, so that
+a create is never sent twice.  Retry-After headers are honored.  A request
+waiting to be retried does not hold a slot of the semaphore.  Records are
+returned as DictRecords (see mirror.py), which Bulk and changed_fields()
+accept in place of pynetbox records.
+
+Async counterparts of the entity operations:
+
+- Bulk.async_create_or_update(items, client) and Bulk.async_delete(items,
+  client) process the chunks of items concurrently (see bulk.py)
+- AsyncEntity, inherited by the entity classes (Device, Interface,
+  IpAddress, Cable, etc), adds async_create_or_update(client) and
+  async_delete(client), the counterparts of create_or_update() and delete()
+
+Create/update arguments are still generated synchronously, resolving names
+to ids with the resolver (see resolver.py).  Preload it before running many
+operations, so that these lookups are answered from its cache rather than
+blocking the event loop with a request each.
+
+The synchronous API is unchanged.
+
+Usage:
+
+import asyncio
+from netbox_tools.aio import AsyncNetbox
+from netbox_tools.common import netbox
+from netbox_tools.device import Device
+
+async def main(netbox_obj, device_dicts):
+    async with AsyncNetbox(netbox_obj, concurrency=200) as client:
+        devices = [Device(netbox_obj, device_dict) for device_dict in device_dicts]
+        await asyncio.gather(*[device.async_create_or_update(client) for device in devices])
+
+asyncio.run(main(netbox(), device_dicts))
+"""
+import sys
+from netbox_tools.diff import changed_fields
+from netbox_tools.lazy import lazy_import
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
+
+asyncio = lazy_import("asyncio")
+mirror = lazy_import("netbox_tools.mirror")
+paginator = lazy_import("netbox_tools.paginator")
+transport = lazy_import("netbox_tools.transport")
+
+OUR_VERSION = 100
+
+DEFAULT_CONCURRENCY = 100
+
+# methods retried on 429/502/503/504 responses, see the module docstring
+IDEMPOTENT_METHODS = ("GET", "DELETE")
+
+
+def _log(*args):
+    """
+    simple logger
+    """
+    log_message(args, __name__, OUR_VERSION)
+
+
+def import_httpx():
+    """
+    Return the httpx module.  Exit with error if it is not installed.
+    """
+    try:
+        return lazy_import("httpx")
+    except ModuleNotFoundError:
+        _log(
+            "exiting. The asyncio client (netbox_tools.aio) needs httpx,",
+            "which is not installed.  Install it with: pip install httpx",
+        )
+        sys.exit(1)
+
+
+def _query(filters):
+    """
+    Return filters as query parameters.  Lists are sent as repeated
+    parameters (e.g. name=a&name=b), and booleans as true or false.
+    """
+    params = {}
+    for key, value in filters.items():
+        if isinstance(value, bool):
+            value = str(value).lower()
+        params[key] = value
+    return params
+
+
+class AsyncRequestError(Exception):
+    """
+    netbox rejected a request sent by AsyncNetbox.  str() includes the
+    error detail that netbox returned.
+    """
+
+    def __init__(self, method, url, status, detail):
+        self.status = status
+        super().__init__(
+            f"The request failed with code {status}: {detail} ({method} {url})"
+        )
+
+
+class AsyncNetbox:
+    """
+    asyncio netbox client.  See the module docstring.
+
+    netbox_obj: netbox instance (see common.netbox()) to send requests to
+    concurrency: maximum number of requests in flight
+    config: contents of config.yml, for its transport settings (see
+    transport.py).  Default: the defaults of transport.py.
+    """
+
+    def __init__(self, netbox_obj, concurrency=DEFAULT_CONCURRENCY, config=None):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        self._httpx = import_httpx()
+        self._netbox_obj = netbox_obj
+        self.concurrency = max(concurrency, 1)
+        self.settings = transport.transport_settings(config or {})
+        self._client = None
+        self._semaphore = None
+        self.requests = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def log(self, *args):
+        """
+        simple logger
+        """
+        log_message(args, self._classname, self.lib_version)
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def open(self):
+        """
+        Create the httpx client.  Called from within the event loop that
+        the client's requests are sent from.
+        """
+        httpx = self._httpx
+        self._semaphore = asyncio.BoundedSemaphore(self.concurrency)
+        self._client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Token {self._netbox_obj.token}",
+                "Accept": "application/json",
+            },
+            verify=getattr(self._netbox_obj.http_session, "verify", True),
+            timeout=httpx.Timeout(
+                self.settings["http_read_timeout"],
+                connect=self.settings["http_connect_timeout"],
+            ),
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+
+    async def close(self):
+        """
+        Close the httpx client and its connections
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def endpoint(self, endpoint):
+        """
+        Return the AsyncEndpoint of endpoint, a pynetbox endpoint, e.g.
+        netbox_obj.dcim.devices
+        """
+        return AsyncEndpoint(self, endpoint)
+
+    def _backoff(self, attempt, response=None):
+        """
+        Return the seconds to wait before retry number attempt (from 0) of a
+        request.  response is the response that is retried, if any.
+        """
+        delay = self.settings["http_backoff_factor"] * 2**attempt
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+        return delay
+
+    async def _send(self, method, url, params, payload):
+        """
+        Send one request, once fewer than concurrency are in flight, and
+        return its response
+        """
+        async with self._semaphore:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                return await self._client.request(
+                    method, url, params=params, json=payload
+                )
+            finally:
+                self.in_flight -= 1
+
+    async def request(self, method, url, params=None, payload=None):
+        """
+        Send a request, retrying it as described in the module docstring.
+        Return the decoded JSON body of the response, or None if it has none.
+        Raise AsyncRequestError if netbox rejects the request.
+        """
+        retries = self.settings["http_max_retries"]
+        attempt = 0
+        while True:
+            try:
+                response = await self._send(method, url, params, payload)
+            except (self._httpx.ConnectError, self._httpx.ConnectTimeout):
+                if attempt >= retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if (
+                    response.status_code not in transport.RETRY_STATUS_CODES
+                    or method not in IDEMPOTENT_METHODS
+                    or attempt >= retries
+                ):
+                    break
+                delay = self._backoff(attempt, response)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+        if response.status_code >= 400:
+            raise AsyncRequestError(method, url, response.status_code, response.text)
+        if len(response.content) == 0:
+            return None
+        return response.json()
+
+    def _parent_endpoint(self, parent_type):
+        """
+        Return the AsyncEndpoint of parent_type (device or virtual_machine)
+        """
+        if parent_type == "device":
+            return self.endpoint(self._netbox_obj.dcim.devices)
+        return self.endpoint(self._netbox_obj.virtualization.virtual_machines)
+
+    async def release_primary_ip(self, ip_address, parent_type, parent_name):
+        """
+        asyncio counterpart of device.release_device_primary_ip() and
+        virtual_machine.release_vm_primary_ip().  If ip_address (a record)
+        is assigned to a parent_type (device or virtual_machine) other than
+        parent_name, and is its primary_ip4, clear that primary_ip4.
+        """
+        parent = getattr(ip_address.assigned_object, parent_type, None)
+        if parent is None or parent.name == parent_name:
+            return
+        endpoint = self._parent_endpoint(parent_type)
+        records = await endpoint.filter(id=parent.id)
+        if len(records) == 0 or records[0].primary_ip4 is None:
+            return
+        if records[0].primary_ip4.id != ip_address.id:
+            return
+        await endpoint.update([{"id": parent.id, "primary_ip4": None}])
+        self.log(
+            f"{parent_type}: {parent.name}",
+            f"released primary_ip4 {ip_address.address}",
+        )
+
+    async def set_primary_ip(self, parent_type, parent_name, address_id):
+        """
+        asyncio counterpart of device.set_device_primary_ip() and
+        virtual_machine.set_vm_primary_ip().  Make the ip address with netbox
+        id address_id the primary ip of parent_name, a parent_type (device
+        or virtual_machine), unless it already is.
+        """
+        endpoint = self._parent_endpoint(parent_type)
+        records = await endpoint.filter(name=parent_name)
+        if len(records) != 1:
+            self.log(
+                "exiting.",
+                f"{parent_type} {parent_name} not found in netbox,",
+                "or not unique.",
+            )
+            sys.exit(1)
+        parent = records[0]
+        if parent.primary_ip4 is not None and parent.primary_ip4.id == address_id:
+            self.log(
+                "Nothing to do.",
+                f"{parent_type} {parent_name} primary_ip4 is unchanged.",
+            )
+            return
+        await endpoint.update([{"id": parent.id, "primary_ip4": address_id}])
+        self.log(f"{parent_type}: {parent_name}", f"primary_ip4 {address_id}")
+
+    def print_stats(self):
+        """
+        Print the number of requests sent, retried, and the most in flight
+        """
+        print(f"concurrency     {self.concurrency}")
+        print(f"requests        {self.requests}")
+        print(f"retries         {self.retries}")
+        print(f"peak in flight  {self.peak_in_flight}")
+
+
+class AsyncEndpoint:
+    """
+    asyncio counterpart of a pynetbox endpoint (e.g. netbox_obj.dcim.devices),
+    whose requests are sent by client, an AsyncNetbox.  create(), update(),
+    and delete() take lists, as pynetbox's do for bulk operations.
+
+    client: AsyncNetbox
+    endpoint: pynetbox endpoint
+    """
+
+    def __init__(self, client, endpoint):
+        self.client = client
+        self.name = endpoint.name
+        self.url = f"{endpoint.url}/"
+
+    async def filter(self, **filters):
+        """
+        Return the list of records that match filters, from all pages
+        """
+        params = _query(filters)
+        params.setdefault("limit", paginator.DEFAULT_PAGE_SIZE)
+        url = self.url
+        records = []
+        while url is not None:
+            page = await self.client.request("GET", url, params=params)
+            records += [mirror.DictRecord(values) for values in page["results"]]
+            # the next url includes the query
+            url = page.get("next")
+            params = None
+        return records
+
+    async def create(self, payloads):
+        """
+        Create an object from each of payloads.  Return the list of records
+        created, in the same order.
+        """
+        created = await self.client.request("POST", self.url, payload=payloads)
+        return [mirror.DictRecord(values) for values in created]
+
+    async def update(self, payloads):
+        """
+        Update the objects whose ids are in payloads with their other
+        fields.  Return the list of records updated, in the same order.
+        """
+        updated = await self.client.request("PATCH", self.url, payload=payloads)
+        return [mirror.DictRecord(values) for values in updated]
+
+    async def delete(self, ids):
+        """
+        Delete the objects with the netbox ids in ids
+        """
+        payload = [{"id": object_id} for object_id in ids]
+        await self.client.request("DELETE", self.url, payload=payload)
+        return True
+
+
+class AsyncEntity:
+    """
+    Base class that gives the entity classes async counterparts of their
+    create_or_update() and delete() methods.  These use the properties and
+    methods the classes provide for netbox_tools.bulk.Bulk (endpoint,
+    bulk_filter, bulk_match(), prepare_create_or_update(), etc).
+
+    Classes whose ip address is also made the primary ip of its device or
+    virtual machine (IpAddress, VirtualIpAddress) provide a
+    primary_ip_parent property: the tuple (parent type, parent name), e.g.
+    ("device", "leaf_1").
+    """
+
+    async def _async_record(self, endpoint):
+        """
+        Return the netbox record of this object, or None
+        """
+        for record in await endpoint.filter(**self.bulk_filter):
+            if self.bulk_match(record):
+                return record
+        return None
+
+    async def async_create_or_update(self, client):
+        """
+        asyncio counterpart of create_or_update(), sending requests with
+        client (an AsyncNetbox).  Return the netbox record of the object.
+        """
+        payload = dict(self.prepare_create_or_update())
+        endpoint = client.endpoint(self.endpoint)
+        parent = getattr(self, "primary_ip_parent", None)
+        try:
+            record = await self._async_record(endpoint)
+            changes = changed_fields(payload, record)
+            if record is None:
+                self.log(f"{endpoint.name}: create {self.bulk_filter}")
+                record = (await endpoint.create([payload]))[0]
+            elif len(changes) == 0:
+                self.log(f"Nothing to do. {endpoint.name} {self.bulk_filter}")
+            elif getattr(self, "bulk_recreate", False):
+                self.log(f"{endpoint.name}: recreate {self.bulk_filter}")
+                await endpoint.delete([record.id])
+                record = (await endpoint.create([payload]))[0]
+            else:
+                self.log(
+                    f"{endpoint.name}: update {self.bulk_filter}",
+                    f"fields: {', '.join(sorted(changes))}",
+                )
+                if parent is not None and "assigned_object_id" in changes:
+                    await client.release_primary_ip(record, *parent)
+                changes["id"] = record.id
+                record = (await endpoint.update([changes]))[0]
+            if parent is not None:
+                await client.set_primary_ip(*parent, record.id)
+        except Exception as _general_exception:
+            self.log(
+                f"exiting. Unable to create or update {endpoint.name}",
+                f"{self.bulk_filter}.",
+                f"Exception detail: {_general_exception}",
+            )
+            sys.exit(1)
+        if len(changes) != 0:
+            self.invalidate_resolver()
+        resolver_key = getattr(self, "resolver_key", None)
+        if resolver_key is not None:
+            get_resolver(self.endpoint.api).store(*resolver_key, record.id)
+        return record
+
+    async def async_delete(self, client):
+        """
+        asyncio counterpart of delete(), sending requests with client (an
+        AsyncNetbox)
+        """
+        self.prepare_delete()
+        endpoint = client.endpoint(self.endpoint)
+        try:
+            record = await self._async_record(endpoint)
+            if record is None:
+                self.log(
+                    f"Nothing to do. {endpoint.name} {self.bulk_filter}",
+                    "does not exist in netbox.",
+                )
+                return
+            await endpoint.delete([record.id])
+        except Exception as _general_exception:
+            self.log(
+                f"exiting. Unable to delete {endpoint.name} {self.bulk_filter}.",
+                f"Exception detail: {_general_exception}",
+            )
+            sys.exit(1)
+        self.log(f"{endpoint.name}: delete {self.bulk_filter}")
+        self.invalidate_resolver()
@@ -0,0 +1,542 @@
+"""
+Name: bulk.py
+Description: Bulk create, update, and delete operations on netbox objects
+
+netbox accepts lists of objects on POST, PATCH, and DELETE.  Bulk uses this to
+create, update, or delete many objects of the same type with a handful of
+requests, rather than several requests per object.
+
+Objects are processed in chunks of chunk_size.  For each chunk, Bulk:
+
+1. Validates each object's input and generates its create/update arguments
+2. Retrieves the netbox records for all objects in the chunk with one request
+3. Partitions the chunk into objects to create, objects to update, and
+   objects that are unchanged (see netbox_tools.diff)
+4. Sends one POST for the creates and one PATCH for the updates.  PATCH
+   payloads contain only the fields that changed.
+
+If netbox rejects a bulk request, none of the objects in it are changed.  Bulk
+then retries the objects in that request one at a time, so that each object
+that netbox rejects is reported individually, and the others are applied.
+
+If Bulk is given a concurrent.futures executor, chunks are processed on it in
+parallel.  create_or_update() and delete() return once all chunks are done.
+From asyncio code, await async_create_or_update() and async_delete() instead.
+These process all chunks concurrently, sending their requests with an
+AsyncNetbox client (see netbox_tools.aio), which bounds the requests in flight.
+
+If Bulk is instantiated with dry_run=True, nothing is sent to netbox.  Bulk
+only records what it would have done, which print_plan() prints.
+
+netbox_id(object) returns the id of the netbox record that an object was
+created as, updated, or found unchanged in, once create_or_update() returns.
+
+Objects passed to Bulk must all be instances of the same entity class
+(Device, Interface, Tag, etc), and that class must provide:
+
+endpoint                    property, the netbox endpoint e.g. netbox_obj.dcim.devices
+bulk_filter                 property, dict of filter arguments that select the object
+bulk_match(record)          return True if netbox record is the object
+prepare_create_or_update()  validate input and return create/update arguments
+prepare_delete()            validate input for delete
+invalidate_resolver()       discard cached name to id mappings for the object
+
+Classes may also provide a resolver_key property, the tuple (object_type, key)
+under which netbox_tools.resolver caches the object's id.  After each chunk,
+Bulk stores there the ids of the objects it found or created, so that later
+lookups of these objects (e.g. device_id() when creating interfaces) are
+answered without a request.
+
+Classes whose netbox objects cannot be updated in place (see Cable) also
+provide a bulk_recreate property that returns True.  These objects are
+deleted and recreated instead of updated.
+
+Usage:
+
+import sys
+from netbox_tools.bulk import Bulk
+from netbox_tools.common import netbox, load_yaml
+from netbox_tools.tag import Tag
+
+netbox_obj = netbox()
+info = load_yaml("tags.yml")
+tags = [Tag(netbox_obj, info["tags"][key]) for key in info["tags"]]
+bulk = Bulk(chunk_size=100)
+bulk.create_or_update(tags)
+bulk.print_summary()
+if bulk.failed:
+    sys.exit(1)
+"""
+import threading
+from netbox_tools.diff import changed_fields
+from netbox_tools.lazy import lazy_import
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
+
+asyncio = lazy_import("asyncio")
+
+OUR_VERSION = 108
+
+DEFAULT_CHUNK_SIZE = 100
+
+
+class Bulk:
+    """
+    Bulk create, update, and delete operations on netbox objects
+
+    chunk_size: maximum number of objects sent to netbox per request
+    executor: optional concurrent.futures executor on which to process chunks
+    dry_run: if True, record the plan but send nothing to netbox
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, executor=None, dry_run=False):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        if chunk_size < 1:
+            chunk_size = 1
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self.dry_run = dry_run
+        self._lock = threading.Lock()
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        self.not_found = 0
+        # list of tuples (action, object, changed fields)
+        self.plan = []
+        # list of tuples (object, operation, exception detail)
+        self.failed = []
+        # object: id of its netbox record, see netbox_id()
+        self._netbox_ids = {}
+
+    def log(self, *args):
+        """
+        simple logger
+        """
+        log_message(args, self._classname, self.lib_version)
+
+    def _chunks(self, items):
+        """
+        Yield successive chunk_size lists from items
+        """
+        items = list(items)
+        for index in range(0, len(items), self.chunk_size):
+            yield items[index : index + self.chunk_size]
+
+    def _run(self, method, items):
+        """
+        Call method on each chunk of items, on self.executor if set.
+        Wait for all chunks to complete.
+        """
+        if self.executor is None:
+            for chunk in self._chunks(items):
+                method(chunk)
+            return
+        futures = [self.executor.submit(method, chunk) for chunk in self._chunks(items)]
+        for future in futures:
+            future.result()
+
+    async def _async_run(self, method, items, client):
+        """
+        Await method on each chunk of items concurrently, sending requests
+        with client (an AsyncNetbox).  Return once all chunks are complete.
+        """
+        await asyncio.gather(*[method(chunk, client) for chunk in self._chunks(items)])
+
+    def _count(self, counter, value):
+        """
+        Add value to counter (created, updated, deleted, unchanged, not_found)
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    @staticmethod
+    def _lookup_filters(chunk):
+        """
+        Return the filter arguments that select all objects in chunk
+        """
+        filters = {}
+        for item in chunk:
+            for key, value in item.bulk_filter.items():
+                filters.setdefault(key, [])
+                if value not in filters[key]:
+                    filters[key].append(value)
+        return filters
+
+    @classmethod
+    def _lookup(cls, chunk):
+        """
+        Retrieve the netbox records for all objects in chunk with one request.
+        Return a list, in the same order as chunk, containing each object's
+        netbox record, or None if the object does not exist in netbox.
+        """
+        records = list(chunk[0].endpoint.filter(**cls._lookup_filters(chunk)))
+        return cls._match(chunk, records)
+
+    @classmethod
+    async def _async_lookup(cls, chunk, endpoint):
+        """
+        asyncio counterpart of _lookup(), where endpoint is the AsyncEndpoint
+        of the objects in chunk
+        """
+        records = await endpoint.filter(**cls._lookup_filters(chunk))
+        return cls._match(chunk, records)
+
+    @staticmethod
+    def _match(chunk, records):
+        """
+        Return a list, in the same order as chunk, containing the record in
+        records of each object in chunk, or None
+        """
+        matches = []
+        for item in chunk:
+            match = None
+            for record in records:
+                if item.bulk_match(record):
+                    match = record
+                    break
+            matches.append(match)
+        return matches
+
+    def _submit(self, operation, method, pairs):
+        """
+        Send payloads to netbox with method, in a single request.
+
+        operation: one of create, update, delete.  Used in log messages.
+        method: the endpoint method (create, update, delete) to call
+        pairs: list of tuples (object, payload)
+
+        If the request fails, retry each payload individually, recording
+        each object that netbox rejects in self.failed.
+
+        Return the list of objects that were successfully processed.
+        """
+        if len(pairs) == 0:
+            return []
+        if self.dry_run:
+            return [item for item, _ in pairs]
+        try:
+            result = method([payload for _, payload in pairs])
+            return self._submitted(operation, pairs, result)
+        except Exception as _general_exception:
+            if not self._retry_each(operation, pairs, _general_exception):
+                return []
+        succeeded = []
+        for item, payload in pairs:
+            try:
+                result = method([payload])
+                succeeded.extend(self._submitted(operation, [(item, payload)], result))
+            except Exception as _general_exception:
+                self._record_failure(item, operation, _general_exception)
+        return succeeded
+
+    async def _async_submit(self, operation, method, pairs):
+        """
+        asyncio counterpart of _submit(), where method is a coroutine
+        function of an AsyncEndpoint
+        """
+        if len(pairs) == 0:
+            return []
+        if self.dry_run:
+            return [item for item, _ in pairs]
+        try:
+            result = await method([payload for _, payload in pairs])
+            return self._submitted(operation, pairs, result)
+        except Exception as _general_exception:
+            if not self._retry_each(operation, pairs, _general_exception):
+                return []
+        succeeded = []
+        for item, payload in pairs:
+            try:
+                result = await method([payload])
+                succeeded.extend(self._submitted(operation, [(item, payload)], result))
+            except Exception as _general_exception:
+                self._record_failure(item, operation, _general_exception)
+        return succeeded
+
+    def _submitted(self, operation, pairs, result):
+        """
+        Record the ids of created objects, given result, the response to the
+        request that sent pairs.  Return the objects in pairs.
+        """
+        if operation == "create":
+            self._record_ids([item for item, _ in pairs], result)
+        return [item for item, _ in pairs]
+
+    def _retry_each(self, operation, pairs, error):
+        """
+        Called when the request that sent pairs failed with error.  Return
+        True if the objects in pairs are to be retried individually, or, if
+        there is only one, record its failure and return False.
+        """
+        if len(pairs) == 1:
+            self._record_failure(pairs[0][0], operation, error)
+            return False
+        self.log(
+            f"WARNING. Bulk {operation} of {len(pairs)} objects failed.",
+            "Retrying each object individually.",
+            f"Exception detail: {error}",
+        )
+        return True
+
+    def _record_ids(self, items, records):
+        """
+        Record the ids of records, the netbox records created for items
+        (in the same order)
+        """
+        if not isinstance(records, list) or len(records) != len(items):
+            return
+        with self._lock:
+            for item, record in zip(items, records):
+                self._netbox_ids[item] = getattr(record, "id", None)
+
+    def _store_ids(self, endpoint, chunk):
+        """
+        Store the ids of the objects in chunk that were found or created in
+        the resolver of the netbox instance that endpoint belongs to.
+        """
+        resolver = get_resolver(endpoint.api)
+        for item in chunk:
+            resolver_key = getattr(item, "resolver_key", None)
+            netbox_id = self.netbox_id(item)
+            if resolver_key is None or netbox_id is None:
+                continue
+            resolver.store(*resolver_key, netbox_id)
+
+    def netbox_id(self, item):
+        """
+        Return the id of the netbox record that item was created as, updated,
+        or found unchanged in, or None if item was not processed, failed, or
+        (in dry_run mode) would have been created.
+        """
+        with self._lock:
+            return self._netbox_ids.get(item)
+
+    def _record_failure(self, item, operation, error):
+        """
+        Log, and record in self.failed, an object that netbox rejected
+        """
+        self.log(
+            f"ERROR. Unable to {operation} {item.__class__.__name__}",
+            f"{item.bulk_filter}.",
+            f"Exception detail: {error}",
+        )
+        with self._lock:
+            self.failed.append((item, operation, f"{error}"))
+
+    def create_or_update(self, items):
+        """
+        Create objects in items that do not exist in netbox, and update those
+        that do and differ from items.
+        """
+        self._run(self._create_or_update_chunk, items)
+
+    async def async_create_or_update(self, items, client):
+        """
+        asyncio counterpart of create_or_update(), whose chunks are processed
+        concurrently, sending requests with client (an AsyncNetbox)
+        """
+        await self._async_run(self._async_create_or_update_chunk, items, client)
+
+    def _create_or_update_chunk(self, chunk):
+        """
+        Create or update the objects in chunk
+        """
+        endpoint = chunk[0].endpoint
+        payloads = [dict(item.prepare_create_or_update()) for item in chunk]
+        partition = self._partition(chunk, payloads, self._lookup(chunk))
+        creates, updates, recreates, unchanged = partition
+        if len(recreates) != 0:
+            deleted = self._submit(
+                "delete",
+                endpoint.delete,
+                [(item, record.id) for item, _, record in recreates],
+            )
+            for item, payload, _ in recreates:
+                if item in deleted:
+                    creates.append((item, payload))
+        self._applied("created", self._submit("create", endpoint.create, creates))
+        self._applied("updated", self._submit("update", endpoint.update, updates))
+        self._store_ids(endpoint, chunk)
+        self._log_chunk(endpoint, creates, updates, recreates, unchanged)
+
+    async def _async_create_or_update_chunk(self, chunk, client):
+        """
+        asyncio counterpart of _create_or_update_chunk()
+        """
+        endpoint = chunk[0].endpoint
+        async_endpoint = client.endpoint(endpoint)
+        payloads = [dict(item.prepare_create_or_update()) for item in chunk]
+        records = await self._async_lookup(chunk, async_endpoint)
+        partition = self._partition(chunk, payloads, records)
+        creates, updates, recreates, unchanged = partition
+        if len(recreates) != 0:
+            deleted = await self._async_submit(
+                "delete",
+                async_endpoint.delete,
+                [(item, record.id) for item, _, record in recreates],
+            )
+            for item, payload, _ in recreates:
+                if item in deleted:
+                    creates.append((item, payload))
+        succeeded = await self._async_submit("create", async_endpoint.create, creates)
+        self._applied("created", succeeded)
+        succeeded = await self._async_submit("update", async_endpoint.update, updates)
+        self._applied("updated", succeeded)
+        self._store_ids(endpoint, chunk)
+        self._log_chunk(endpoint, creates, updates, recreates, unchanged)
+
+    def _partition(self, chunk, payloads, records):
+        """
+        Given the create/update arguments (payloads) and netbox records
+        (records, see _lookup()) of the objects in chunk, return a tuple of
+        the list of tuples (object, payload) to create, the list of tuples
+        (object, changed fields) to update, the list of tuples (object,
+        payload, record) to recreate, and the number of unchanged objects.
+        Record them all in the plan.
+        """
+        creates = []
+        updates = []
+        recreates = []
+        unchanged = 0
+        for item, payload, record in zip(chunk, payloads, records):
+            if record is None:
+                creates.append((item, payload))
+                self._add_plan("create", item, sorted(payload))
+                continue
+            if not getattr(item, "bulk_recreate", False):
+                self._record_ids([item], [record])
+            changes = changed_fields(payload, record)
+            if len(changes) == 0:
+                unchanged += 1
+                self._add_plan("unchanged", item, [])
+            elif getattr(item, "bulk_recreate", False):
+                recreates.append((item, payload, record))
+                self._add_plan("recreate", item, sorted(changes))
+            else:
+                self._add_plan("update", item, sorted(changes))
+                changes["id"] = record.id
+                updates.append((item, changes))
+        self._count("unchanged", unchanged)
+        return creates, updates, recreates, unchanged
+
+    def _applied(self, counter, items):
+        """
+        Add the number of items, the objects sent to netbox successfully,
+        to counter (created, updated, deleted), and discard their cached ids
+        """
+        self._count(counter, len(items))
+        for item in items:
+            item.invalidate_resolver()
+
+    def _log_chunk(self, endpoint, creates, updates, recreates, unchanged):
+        """
+        Log the number of objects of a chunk to create, update, and recreate
+        (see _partition()), and the number unchanged
+        """
+        self.log(
+            f"{endpoint.name}: {len(creates)} to create,",
+            f"{len(updates)} to update,",
+            f"{len(recreates)} to recreate,",
+            f"{unchanged} unchanged.",
+        )
+
+    def delete(self, items):
+        """
+        Delete objects in items that exist in netbox.
+        """
+        self._run(self._delete_chunk, items)
+
+    async def async_delete(self, items, client):
+        """
+        asyncio counterpart of delete(), whose chunks are processed
+        concurrently, sending requests with client (an AsyncNetbox)
+        """
+        await self._async_run(self._async_delete_chunk, items, client)
+
+    def _delete_chunk(self, chunk):
+        """
+        Delete the objects in chunk that exist in netbox
+        """
+        endpoint = chunk[0].endpoint
+        for item in chunk:
+            item.prepare_delete()
+        deletes = self._deletes(chunk, self._lookup(chunk))
+        self._applied("deleted", self._submit("delete", endpoint.delete, deletes))
+        self.log(f"{endpoint.name}: {len(deletes)} to delete.")
+
+    async def _async_delete_chunk(self, chunk, client):
+        """
+        asyncio counterpart of _delete_chunk()
+        """
+        endpoint = chunk[0].endpoint
+        async_endpoint = client.endpoint(endpoint)
+        for item in chunk:
+            item.prepare_delete()
+        records = await self._async_lookup(chunk, async_endpoint)
+        deletes = self._deletes(chunk, records)
+        succeeded = await self._async_submit("delete", async_endpoint.delete, deletes)
+        self._applied("deleted", succeeded)
+        self.log(f"{endpoint.name}: {len(deletes)} to delete.")
+
+    def _deletes(self, chunk, records):
+        """
+        Given the netbox records (records, see _lookup()) of the objects in
+        chunk, return the list of tuples (object, record id) to delete.
+        Count the objects that do not exist in netbox, and record the others
+        in the plan.
+        """
+        deletes = []
+        for item, record in zip(chunk, records):
+            if record is None:
+                self.log(
+                    f"Nothing to do. {item.__class__.__name__} {item.bulk_filter}",
+                    "does not exist in netbox.",
+                )
+                self._count("not_found", 1)
+                continue
+            deletes.append((item, record.id))
+            self._add_plan("delete", item, [])
+        return deletes
+
+    def _add_plan(self, action, item, fields):
+        """
+        Record in self.plan that action (create, update, recreate, unchanged,
+        delete) applies to item.  fields is the list of fields that action
+        changes.
+        """
+        with self._lock:
+            self.plan.append((action, item, fields))
+
+    def print_plan(self):
+        """
+        Print the objects to create, update, recreate, or delete, with the
+        fields that would change.  Unchanged objects are counted rather than
+        listed.
+        """
+        unchanged = 0
+        for action, item, fields in self.plan:
+            if action == "unchanged":
+                unchanged += 1
+                continue
+            line = f"{action:<10} {item.endpoint.name:<22} {item.bulk_filter}"
+            if action in ("update", "recreate"):
+                line += f" fields: {', '.join(fields)}"
+            print(line)
+        print(f"{'unchanged':<10} {unchanged} objects")
+
+    def print_summary(self):
+        """
+        Print the number of objects created, updated, deleted, unchanged,
+        and failed.  In dry_run mode, these are the numbers that would have
+        been created, updated, etc.
+        """
+        prefix = ""
+        if self.dry_run:
+            prefix = "dry run, no changes sent to netbox. "
+        self.log(
+            f"{prefix}created {self.created}, updated {self.updated},",
+            f"deleted {self.deleted}, unchanged {self.unchanged},",
+            f"not found {self.not_found}, failed {len(self.failed)}",
+        )
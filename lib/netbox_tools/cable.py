@@ -2,23 +2,30 @@
 Name: cable.py
 Description: create, update, and delete operations on netbox cable
 """
-from inspect import stack
 import sys
-from pynetbox import RequestError
-from netbox_tools.common import interface_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.choices import get_choices
+from netbox_tools.common import NOT_FETCHED, interface_id
 from netbox_tools.common import tag_id
 from netbox_tools.colors import color_to_rgb
+from netbox_tools.diff import changed_fields
+from netbox_tools.lazy import lazy_import
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 105
+pynetbox = lazy_import("pynetbox")
 
+OUR_VERSION = 117
 
-class Cable:
+
+class Cable(AsyncEntity):
     """
     create, update, and delete operations on netbox dcim.cable
     """
 
     def __init__(self, netbox_obj, info):
         self._netbox_obj = netbox_obj
+        self._cable_object = NOT_FETCHED
         self._info = info
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
@@ -33,9 +40,7 @@ class Cable:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _populate_valid_port_types(self):
         self._valid_port_types = set()
@@ -92,11 +97,7 @@ class Cable:
         to validate caller's input, and 2) provide caller a list of valid choices
         if they provide invalid input.
         """
-        self.valid_choices = {}
-        choices_dict = self._netbox_obj.dcim.cables.choices()
-        for item in choices_dict:
-            valid_values = choices_dict[item]
-            self.valid_choices[item] = [item["value"] for item in valid_values]
+        self.valid_choices = get_choices(self._netbox_obj, "dcim", "cables")
 
     def _validate_keys_delete(self):
         """
@@ -274,6 +275,23 @@ class Cable:
         self._set_b_terminations()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox cable object so that the next access
+        to cable_object retrieves it from netbox.  Called after each write.
+        """
+        self._cable_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this cable so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("cable", self.label)
+        self.refresh()
+
     def create(self):
         """
         create a cable
@@ -281,7 +299,7 @@ class Cable:
         self.log(f"{self.label}")
         try:
             self._netbox_obj.dcim.cables.create(self._args)
-        except RequestError as request_error:
+        except pynetbox.RequestError as request_error:
             self.log(
                 f"exiting. RequestError Unable to create Cable {self.label}.",
                 f"Exception detail: {request_error}",
@@ -293,6 +311,8 @@ class Cable:
                 f"Exception detail: {general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     # TODO: remove when pynetbox issue 491 is fixed
     # https://github.com/netbox-community/pynetbox/issues/491
@@ -309,10 +329,14 @@ class Cable:
         the change log will only ever have one entry, and journel entries will
         be deleted.
         """
+        changes = changed_fields(self._args, self.cable_object)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. cable {self.label} is unchanged.")
+            return
         self.log(f"Cable.update: {self.label} cable_id {self.cable_id}")
         try:
             self.cable_object.delete()
-        except RequestError as request_error:
+        except pynetbox.RequestError as request_error:
             self.log(
                 f"exiting. Unable to delete Cable {self.label} prior to updating.",
                 f"Exception detail (RequestError): {request_error}",
@@ -327,7 +351,7 @@ class Cable:
 
         try:
             self._netbox_obj.dcim.cables.create(self._args)
-        except RequestError as request_error:
+        except pynetbox.RequestError as request_error:
             self.log(
                 f"exiting. Unable to update Cable {self.label}.",
                 f"Exception detail (RequestError): {request_error}",
@@ -339,6 +363,8 @@ class Cable:
                 f"Exception detail: {general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     # TODO: uncomment when pynetbox issue 491 is fixed
     # https://github.com/netbox-community/pynetbox/issues/491
@@ -363,7 +389,7 @@ class Cable:
             return
         try:
             self.cable_object.delete()
-        except RequestError as request_error:
+        except pynetbox.RequestError as request_error:
             self.log(
                 f"exiting. Unable to delete Cable {self.label}.",
                 f"Exception detail (RequestError): {request_error}",
@@ -375,6 +401,29 @@ class Cable:
                 f"Exception detail: {general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this cable
+        """
+        return record.label == self.label
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_or_update()
+        self._generate_args_create_or_update()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_delete()
 
     def create_or_update(self):
         """
@@ -387,6 +436,38 @@ class Cable:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for cables
+        """
+        return self._netbox_obj.dcim.cables
+
+    @property
+    def bulk_recreate(self):
+        """
+        Return True to tell netbox_tools.bulk.Bulk to delete and recreate
+        existing cables, rather than update them.  See update().
+        """
+        return True
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this cable.
+        netbox_tools.bulk.Bulk merges these to retrieve many cables per request.
+        """
+        return {"label": self.label}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this cable's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the cable.
+        """
+        return ("cable", self.label)
+
     @property
     def color(self):
         """
@@ -417,7 +498,10 @@ class Cable:
         """
         return a cable object by searching for the cable's label
         """
-        return self._netbox_obj.dcim.cables.get(label=self.label)
+        if self._cable_object is not NOT_FETCHED:
+            return self._cable_object
+        self._cable_object = self._netbox_obj.dcim.cables.get(label=self.label)
+        return self._cable_object
 
     @property
     def cable_id(self):
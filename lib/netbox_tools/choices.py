@@ -0,0 +1,215 @@
+"""
+Name: choices.py
+Description: Process-wide registry of netbox endpoint choices
+
+The entity classes validate caller input (cable type, interface type, vlan
+status, etc) against the choices netbox reports for the corresponding
+endpoint.  Retrieving these costs an OPTIONS request.  Rather than sending
+one per object instance, get_choices() retrieves them once per endpoint
+per netbox instance, and returns the same result to every caller.  Threads
+that ask for an endpoint's choices while they are being retrieved wait for,
+and reuse, that result.  Retrieval of different endpoints proceeds in parallel.
+
+Optionally, choices can also be persisted to disk so that they survive
+across script invocations.  To enable this, add the following to config.yml
+
+choices_cache_file: '/path/to/netbox_choices.json'
+choices_cache_ttl: 86400   # seconds, optional, default is 86400
+
+Entries in the disk cache are keyed on the netbox url and netbox version, so
+upgrading netbox invalidates them.  The netbox version is also kept in the
+disk cache, with the same ttl, so that a script whose choices are all in the
+disk cache need not ask netbox for its version.  Hence, after upgrading
+netbox, choices cached before the upgrade may be used for up to ttl seconds
+(delete the cache file to avoid this).
+
+Usage:
+
+from netbox_tools.choices import get_choices
+from netbox_tools.common import netbox
+
+netbox_instance = netbox()
+valid_choices = get_choices(netbox_instance, "dcim", "interfaces")
+print(valid_choices["type"])
+"""
+import json
+import os
+import threading
+import time
+from netbox_tools.common import netbox_version
+from netbox_tools.config.netbox_config import LoadConfig
+from netbox_tools.logger import log_message
+
+OUR_VERSION = 102
+
+DEFAULT_TTL = 86400
+
+_registry = {}
+# key -> threading.Event, for keys whose choices are being retrieved
+_in_flight = {}
+_registry_lock = threading.Lock()
+# serializes updates of the disk cache by threads of this process
+_disk_lock = threading.Lock()
+
+
+def get_choices(netbox_instance, app, endpoint):
+    """
+    Return a dictionary, keyed on field name, whose values are lists of the
+    valid values for that field on netbox endpoint app.endpoint
+    e.g. get_choices(netbox_instance, "ipam", "vlans")["status"]
+
+    The returned dictionary is shared between all callers and must not be
+    modified.
+    """
+    key = (netbox_instance.base_url, f"{app}.{endpoint}")
+    while True:
+        with _registry_lock:
+            if key in _registry:
+                return _registry[key]
+            event = _in_flight.get(key)
+            if event is None:
+                event = threading.Event()
+                _in_flight[key] = event
+                break
+        # another thread is retrieving these choices.  If it fails, the
+        # next pass through the loop retrieves them in this thread.
+        event.wait()
+    try:
+        valid_choices = _load_disk_cache(netbox_instance, key)
+        if valid_choices is None:
+            choices_dict = getattr(getattr(netbox_instance, app), endpoint).choices()
+            valid_choices = {}
+            for item in choices_dict:
+                valid_values = choices_dict[item]
+                valid_choices[item] = [item["value"] for item in valid_values]
+            _save_disk_cache(netbox_instance, key, valid_choices)
+        with _registry_lock:
+            _registry[key] = valid_choices
+        return valid_choices
+    finally:
+        with _registry_lock:
+            _in_flight.pop(key, None)
+        event.set()
+
+
+def clear_choices():
+    """
+    Discard all choices held in the in-memory registry.
+    The disk cache, if any, is left untouched.
+    """
+    with _registry_lock:
+        _registry.clear()
+
+
+def _cache_settings():
+    """
+    Return a tuple (cache_file, ttl) from config.yml.
+    cache_file is None if disk caching is not configured.
+    """
+    cfg = LoadConfig()
+    cache_file = cfg.config.get("choices_cache_file")
+    ttl = cfg.config.get("choices_cache_ttl", DEFAULT_TTL)
+    return cache_file, ttl
+
+
+def _disk_key(key, version):
+    """
+    Return the key under which choices for key are stored in the disk cache
+    """
+    base_url, endpoint = key
+    return f"{base_url}|{version}|{endpoint}"
+
+
+def _disk_version(netbox_instance, contents, ttl):
+    """
+    Return the version of netbox_instance, avoiding a request to netbox if
+    possible.  Use, in order of preference, the version already retrieved
+    for netbox_instance, the version in the disk cache contents if it is
+    fresh, or the version reported by netbox.
+    """
+    version = getattr(netbox_instance, "netbox_tools_version", None)
+    if version is not None:
+        return version
+    entry = contents.get(f"{netbox_instance.base_url}|version")
+    if entry is not None and time.time() - entry.get("timestamp", 0) <= ttl:
+        return entry.get("version")
+    return netbox_version(netbox_instance)
+
+
+def _log(*args):
+    """
+    simple logger
+    """
+    log_message(args, __name__, OUR_VERSION)
+
+
+def _read_cache_file(cache_file):
+    """
+    Return the contents of cache_file, or an empty dictionary if cache_file
+    does not exist or cannot be parsed.
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as _general_exception:
+        _log(
+            f"WARNING. Ignoring unreadable choices cache {cache_file}.",
+            f"Exception detail: {_general_exception}",
+        )
+        return {}
+
+
+def _load_disk_cache(netbox_instance, key):
+    """
+    Return the choices for key from the disk cache, if configured and fresh.
+    Otherwise, return None.
+    """
+    cache_file, ttl = _cache_settings()
+    if cache_file is None:
+        return None
+    contents = _read_cache_file(cache_file)
+    version = _disk_version(netbox_instance, contents, ttl)
+    entry = contents.get(_disk_key(key, version))
+    if entry is None:
+        return None
+    if time.time() - entry.get("timestamp", 0) > ttl:
+        return None
+    return entry.get("choices")
+
+
+def _save_disk_cache(netbox_instance, key, valid_choices):
+    """
+    Add the choices for key, and the version of netbox_instance, to the
+    disk cache, if configured.  The file is replaced atomically so that
+    concurrent scripts never see a partially written cache.
+    """
+    cache_file, ttl = _cache_settings()
+    if cache_file is None:
+        return
+    with _disk_lock:
+        contents = _read_cache_file(cache_file)
+        version = _disk_version(netbox_instance, contents, ttl)
+        now = time.time()
+        # refresh the cached version only if it was retrieved from netbox,
+        # so that the ttl bounds how long a stale version can be used
+        if getattr(netbox_instance, "netbox_tools_version", None) is not None:
+            contents[f"{netbox_instance.base_url}|version"] = {
+                "timestamp": now,
+                "version": version,
+            }
+        contents[_disk_key(key, version)] = {
+            "timestamp": now,
+            "choices": valid_choices,
+        }
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as handle:
+                json.dump(contents, handle)
+            os.replace(tmp_file, cache_file)
+        except OSError as _general_exception:
+            _log(
+                f"WARNING. Unable to write choices cache {cache_file}.",
+                f"Exception detail: {_general_exception}",
+            )
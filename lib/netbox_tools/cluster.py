@@ -3,20 +3,24 @@ Name: cluster.py
 Description: Class for create and update operations on netbox cluster
 """
 import sys
-from inspect import stack
-from netbox_tools.common import create_slug
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, create_slug
 from netbox_tools.common import cluster_group_id, cluster_type_id, site_id, tag_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 103
+OUR_VERSION = 113
 
 
-class Cluster:
+class Cluster(AsyncEntity):
     """
     create, update, delete operations on netbox endpoint: virtualization.clusters
     """
 
     def __init__(self, netbox_obj, info):
         self._netbox_obj = netbox_obj
+        self._cluster_object = NOT_FETCHED
         self._info = info
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
@@ -28,9 +32,7 @@ class Cluster:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _populate_mutex_keys(self):
         """
@@ -142,6 +144,23 @@ class Cluster:
         self._set_tags()
         self._set_type()
 
+    def refresh(self):
+        """
+        Discard the cached netbox cluster object so that the next access
+        to cluster_object retrieves it from netbox.  Called after each write.
+        """
+        self._cluster_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this cluster so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("cluster", self.cluster)
+        self.refresh()
+
     def delete(self):
         """
         delete a cluster
@@ -155,6 +174,8 @@ class Cluster:
                 f"Exception detail: {_general_error}",
             )
             return
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -169,21 +190,48 @@ class Cluster:
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a cluster
         """
+        changes = changed_fields(self._args, self.cluster_object)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. cluster {self.cluster} is unchanged.")
+            return
         self.log(f"{self._info['cluster']}")
         self._args["id"] = self.cluster_id
         try:
-            self.cluster_object.update(self._args)
+            self.cluster_object.update(changes)
         except Exception as _general_error:
             self.log(
                 f"exiting. Unable to update cluster {self._info['cluster']}.",
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this cluster
+        """
+        return record.name == self.cluster
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_update()
+        self._generate_args_create_update()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -196,6 +244,30 @@ class Cluster:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for clusters
+        """
+        return self._netbox_obj.virtualization.clusters
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this cluster.
+        netbox_tools.bulk.Bulk merges these to retrieve many clusters per request.
+        """
+        return {"name": self.cluster}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this cluster's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the cluster.
+        """
+        return ("cluster", self.cluster)
+
     @property
     def cluster(self):
         """
@@ -211,7 +283,12 @@ class Cluster:
         """
         retrieve a cluster object from netbox by filtering on self.cluster and return it
         """
-        return self._netbox_obj.virtualization.clusters.get(name=self.cluster)
+        if self._cluster_object is not NOT_FETCHED:
+            return self._cluster_object
+        self._cluster_object = self._netbox_obj.virtualization.clusters.get(
+            name=self.cluster
+        )
+        return self._cluster_object
 
     @property
     def cluster_id(self):
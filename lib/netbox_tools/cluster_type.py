@@ -3,13 +3,16 @@ Name: cluster_type.py
 Description: Class for create and update operations on netbox cluster_type
 """
 import sys
-from inspect import stack
-from netbox_tools.common import create_slug, tag_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, create_slug, tag_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 103
+OUR_VERSION = 113
 
 
-class ClusterType:
+class ClusterType(AsyncEntity):
     """
     create, update, and delete operations on netbox virtualization.cluster_types
     """
@@ -18,6 +21,7 @@ class ClusterType:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._cluster_type_object = NOT_FETCHED
         self._info = info
         self._args = {}
         self._populate_mandatory_keys()
@@ -43,9 +47,7 @@ class ClusterType:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys_create_update(self):
         """
@@ -104,6 +106,23 @@ class ClusterType:
         self._set_slug()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox cluster type object so that the next access
+        to cluster_type_object retrieves it from netbox.  Called after each write.
+        """
+        self._cluster_type_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this cluster_type so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("cluster_type", self.name)
+        self.refresh()
+
     def delete(self):
         """
         delete a cluster_type
@@ -118,6 +137,8 @@ class ClusterType:
                 "continuing nonetheless..."
             )
             return
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -132,20 +153,47 @@ class ClusterType:
                 f"Exception detail: {_general_error}"
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a cluster_type
         """
+        changes = changed_fields(self._args, self.cluster_type_object)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. cluster_type {self.name} is unchanged.")
+            return
         self.log("{}".format(self._info["name"]))
         try:
-            self.cluster_type_object.update(self._args)
+            self.cluster_type_object.update(changes)
         except Exception as _general_error:
             self.log(
                 f"exiting. Unable to update cluster_type {self._info['name']}",
                 f"Exception detail: {_general_error}"
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this cluster_type
+        """
+        return record.name == self.name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_update()
+        self._generate_args_create_update()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -158,12 +206,41 @@ class ClusterType:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for cluster_types
+        """
+        return self._netbox_obj.virtualization.cluster_types
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this cluster_type.
+        netbox_tools.bulk.Bulk merges these to retrieve many cluster_types per request.
+        """
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this cluster_type's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the cluster_type.
+        """
+        return ("cluster_type", self.name)
+
     @property
     def cluster_type_object(self):
         """
         retrieve a cluster_type object from netbox by filtering on self.name and return it
         """
-        return self._netbox_obj.virtualization.cluster_types.get(name=self.name)
+        if self._cluster_type_object is not NOT_FETCHED:
+            return self._cluster_type_object
+        self._cluster_type_object = self._netbox_obj.virtualization.cluster_types.get(
+            name=self.name
+        )
+        return self._cluster_type_object
 
     @property
     def cluster_type_id(self):
@@ -2,10 +2,10 @@
 """
 Convert rgb to color and vice-versa.
 """
-from inspect import stack
 import sys
+from netbox_tools.logger import log_message
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 rgb2color = {}
 rgb2color["2196f3"] = "blue"
@@ -29,7 +29,7 @@ def log(*args):
     """
     simple logger
     """
-    print(f"{__name__}(v{OUR_VERSION}).{stack()[1].function}: {' '.join(args)}")
+    log_message(args, __name__, OUR_VERSION)
 
 
 def color(color_name):
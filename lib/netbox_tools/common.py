@@ -1,26 +1,55 @@
 """
 common functions used in netbox-tools
+
+pynetbox, urllib3 and netbox_tools.transport (which imports requests) are
+imported lazily, when netbox() is first called, so that scripts can parse
+their arguments (and answer --help) without paying for them.  See
+netbox_tools.lazy.
 """
 import re
 from string import punctuation
 import sys
+import threading
 import yaml
-import requests
-import urllib3
-import pynetbox
 from netbox_tools.config.netbox_config import LoadConfig
 from netbox_tools.credentials import NetboxCredentials
+from netbox_tools.lazy import lazy_import
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import Resolver, get_resolver
+
+pynetbox = lazy_import("pynetbox")
+transport = lazy_import("netbox_tools.transport")
+urllib3 = lazy_import("urllib3")
+
+# serializes retrieval of the netbox version, see netbox_version()
+_version_lock = threading.Lock()
+
+# value of the netbox object cached by an entity class (e.g. Device's
+# device_object) until it is first retrieved.  None is cached, and means
+# that the object does not exist in netbox.
+NOT_FETCHED = object()
+
+
+def _log(*args):
+    """
+    simple logger
+    """
+    log_message(args, "common")
 
 
 def netbox():
     """
     return a configured netbox instance
+
+    The instance's http session pools connections, retries, and applies
+    timeouts as configured in config.yml (see netbox_tools.transport).
+    It is safe to share the instance between threads.
     """
     cfg = LoadConfig()
     credentials = NetboxCredentials()
     netbox_instance = pynetbox.api(credentials.url, token=credentials.token)
 
-    session = requests.Session()
+    session = transport.make_session(cfg.config)
     if "ssl_verify" in cfg.config:
         session.verify = cfg.config["ssl_verify"]
     if "disable_insecure_request_warnings" in cfg.config:
@@ -28,27 +57,76 @@ def netbox():
             # requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
     netbox_instance.http_session = session
+    netbox_instance.resolver = Resolver()
     return netbox_instance
 
 
+def brief_query(netbox_instance, fields=None):
+    """
+    Return query parameters (a dictionary) asking netbox_instance for a
+    reduced representation of objects, for callers that need only a few of
+    their fields.  This cuts the size of responses, and the time netbox
+    spends serializing them, especially for devices.
+
+    If fields is None, ask for netbox's brief representation, which holds
+    id, url, display, and a few identifying fields (e.g. name), and is
+    supported by all netbox versions.
+
+    Else fields is a list of the fields needed.  netbox 4.0 and later return
+    only these fields (plus id and url, so that pynetbox can fetch the rest
+    of the object if another field is accessed).  Earlier versions do not
+    support field selection, so return no parameters, and the full
+    representation is returned.
+    """
+    if fields is None:
+        return {"brief": 1}
+    version = netbox_version(netbox_instance).split(".")[:2]
+    if tuple(int(part) for part in version) < (4, 0):
+        return {}
+    fields = ["id", "url"] + [field for field in fields if field not in ("id", "url")]
+    return {"fields": ",".join(fields)}
+
+
+def netbox_version(netbox_instance):
+    """
+    Return the version string (e.g. "3.7") reported by netbox_instance.
+    The version is retrieved once per netbox instance and cached on it.
+    """
+    version = getattr(netbox_instance, "netbox_tools_version", None)
+    if version is not None:
+        return version
+    with _version_lock:
+        version = getattr(netbox_instance, "netbox_tools_version", None)
+        if version is None:
+            version = netbox_instance.version
+            netbox_instance.netbox_tools_version = version
+    return version
+
+
 # cable
 def cable_id(netbox_instance, label):
     """
     return the netbox cable id, if any, associated with label
     """
-    try:
-        cable = netbox_instance.dcim.cables.get(label=label)
-        if cable is not None:
-            return cable.id
-        msg = "common.cable_id: returning None."
-        msg += f" cable associated with label {label} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.cable_id: returning None for cable label {label}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("cable", label) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            cable = netbox_instance.dcim.cables.get(
+                label=label, **brief_query(netbox_instance)
+            )
+            if cable is not None:
+                return resolver.store("cable", label, cable.id)
+            msg = "returning None."
+            msg += f" cable associated with label {label} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("cable", label, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for cable label {label}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # cluster
@@ -56,19 +134,25 @@ def cluster_id(netbox_instance, name):
     """
     return the netbox cluster id, if any, associated with name
     """
-    try:
-        cluster = netbox_instance.virtualization.clusters.get(name=name)
-        if cluster is not None:
-            return cluster.id
-        msg = "common.cluster_id: returning None."
-        msg += f" cluster name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.cluster_id: returning None for cluster name {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("cluster", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            cluster = netbox_instance.virtualization.clusters.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if cluster is not None:
+                return resolver.store("cluster", name, cluster.id)
+            msg = "returning None."
+            msg += f" cluster name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("cluster", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for cluster name {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # cluster_group
@@ -76,19 +160,25 @@ def cluster_group_id(netbox_instance, name):
     """
     return the netbox cluster_group id, if any, associated with name
     """
-    try:
-        cluster_group = netbox_instance.virtualization.cluster_groups.get(name=name)
-        if cluster_group is not None:
-            return cluster_group.id
-        msg = "common.cluster_group_id: returning None."
-        msg += f" cluster_group name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.cluster_group_id: returning None for cluster_group {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("cluster_group", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            cluster_group = netbox_instance.virtualization.cluster_groups.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if cluster_group is not None:
+                return resolver.store("cluster_group", name, cluster_group.id)
+            msg = "returning None."
+            msg += f" cluster_group name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("cluster_group", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for cluster_group {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # cluster_type
@@ -96,19 +186,25 @@ def cluster_type_id(netbox_instance, name):
     """
     return the netbox cluster_type id, if any, associated with name
     """
-    try:
-        cluster_type = netbox_instance.virtualization.cluster_types.get(name=name)
-        if cluster_type is not None:
-            return cluster_type.id
-        msg = "common.cluster_type_id: returning None."
-        msg += f" cluster_type name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.cluster_type_id: returning None for cluster_type {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("cluster_type", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            cluster_type = netbox_instance.virtualization.cluster_types.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if cluster_type is not None:
+                return resolver.store("cluster_type", name, cluster_type.id)
+            msg = "returning None."
+            msg += f" cluster_type name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("cluster_type", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for cluster_type {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # console_port
@@ -124,19 +220,25 @@ def get_console_port(netbox_instance, device, port):
     Given netbox instance, device name, and port, return console_port object.
     If console_port does not exist in netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    key = (device, port)
+    found, cached_id = resolver.lookup("console_port", key)
+    if found and cached_id is None:
+        return None
     try:
         console_port = netbox_instance.dcim.console_ports.get(device=device, name=port)
         if console_port is not None:
+            resolver.store("console_port", key, console_port.id)
             return console_port
-        msg = "common.get_console_port: returning None."
+        msg = "returning None."
         msg += f" device {device} port {port} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("console_port", key, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = "common.get_console_port: returning None"
+        msg = "returning None"
         msg += f" for device {device} console_server_port {port}"
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -145,20 +247,28 @@ def console_port_id(netbox_instance, device, port):
     Given netbox instance, device name, and port, return console_port ID.
     If console_port does not exist in netbox, return None
     """
-    try:
-        console_port = netbox_instance.dcim.console_ports.get(device=device, name=port)
-        if console_port is not None:
-            return console_port.id
-        msg = "common.console_port_id: returning None."
-        msg += f" device {device} port {port} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = "common.console_port_id: returning None"
-        msg += f" for device {device} console_server_port {port}"
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("console_port", (device, port)) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            console_port = netbox_instance.dcim.console_ports.get(
+                device=device, name=port, **brief_query(netbox_instance)
+            )
+            if console_port is not None:
+                return resolver.store("console_port", (device, port), console_port.id)
+            msg = "returning None."
+            msg += (
+                f" device {device} port {port} not found at {netbox_instance.base_url}"
+            )
+            _log(msg)
+            return resolver.store("console_port", (device, port), None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = "returning None"
+            msg += f" for device {device} console_server_port {port}"
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # console_server_port
@@ -174,21 +284,27 @@ def get_console_server_port(netbox_instance, device, port):
     Given netbox instance, device name, and port, return console_server_port object.
     If console_server_port does not exist in netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    key = (device, port)
+    found, cached_id = resolver.lookup("console_server_port", key)
+    if found and cached_id is None:
+        return None
     try:
         console_server_port = netbox_instance.dcim.console_server_ports.get(
             device=device, name=port
         )
         if console_server_port is not None:
+            resolver.store("console_server_port", key, console_server_port.id)
             return console_server_port
-        msg = "common.get_console_server_port: returning None."
+        msg = "returning None."
         msg += f" device {device} port {port} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("console_server_port", key, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = "common.get_console_server_port: returning None"
+        msg = "returning None"
         msg += f" for device {device} console_server_port {port}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -197,22 +313,30 @@ def console_server_port_id(netbox_instance, device, port):
     Given netbox instance, device name, and port, return console_server_port ID.
     If console_server_port does not exist in netbox, return None
     """
-    try:
-        console_server_port = netbox_instance.dcim.console_server_ports.get(
-            device=device, name=port
-        )
-        if console_server_port is not None:
-            return console_server_port.id
-        msg = "common.console_server_port_id: returning None."
-        msg += f" device {device} port {port} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = "common.console_server_port_id: returning None"
-        msg += f" for device {device} console_server_port {port}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("console_server_port", (device, port)) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            console_server_port = netbox_instance.dcim.console_server_ports.get(
+                device=device, name=port, **brief_query(netbox_instance)
+            )
+            if console_server_port is not None:
+                return resolver.store(
+                    "console_server_port", (device, port), console_server_port.id
+                )
+            msg = "returning None."
+            msg += (
+                f" device {device} port {port} not found at {netbox_instance.base_url}"
+            )
+            _log(msg)
+            return resolver.store("console_server_port", (device, port), None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = "returning None"
+            msg += f" for device {device} console_server_port {port}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # device
@@ -221,18 +345,23 @@ def get_device(netbox_instance, name):
     Given netbox instance and device name, return device.
     If device does not exist in netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    found, cached_id = resolver.lookup("device", name)
+    if found and cached_id is None:
+        return None
     try:
         device = netbox_instance.dcim.devices.get(name=name)
         if device is not None:
+            resolver.store("device", name, device.id)
             return device
-        msg = "common.get_device: returning None."
+        msg = "returning None."
         msg += f" device {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("device", name, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_device: returning None for device name {name}."
+        msg = f"returning None for device name {name}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -241,19 +370,25 @@ def device_id(netbox_instance, name):
     Given netbox instance and device name, return device_id.
     If device does not exist in netbox, return None
     """
-    try:
-        device = netbox_instance.dcim.devices.get(name=name)
-        if device is not None:
-            return device.id
-        msg = "common.device_id: returning None."
-        msg += f" device {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.device_id: returning None for device name {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("device", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            device = netbox_instance.dcim.devices.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if device is not None:
+                return resolver.store("device", name, device.id)
+            msg = "returning None."
+            msg += f" device {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("device", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for device name {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # device_type
@@ -266,14 +401,14 @@ def get_device_type(netbox_instance, name):
         device_type = netbox_instance.dcim.device_types.get(slug=name.lower())
         if device_type is not None:
             return device_type
-        msg = "common.get_device_type: returning None."
+        msg = "returning None."
         msg += f" device {name} not found at {netbox_instance.base_url}"
-        print(msg)
+        _log(msg)
         return None
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_device_type: returning None for device_type {name}."
+        msg = f"returning None for device_type {name}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -282,19 +417,25 @@ def device_type_id(netbox_instance, name):
     Given netbox instance and device_type name, return device_type_id.
     If device_type does not exist in netbox, return None
     """
-    try:
-        device_type = netbox_instance.dcim.device_types.get(model=name)
-        if device_type is not None:
-            return device_type.id
-        msg = "common.device_type_id: returning None."
-        msg += f" device_type {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.device_type_id: returning None for device_type {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("device_type", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            device_type = netbox_instance.dcim.device_types.get(
+                model=name, **brief_query(netbox_instance)
+            )
+            if device_type is not None:
+                return resolver.store("device_type", name, device_type.id)
+            msg = "returning None."
+            msg += f" device_type {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("device_type", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for device_type {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # interface
@@ -303,20 +444,26 @@ def get_interface(netbox_instance, device, interface):
     Given netbox instance, device name, interface name, return interface object
     If interface does not exist in netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    key = (device, interface)
+    found, cached_id = resolver.lookup("interface", key)
+    if found and cached_id is None:
+        return None
     try:
         interface_object = netbox_instance.dcim.interfaces.get(
             name=interface, device=device
         )
         if interface_object is not None:
+            resolver.store("interface", key, interface_object.id)
             return interface_object
-        msg = "common.get_interface: returning None."
+        msg = "returning None."
         msg += f" device {device} interface {interface} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("interface", key, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_interface: returning None for device {device} interface {interface}."
+        msg = f"returning None for device {device} interface {interface}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -325,21 +472,27 @@ def interface_id(netbox_instance, device, interface):
     Given netbox instance, device name, interface name, return interface id
     If interface does not exist in netbox, return None
     """
-    try:
-        interface_object = netbox_instance.dcim.interfaces.get(
-            name=interface, device=device
-        )
-        if interface_object is not None:
-            return interface_object.id
-        msg = "common.interface_id: returning None."
-        msg += f" device {device} interface {interface} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.interface_id: returning None for device {device} interface {interface}."
-        msg += f"Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("interface", (device, interface)) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            interface_object = netbox_instance.dcim.interfaces.get(
+                name=interface, device=device, **brief_query(netbox_instance)
+            )
+            if interface_object is not None:
+                return resolver.store(
+                    "interface", (device, interface), interface_object.id
+                )
+            msg = "returning None."
+            msg += f" device {device} interface {interface} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("interface", (device, interface), None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for device {device} interface {interface}."
+            msg += f"Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # ip address
@@ -353,22 +506,27 @@ def get_ip_address(netbox_instance, ip4):
     except (ValueError, Exception) as _value_error:
         msg = f"exiting. Unexpected format for prefix. Expected A.B.C.D/E, got {ip4}."
         msg += f"Exception detail: {_value_error}"
-        print(msg)
+        _log(msg)
         sys.exit(1)
+    resolver = get_resolver(netbox_instance)
+    found, cached_id = resolver.lookup("ip_address", ip4)
+    if found and cached_id is None:
+        return None
     try:
         ip_address_obj = netbox_instance.ipam.ip_addresses.get(
             address=address, mask=mask
         )
         if ip_address_obj is not None:
+            resolver.store("ip_address", ip4, ip_address_obj.id)
             return ip_address_obj
-        msg = "common.get_ip_address: returning None."
+        msg = "returning None."
         msg += f" ip4 {ip4} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("ip_address", ip4, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_ip_address: returning None for ip {ip4}."
+        msg = f"returning None for ip {ip4}."
         msg += f"Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -388,9 +546,9 @@ def make_ip_address_dict(ip_addresses_dict, interface_dict):
     elif "virtual_machine" in interface_dict:
         device_key = "virtual_machine"
     else:
-        msg = "common.make_ip_address_dict: exiting."
+        msg = "exiting."
         msg += " interface_dict missing key: 'device' or 'virtual_machine'"
-        print(msg)
+        _log(msg)
         sys.exit(1)
     ip4 = interface_dict["ip4"]
     try:
@@ -403,11 +561,11 @@ def make_ip_address_dict(ip_addresses_dict, interface_dict):
         ip_address_dict["tags"] = []
         ip_address_dict[device_key] = interface_dict[device_key]
     except KeyError as _key_error_exception:
-        msg = "common.make_ip_address_dict: missing mandatory key in"
+        msg = "missing mandatory key in"
         msg += f" interface_dict {interface_dict}"
         msg += " Mandatory keys: ip4, interface, [device or virtual_machine]"
         msg += f" Exception detail: {_key_error_exception}"
-        print(msg)
+        _log(msg)
         sys.exit(1)
     if ip4 not in ip_addresses_dict:
         return ip_address_dict
@@ -430,24 +588,30 @@ def ip_address_id(netbox_instance, ip4):
     try:
         address, mask = ip4.split("/")
     except (ValueError) as _value_error:
-        msg = "common.ip_address_id: exiting."
+        msg = "exiting."
         msg += f" Unexpected format for prefix. Expected A.B.C.D/E, got {ip4}."
         msg += f" Exception detail: {_value_error}"
-        print(msg)
+        _log(msg)
         sys.exit(1)
-    try:
-        ip_address = netbox_instance.ipam.ip_addresses.get(address=address, mask=mask)
-        if ip_address is not None:
-            return ip_address.id
-        msg = "common.ip_address_id: returning None."
-        msg += f" ipv4 address {ip4} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.ip_address_id: returning None for ip {ip4}"
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("ip_address", ip4) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            ip_address = netbox_instance.ipam.ip_addresses.get(
+                address=address, mask=mask, **brief_query(netbox_instance)
+            )
+            if ip_address is not None:
+                return resolver.store("ip_address", ip4, ip_address.id)
+            msg = "returning None."
+            msg += f" ipv4 address {ip4} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("ip_address", ip4, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for ip {ip4}"
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # virtualization/interfaces virtual_interface
@@ -458,22 +622,28 @@ def get_virtual_interface(netbox_instance, virtual_machine, virtual_interface):
 
     If virtual_interface does not exist in netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    key = (virtual_machine, virtual_interface)
+    found, cached_id = resolver.lookup("virtual_interface", key)
+    if found and cached_id is None:
+        return None
     try:
         virtual_interface_object = netbox_instance.virtualization.interfaces.get(
             name=virtual_interface, virtual_machine=virtual_machine
         )
         if virtual_interface_object is not None:
+            resolver.store("virtual_interface", key, virtual_interface_object.id)
             return virtual_interface_object
-        msg = "common.get_virtual_interface: returning None."
+        msg = "returning None."
         msg += f" virtual_machine {virtual_machine} virtual_interface {virtual_interface}"
         msg += f" not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("virtual_interface", key, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = "common.get_virtual_interface: returning None"
+        msg = "returning None"
         msg += f" for virtual_machine {virtual_machine} virtual_interface {virtual_interface}"
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -482,25 +652,32 @@ def virtual_interface_id(netbox_instance, virtual_machine, virtual_interface):
     Given netbox instance, virtual_machine name, virtual_interface name, return virtual_interface id
     If virtual_interface does not exist in netbox, return None
     """
-    try:
-        virtual_interface_object = netbox_instance.virtualization.interfaces.get(
-            name=virtual_interface, virtual_machine=virtual_machine
-        )
-        if virtual_interface_object is not None:
-            return virtual_interface_object.id
-        msg = "common.virtual_interface_id: returning None."
-        msg += (
-            f" virtual_machine {virtual_machine} virtual_interface {virtual_interface}"
-        )
-        msg += f" not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = "common.virtual_interface_id: returning None"
-        msg += f" for virtual_machine {virtual_machine} virtual_interface {virtual_interface}"
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    key = (virtual_machine, virtual_interface)
+    with resolver.claim("virtual_interface", key) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            virtual_interface_object = netbox_instance.virtualization.interfaces.get(
+                name=virtual_interface,
+                virtual_machine=virtual_machine,
+                **brief_query(netbox_instance),
+            )
+            if virtual_interface_object is not None:
+                return resolver.store(
+                    "virtual_interface", key, virtual_interface_object.id
+                )
+            msg = "returning None."
+            msg += f" virtual_machine {virtual_machine} virtual_interface {virtual_interface}"
+            msg += f" not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("virtual_interface", key, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = "returning None"
+            msg += f" for virtual_machine {virtual_machine} virtual_interface {virtual_interface}"
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # vlans
@@ -509,23 +686,29 @@ def netbox_id_untagged_vlan(netbox_instance, vid):
     Given netbox instance and vid (vlan id), return netbox id for vlan.
     If vlan does not exist in netbox, return None
     """
-    try:
-        vlan_object = netbox_instance.ipam.vlans.get(vid=vid)
-        if vlan_object is not None:
-            return vlan_object.id
-        msg = "common.netbox_id_untagged_vlan: returning None"
-        msg += f" vid {vid} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.netbox_id_untagged_vlan: returning None for vid {vid}"
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        msg = f"common.netbox_id_untagged_vlan: possibly vlan ID (vid) {vid}"
-        msg += f" does not yet exist at {netbox_instance.base_url}"
-        msg += " in which case you need to create it first."
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("vlan_vid", vid) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            vlan_object = netbox_instance.ipam.vlans.get(
+                vid=vid, **brief_query(netbox_instance)
+            )
+            if vlan_object is not None:
+                return resolver.store("vlan_vid", vid, vlan_object.id)
+            msg = "returning None"
+            msg += f" vid {vid} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("vlan_vid", vid, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for vid {vid}"
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            msg = f"possibly vlan ID (vid) {vid}"
+            msg += f" does not yet exist at {netbox_instance.base_url}"
+            msg += " in which case you need to create it first."
+            _log(msg)
+            return None
 
 
 def vlan_name_to_id(netbox_instance, vlan_name):
@@ -533,23 +716,29 @@ def vlan_name_to_id(netbox_instance, vlan_name):
     Given netbox instance and Vlan name, return Netbox id.
     If vlan does not exist in netbox, return None
     """
-    try:
-        vlan_object = netbox_instance.ipam.vlans.get(name=vlan_name)
-        if vlan_object is not None:
-            return vlan_object.id
-        msg = "common.vlan_name_to_id: returning None."
-        msg += f" vlan_name {vlan_name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.vlan_name_to_id: returning None for vlan_name {vlan_name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        msg = f"common.vlan_name_to_id: possibly vlan_name {vlan_name}"
-        msg += f" does not yet exist at {netbox_instance.base_url}"
-        msg += " in which case you need to create it first."
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("vlan_name", vlan_name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            vlan_object = netbox_instance.ipam.vlans.get(
+                name=vlan_name, **brief_query(netbox_instance)
+            )
+            if vlan_object is not None:
+                return resolver.store("vlan_name", vlan_name, vlan_object.id)
+            msg = "returning None."
+            msg += f" vlan_name {vlan_name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("vlan_name", vlan_name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for vlan_name {vlan_name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            msg = f"possibly vlan_name {vlan_name}"
+            msg += f" does not yet exist at {netbox_instance.base_url}"
+            msg += " in which case you need to create it first."
+            _log(msg)
+            return None
 
 
 def vlan_vid_to_id(netbox_instance, vlan_vid):
@@ -557,23 +746,29 @@ def vlan_vid_to_id(netbox_instance, vlan_vid):
     Given netbox instance and Vlan vid, return Netbox id.
     If vlan does not exist in netbox, return None
     """
-    try:
-        vlan_object = netbox_instance.ipam.vlans.get(vid=vlan_vid)
-        if vlan_object is not None:
-            return vlan_object.id
-        msg = "common.vlan_vid_to_id: returning None."
-        msg += f" vlan_vid {vlan_vid} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.vlan_name_to_id: returning None for vlan_vid {vlan_vid}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        msg = f"common.vlan_vid_to_id: possibly vlan_vid {vlan_vid}"
-        msg += f" does not yet exist at {netbox_instance.base_url}"
-        msg += " in which case you need to create it first."
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("vlan_vid", vlan_vid) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            vlan_object = netbox_instance.ipam.vlans.get(
+                vid=vlan_vid, **brief_query(netbox_instance)
+            )
+            if vlan_object is not None:
+                return resolver.store("vlan_vid", vlan_vid, vlan_object.id)
+            msg = "returning None."
+            msg += f" vlan_vid {vlan_vid} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("vlan_vid", vlan_vid, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for vlan_vid {vlan_vid}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            msg = f"possibly vlan_vid {vlan_vid}"
+            msg += f" does not yet exist at {netbox_instance.base_url}"
+            msg += " in which case you need to create it first."
+            _log(msg)
+            return None
 
 
 def vlan_group_id(netbox_instance, vlan_group_name):
@@ -581,19 +776,27 @@ def vlan_group_id(netbox_instance, vlan_group_name):
     Given netbox instance and VlanGroup name, return vlan_group_id.
     If vlan_group does not exist in netbox, return None
     """
-    try:
-        vlan_group_object = netbox_instance.ipam.vlan_groups.get(name=vlan_group_name)
-        if vlan_group_object is not None:
-            return vlan_group_object.id
-        msg = "common.vlan_group_id: returning None."
-        msg += f" vlan_group_name {vlan_group_name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.vlan_group_id: returning None for vlan_group_name {vlan_group_name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("vlan_group", vlan_group_name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            vlan_group_object = netbox_instance.ipam.vlan_groups.get(
+                name=vlan_group_name, **brief_query(netbox_instance)
+            )
+            if vlan_group_object is not None:
+                return resolver.store(
+                    "vlan_group", vlan_group_name, vlan_group_object.id
+                )
+            msg = "returning None."
+            msg += f" vlan_group_name {vlan_group_name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("vlan_group", vlan_group_name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for vlan_group_name {vlan_group_name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # location
@@ -602,19 +805,25 @@ def location_id(netbox_instance, name):
     Given netbox instance and location name, return location id.
     If location doesn't exist within netbox, return None
     """
-    try:
-        location = netbox_instance.dcim.locations.get(name=name)
-        if location is not None:
-            return location.id
-        msg = "common.location_id: returning None."
-        msg += f" location name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.location_id: returning None for location {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("location", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            location = netbox_instance.dcim.locations.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if location is not None:
+                return resolver.store("location", name, location.id)
+            msg = "returning None."
+            msg += f" location name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("location", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for location {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # rack
@@ -623,19 +832,25 @@ def rack_id(netbox_instance, name):
     Given netbox instance and rack name, return rack id.
     If rack doesn't exist within netbox, return None
     """
-    try:
-        rack = netbox_instance.dcim.racks.get(name=name)
-        if rack is not None:
-            return rack.id
-        msg = "common.rack_id: returning None."
-        msg += f" rack name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.rack_id: returning None for rack {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("rack", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            rack = netbox_instance.dcim.racks.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if rack is not None:
+                return resolver.store("rack", name, rack.id)
+            msg = "returning None."
+            msg += f" rack name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("rack", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for rack {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # manufacturer
@@ -644,18 +859,23 @@ def get_manufacturer(netbox_instance, name):
     Given netbox instance and manufacturer name, return manufacturer.
     If manufacturer doesn't exist within netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    found, cached_id = resolver.lookup("manufacturer", name)
+    if found and cached_id is None:
+        return None
     try:
         manufacturer = netbox_instance.dcim.manufacturers.get(name=name)
         if manufacturer is not None:
+            resolver.store("manufacturer", name, manufacturer.id)
             return manufacturer
-        msg = "common.get_manufacturer: returning None."
+        msg = "returning None."
         msg += f" manufacturer name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("manufacturer", name, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_manufacturer: returning None for manufacturer {name}."
+        msg = f"returning None for manufacturer {name}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -664,19 +884,25 @@ def manufacturer_id(netbox_instance, name):
     Given netbox instance and manufacturer name, return manufacturer id.
     If manufacturer doesn't exist within netbox, return None
     """
-    try:
-        manufacturer = netbox_instance.dcim.manufacturers.get(name=name)
-        if manufacturer is not None:
-            return manufacturer.id
-        msg = "common.manufacturer_id: returning None."
-        msg += f" manufacturer name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.manufacturer_id: returning None for manufacturer {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("manufacturer", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            manufacturer = netbox_instance.dcim.manufacturers.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if manufacturer is not None:
+                return resolver.store("manufacturer", name, manufacturer.id)
+            msg = "returning None."
+            msg += f" manufacturer name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("manufacturer", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for manufacturer {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # role
@@ -685,18 +911,23 @@ def get_role(netbox_instance, name):
     Given netbox instance and device role name, return device role.
     If device role doesn't exist within netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    found, cached_id = resolver.lookup("role", name)
+    if found and cached_id is None:
+        return None
     try:
         role = netbox_instance.dcim.device_roles.get(name=name)
         if role is not None:
+            resolver.store("role", name, role.id)
             return role
-        msg = "common.get_role: returning None."
+        msg = "returning None."
         msg += f" role name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("role", name, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_role: returning None for role {name}."
+        msg = f"returning None for role {name}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -705,19 +936,25 @@ def role_id(netbox_instance, name):
     Given netbox instance and role name, return role id.
     If device role doesn't exist within netbox, return None
     """
-    try:
-        role = netbox_instance.dcim.device_roles.get(name=name)
-        if role is not None:
-            return role.id
-        msg = "common.role_id: returning None."
-        msg += f" role name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.role_id: returning None for role_id associated with role {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("role", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            role = netbox_instance.dcim.device_roles.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if role is not None:
+                return resolver.store("role", name, role.id)
+            msg = "returning None."
+            msg += f" role name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("role", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for role_id associated with role {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # site
@@ -726,19 +963,25 @@ def site_id(netbox_instance, name):
     Given netbox instance and site name, return site id.
     If site doesn't exist within netbox, return None
     """
-    try:
-        site = netbox_instance.dcim.sites.get(name=name)
-        if site is not None:
-            return site.id
-        msg = "common.site_id: returning None."
-        msg += f" site name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.site_id: returning None for site_id associated with site {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("site", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            site = netbox_instance.dcim.sites.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if site is not None:
+                return resolver.store("site", name, site.id)
+            msg = "returning None."
+            msg += f" site name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("site", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for site_id associated with site {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # tag
@@ -747,18 +990,23 @@ def get_tag(netbox_instance, name):
     Given netbox instance and tag name, return tag.
     If tag doesn't exist within netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    found, cached_id = resolver.lookup("tag", name)
+    if found and cached_id is None:
+        return None
     try:
         tag = netbox_instance.extras.tags.get(name=name)
         if tag is not None:
+            resolver.store("tag", name, tag.id)
             return tag
-        msg = "common.get_tag: returning None."
+        msg = "returning None."
         msg += f" tag {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("tag", name, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_tag: returning None for tag {name}."
+        msg = f"returning None for tag {name}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -767,19 +1015,25 @@ def tag_id(netbox_instance, name):
     Given netbox instance and tag name, return tag id.
     If tag doesn't exist within netbox, return None
     """
-    try:
-        tag = netbox_instance.extras.tags.get(name=name)
-        if tag is not None:
-            return tag.id
-        msg = "common.tag_id: returning None."
-        msg += f" tag name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.tag_id: returning None for tag_id associated with tag {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("tag", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            tag = netbox_instance.extras.tags.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if tag is not None:
+                return resolver.store("tag", name, tag.id)
+            msg = "returning None."
+            msg += f" tag name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("tag", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for tag_id associated with tag {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 def get_tags(netbox_instance):
@@ -790,14 +1044,14 @@ def get_tags(netbox_instance):
         tags = netbox_instance.extras.tags.all()
         if tags is not None:
             return [tag.name for tag in tags]
-        msg = "common.get_tags: returning empty list."
+        msg = "returning empty list."
         msg += f" no tags found at {netbox_instance.base_url}"
-        print(msg)
+        _log(msg)
         return []
     except (pynetbox.RequestError) as _request_error:
-        msg = "common.get_tags: returning None."
+        msg = "returning None."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -806,18 +1060,23 @@ def get_vm(netbox_instance, name):
     Given netbox instance and vm name, return vm.
     If vm does not exist in netbox, return None
     """
+    resolver = get_resolver(netbox_instance)
+    found, cached_id = resolver.lookup("vm", name)
+    if found and cached_id is None:
+        return None
     try:
         vm_obj = netbox_instance.virtualization.virtual_machines.get(name=name)
         if vm_obj is not None:
+            resolver.store("vm", name, vm_obj.id)
             return vm_obj
-        msg = "common.get_vm: returning None."
+        msg = "returning None."
         msg += f" vm {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
+        _log(msg)
+        return resolver.store("vm", name, None)
     except (pynetbox.RequestError) as _request_error:
-        msg = f"common.get_vm: returning None for vm {name}."
+        msg = f"returning None for vm {name}."
         msg += f" Exception detail: {_request_error}"
-        print(msg)
+        _log(msg)
         return None
 
 
@@ -826,19 +1085,25 @@ def vm_id(netbox_instance, name):
     Given netbox instance and vm name, return vm id.
     If vm doesn't exist within netbox, return None
     """
-    try:
-        vm_obj = netbox_instance.virtualization.virtual_machines.get(name=name)
-        if vm_obj is not None:
-            return vm_obj.id
-        msg = "common.vm_id: returning None."
-        msg += f" vm name {name} not found at {netbox_instance.base_url}"
-        print(msg)
-        return None
-    except (pynetbox.RequestError) as _request_error:
-        msg = f"common.vm_id: returning None for vm {name}."
-        msg += f" Exception detail: {_request_error}"
-        print(msg)
-        return None
+    resolver = get_resolver(netbox_instance)
+    with resolver.claim("vm", name) as (found, cached_id):
+        if found:
+            return cached_id
+        try:
+            vm_obj = netbox_instance.virtualization.virtual_machines.get(
+                name=name, **brief_query(netbox_instance)
+            )
+            if vm_obj is not None:
+                return resolver.store("vm", name, vm_obj.id)
+            msg = "returning None."
+            msg += f" vm name {name} not found at {netbox_instance.base_url}"
+            _log(msg)
+            return resolver.store("vm", name, None)
+        except (pynetbox.RequestError) as _request_error:
+            msg = f"returning None for vm {name}."
+            msg += f" Exception detail: {_request_error}"
+            _log(msg)
+            return None
 
 
 # utility functions
@@ -864,7 +1129,7 @@ def load_yaml(filename):
             contents = yaml.load(file_handle, Loader=yaml.FullLoader)
         return contents
     except Exception as _general_exception:
-        msg = "common.load_yaml: exiting."
+        msg = "exiting."
         msg += f" Exception detail {_general_exception}"
-        print(msg)
+        _log(msg)
         sys.exit(1)
@@ -2,14 +2,17 @@
 Name: console_server_port.py
 Description: Create, update, delete operations on netbox /dcim/console-server-ports/ endpoint
 """
-from inspect import stack
 import sys
-from netbox_tools.common import device_id, tag_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, device_id, tag_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 103
+OUR_VERSION = 113
 
 
-class ConsoleServerPort:
+class ConsoleServerPort(AsyncEntity):
     """
     create, update, delete Netbox console server ports
 
@@ -38,6 +41,7 @@ class ConsoleServerPort:
 
     def __init__(self, netbox_obj, info):
         self._netbox_obj = netbox_obj
+        self._console_server_port_object = NOT_FETCHED
         self._info = info
         self._classname = __class__.__name__
         self.lib_version = OUR_VERSION
@@ -88,9 +92,7 @@ class ConsoleServerPort:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_delete_keys(self):
         """
@@ -198,6 +200,24 @@ class ConsoleServerPort:
         self._set_port_type()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox console server port object so that the next
+        access to console_server_port_object retrieves it from netbox.
+        Called after each write.
+        """
+        self._console_server_port_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this console_server_port so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("console_server_port", (self.device, self.port))
+        self.refresh()
+
     def delete(self):
         """
         delete a console_server_port
@@ -217,6 +237,8 @@ class ConsoleServerPort:
                 f"Exception detail: {_general_error}",
             )
             return
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -231,20 +253,50 @@ class ConsoleServerPort:
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a console_server_port
         """
+        changes = changed_fields(self._args, self.console_server_port_object)
+        if len(changes) == 0:
+            self.log(
+                f"Nothing to do. device {self.device} console_server_port {self.port} is unchanged."
+            )
+            return
         self.log(f"device {self.device} port {self.port}")
         try:
-            self.console_server_port_object.update(self._args)
+            self.console_server_port_object.update(changes)
         except Exception as _general_error:
             self.log(
                 f"exiting. Unable to update device {self.device} port {self.port}.",
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this console_server_port
+        """
+        return record.device.name == self.device and record.name == self.port
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_create_update_keys()
+        self._generate_create_update_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_delete_keys()
 
     def create_or_update(self):
         """
@@ -257,14 +309,41 @@ class ConsoleServerPort:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for console_server_ports
+        """
+        return self._netbox_obj.dcim.console_server_ports
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this console_server_port.
+        netbox_tools.bulk.Bulk merges these to retrieve many console_server_ports per request.
+        """
+        return {"device": self.device, "name": self.port}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this console_server_port's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the console_server_port.
+        """
+        return ("console_server_port", (self.device, self.port))
+
     @property
     def console_server_port_object(self):
         """
         return a console_server_port object by searching for
         the console_server_port's device and name
         """
+        if self._console_server_port_object is not NOT_FETCHED:
+            return self._console_server_port_object
         try:
-            return self._netbox_obj.dcim.console_server_ports.get(
+            endpoint = self._netbox_obj.dcim.console_server_ports
+            self._console_server_port_object = endpoint.get(
                 device=self.device, name=self.port
             )
         except Exception as _general_error:
@@ -274,6 +353,7 @@ class ConsoleServerPort:
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        return self._console_server_port_object
 
     @property
     def description(self):
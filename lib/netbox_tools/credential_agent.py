@@ -0,0 +1,280 @@
+"""
+Name: credential_agent.py
+Description: Serve decrypted netbox credentials over a user-only Unix socket
+
+Loading credentials from the Ansible vault means importing the Ansible
+libraries, prompting for the vault password, and decrypting the vault on
+every script run.  Similar to ssh-agent, the credential agent does this
+once, holds the credentials in memory, and serves them to netbox-tools
+scripts run by the same user.  NetboxCredentials asks the agent first, and
+falls back to the vault if no agent is running.
+
+Start the agent with scripts/credential_agent.py (see that script's --help).
+The agent exits after idle_timeout seconds without a request, or when
+stopped with scripts/credential_agent.py --stop.
+
+Security:
+
+- The socket is created in a directory that only the user can access, and
+  is itself only readable and writable by the user.  If the agent creates
+  this directory, it creates it with mode 0700.  If the directory already
+  exists, its permissions are left as they are, and the agent refuses to
+  start unless the user owns it and it is not writable by group or others.
+- Where the platform supports it (Linux SO_PEERCRED), the agent also
+  refuses connections from processes owned by other users.
+- Credentials are held only in the agent's memory and are never written
+  to disk.
+
+Socket path, in order of precedence:
+
+1. The NETBOX_TOOLS_AGENT_SOCK environment variable
+2. credential_agent_socket in config.yml
+3. ~/.netbox_tools/agent.sock
+
+Protocol: the client sends one line of JSON, {"command": "get"} or
+{"command": "stop"}, and the agent replies with one line of JSON.
+
+Usage:
+
+from netbox_tools.credential_agent import query_agent
+
+credentials = query_agent()
+if credentials is not None:
+    print(credentials["netbox_url"])
+"""
+import json
+import os
+import socket
+import stat
+import struct
+import time
+from netbox_tools.logger import log_message
+
+OUR_VERSION = 102
+
+DEFAULT_IDLE_TIMEOUT = 3600
+# seconds that clients wait for the agent before falling back to the vault
+CLIENT_TIMEOUT = 2
+SOCKET_ENV_VAR = "NETBOX_TOOLS_AGENT_SOCK"
+MAX_MESSAGE_SIZE = 65536
+
+
+def socket_path(config=None):
+    """
+    Return the path of the agent's socket (see module docstring)
+
+    config: optional contents of config.yml
+    """
+    if os.environ.get(SOCKET_ENV_VAR):
+        return os.environ[SOCKET_ENV_VAR]
+    if config is not None and config.get("credential_agent_socket"):
+        return os.path.expanduser(config["credential_agent_socket"])
+    return os.path.expanduser(os.path.join("~", ".netbox_tools", "agent.sock"))
+
+
+def _send(path, message):
+    """
+    Send message (a dictionary) to the agent listening on path, and return
+    its reply (a dictionary).  Raise OSError or ValueError on failure.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CLIENT_TIMEOUT)
+        client.connect(path)
+        client.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        return json.loads(_read_line(client))
+
+
+def _read_line(connection):
+    """
+    Read and return one newline-terminated message from connection
+    """
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = connection.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > MAX_MESSAGE_SIZE:
+            raise ValueError("message too large")
+    return data.decode("utf-8")
+
+
+def query_agent(path=None):
+    """
+    Return the credentials held by the agent listening on path, as a
+    dictionary with keys netbox_url and netbox_token.
+    Return None if no agent is listening, or the agent does not reply
+    with credentials.
+    """
+    if path is None:
+        path = socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        reply = _send(path, {"command": "get"})
+    except (OSError, ValueError):
+        return None
+    if "netbox_url" not in reply or "netbox_token" not in reply:
+        return None
+    return reply
+
+
+def stop_agent(path=None):
+    """
+    Ask the agent listening on path to exit.
+    Return True if an agent acknowledged, else False.
+    """
+    if path is None:
+        path = socket_path()
+    try:
+        reply = _send(path, {"command": "stop"})
+    except (OSError, ValueError):
+        return False
+    return reply.get("status") == "stopped"
+
+
+def _log(*args):
+    """
+    simple logger
+    """
+    log_message(args, __name__, OUR_VERSION)
+
+
+class CredentialAgent:
+    """
+    Hold credentials in memory and serve them over a user-only Unix socket.
+
+    credentials: dictionary with keys netbox_url and netbox_token
+    path: socket path
+    idle_timeout: seconds without a request after which the agent exits
+    """
+
+    def __init__(self, credentials, path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self._credentials = {
+            "netbox_url": credentials["netbox_url"],
+            "netbox_token": credentials["netbox_token"],
+        }
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self._server = None
+
+    def bind(self):
+        """
+        Create the socket directory (mode 0700), if it does not exist, and
+        the socket (mode 0600).  A stale socket left by an agent that did not
+        exit cleanly is replaced.  Raise RuntimeError if another agent is
+        already listening, or if the socket directory already exists and
+        is not safe (see _check_directory()).
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        try:
+            os.mkdir(directory, 0o700)
+            # mkdir applies the umask, which may not include group/other bits
+            os.chmod(directory, 0o700)
+        except FileExistsError:
+            self._check_directory(directory)
+        if os.path.exists(self.path):
+            if query_agent(self.path) is not None:
+                raise RuntimeError(f"an agent is already listening on {self.path}")
+            os.unlink(self.path)
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(self.path)
+        finally:
+            os.umask(previous_umask)
+        os.chmod(self.path, 0o600)
+        self._server.listen(8)
+
+    @staticmethod
+    def _check_directory(directory):
+        """
+        Raise RuntimeError unless directory is a directory owned by the user
+        that neither group nor others can write to.  Otherwise another user
+        could replace the socket with one of their own.
+        """
+        status = os.stat(directory)
+        if not stat.S_ISDIR(status.st_mode):
+            raise RuntimeError(f"{directory} is not a directory")
+        if status.st_uid != os.getuid():
+            raise RuntimeError(f"{directory} is not owned by the current user")
+        if status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise RuntimeError(
+                f"{directory} is writable by group or others. chmod 700 {directory}"
+            )
+
+    def serve(self):
+        """
+        Answer requests until stopped, or until idle_timeout seconds pass
+        without a request.  Remove the socket on exit.
+        """
+        deadline = time.monotonic() + self.idle_timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    _log(f"idle for {self.idle_timeout} seconds. Exiting.")
+                    return
+                self._server.settimeout(remaining)
+                try:
+                    connection, _ = self._server.accept()
+                except socket.timeout:
+                    continue
+                with connection:
+                    if self._handle(connection) is False:
+                        return
+                deadline = time.monotonic() + self.idle_timeout
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Close and remove the socket
+        """
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _peer_is_owner(connection):
+        """
+        Return False if the peer is known to be owned by another user.
+        On platforms without SO_PEERCRED, the socket's permissions are
+        relied on instead, and True is returned.
+        """
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        credentials = connection.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        _, uid, _ = struct.unpack("3i", credentials)
+        return uid == os.getuid()
+
+    def _handle(self, connection):
+        """
+        Answer one request.  Return False if the agent was asked to stop.
+        """
+        connection.settimeout(CLIENT_TIMEOUT)
+        if not self._peer_is_owner(connection):
+            return True
+        try:
+            request = json.loads(_read_line(connection))
+        except (OSError, ValueError):
+            return True
+        command = request.get("command") if isinstance(request, dict) else None
+        if command == "get":
+            reply = self._credentials
+        elif command == "stop":
+            reply = {"status": "stopped"}
+        else:
+            reply = {"error": f"unknown command {command}"}
+        try:
+            connection.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+        except OSError:
+            pass
+        return command != "stop"
@@ -26,15 +26,20 @@ and modify the config_file variable at the top of the file to point to your
 vault e.g.
 
 netbox_vault = /Users/arobel/repos/netbox-tools/lib/secrets
+
+3. Optional credential agent
+
+If a credential agent (see netbox_tools/credential_agent.py) is running,
+credentials are read from it, and the vault is not opened.  The Ansible
+libraries are imported only if the vault must be read.
 """
-from inspect import stack
 import sys
-from ansible.cli import CLI
-from ansible.parsing.dataloader import DataLoader
 
 from netbox_tools.config.netbox_config import LoadConfig
+from netbox_tools.credential_agent import query_agent, socket_path
+from netbox_tools.logger import log_message
 
-OUR_VERSION = 102
+OUR_VERSION = 104
 
 
 class NetboxCredentials:
@@ -43,9 +48,12 @@ class NetboxCredentials:
 
     token - via property token
     url - via property url
+
+    use_agent: if True (the default), ask the credential agent first, and
+    read the vault only if no agent is running.
     """
 
-    def __init__(self):
+    def __init__(self, use_agent=True):
         self._classname = __class__.__name__
         self.lib_version = OUR_VERSION
 
@@ -60,15 +68,14 @@ class NetboxCredentials:
 
         self._config = LoadConfig()
 
-        self._load_credentials()
+        if use_agent is False or self._load_credentials_from_agent() is False:
+            self._load_credentials()
 
     def log(self, *args):
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _verify_mandatory_keys(self):
         """
@@ -91,10 +98,28 @@ class NetboxCredentials:
                 return False
         return True
 
+    def _load_credentials_from_agent(self):
+        """
+        load credentials from the credential agent, if one is running.
+        return True if credentials were loaded, else False
+        """
+        credentials = query_agent(socket_path(self._config.config))
+        if credentials is None:
+            return False
+        self._credentials = {}
+        self._credentials["netbox_token"] = str(credentials["netbox_token"])
+        self._credentials["netbox_url"] = str(credentials["netbox_url"])
+        return True
+
     def _load_credentials(self):
         """
         load credentials from ansible vault
         """
+        # Imported here, since importing ansible is slow, and is not
+        # needed when credentials come from the agent.
+        from ansible.cli import CLI
+        from ansible.parsing.dataloader import DataLoader
+
         try:
             loader = DataLoader()
             vault_secrets = CLI.setup_vault_secrets(loader=loader, vault_ids=[])
@@ -2,79 +2,143 @@
 Name: device.py
 Description: Class for create, update, and delete operations on netbox device
 """
-from inspect import stack, getframeinfo, currentframe
 import sys
-from netbox_tools.common import cluster_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, cluster_id
 from netbox_tools.common import create_slug
 from netbox_tools.common import device_type_id
 from netbox_tools.common import get_device
 from netbox_tools.common import get_ip_address
 from netbox_tools.common import interface_id
-from netbox_tools.common import ip_address_id
 from netbox_tools.common import location_id
+from netbox_tools.common import netbox_version
 from netbox_tools.common import rack_id
 from netbox_tools.common import role_id
 from netbox_tools.common import site_id
 from netbox_tools.common import tag_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 105
+OUR_VERSION = 118
 
 
-def initialize_device_primary_ip(netbox_obj, device_name):
+def _log(*args):
     """
-    Initialize primary_ip4 and primary_ip to avoid errors in map_device_primary_ip()address.save()
+    simple logger
     """
-    device = get_device(netbox_obj, device_name)
-    device.primary_ip4 = None
-    device.primary_ip = None
-    device.save()
-    func_name = getframeinfo(currentframe()).function
-    print(f"{__name__}(v{OUR_VERSION}).{func_name}: device: {device_name}")
+    log_message(args, __name__, OUR_VERSION)
 
 
-def map_device_primary_ip(netbox_obj, device_name, interface_name, ip4):
+def release_device_primary_ip(netbox_obj, ip_address_obj, device_name):
     """
-    Map an existing IP address to an interface ID
-    args: netbox_obj, device_name, interface_name, ip4
+    netbox will not move an ip address to another device while it is the
+    primary ip of the device it is assigned to.  If ip_address_obj is
+    assigned to a device other than device_name, and is that device's
+    primary_ip4, clear that device's primary_ip4.
+
+    Sends no requests if ip_address_obj is unassigned, or is already
+    assigned to device_name.
+    """
+    parent = getattr(ip_address_obj.assigned_object, "device", None)
+    if parent is None or parent.name == device_name:
+        return
+    device = netbox_obj.dcim.devices.get(parent.id)
+    if device is None or device.primary_ip4 is None:
+        return
+    if device.primary_ip4.id != ip_address_obj.id:
+        return
+    device.update({"primary_ip4": None})
+    _log(
+        f"device: {parent.name}",
+        f"released primary_ip4 {ip_address_obj.address}",
+    )
+
+
+def set_device_primary_ip(netbox_obj, device_name, address_id):
+    """
+    Make the ip address with netbox id address_id the primary ip of a device.
+    The device is updated only if its primary_ip4 is not already address_id.
+    args: netbox_obj, device_name, address_id
 
     Where:
         netbox_obj - netbox object instance
         device_name - str() name of a device
-        interface_name - str() name of an interface
-        ip4 - str() ip address in A.B.C.D/E format
+        address_id - int() netbox id of an ip address assigned to the device
     """
-    address = get_ip_address(netbox_obj, ip4)
-    address.assigned_object_id = interface_id(netbox_obj, device_name, interface_name)
-    address.assigned_object_type = "dcim.interface"
-    address.save()
-    func_name = getframeinfo(currentframe()).function
-    print(
-        f"{__name__}(v{OUR_VERSION}).{func_name}: device: {device_name}",
-        f"interface {interface_name} ip_address {ip4}",
+    device = get_device(netbox_obj, device_name)
+    if device is None:
+        _log(
+            "exiting.",
+            f"device {device_name} not found in netbox.",
+        )
+        sys.exit(1)
+    if device.primary_ip4 is not None and device.primary_ip4.id == address_id:
+        _log(
+            "Nothing to do.",
+            f"device {device_name} primary_ip4 is unchanged.",
+        )
+        return
+    try:
+        device.update({"primary_ip4": address_id})
+    except Exception as _general_exception:
+        _log(
+            "exiting.",
+            f"Unable to set device {device_name} primary_ip4 to {address_id}.",
+            f"Exception detail: {_general_exception}",
+        )
+        sys.exit(1)
+    _log(
+        f"device: {device_name}",
+        f"primary_ip4 {address_id}",
     )
 
 
-def make_device_primary_ip(netbox_obj, device_name, ip4):
+def assign_device_primary_ip(netbox_obj, device_name, interface_name, ip4):
     """
-    Make an ip address the primary address for a device by mapping
-    the address ID to a device's primary_ip and primary_ip4.
+    Assign an existing ip address to a device interface, and make it the
+    device's primary ip.  Each is updated only if it differs from what
+    netbox already has.
+    args: netbox_obj, device_name, interface_name, ip4
+
+    Where:
+        netbox_obj - netbox object instance
+        device_name - str() name of a device
+        interface_name - str() name of an interface
+        ip4 - str() ip address in A.B.C.D/E format
     """
-    device = get_device(netbox_obj, device_name)
-    address_id = ip_address_id(netbox_obj, ip4)
-    device.primary_ip = address_id
-    device.primary_ip4 = address_id
-    device.save()
-    func_name = getframeinfo(currentframe()).function
-    print(f"{__name__}(v{OUR_VERSION}).{func_name}: device: {device_name} ip4 {ip4}")
+    address = get_ip_address(netbox_obj, ip4)
+    intf_id = interface_id(netbox_obj, device_name, interface_name)
+    if address is None or intf_id is None:
+        _log(
+            "exiting.",
+            f"ip_address {ip4} or device {device_name} interface {interface_name}",
+            "not found in netbox.",
+        )
+        sys.exit(1)
+    assignment = {
+        "assigned_object_type": "dcim.interface",
+        "assigned_object_id": intf_id,
+    }
+    changes = changed_fields(assignment, address)
+    if len(changes) != 0:
+        release_device_primary_ip(netbox_obj, address, device_name)
+        address.update(changes)
+        _log(
+            f"device: {device_name}",
+            f"interface {interface_name} ip_address {ip4}",
+        )
+    set_device_primary_ip(netbox_obj, device_name, address.id)
 
 
-class Device:
+class Device(AsyncEntity):
     """
     create, update, and delete operations on netbox dcim.devices
     """
 
     def __init__(self, netbox_obj, info):
         self._netbox_obj = netbox_obj
+        self._device_object = NOT_FETCHED
         self._info = info
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
@@ -93,9 +157,7 @@ class Device:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _fix_deprecations(self):
         """
@@ -155,9 +217,13 @@ class Device:
 
     def _set_device_role(self):
         """
-        add device role to args
+        add device role to args.  netbox 4.0 renamed device_role to role.
         """
-        self._args["device_role"] = role_id(self._netbox_obj, self.device_role)
+        version = netbox_version(self._netbox_obj).split(".")[:2]
+        if tuple(int(part) for part in version) >= (4, 0):
+            self._args["role"] = role_id(self._netbox_obj, self.device_role)
+        else:
+            self._args["device_role"] = role_id(self._netbox_obj, self.device_role)
 
     def _set_device_type(self):
         """
@@ -249,6 +315,27 @@ class Device:
         self._set_serial()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox device object so that the next access
+        to device_object retrieves it from netbox.  Called after each write.
+        """
+        self._device_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this device so that
+        subsequent lookups are sent to netbox.
+        Also discard this device's cached interface, console_port, and
+        console_server_port mappings, which may be affected by changes to it.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("device", self.device)
+        for object_type in ["interface", "console_port", "console_server_port"]:
+            resolver.invalidate_where(object_type, lambda key: key[0] == self.device)
+        self.refresh()
+
     def create(self):
         """
         create a device
@@ -262,21 +349,27 @@ class Device:
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a device
         """
+        changes = changed_fields(self._args, self.device_object)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. device {self.device} is unchanged.")
+            return
         self.log(f"{self.device}")
-        self._args["id"] = self.device_id
         try:
-            self.device_object.update(self._args)
+            self.device_object.update(changes)
         except Exception as _general_error:
             self.log(
                 f"exiting. Unable to update device {self.device}.",
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.refresh()
 
     def delete(self):
         """
@@ -295,6 +388,29 @@ class Device:
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this device
+        """
+        return record.name == self.device
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_or_update()
+        self._generate_args_create_or_update()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_delete()
 
     def create_or_update(self):
         """
@@ -307,6 +423,30 @@ class Device:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for devices
+        """
+        return self._netbox_obj.dcim.devices
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this device.
+        netbox_tools.bulk.Bulk merges these to retrieve many devices per request.
+        """
+        return {"name": self.device}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this device's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the device.
+        """
+        return ("device", self.device)
+
     @property
     def cluster(self):
         """
@@ -322,7 +462,10 @@ class Device:
         """
         return the netbox device object
         """
-        return self._netbox_obj.dcim.devices.get(name=self.device)
+        if self._device_object is not NOT_FETCHED:
+            return self._device_object
+        self._device_object = self._netbox_obj.dcim.devices.get(name=self.device)
+        return self._device_object
 
     @property
     def device_id(self):
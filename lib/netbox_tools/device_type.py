@@ -2,16 +2,19 @@
 Name: device_type.py
 Description: Create, update, delete netbox device types
 """
-from inspect import stack
 import sys
-from netbox_tools.common import manufacturer_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, manufacturer_id
 from netbox_tools.common import create_slug
 from netbox_tools.common import tag_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 106
+OUR_VERSION = 116
 
 
-class DeviceType:
+class DeviceType(AsyncEntity):
     """
     Create, update, delete netbox device types
 
@@ -35,6 +38,7 @@ class DeviceType:
 
     def __init__(self, netbox_obj, info):
         self._netbox_obj = netbox_obj
+        self._device_type_obj = NOT_FETCHED
         self._info = info
         self._classname = __class__.__name__
         self.lib_version = OUR_VERSION
@@ -56,9 +60,7 @@ class DeviceType:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_delete_keys(self):
         for key in self._mandatory_delete_keys:
@@ -122,6 +124,23 @@ class DeviceType:
         self._set_slug()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox device type object so that the next access
+        to device_type_obj retrieves it from netbox.  Called after each write.
+        """
+        self._device_type_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this device_type so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("device_type", self.model)
+        self.refresh()
+
     def delete(self):
         """
         delete a device_type
@@ -141,6 +160,8 @@ class DeviceType:
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -155,24 +176,52 @@ class DeviceType:
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a device_type
         """
+        changes = changed_fields(self._args, self.device_type_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. device_type {self.model} is unchanged.")
+            return
         self.log(f"{self.model}")
         if self.device_type_id is None:
             self.log(f"{self.model} does not exist in netbox. Skipping.")
             return
         self._args["id"] = self.device_type_id
         try:
-            self.device_type_obj.update(self._args)
+            self.device_type_obj.update(changes)
         except Exception as _general_error:
             self.log(
                 f"exiting. Unable to update device_type {self.model}.",
                 f"Exception detail: {_general_error}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this device_type
+        """
+        return record.model == self.model
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_create_update_keys()
+        self._generate_create_update_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_delete_keys()
 
     def create_or_update(self):
         """
@@ -185,6 +234,30 @@ class DeviceType:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for device_types
+        """
+        return self._netbox_obj.dcim.device_types
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this device_type.
+        netbox_tools.bulk.Bulk merges these to retrieve many device_types per request.
+        """
+        return {"model": self.model}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this device_type's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the device_type.
+        """
+        return ("device_type", self.model)
+
     @property
     def comments(self):
         """
@@ -225,7 +298,10 @@ class DeviceType:
         return an instance of the netbox device_type
         If the device_type does not exist, None will be returned
         """
-        return self._netbox_obj.dcim.device_types.get(model=self.model)
+        if self._device_type_obj is not NOT_FETCHED:
+            return self._device_type_obj
+        self._device_type_obj = self._netbox_obj.dcim.device_types.get(model=self.model)
+        return self._device_type_obj
 
     @property
     def device_type_id(self):
@@ -0,0 +1,137 @@
+"""
+Name: diff.py
+Description: Compare create/update arguments with an existing netbox record
+
+The entity classes generate arguments (self._args) in the form netbox expects
+on POST/PATCH, e.g. {"site": 4, "status": "active", "tags": [1, 3]}.  netbox
+returns records in a richer form, e.g. {"site": {"id": 4, "name": "dc1", ...},
+"status": {"value": "active", "label": "Active"}, "tags": [{"id": 3, ...},
+{"id": 1, ...}]}.
+
+changed_fields() normalizes both sides to a common form and returns only the
+arguments whose values differ from the record.  Normalization rules:
+
+- nested objects are reduced to their id
+- choices are reduced to their value
+- cable terminations are reduced to (object_type, object_id)
+- lists (e.g. tags) are compared without regard to order
+- None and "" are equal
+- numbers are compared numerically (1 == 1.0 == "1.0")
+- mac addresses and colors are compared case-insensitively
+- dictionaries (e.g. custom_fields) are compared on the keys in the arguments
+- arguments for fields that later netbox versions renamed (e.g. device_role,
+  renamed role in netbox 4) are compared with the renamed field if the record
+  has it
+- other arguments for which the record has no field are ignored, since netbox
+  ignores them too
+
+Usage:
+
+from netbox_tools.diff import changed_fields
+
+changes = changed_fields(self._args, self.tag_obj)
+if len(changes) == 0:
+    return
+self.tag_obj.update(changes)
+"""
+
+OUR_VERSION = 101
+
+CASE_INSENSITIVE_FIELDS = {"color", "mac_address"}
+
+# Fields that are never compared
+IGNORED_FIELDS = {"id"}
+
+# argument name: name of the field in records of later netbox versions
+RENAMED_FIELDS = {"device_role": "role"}
+
+
+def normalize(value):
+    """
+    Return value reduced to the common form described in the module docstring
+    """
+    if isinstance(value, dict):
+        if "value" in value and "label" in value:
+            return value["value"]
+        if "id" in value:
+            return value["id"]
+        if "object_type" in value and "object_id" in value:
+            return (value["object_type"], value["object_id"])
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and not _is_termination(value):
+        return sorted((normalize(item) for item in value), key=repr)
+    return value
+
+
+def _is_termination(value):
+    """
+    Return True if value is a normalized (object_type, object_id) tuple
+    """
+    return (
+        isinstance(value, tuple)
+        and len(value) == 2
+        and isinstance(value[0], str)
+        and "." in value[0]
+    )
+
+
+def _is_number(value):
+    """
+    Return True if value is an int or float (but not a bool)
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_equal(field, desired, current):
+    """
+    Return True if desired (an argument value) is equivalent to current
+    (the corresponding record value) after normalization.
+    """
+    desired = normalize(desired)
+    current = normalize(current)
+    if desired in (None, "") and current in (None, ""):
+        return True
+    if field in CASE_INSENSITIVE_FIELDS:
+        if isinstance(desired, str) and isinstance(current, str):
+            return desired.upper() == current.upper()
+    if _is_number(desired) or _is_number(current):
+        try:
+            return float(desired) == float(current)
+        except (TypeError, ValueError):
+            return False
+    if isinstance(desired, dict) and isinstance(current, dict):
+        for key, value in desired.items():
+            if not is_equal(key, value, current.get(key)):
+                return False
+        return True
+    if isinstance(desired, list) and isinstance(current, list):
+        if len(desired) != len(current):
+            return False
+        for desired_item, current_item in zip(desired, current):
+            if not is_equal(field, desired_item, current_item):
+                return False
+        return True
+    return desired == current
+
+
+def changed_fields(args, record):
+    """
+    Return a dictionary containing the items in args whose values differ
+    from the corresponding fields in record (a pynetbox Record).
+    If record is None, return a copy of args.
+    """
+    if record is None:
+        return dict(args)
+    current = dict(record)
+    changes = {}
+    for field, desired in args.items():
+        if field in IGNORED_FIELDS:
+            continue
+        record_field = field
+        if field not in current:
+            record_field = RENAMED_FIELDS.get(field)
+            if record_field not in current:
+                continue
+        if not is_equal(field, desired, current[record_field]):
+            changes[field] = desired
+    return changes
@@ -0,0 +1,184 @@
+"""
+Name: graphql.py
+Description: Fetch report data from netbox's GraphQL API in one query
+
+Reports such as device_print_filtered.py print fields of objects nested in
+each device (device_type.model, role, location, primary_ip4, tags).  The
+REST API returns brief nested objects, and reading a field they lack makes
+pynetbox fetch the nested object, one request per device.  netbox's GraphQL
+API (/graphql/) returns exactly the fields asked for, nested to any depth,
+for every device, in one request.
+
+GraphQLClient posts queries to a GraphQL endpoint.  graphql_client()
+returns one for the netbox instance returned by common.netbox(), sharing
+its http session (and so its pooling, retries, and timeouts).
+
+device_report() returns every device as a DictRecord (see mirror.py)
+shaped like the REST representation, holding only the fields the device
+reports use, so report code reads device.device_type.model etc. the same
+way whichever backend it uses.  netbox 4 renamed device_role to role.  Both
+are set, whichever version is queried.
+
+For offline testing, benchmarks/graphql_stub.py serves a GraphQL endpoint
+from fixture data.
+
+Usage:
+
+from netbox_tools.common import netbox, netbox_version
+from netbox_tools.graphql import device_report, graphql_client
+
+netbox_instance = netbox()
+client = graphql_client(netbox_instance)
+for device in device_report(client, netbox_version(netbox_instance)):
+    print(device.name, device.device_type.model, device.role.name)
+"""
+import sys
+from netbox_tools.lazy import lazy_import
+from netbox_tools.logger import log_message
+from netbox_tools.mirror import DictRecord
+
+requests = lazy_import("requests")
+
+OUR_VERSION = 101
+
+# {role} is device_role before netbox 4.0, role after
+DEVICE_REPORT_QUERY = """
+query {
+  device_list {
+    id
+    name
+    serial
+    status
+    {role} { name }
+    location { name }
+    device_type { model }
+    primary_ip4 { id address }
+    tags { name slug }
+  }
+}
+"""
+
+
+def graphql_url(netbox_instance):
+    """
+    Return the url of the GraphQL endpoint of netbox_instance, whose
+    base_url is the url of the REST API, e.g. https://netbox/api
+    """
+    base_url = netbox_instance.base_url.rstrip("/")
+    if base_url.endswith("/api"):
+        base_url = base_url[: -len("/api")]
+    return f"{base_url}/graphql/"
+
+
+def graphql_client(netbox_instance):
+    """
+    Return a GraphQLClient for netbox_instance, sharing its token and
+    http session
+    """
+    return GraphQLClient(
+        graphql_url(netbox_instance),
+        token=netbox_instance.token,
+        session=netbox_instance.http_session,
+    )
+
+
+def _role_field(version):
+    """
+    Return the name of a device's role field in netbox version (e.g. "3.7")
+    """
+    major = int(version.split(".")[0])
+    if major >= 4:
+        return "role"
+    return "device_role"
+
+
+def _device_values(values, role_field):
+    """
+    Return a GraphQL device (a dictionary) in the shape of its REST
+    representation, as far as the device reports need
+    """
+    device = dict(values)
+    device["id"] = int(device["id"])
+    role = device.pop(role_field, None)
+    device["role"] = role
+    device["device_role"] = role
+    # graphene (netbox 3) returns the choice's enum name, e.g. ACTIVE
+    status = str(device.get("status") or "").lower()
+    device["status"] = {"value": status, "label": status.capitalize()}
+    if device.get("primary_ip4") is not None:
+        primary_ip4 = dict(device["primary_ip4"])
+        primary_ip4["id"] = int(primary_ip4["id"])
+        primary_ip4["display"] = primary_ip4["address"]
+        device["primary_ip4"] = primary_ip4
+    return device
+
+
+def device_report(client, version):
+    """
+    Return a list of every device in the netbox queried by client (a
+    GraphQLClient), as DictRecords.  See the module docstring.
+
+    version: version of that netbox, e.g. "3.7", from common.netbox_version()
+    """
+    role_field = _role_field(version)
+    data = client.query(DEVICE_REPORT_QUERY.replace("{role}", role_field))
+    return [
+        DictRecord(_device_values(values, role_field)) for values in data["device_list"]
+    ]
+
+
+class GraphQLClient:
+    """
+    Send queries to a GraphQL endpoint.
+
+    url: url of the endpoint, e.g. https://netbox/graphql/
+    token: netbox API token, or None to send no Authorization header
+    session: requests.Session to send queries with.  Default: a new session
+    """
+
+    def __init__(self, url, token=None, session=None):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        self.url = url
+        self.token = token
+        self.session = session
+
+    def log(self, *args):
+        """
+        simple logger
+        """
+        log_message(args, self._classname, self.lib_version)
+
+    def query(self, query, variables=None):
+        """
+        Send query, with variables (a dictionary), and return the data it
+        selects.  Exit with error if the endpoint cannot be reached, or
+        reports errors.
+        """
+        if self.session is None:
+            self.session = requests.Session()
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if self.token is not None:
+            headers["Authorization"] = f"Token {self.token}"
+        payload = {"query": query, "variables": variables or {}}
+        try:
+            response = self.session.post(self.url, json=payload, headers=headers)
+        except requests.RequestException as _request_exception:
+            self.log(
+                f"exiting. Unable to reach {self.url}.",
+                f"Exception detail: {_request_exception}",
+            )
+            sys.exit(1)
+        try:
+            result = response.json()
+        except ValueError:
+            self.log(
+                f"exiting. {self.url} returned status {response.status_code}",
+                f"and a body that is not JSON: {response.text[:200]}",
+            )
+            sys.exit(1)
+        if result.get("errors"):
+            messages = [error.get("message", str(error)) for error in result["errors"]]
+            self.log(f"exiting. {self.url} returned errors: {'; '.join(messages)}")
+            sys.exit(1)
+        return result["data"]
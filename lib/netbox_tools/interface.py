@@ -2,14 +2,18 @@
 Name: interface.py
 Description: Create, update, delete operations on netbox interfaces
 """
-from inspect import stack
 import sys
-from netbox_tools.common import device_id, netbox_id_untagged_vlan
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.choices import get_choices
+from netbox_tools.common import NOT_FETCHED, device_id, netbox_id_untagged_vlan
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 104
+OUR_VERSION = 115
 
 
-class Interface:
+class Interface(AsyncEntity):
     """
     create, update, and delete operations on netbox dcim.interfaces
     """
@@ -18,6 +22,7 @@ class Interface:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._interface_object = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_create_update_keys = ["interface", "device"]
@@ -45,19 +50,13 @@ class Interface:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _populate_valid_choices(self):
         """
         retrieve valid interface choices from the users netbox instance
         """
-        self.valid_choices = {}
-        choices_dict = self._netbox_obj.dcim.interfaces.choices()
-        for item in choices_dict:
-            valid_values = choices_dict[item]
-            self.valid_choices[item] = [item["value"] for item in valid_values]
+        self.valid_choices = get_choices(self._netbox_obj, "dcim", "interfaces")
 
     def _fix_deprecations(self):
         """
@@ -249,6 +248,23 @@ class Interface:
         self._set_mtu()
         self._set_untagged_vlan()
 
+    def refresh(self):
+        """
+        Discard the cached netbox interface object so that the next access
+        to interface_object retrieves it from netbox.  Called after each write.
+        """
+        self._interface_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this interface so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("interface", (self.device, self.interface))
+        self.refresh()
+
     def delete(self):
         """
         Delete an interface, if it exists in netbox.
@@ -268,6 +284,8 @@ class Interface:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -282,21 +300,51 @@ class Interface:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         Update an interface.
         """
+        changes = changed_fields(self._args, self.interface_object)
+        if len(changes) == 0:
+            self.log(
+                f"Nothing to do. device {self.device} interface {self.interface} is unchanged."
+            )
+            return
         self.log(f"device {self.device} interface {self.interface}")
         self._args["id"] = self.interface_id
         try:
-            self.interface_object.update(self._args)
+            self.interface_object.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"exiting. Unable to update interface {self.interface}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this interface
+        """
+        return record.device.name == self.device and record.name == self.interface
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_create_update_keys()
+        self._generate_create_update_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_delete_keys()
 
     def create_or_update(self):
         """
@@ -309,6 +357,30 @@ class Interface:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for interfaces
+        """
+        return self._netbox_obj.dcim.interfaces
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this interface.
+        netbox_tools.bulk.Bulk merges these to retrieve many interfaces per request.
+        """
+        return {"device": self.device, "name": self.interface}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this interface's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the interface.
+        """
+        return ("interface", (self.device, self.interface))
+
     @property
     def description(self):
         """
@@ -360,9 +432,12 @@ class Interface:
         properties will exit with an error, so no need here for
         error handling.
         """
-        return self._netbox_obj.dcim.interfaces.get(
+        if self._interface_object is not NOT_FETCHED:
+            return self._interface_object
+        self._interface_object = self._netbox_obj.dcim.interfaces.get(
             device=self.device, name=self.interface
         )
+        return self._interface_object
 
     @property
     def interface_enabled(self):
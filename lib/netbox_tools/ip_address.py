@@ -4,23 +4,29 @@ Description: create, update and delete operations on netbox ip_address
 
 NOTES:
 
-1. For create and update operations, this class also maps and assigns the
-IP address as a device's primary IP.  We shouldn't have to do this, but
-are seeing Netbox get into a state where the IPAM -> IP Addresses
-page will not load if the IP address is not mapped to a device.
+1. For create and update operations, this class also assigns the IP address
+to the device interface and makes it the device's primary IP.  We shouldn't
+have to do this, but are seeing Netbox get into a state where the
+IPAM -> IP Addresses page will not load if the IP address is not mapped to
+a device.
+
+2. The interface assignment is part of the ip address create/update
+arguments, so it costs no extra request.  The device is updated only if its
+primary_ip4 is not already this address.
 """
-from inspect import stack
 import sys
-from netbox_tools.common import device_id
-from netbox_tools.device import (
-    map_device_primary_ip,
-    make_device_primary_ip,
-    initialize_device_primary_ip,
-)
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.choices import get_choices
+from netbox_tools.common import NOT_FETCHED, interface_id, tag_id
+from netbox_tools.device import release_device_primary_ip, set_device_primary_ip
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 103
+OUR_VERSION = 115
 
-class IpAddress:
+
+class IpAddress(AsyncEntity):
     """
     create, update, delete operations on Netbox ipam.ip_address
 
@@ -42,6 +48,7 @@ class IpAddress:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._ip_address_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_create_update_keys = set()
@@ -63,19 +70,13 @@ class IpAddress:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _populate_valid_choices(self):
         """
         retrieve valid ip address choices from the users netbox instance
         """
-        self._valid_choices = {}
-        choices_dict = self._netbox_obj.ipam.ip_addresses.choices()
-        for item in choices_dict:
-            valid_values = choices_dict[item]
-            self._valid_choices[item] = [item["value"] for item in valid_values]
+        self._valid_choices = get_choices(self._netbox_obj, "ipam", "ip_addresses")
 
     def _fix_deprecations(self):
         """
@@ -120,8 +121,20 @@ class IpAddress:
     def _set_address(self):
         self._args["address"] = self.ip4
 
-    def _set_assigned_object_id(self):
-        self._args["assigned_object_id"] = device_id(self._netbox_obj, self.device)
+    def _set_assigned_object(self):
+        """
+        Update args with the interface to which the ip address is assigned.
+        Exit with error if the interface does not exist in netbox.
+        """
+        intf_id = interface_id(self._netbox_obj, self.device, self.interface)
+        if intf_id is None:
+            self.log(
+                f"exiting. device {self.device} interface {self.interface}",
+                "not found in netbox.",
+            )
+            sys.exit(1)
+        self._args["assigned_object_type"] = "dcim.interface"
+        self._args["assigned_object_id"] = intf_id
 
     def _set_description(self):
         """
@@ -187,12 +200,29 @@ class IpAddress:
         Generate all supported arguments for create and update methods
         """
         self._set_address()
-        self._set_assigned_object_id()
+        self._set_assigned_object()
         self._set_description()
         self._set_role()
         self._set_status()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox ip address object so that the next access
+        to ip_address_obj retrieves it from netbox.  Called after each write.
+        """
+        self._ip_address_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this ip address so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("ip_address", self.ip4)
+        self.refresh()
+
     def delete(self):
         """
         Delete an ip address.
@@ -210,35 +240,75 @@ class IpAddress:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
-        Create an ip address.
+        Create an ip address.  Return the new netbox ip address object.
         """
         self.log(f"device {self.device} address {self.ip4}")
         try:
-            self._netbox_obj.ipam.ip_addresses.create(self._args)
+            ip_address_obj = self._netbox_obj.ipam.ip_addresses.create(self._args)
         except Exception as _general_exception:
             self.log(
                 f"exiting. Unable to create device {self.device} ip_address {self.ip4}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
+        return ip_address_obj
 
     def update(self):
         """
         Update an ip address.
         """
+        self._update(self.ip_address_obj)
+
+    def _update(self, ip_address_obj):
+        """
+        Update ip_address_obj with the arguments that differ from it.
+        If the ip address is moving from another device, on which it is
+        the primary ip, release it from that device first.
+        """
+        changes = changed_fields(self._args, ip_address_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. ip_address {self.ip4} is unchanged.")
+            return
         self.log(f"device {self.device} address {self.ip4}")
-        self._args["id"] = self.ip_address_id
+        if "assigned_object_id" in changes:
+            release_device_primary_ip(self._netbox_obj, ip_address_obj, self.device)
         try:
-            self.ip_address_obj.update(self._args)
+            ip_address_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"exiting. Unable to update device {self.device} ip_address {self.ip4}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this ip address
+        """
+        return record.address == self.ip4
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_create_update_keys()
+        self._generate_create_update_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_delete_keys()
 
     def create_or_update(self):
         """
@@ -246,13 +316,45 @@ class IpAddress:
         """
         self._validate_create_update_keys()
         self._generate_create_update_args()
-        initialize_device_primary_ip(self._netbox_obj, self.device)
-        if self.ip_address_obj is None:
-            self.create()
+        ip_address_obj = self.ip_address_obj
+        if ip_address_obj is None:
+            ip_address_obj = self.create()
         else:
-            self.update()
-        map_device_primary_ip(self._netbox_obj, self.device, self.interface, self.ip4)
-        make_device_primary_ip(self._netbox_obj, self.device, self.ip4)
+            self._update(ip_address_obj)
+        set_device_primary_ip(self._netbox_obj, self.device, ip_address_obj.id)
+
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for ip addresses
+        """
+        return self._netbox_obj.ipam.ip_addresses
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this ip address.
+        netbox_tools.bulk.Bulk merges these to retrieve many ip addresses per request.
+        """
+        return {"address": self.ip4}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this ip address's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the ip address.
+        """
+        return ("ip_address", self.ip4)
+
+    @property
+    def primary_ip_parent(self):
+        """
+        Return the tuple (parent type, parent name) of the device whose
+        primary ip this ip address is made.  Used by
+        netbox_tools.aio.AsyncEntity.async_create_or_update()
+        """
+        return ("device", self.device)
 
     @property
     def description(self):
@@ -285,6 +387,8 @@ class IpAddress:
         """
         Return the ip address object associated with the ip address and mask set by the caller.
         """
+        if self._ip_address_obj is not NOT_FETCHED:
+            return self._ip_address_obj
         try:
             address, mask = self.ip4.split("/")
         except Exception as _general_exception:
@@ -294,7 +398,10 @@ class IpAddress:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
-        return self._netbox_obj.ipam.ip_addresses.get(address=address, mask=mask)
+        self._ip_address_obj = self._netbox_obj.ipam.ip_addresses.get(
+            address=address, mask=mask
+        )
+        return self._ip_address_obj
 
     @property
     def ip_address_id(self):
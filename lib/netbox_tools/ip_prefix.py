@@ -2,14 +2,16 @@
 Name: ip_prefix.py
 Description: Create, update, delete operations on netbox ip_prefix
 """
-from inspect import stack
 import sys
-from netbox_tools.common import site_id, vlan_vid_to_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, site_id, vlan_vid_to_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
 
-OUR_VERSION = 102
+OUR_VERSION = 110
 
 
-class IpPrefix:
+class IpPrefix(AsyncEntity):
     """
     Create, update, delete operations on netbox ip_prefix
     """
@@ -18,6 +20,7 @@ class IpPrefix:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._prefix_object = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_keys = set()
@@ -36,9 +39,7 @@ class IpPrefix:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys(self):
         """
@@ -88,6 +89,7 @@ class IpPrefix:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
 
     def create(self):
         """
@@ -102,21 +104,60 @@ class IpPrefix:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
 
     def update(self):
         """
         update a prefix
         """
+        changes = changed_fields(self._args, self.prefix_object)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. prefix {self.prefix} is unchanged.")
+            return
         self.log(f"prefix {self.prefix}")
         self._args["id"] = self.prefix_id
         try:
-            self.prefix_object.update(self._args)
+            self.prefix_object.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"Exiting. Unable to update prefix {self.prefix}",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Discard the cached netbox prefix object so that the next access
+        to prefix_object retrieves it from netbox.  Called after each write.
+        """
+        self._prefix_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Prefixes are not cached by netbox_tools.resolver, so there is
+        nothing to discard.  Used by netbox_tools.bulk.Bulk
+        Also discard the cached netbox object (see refresh()).
+        """
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this prefix
+        """
+        return record.prefix == self.prefix
+
+    def prepare_create_or_update(self):
+        """
+        Return create/update arguments.  These are validated and generated
+        when this object is instantiated.  Used by netbox_tools.bulk.Bulk
+        """
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -127,6 +168,21 @@ class IpPrefix:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for prefixes
+        """
+        return self._netbox_obj.ipam.prefixes
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this prefix.
+        netbox_tools.bulk.Bulk merges these to retrieve many prefixes per request.
+        """
+        return {"prefix": self.prefix}
+
     @property
     def description(self):
         """
@@ -144,7 +200,10 @@ class IpPrefix:
         prefix set by the caller. If the caller didn't set prefix,
         this is caught in _validate_keys, so no need here for error handling.
         """
-        return self._netbox_obj.ipam.prefixes.get(prefix=self.prefix)
+        if self._prefix_object is not NOT_FETCHED:
+            return self._prefix_object
+        self._prefix_object = self._netbox_obj.ipam.prefixes.get(prefix=self.prefix)
+        return self._prefix_object
 
     @property
     def prefix(self):
@@ -0,0 +1,50 @@
+"""
+Name: lazy.py
+Description: Defer importing heavy modules until they are first used
+
+pynetbox, requests, and urllib3 take a noticeable fraction of a second to
+import.  Scripts import netbox_tools modules before parsing their arguments,
+so if these were imported eagerly, --help and --version would pay that cost
+too, as would scripts that fail argument validation.
+
+lazy_import() returns a module object whose real import is deferred until
+one of its attributes is first accessed, e.g. pynetbox.api(...), or an
+except clause that names pynetbox.RequestError being evaluated.
+
+Usage:
+
+from netbox_tools.lazy import lazy_import
+
+pynetbox = lazy_import("pynetbox")   # nothing imported yet
+netbox_instance = pynetbox.api(url, token=token)   # pynetbox imported here
+
+Measure script startup with benchmarks/startup.py at the top of this repo.
+"""
+import importlib.util
+import sys
+import threading
+
+OUR_VERSION = 100
+
+_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """
+    Return module name, imported lazily.
+    If name is already imported (or lazily imported), return it from
+    sys.modules.  If name cannot be found, raise ModuleNotFoundError now,
+    rather than on first use.
+    """
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
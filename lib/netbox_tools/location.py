@@ -2,16 +2,19 @@
 Name: location.py
 Description: create and update operations on netbox location
 """
-from inspect import stack
 import sys
-from netbox_tools.common import create_slug
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, create_slug
 from netbox_tools.common import tag_id
 from netbox_tools.common import site_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 102
+OUR_VERSION = 112
 
 
-class Location:
+class Location(AsyncEntity):
     """
     create and update operations on netbox location
     """
@@ -20,6 +23,7 @@ class Location:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._location_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self.mandatory_keys_create_update = set()
@@ -30,9 +34,7 @@ class Location:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys_create_update(self):
         """
@@ -85,6 +87,23 @@ class Location:
         self._set_slug()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox location object so that the next access
+        to location_obj retrieves it from netbox.  Called after each write.
+        """
+        self._location_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this location so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("location", self.name)
+        self.refresh()
+
     def delete(self):
         """
         delete a location
@@ -98,6 +117,8 @@ class Location:
                 f"Exception detail: {_general_exception}",
             )
             return
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -112,21 +133,48 @@ class Location:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a location
         """
+        changes = changed_fields(self._args, self.location_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. location {self.name} is unchanged.")
+            return
         self.log(f"location {self.name}")
         self._args["id"] = self.location_id
         try:
-            self.location_obj.update(self._args)
+            self.location_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"WARNING. Unable to update location {self.name}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this location
+        """
+        return record.name == self.name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_update()
+        self._generate_args_create_update()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -139,6 +187,30 @@ class Location:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for locations
+        """
+        return self._netbox_obj.dcim.locations
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this location.
+        netbox_tools.bulk.Bulk merges these to retrieve many locations per request.
+        """
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this location's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the location.
+        """
+        return ("location", self.name)
+
     @property
     def location_obj(self):
         """
@@ -146,7 +218,10 @@ class Location:
         name set by the caller.
         Netbox will return None if the location is not found.
         """
-        return self._netbox_obj.dcim.locations.get(name=self.name)
+        if self._location_obj is not NOT_FETCHED:
+            return self._location_obj
+        self._location_obj = self._netbox_obj.dcim.locations.get(name=self.name)
+        return self._location_obj
 
     @property
     def location_id(self):
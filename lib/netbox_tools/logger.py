@@ -0,0 +1,250 @@
+"""
+Name: logger.py
+Description: Logging shared by the classes, modules, and scripts of this library
+
+The log() methods of the classes (and the log() functions of the modules
+and scripts) pass their arguments to log_message(), which sends them to
+the stdlib logger named netbox_tools.  Messages look as they always have:
+
+Device(v105).create: message      (classes and modules, name set)
+create(v110): message             (scripts, name None)
+common.site_id: message           (modules without a version)
+
+where create is the function that called log().  Its name is read from
+the caller's frame.  Unlike inspect.stack(), this does not read source
+files or search sys.modules, so it costs little, and nothing at all for
+messages below the logging level.  The message (the arguments joined with
+spaces) is only built when a handler formats it.
+
+Levels:
+
+- ERROR if the message starts with exiting or error (case-insensitive)
+- WARNING if it starts with warning
+- INFO otherwise
+
+Messages go to stderr, so that scripts' output (e.g. csv or json, see
+output.py) is not mixed with them.  configure_logging() selects:
+
+- the minimum level: INFO, or WARNING if quiet
+- the format: text (as above) or json (one JSON object per line, with
+  time, level, source, version, function, thread, and message)
+- whether messages are queued: a handler puts them on a queue, and a
+  QueueListener thread writes them, so that threads logging (e.g. the
+  workers of entity_create_update_all.py) do not block on the console.
+  The queue is drained at exit.
+
+The scripts' --quiet and --log_format options (see parse_args()) are passed
+to configure_logging().  Until it is called, messages are written, at INFO,
+as text, without a queue.
+
+Usage:
+
+from netbox_tools.logger import log_message
+
+class Foo:
+    def log(self, *args):
+        log_message(args, self._classname, self.lib_version)
+"""
+import atexit
+import logging
+import queue
+import sys
+from netbox_tools.lazy import lazy_import
+
+json = lazy_import("json")
+handlers = lazy_import("logging.handlers")
+
+OUR_VERSION = 100
+
+LOGGER = logging.getLogger("netbox_tools")
+
+LOG_FORMATS = ("text", "json")
+DEFAULT_LOG_FORMAT = "text"
+
+ERROR_PREFIXES = ("exiting", "error")
+WARNING_PREFIXES = ("warning",)
+
+# holds the QueueListener of the current configuration, under key
+# "listener", if messages are queued
+_state = {}
+
+
+def message_level(args):
+    """
+    Return the level of the message made of args (see the module docstring)
+    """
+    if len(args) == 0:
+        return logging.INFO
+    first = str(args[0]).lower()
+    if first.startswith(ERROR_PREFIXES):
+        return logging.ERROR
+    if first.startswith(WARNING_PREFIXES):
+        return logging.WARNING
+    return logging.INFO
+
+
+class _Message:
+    """
+    The arguments of log(), joined with spaces when the message is formatted
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+    def __str__(self):
+        return " ".join(str(arg) for arg in self.args)
+
+
+def log_message(args, name=None, version=None, level=None):
+    """
+    Log the message made of args (a tuple of strings, joined with spaces).
+
+    name: the class or module logging, or None for scripts
+    version: its OUR_VERSION
+    level: a logging level.  If None, see message_level().
+
+    Called from the log() methods and functions of this library, so the
+    function to report is the caller of that log().
+    """
+    if level is None:
+        level = message_level(args)
+    if not LOGGER.isEnabledFor(level):
+        return
+    # frame 0: log_message(), 1: log(), 2: the function that called log()
+    function = sys._getframe(2).f_code.co_name  # pylint: disable=protected-access
+    record = LOGGER.makeRecord(
+        LOGGER.name,
+        level,
+        "",
+        0,
+        _Message(args),
+        (),
+        None,
+        func=function,
+        extra={"source": name, "version": version},
+    )
+    LOGGER.handle(record)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Format records as the print-based loggers of this library did
+    """
+
+    def format(self, record):
+        version = "" if record.version is None else f"(v{record.version})"
+        if record.source is None:
+            prefix = f"{record.funcName}{version}"
+        else:
+            prefix = f"{record.source}{version}.{record.funcName}"
+        return f"{prefix}: {record.getMessage()}"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line
+    """
+
+    def format(self, record):
+        return json.dumps(
+            {
+                "time": record.created,
+                "level": record.levelname,
+                "source": record.source,
+                "version": record.version,
+                "function": record.funcName,
+                "thread": record.threadName,
+                "message": record.getMessage(),
+            }
+        )
+
+
+class _QueueHandler(logging.Handler):
+    """
+    Put records on a queue, unformatted, for a QueueListener to format and
+    write from its own thread
+    """
+
+    def __init__(self, messages):
+        super().__init__()
+        self.queue = messages
+
+    def emit(self, record):
+        self.queue.put_nowait(record)
+
+
+def stop_listener():
+    """
+    Write the messages still queued, and stop the QueueListener, if any
+    """
+    listener = _state.pop("listener", None)
+    if listener is not None:
+        listener.stop()
+
+
+def configure_logging(log_format=DEFAULT_LOG_FORMAT, quiet=False, queued=True):
+    """
+    Configure the netbox_tools logger.  See the module docstring.
+
+    log_format: text or json
+    quiet: if True, log only warnings and errors
+    queued: if True, write messages from a QueueListener thread
+    """
+    stop_listener()
+    for handler in list(LOGGER.handlers):
+        LOGGER.removeHandler(handler)
+    handler = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(TextFormatter())
+    if queued:
+        messages = queue.SimpleQueue()
+        listener = handlers.QueueListener(messages, handler)
+        listener.start()
+        _state["listener"] = listener
+        handler = _QueueHandler(messages)
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(logging.WARNING if quiet else logging.INFO)
+    LOGGER.propagate = False
+
+
+def parse_args(parser):
+    """
+    Add --quiet and --log_format to parser (an argparse.ArgumentParser),
+    parse the command line, configure logging from it, and return the
+    parsed arguments
+    """
+    help_quiet = "Log only warnings and errors."
+    help_log_format = "Format of log messages: text, or json (one JSON object"
+    help_log_format += f" per line). Default: {DEFAULT_LOG_FORMAT}."
+
+    ex_prefix = " Example: "
+    ex_log_format = f"{ex_prefix} --log_format json"
+
+    logging_args = parser.add_argument_group(title="LOGGING ARGS")
+
+    logging_args.add_argument(
+        "--quiet",
+        dest="quiet",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_quiet,
+    )
+    logging_args.add_argument(
+        "--log_format",
+        dest="log_format",
+        required=False,
+        default=DEFAULT_LOG_FORMAT,
+        choices=LOG_FORMATS,
+        help=f"{help_log_format} {ex_log_format}",
+    )
+
+    args = parser.parse_args()
+    configure_logging(args.log_format, args.quiet)
+    return args
+
+
+configure_logging(queued=False)
+atexit.register(stop_listener)
@@ -3,13 +3,16 @@ Name: manufacturer.py
 Description: create, update, and delete operations on netbox manufacturer
 """
 
-from inspect import stack
 import sys
-from netbox_tools.common import create_slug
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, create_slug
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 103
+OUR_VERSION = 113
 
-class Manufacturer:
+class Manufacturer(AsyncEntity):
     """
     create, update, and delete operations on netbox manufacturer
     """
@@ -18,6 +21,7 @@ class Manufacturer:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._manufacturer_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_create_update_keys = set()
@@ -30,9 +34,7 @@ class Manufacturer:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_delete_keys(self):
         """
@@ -68,6 +70,23 @@ class Manufacturer:
             if key in self._info:
                 self._args[key] = self._info[key]
 
+    def refresh(self):
+        """
+        Discard the cached netbox manufacturer object so that the next access
+        to manufacturer_obj retrieves it from netbox.  Called after each write.
+        """
+        self._manufacturer_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this manufacturer so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("manufacturer", self.name)
+        self.refresh()
+
     def delete(self):
         """
         delete a manufacturer
@@ -87,6 +106,8 @@ class Manufacturer:
                 f"Exception detail: {_general_exception}",
             )
             return
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -101,21 +122,49 @@ class Manufacturer:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a manufacturer
         """
+        changes = changed_fields(self._args, self.manufacturer_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. manufacturer {self.name} is unchanged.")
+            return
         self.log(f"{self.name}")
         self._args["id"] = self.manufacturer_id
         try:
-            self.manufacturer_obj.update(self._args)
+            self.manufacturer_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"Error. Unable to update manufacturer {self.name}",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this manufacturer
+        """
+        return record.name == self.name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_create_update_keys()
+        self._generate_create_update_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_delete_keys()
 
     def create_or_update(self):
         """
@@ -128,6 +177,30 @@ class Manufacturer:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for manufacturers
+        """
+        return self._netbox_obj.dcim.manufacturers
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this manufacturer.
+        netbox_tools.bulk.Bulk merges these to retrieve many manufacturers per request.
+        """
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this manufacturer's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the manufacturer.
+        """
+        return ("manufacturer", self.name)
+
     @property
     def name(self):
         """
@@ -142,7 +215,10 @@ class Manufacturer:
         manufacturer name set by the caller.
         Netbox will return None if this does not exist.
         """
-        return self._netbox_obj.dcim.manufacturers.get(name=self.name)
+        if self._manufacturer_obj is not NOT_FETCHED:
+            return self._manufacturer_obj
+        self._manufacturer_obj = self._netbox_obj.dcim.manufacturers.get(name=self.name)
+        return self._manufacturer_obj
 
     @property
     def manufacturer_id(self):
@@ -0,0 +1,369 @@
+"""
+Name: metrics.py
+Description: Per-request metrics of the http session used to talk to netbox
+
+When http_metrics is True in config.yml, the session returned by
+transport.make_session() (and so common.netbox()) records, for every
+response: the method, endpoint, status, bytes received, latency, and the
+code that sent the request.  When the script exits, a summary is printed
+to stderr, with the number of requests, errors, bytes, total time, and
+p50/p95/p99 latency, per endpoint and per caller.
+
+endpoint is the path of the request below /api/, with ids replaced by {id},
+e.g. GET dcim/devices/{id}/.
+
+caller is the code in this library that sent the request: Class.method for
+the entity classes (e.g. Device.refresh, Bulk._lookup), module.function
+for functions (e.g. common.site_id), or script:function for requests sent
+by a script directly.  This shows which lookups dominate a run.
+
+latency is from sending the request to reading the whole response body.
+Requests that fail without a response (e.g. connection errors) are not
+recorded.
+
+If http_metrics_file is set, the metrics are also written to that file at
+exit: in Prometheus text format if its name ends with .prom (for
+node_exporter's textfile collector), else as JSON.
+
+Usage:
+
+from netbox_tools.common import netbox
+
+netbox_instance = netbox()
+...
+netbox_instance.http_session.metrics.print_summary()
+"""
+import atexit
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+OUR_VERSION = 100
+
+# upper bounds (seconds) of the Prometheus latency histogram buckets
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# modules whose frames are skipped when looking for a request's caller
+SKIPPED_MODULES = ("netbox_tools.metrics", "netbox_tools.transport")
+
+ID_RE = re.compile(r"^\d+$")
+
+
+def percentile(values, percent):
+    """
+    Return the percent (e.g. 95) percentile of values (a non-empty list),
+    using the nearest-rank method
+    """
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def endpoint_name(url):
+    """
+    Return the endpoint of url: its path below /api/, with ids replaced
+    by {id}, e.g. dcim/devices/{id}/
+    """
+    path = url.split("?", 1)[0].split("://", 1)[-1]
+    path = path.split("/", 1)[1] if "/" in path else ""
+    if "api/" in f"/{path}":
+        path = f"/{path}".split("/api/", 1)[1]
+    parts = ["{id}" if ID_RE.match(part) else part for part in path.split("/")]
+    return "/".join(parts)
+
+
+def find_caller():
+    """
+    Return a name for the code that sent the current request (see the
+    module docstring)
+    """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("netbox_tools.") and module not in SKIPPED_MODULES:
+            instance = frame.f_locals.get("self")
+            if instance is not None:
+                return f"{instance.__class__.__name__}.{frame.f_code.co_name}"
+            return f"{module.split('.', 1)[1]}.{frame.f_code.co_name}"
+        if module == "__main__" and fallback is None:
+            script = os.path.basename(frame.f_code.co_filename)
+            fallback = f"{script}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+class RequestMetrics:
+    """
+    Thread-safe recorder of per-request metrics.  See the module docstring.
+    """
+
+    def __init__(self):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        self._lock = threading.Lock()
+        # group (endpoint or caller): {key: statistics}
+        self._groups = {"endpoint": {}, "caller": {}}
+        self.started = time.time()
+
+    def hook(self, response, *args, **kwargs):
+        """
+        requests response hook.  Record the metrics of response.
+        """
+        start = time.monotonic()
+        nbytes = 0
+        if not kwargs.get("stream"):
+            nbytes = len(response.content)
+            try:
+                nbytes = response.raw.tell() or nbytes
+            except (AttributeError, OSError, ValueError):
+                pass
+        latency = response.elapsed.total_seconds() + time.monotonic() - start
+        self.record(
+            response.request.method,
+            endpoint_name(response.request.url),
+            response.status_code,
+            nbytes,
+            latency,
+            find_caller(),
+        )
+        return response
+
+    def record(self, method, endpoint, status, nbytes, latency, caller):
+        """
+        Record one request
+        """
+        keys = {"endpoint": f"{method} {endpoint}", "caller": caller}
+        with self._lock:
+            for group, key in keys.items():
+                stats = self._groups[group].setdefault(
+                    key, {"latencies": [], "bytes": 0, "statuses": {}}
+                )
+                stats["latencies"].append(latency)
+                stats["bytes"] += nbytes
+                stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+
+    def summary(self, group):
+        """
+        Return a list of dictionaries, one per key of group (endpoint or
+        caller), with the number of requests, errors (status 400 or
+        higher), bytes, and total, p50, p95, and p99 latency.
+        Sorted by total latency, highest first.
+        """
+        rows = []
+        for key, stats in self._snapshot()[group].items():
+            latencies = stats["latencies"]
+            statuses = stats["statuses"]
+            errors = [count for status, count in statuses.items() if status >= 400]
+            rows.append(
+                {
+                    group: key,
+                    "count": len(latencies),
+                    "errors": sum(errors),
+                    "bytes": stats["bytes"],
+                    "total": sum(latencies),
+                    "p50": percentile(latencies, 50),
+                    "p95": percentile(latencies, 95),
+                    "p99": percentile(latencies, 99),
+                    "statuses": statuses,
+                }
+            )
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def print_summary(self, stream=None):
+        """
+        Print the summary of each group to stream (default: sys.stderr)
+        """
+        stream = sys.stderr if stream is None else stream
+        fmt = "{:<44} {:>7} {:>6} {:>11} {:>9} {:>8} {:>8} {:>8}"
+        for group in self._groups:
+            rows = self.summary(group)
+            if len(rows) == 0:
+                continue
+            print(f"--- netbox requests per {group} ---", file=stream)
+            print(
+                fmt.format(
+                    group,
+                    "count",
+                    "errors",
+                    "bytes",
+                    "total_s",
+                    "p50_ms",
+                    "p95_ms",
+                    "p99_ms",
+                ),
+                file=stream,
+            )
+            for row in rows:
+                print(
+                    fmt.format(
+                        row[group][:44],
+                        row["count"],
+                        row["errors"],
+                        row["bytes"],
+                        f"{row['total']:.2f}",
+                        f"{row['p50'] * 1000:.1f}",
+                        f"{row['p95'] * 1000:.1f}",
+                        f"{row['p99'] * 1000:.1f}",
+                    ),
+                    file=stream,
+                )
+        stream.flush()
+
+    def to_dict(self):
+        """
+        Return the summaries of all groups, as a dictionary
+        """
+        result = {"started": self.started, "finished": time.time()}
+        for group in self._groups:
+            result[group] = self.summary(group)
+        return result
+
+    def prometheus_text(self):
+        """
+        Return the metrics in Prometheus text format
+        """
+        lines = []
+        groups = self._snapshot()
+        endpoints = groups["endpoint"]
+        callers = groups["caller"]
+        lines.append("# HELP netbox_tools_requests_total netbox requests by endpoint.")
+        lines.append("# TYPE netbox_tools_requests_total counter")
+        for key, stats in sorted(endpoints.items()):
+            method, endpoint = key.split(" ", 1)
+            for status, count in sorted(stats["statuses"].items()):
+                labels = _labels(method=method, endpoint=endpoint, status=status)
+                lines.append(f"netbox_tools_requests_total{{{labels}}} {count}")
+        lines.append(
+            "# HELP netbox_tools_response_bytes_total bytes received by endpoint."
+        )
+        lines.append("# TYPE netbox_tools_response_bytes_total counter")
+        for key, stats in sorted(endpoints.items()):
+            method, endpoint = key.split(" ", 1)
+            labels = _labels(method=method, endpoint=endpoint)
+            lines.append(
+                f"netbox_tools_response_bytes_total{{{labels}}} {stats['bytes']}"
+            )
+        lines.append(
+            "# HELP netbox_tools_request_duration_seconds netbox request latency."
+        )
+        lines.append("# TYPE netbox_tools_request_duration_seconds histogram")
+        for key, stats in sorted(endpoints.items()):
+            method, endpoint = key.split(" ", 1)
+            latencies = stats["latencies"]
+            for bucket in BUCKETS:
+                labels = _labels(method=method, endpoint=endpoint, le=bucket)
+                count = sum(1 for latency in latencies if latency <= bucket)
+                lines.append(
+                    f"netbox_tools_request_duration_seconds_bucket{{{labels}}} {count}"
+                )
+            labels = _labels(method=method, endpoint=endpoint, le="+Inf")
+            lines.append(
+                f"netbox_tools_request_duration_seconds_bucket{{{labels}}} {len(latencies)}"
+            )
+            labels = _labels(method=method, endpoint=endpoint)
+            lines.append(
+                f"netbox_tools_request_duration_seconds_sum{{{labels}}} {sum(latencies)}"
+            )
+            lines.append(
+                f"netbox_tools_request_duration_seconds_count{{{labels}}} {len(latencies)}"
+            )
+        lines.append(
+            "# HELP netbox_tools_caller_requests_total netbox requests by caller."
+        )
+        lines.append("# TYPE netbox_tools_caller_requests_total counter")
+        for key, stats in sorted(callers.items()):
+            labels = _labels(caller=key)
+            lines.append(
+                f"netbox_tools_caller_requests_total{{{labels}}} {len(stats['latencies'])}"
+            )
+        lines.append(
+            "# HELP netbox_tools_caller_duration_seconds_total time spent in netbox"
+            " requests by caller."
+        )
+        lines.append("# TYPE netbox_tools_caller_duration_seconds_total counter")
+        for key, stats in sorted(callers.items()):
+            labels = _labels(caller=key)
+            lines.append(
+                "netbox_tools_caller_duration_seconds_total"
+                f"{{{labels}}} {sum(stats['latencies'])}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def _snapshot(self):
+        """
+        Return a copy of the recorded statistics
+        """
+        with self._lock:
+            return {
+                group: {
+                    key: {
+                        "latencies": list(stats["latencies"]),
+                        "bytes": stats["bytes"],
+                        "statuses": dict(stats["statuses"]),
+                    }
+                    for key, stats in entries.items()
+                }
+                for group, entries in self._groups.items()
+            }
+
+    def write(self, path):
+        """
+        Write the metrics to path: Prometheus text format if path ends with
+        .prom, else JSON.  The file is replaced atomically, as the
+        Prometheus textfile collector requires.
+        """
+        if path.endswith(".prom"):
+            contents = self.prometheus_text()
+        else:
+            contents = json.dumps(self.to_dict(), indent=1) + "\n"
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(contents)
+        os.replace(temporary, path)
+
+    def report(self, path=None):
+        """
+        Print the summary to stderr, and write the metrics to path, if set.
+        Called at exit, see install().
+        """
+        self.print_summary()
+        if path is None:
+            return
+        try:
+            self.write(os.path.expanduser(path))
+        except OSError as _os_error:
+            print(
+                f"{self._classname}(v{self.lib_version}).report:",
+                f"WARNING. Unable to write {path}. Exception detail: {_os_error}",
+                file=sys.stderr,
+            )
+
+
+def _labels(**labels):
+    """
+    Return labels formatted for Prometheus, e.g. method="GET",status="200"
+    """
+    values = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        values.append(f'{name}="{value}"')
+    return ",".join(values)
+
+
+def install(session, path=None):
+    """
+    Record the metrics of every response received by session (a
+    requests.Session), and report them at exit (see
+    RequestMetrics.report()).  Return the RequestMetrics, which is also
+    set as session.metrics.
+    """
+    metrics = RequestMetrics()
+    session.hooks["response"].append(metrics.hook)
+    session.metrics = metrics
+    atexit.register(metrics.report, path)
+    return metrics
@@ -0,0 +1,768 @@
+"""
+Name: mirror.py
+Description: Offline SQLite mirror of netbox inventory for read-only scripts
+
+Read-only scripts (device_print.py, device_count.py, racks_print.py, etc)
+can answer from a local snapshot of netbox, rather than from the live API.
+This takes milliseconds, and needs no network access or vault password.
+
+The mirror is a SQLite file holding one table per mirrored endpoint (see
+MIRROR_TABLES).  Each row holds an object's id, the object as returned by
+netbox (JSON), and a handful of indexed columns extracted from it (name,
+site_id, role, etc) that queries filter on.  A meta table records when
+each endpoint was snapshotted, and from which netbox.
+
+Take or refresh a snapshot with scripts/mirror_snapshot.py.  Once a full
+snapshot exists, Mirror.refresh() brings it up to date incrementally, by
+reading netbox's change log (object changes) since the last change it
+applied, and re-fetching only the objects that were created or updated
+(and the mirrored objects that embed them, e.g. the devices of a renamed
+site), and removing those that were deleted.  If the change log has been
+pruned past that point (see CHANGELOG_RETENTION in netbox), or the mirror
+is of another netbox, refresh() takes a full snapshot instead.
+
+Read-only
+scripts that support --from_mirror then use netbox_mirror() in place of
+common.netbox().  The object it returns supports the subset of the pynetbox
+API those scripts use:
+
+mirror.dcim.devices.all()
+mirror.dcim.devices.filter(site_id=4, tag=["foo", "bar"])
+mirror.dcim.devices.get(name="leaf_1")
+mirror.dcim.devices.count(role_id=3)
+
+Records returned are DictRecord instances, which expose fields as
+attributes like pynetbox records do (device.site.name, device.status.value).
+Filters are limited to the indexed columns of each table.  As in netbox,
+a list of values for one filter matches any of them, except for tag, which
+must match all of them.
+
+The mirror file is configured with mirror_file in config.yml.  The default
+is ~/.netbox_tools/mirror.sqlite3
+
+Usage:
+
+from netbox_tools.mirror import netbox_mirror
+
+mirror = netbox_mirror()
+for rack in mirror.dcim.racks.all():
+    print(rack.name, rack.site.name)
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from netbox_tools.common import netbox_version
+from netbox_tools.config.netbox_config import LoadConfig
+from netbox_tools.logger import log_message
+from netbox_tools.paginator import DEFAULT_WORKERS, parallel_all
+
+OUR_VERSION = 106
+
+DEFAULT_MIRROR_FILE = os.path.join("~", ".netbox_tools", "mirror.sqlite3")
+
+# table: (netbox app, netbox endpoint, {column: path to the value in the record})
+# A path is a dotted list of keys.  Alternatives are separated by "|", and the
+# first that resolves is used (e.g. device_role was renamed role in netbox 4).
+# A path starting with "[]" indexes each item of a list (e.g. tag slugs).
+MIRROR_TABLES = {
+    "devices": (
+        "dcim",
+        "devices",
+        {
+            "name": "name",
+            "site_id": "site.id",
+            "site": "site.slug",
+            "role_id": "role.id|device_role.id",
+            "role": "role.slug|device_role.slug",
+            "device_type_id": "device_type.id",
+            "model": "device_type.model",
+            "location_id": "location.id",
+            "location": "location.slug",
+            "rack_id": "rack.id",
+            "status": "status.value",
+            "tag": "tags[].slug",
+        },
+    ),
+    "interfaces": (
+        "dcim",
+        "interfaces",
+        {
+            "name": "name",
+            "device_id": "device.id",
+            "device": "device.name",
+        },
+    ),
+    "ip_addresses": (
+        "ipam",
+        "ip_addresses",
+        {
+            "address": "address",
+            "device_id": "assigned_object.device.id",
+            "virtual_machine_id": "assigned_object.virtual_machine.id",
+        },
+    ),
+    "racks": (
+        "dcim",
+        "racks",
+        {
+            "name": "name",
+            "site_id": "site.id",
+            "location_id": "location.id",
+        },
+    ),
+    "device_types": (
+        "dcim",
+        "device_types",
+        {
+            "model": "model",
+            "manufacturer_id": "manufacturer.id",
+        },
+    ),
+    "device_roles": ("dcim", "device_roles", {"name": "name", "slug": "slug"}),
+    "locations": (
+        "dcim",
+        "locations",
+        {"name": "name", "slug": "slug", "site_id": "site.id"},
+    ),
+    "sites": ("dcim", "sites", {"name": "name", "slug": "slug"}),
+    "tags": ("extras", "tags", {"name": "name", "slug": "slug"}),
+}
+
+# netbox object type (as recorded in the change log): mirror table
+OBJECT_TYPES = {
+    "dcim.device": "devices",
+    "dcim.interface": "interfaces",
+    "ipam.ipaddress": "ip_addresses",
+    "dcim.rack": "racks",
+    "dcim.devicetype": "device_types",
+    "dcim.devicerole": "device_roles",
+    "dcim.location": "locations",
+    "dcim.site": "sites",
+    "extras.tag": "tags",
+}
+
+# netbox object type: [(table, path)]
+# Mirrored objects embed a brief representation (name, slug, etc) of related
+# objects.  When an object of a type below changes, the rows of table whose
+# data holds its id at path (see MIRROR_TABLES) are re-fetched too.
+DEPENDENT_TABLES = {
+    "dcim.site": [
+        ("devices", "site.id"),
+        ("racks", "site.id"),
+        ("locations", "site.id"),
+    ],
+    "dcim.location": [
+        ("devices", "location.id"),
+        ("racks", "location.id"),
+        ("locations", "parent.id"),
+    ],
+    "dcim.rack": [("devices", "rack.id")],
+    "dcim.devicerole": [("devices", "role.id"), ("devices", "device_role.id")],
+    "dcim.devicetype": [("devices", "device_type.id")],
+    "dcim.manufacturer": [
+        ("device_types", "manufacturer.id"),
+        ("devices", "device_type.manufacturer.id"),
+    ],
+    "dcim.platform": [("devices", "platform.id")],
+    "dcim.device": [
+        ("interfaces", "device.id"),
+        ("ip_addresses", "assigned_object.device.id"),
+    ],
+    "dcim.interface": [("ip_addresses", "assigned_object.id")],
+    "extras.tag": [("devices", "tags[].id")],
+}
+
+# number of ids per request when re-fetching changed objects
+REFETCH_CHUNK_SIZE = 100
+
+# columns holding one or more values, stored as ",value1,value2,"
+MULTI_VALUE_COLUMNS = {"tag"}
+
+
+def _log(*args):
+    """
+    simple logger.  Writes to stderr, so that scripts' csv and json output
+    (see output.py) is not mixed with it.
+    """
+    log_message(args, __name__, OUR_VERSION)
+
+
+def mirror_file(config=None):
+    """
+    Return the path of the mirror file, from mirror_file in config (the
+    contents of config.yml) if set, else DEFAULT_MIRROR_FILE
+    """
+    if config is None:
+        config = LoadConfig().config
+    return os.path.expanduser(config.get("mirror_file") or DEFAULT_MIRROR_FILE)
+
+
+def netbox_mirror(path=None):
+    """
+    Return a read-only Mirror of the mirror file at path (default: see
+    mirror_file()), after logging how old its snapshot is.
+    Exit with error if the mirror file does not exist.
+    """
+    if path is None:
+        path = mirror_file()
+    if not os.path.exists(path):
+        _log(
+            f"exiting. Mirror {path} does not exist.",
+            "Create it with mirror_snapshot.py",
+        )
+        sys.exit(1)
+    mirror = Mirror(path)
+    _log(mirror.freshness())
+    return mirror
+
+
+def _extract(record, path):
+    """
+    Return the value at path (see MIRROR_TABLES) in record (a dictionary),
+    or None if path does not resolve.
+    """
+    for alternative in path.split("|"):
+        value = record
+        keys = alternative.split(".")
+        for index, key in enumerate(keys):
+            if key.endswith("[]"):
+                items = value.get(key[:-2]) if isinstance(value, dict) else None
+                rest = ".".join(keys[index + 1 :])
+                values = [_extract(item, rest) for item in items or []]
+                value = [item for item in values if item is not None]
+                break
+            value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                break
+        if value is not None:
+            return value
+    return None
+
+
+def _change_log(netbox_instance):
+    """
+    Return the pynetbox endpoint of netbox_instance's change log.
+    It moved from extras to core in netbox 4.1.
+    """
+    version = netbox_version(netbox_instance).split(".")[:2]
+    if tuple(int(part) for part in version) >= (4, 1):
+        return netbox_instance.core.object_changes
+    return netbox_instance.extras.object_changes
+
+
+def _first_change_id(change_log, ordering):
+    """
+    Return the id of the first change in change_log when sorted by
+    ordering ("id" for the oldest, "-id" for the newest), or None if the
+    change log is empty
+    """
+    # with an offset, pynetbox fetches only the first page
+    for change in change_log.filter(ordering=ordering, limit=1, offset=0):
+        return change.id
+    return None
+
+
+def _like_escape(value):
+    """
+    Return value with the LIKE wildcards (% and _), and the escape character
+    itself, escaped with backslash, for use in a LIKE pattern with ESCAPE '\\'
+    e.g. tag slug "a_b" must not match "axb"
+    """
+    for character in ("\\", "%", "_"):
+        value = value.replace(character, f"\\{character}")
+    return value
+
+
+def _json_condition(path):
+    """
+    Return an SQL condition matching rows whose data holds one of the ids
+    bound to the placeholder {} (filled in by the caller) at path (see
+    MIRROR_TABLES)
+    """
+    if "[]" in path:
+        items, rest = path.split("[].", 1)
+        return (
+            f"EXISTS (SELECT 1 FROM json_each(data, '$.{items}')"
+            f" WHERE json_extract(value, '$.{rest}') IN ({{}}))"
+        )
+    return f"json_extract(data, '$.{path}') IN ({{}})"
+
+
+class DictRecord:
+    """
+    Read-only view of a netbox object (a dictionary, as returned by the
+    netbox API) that exposes its fields as attributes, like pynetbox's
+    Record.  Nested objects are also DictRecords.
+
+    str() returns the object's name, label, or display field, as pynetbox
+    does.  dict() returns the original dictionary.
+    """
+
+    def __init__(self, values):
+        self._values = values
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "_values":
+            raise AttributeError(name)
+        try:
+            return self._wrap(self._values[name])
+        except KeyError as error:
+            raise AttributeError(name) from error
+
+    @classmethod
+    def _wrap(cls, value):
+        """
+        Return value, with dictionaries (and dictionaries in lists) wrapped
+        in DictRecord
+        """
+        if isinstance(value, dict):
+            return cls(value)
+        if isinstance(value, list):
+            return [cls._wrap(item) for item in value]
+        return value
+
+    def __iter__(self):
+        return iter(self._values.items())
+
+    def __str__(self):
+        for key in ("name", "label", "display"):
+            if self._values.get(key):
+                return str(self._values[key])
+        return ""
+
+    def __repr__(self):
+        return str(self)
+
+    def __eq__(self, other):
+        if isinstance(other, DictRecord):
+            return self._values == other._values
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._values.get("id"))
+
+
+class Mirror:
+    """
+    SQLite mirror of netbox.  See the module docstring.
+
+    path: path of the mirror file.  Created by snapshot() if it does not exist.
+    """
+
+    def __init__(self, path):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        self.path = path
+        self.base_url = f"mirror:{path}"
+        self._local = threading.local()
+
+    def log(self, *args):
+        """
+        simple logger
+        """
+        log_message(args, self._classname, self.lib_version)
+
+    @property
+    def connection(self):
+        """
+        Return this thread's connection to the mirror file.
+        SQLite connections cannot be shared between threads.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._local.connection = connection
+        return connection
+
+    @property
+    def version(self):
+        """
+        Return the version of the netbox that was mirrored, as pynetbox's
+        Api.version does, or "0" if unknown
+        """
+        return self.get_meta("netbox_version") or "0"
+
+    def __getattr__(self, app):
+        if app.startswith("_"):
+            raise AttributeError(app)
+        if app not in {app for app, _, _ in MIRROR_TABLES.values()}:
+            raise AttributeError(f"{app} is not mirrored")
+        return _MirrorApp(self, app)
+
+    @staticmethod
+    def table_for(app, endpoint):
+        """
+        Return the mirror table for netbox endpoint app.endpoint,
+        or None if it is not mirrored
+        """
+        for table, (table_app, table_endpoint, _) in MIRROR_TABLES.items():
+            if (table_app, table_endpoint) == (app, endpoint):
+                return table
+        return None
+
+    def _create_table(self, table):
+        """
+        (Re)create table and its indexes.  Must be called in a transaction.
+        """
+        columns = MIRROR_TABLES[table][2]
+        self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+        column_sql = "".join(f", {column} TEXT" for column in columns)
+        self.connection.execute(
+            f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, data TEXT{column_sql})"
+        )
+        for column in columns:
+            self.connection.execute(
+                f"CREATE INDEX {table}_{column} ON {table} ({column})"
+            )
+
+    def _row(self, table, record):
+        """
+        Return the row (a tuple) that stores record (a dictionary) in table
+        """
+        row = [record["id"], json.dumps(record)]
+        for column, path in MIRROR_TABLES[table][2].items():
+            value = _extract(record, path)
+            if column in MULTI_VALUE_COLUMNS:
+                value = f",{','.join(str(item) for item in value or [])},"
+            elif value is not None:
+                value = str(value)
+            row.append(value)
+        return tuple(row)
+
+    def store(self, table, records):
+        """
+        Insert, or replace, records (dictionaries) in table.
+        Must be called in a transaction.
+        """
+        columns = ["id", "data"] + list(MIRROR_TABLES[table][2])
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)})"
+        sql += f" VALUES ({placeholders})"
+        self.connection.executemany(
+            sql,
+            [self._row(table, record) for record in records],
+        )
+
+    def remove(self, table, ids):
+        """
+        Delete the objects with netbox ids in ids from table.
+        Must be called in a transaction.
+        """
+        self.connection.executemany(
+            f"DELETE FROM {table} WHERE id = ?", [(object_id,) for object_id in ids]
+        )
+
+    def set_meta(self, key, value):
+        """
+        Record value for key in the meta table.  Must be called in a transaction.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    def get_meta(self, key):
+        """
+        Return the value for key in the meta table, or None if not set
+        """
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def snapshot(self, netbox_instance, tables=None, workers=DEFAULT_WORKERS):
+        """
+        Fetch every object of each table in tables (default: all tables in
+        MIRROR_TABLES) from netbox_instance, and replace the table with them.
+        Pages of each table are fetched in parallel from up to workers
+        threads (see paginator.py).
+
+        All tables are replaced in one transaction, so readers see either
+        the previous snapshot or the new one, never a mix.
+        Return a dictionary, keyed on table, of the number of objects stored.
+        """
+        if tables is None:
+            tables = list(MIRROR_TABLES)
+        # Changes made while we fetch are re-applied by the next refresh()
+        checkpoint = None
+        if set(tables) == set(MIRROR_TABLES):
+            checkpoint = _first_change_id(_change_log(netbox_instance), "-id") or 0
+        fetched = {}
+        for table in tables:
+            app, endpoint, _ = MIRROR_TABLES[table]
+            self.log(f"fetching {app}.{endpoint}")
+            started = time.time()
+            records = parallel_all(
+                getattr(getattr(netbox_instance, app), endpoint), workers=workers
+            )
+            fetched[table] = (started, [dict(record) for record in records])
+        counts = {}
+        with self.connection:
+            for table, (started, records) in fetched.items():
+                self._create_table(table)
+                self.store(table, records)
+                self.set_meta(f"{table}.snapshot_time", started)
+                counts[table] = len(records)
+            self.set_meta("netbox_url", netbox_instance.base_url)
+            self.set_meta("netbox_version", netbox_version(netbox_instance))
+            if checkpoint is not None:
+                self.set_meta("last_change_id", checkpoint)
+        return counts
+
+    def _resync_reason(self, netbox_instance, change_log):
+        """
+        Return why refresh() must take a full snapshot, or None if it can
+        apply the change log
+        """
+        if self.get_meta("netbox_url") != netbox_instance.base_url:
+            return f"the mirror is not of {netbox_instance.base_url}"
+        if any(self.snapshot_time(table) is None for table in MIRROR_TABLES):
+            return "the mirror does not hold every table"
+        if self.get_meta("last_change_id") is None:
+            return "the mirror has no change log checkpoint"
+        checkpoint = int(self.get_meta("last_change_id"))
+        oldest = _first_change_id(change_log, "id")
+        # netbox prunes the oldest changes first.  If any change at or
+        # before our checkpoint remains, none after it were pruned.
+        if oldest is None or oldest > checkpoint:
+            return f"the change log has been pruned past change {checkpoint}"
+        return None
+
+    def _dependents(self, object_type, ids):
+        """
+        Return a dictionary, keyed on table, of the set of ids of mirrored
+        objects that embed an object of object_type whose id is in ids
+        """
+        dependents = {}
+        placeholders = ", ".join("?" for _ in ids)
+        for table, path in DEPENDENT_TABLES.get(object_type, []):
+            sql = f"SELECT id FROM {table} WHERE "
+            sql += _json_condition(path).format(placeholders)
+            rows = self.connection.execute(sql, list(ids)).fetchall()
+            dependents.setdefault(table, set()).update(row[0] for row in rows)
+        return dependents
+
+    def _refetch(self, netbox_instance, table, ids):
+        """
+        Return a list of the objects (dictionaries) of table with an id
+        in ids, fetched from netbox_instance.  Objects that no longer exist
+        are not returned.
+        """
+        app, endpoint, _ = MIRROR_TABLES[table]
+        endpoint = getattr(getattr(netbox_instance, app), endpoint)
+        ids = sorted(ids)
+        records = []
+        for index in range(0, len(ids), REFETCH_CHUNK_SIZE):
+            chunk = ids[index : index + REFETCH_CHUNK_SIZE]
+            records.extend(dict(record) for record in endpoint.filter(id=chunk))
+        return records
+
+    def refresh(self, netbox_instance, workers=DEFAULT_WORKERS):
+        """
+        Bring the mirror up to date with netbox_instance by applying the
+        changes in its change log since the last change applied (see the
+        module docstring).  Take a full snapshot instead if the change log
+        cannot be used, fetching its pages from up to workers threads.
+
+        All changes are applied in one transaction.
+        Return a dictionary, keyed on table, of the number of objects
+        stored or removed.
+        """
+        change_log = _change_log(netbox_instance)
+        reason = self._resync_reason(netbox_instance, change_log)
+        if reason is not None:
+            self.log(f"taking a full snapshot, since {reason}")
+            return self.snapshot(netbox_instance, workers=workers)
+        started = time.time()
+        checkpoint = int(self.get_meta("last_change_id"))
+        self.log(f"fetching changes after change {checkpoint}")
+        # (object type, object id): action of the object's latest change
+        actions = {}
+        for change in change_log.filter(id__gt=checkpoint, ordering="id"):
+            change = dict(change)
+            checkpoint = max(checkpoint, change["id"])
+            key = (change["changed_object_type"], change["changed_object_id"])
+            actions[key] = change["action"]["value"]
+        self.log(f"{len(actions)} objects changed, up to change {checkpoint}")
+        changed = {}
+        deleted = {table: set() for table in MIRROR_TABLES}
+        for (object_type, object_id), action in actions.items():
+            changed.setdefault(object_type, set()).add(object_id)
+            table = OBJECT_TYPES.get(object_type)
+            if table is not None and action == "delete":
+                deleted[table].add(object_id)
+        refetch = {table: set() for table in MIRROR_TABLES}
+        for object_type, ids in changed.items():
+            table = OBJECT_TYPES.get(object_type)
+            if table is not None:
+                refetch[table].update(ids)
+            for dependent, dependent_ids in self._dependents(object_type, ids).items():
+                refetch[dependent].update(dependent_ids)
+        fetched = {}
+        for table, ids in refetch.items():
+            ids -= deleted[table]
+            if len(ids) != 0:
+                self.log(f"fetching {len(ids)} {table}")
+                fetched[table] = self._refetch(netbox_instance, table, ids)
+                # not returned: deleted after the last change we read
+                deleted[table].update(ids - {record["id"] for record in fetched[table]})
+        counts = {}
+        with self.connection:
+            for table in MIRROR_TABLES:
+                self.store(table, fetched.get(table, []))
+                self.remove(table, deleted[table])
+                self.set_meta(f"{table}.snapshot_time", started)
+                counts[table] = len(fetched.get(table, [])) + len(deleted[table])
+            self.set_meta("last_change_id", checkpoint)
+        return counts
+
+    def snapshot_time(self, table=None):
+        """
+        Return the time (seconds since the epoch) at which table was
+        snapshotted, or, if table is None, the oldest snapshot time of all
+        mirrored tables.  Return None if there is no snapshot.
+        """
+        if table is not None:
+            value = self.get_meta(f"{table}.snapshot_time")
+            return None if value is None else float(value)
+        times = [self.snapshot_time(table) for table in MIRROR_TABLES]
+        times = [value for value in times if value is not None]
+        if len(times) == 0:
+            return None
+        return min(times)
+
+    def freshness(self, table=None):
+        """
+        Return a message describing when table (or all tables, if None)
+        was snapshotted
+        """
+        snapshot_time = self.snapshot_time(table)
+        source = self.get_meta("netbox_url")
+        if snapshot_time is None:
+            return f"Mirror {self.path} has no snapshot of {table or 'any table'}."
+        age = int(time.time() - snapshot_time)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot_time))
+        return (
+            f"Using mirror {self.path} of {source}, snapshot taken {stamp}"
+            f" ({age // 3600}h {age % 3600 // 60}m ago)."
+        )
+
+    def query(self, table, filters, select="data", limit=None, offset=None):
+        """
+        Return the rows of table that match filters (see module docstring)
+        select: SQL expression to select, e.g. "data", or "COUNT(*)"
+        limit, offset: return up to limit rows, starting at row offset
+        """
+        if self.snapshot_time(table) is None:
+            self.log(f"exiting. Mirror {self.path} has no snapshot of {table}.")
+            sys.exit(1)
+        columns = MIRROR_TABLES[table][2]
+        clauses = []
+        params = []
+        for key, value in filters.items():
+            column = "id" if key == "id" else key
+            if column != "id" and column not in columns:
+                self.log(
+                    f"exiting. Unsupported mirror filter {key} for {table}.",
+                    f"Supported filters: id, {', '.join(sorted(columns))}",
+                )
+                sys.exit(1)
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            values = [str(item) for item in values]
+            if column in MULTI_VALUE_COLUMNS:
+                for item in values:
+                    clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+                    params.append(f"%,{_like_escape(item)},%")
+            else:
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        sql = f"SELECT {select} FROM {table}"
+        if len(clauses) != 0:
+            sql += f" WHERE {' AND '.join(clauses)}"
+        if select == "data":
+            sql += " ORDER BY id"
+        if limit:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset or 0])
+        return self.connection.execute(sql, params).fetchall()
+
+
+class _MirrorApp:
+    """
+    Mirror counterpart of a pynetbox App (e.g. netbox_instance.dcim)
+    """
+
+    def __init__(self, mirror, app):
+        self._mirror = mirror
+        self._app = app
+
+    def __getattr__(self, endpoint):
+        if endpoint.startswith("_"):
+            raise AttributeError(endpoint)
+        table = Mirror.table_for(self._app, endpoint)
+        if table is None:
+            raise AttributeError(f"{self._app}.{endpoint} is not mirrored")
+        return MirrorEndpoint(self._mirror, table)
+
+
+class MirrorEndpoint:
+    """
+    Mirror counterpart of a pynetbox Endpoint (e.g. netbox_instance.dcim.devices)
+    supporting all(), filter(), get(), and count()
+    """
+
+    def __init__(self, mirror, table):
+        self._mirror = mirror
+        self.name = table
+
+    def filter(self, limit=None, offset=None, **filters):
+        """
+        Return a list of DictRecord matching filters.
+        As with pynetbox, limit and offset return one page of the matches.
+        brief and fields (see common.brief_query()) are ignored, since
+        mirrored records are complete.
+        """
+        filters.pop("brief", None)
+        filters.pop("fields", None)
+        rows = self._mirror.query(self.name, filters, limit=limit, offset=offset)
+        return [DictRecord(json.loads(row[0])) for row in rows]
+
+    def all(self, limit=None, offset=None):
+        """
+        Return a list of all DictRecord in the table, or, with limit and
+        offset, one page of them
+        """
+        return self.filter(limit=limit, offset=offset)
+
+    def get(self, *args, **filters):
+        """
+        Return the DictRecord matching filters, or with id args[0].
+        Return None if there is no match.  Raise ValueError if there is
+        more than one match, as pynetbox does.
+        """
+        if len(args) != 0:
+            filters["id"] = args[0]
+        matches = self.filter(**filters)
+        if len(matches) > 1:
+            raise ValueError(f"get() returned more than one result for {filters}")
+        if len(matches) == 0:
+            return None
+        return matches[0]
+
+    def count(self, **filters):
+        """
+        Return the number of objects matching filters
+        """
+        filters.pop("brief", None)
+        filters.pop("fields", None)
+        return self._mirror.query(self.name, filters, select="COUNT(*)")[0][0]
@@ -0,0 +1,179 @@
+"""
+Name: output.py
+Description: Stream rows to stdout as a table, CSV, or JSON lines
+
+The *_print.py scripts write one row per netbox object.  Rather than
+collecting objects and printing them at the end, they hand each row to a
+row writer as soon as it is available.  pynetbox fetches results a page at
+a time as they are iterated, so rows appear as each page arrives, and only
+one page of objects is held in memory.
+
+Output is flushed at most every FLUSH_INTERVAL seconds, and when the
+writer is closed, so that rows appear promptly even when stdout is a pipe,
+without flushing on every row.
+
+Formats (OUTPUT_FORMATS):
+
+table: fixed-width columns with a header, for people (the default)
+csv:   comma-separated values with a header row, for spreadsheets
+json:  one JSON object per line (JSON lines), for jq and other tools
+
+Columns are a list of (name, width, align) tuples.  width and align ("<"
+or ">") apply only to the table format.
+
+Usage:
+
+from netbox_tools.output import row_writer
+
+columns = [("id", 5, ">"), ("name", 15, "<"), ("site", 15, "<")]
+with row_writer(cfg.output, columns) as writer:
+    for rack in netbox_instance.dcim.racks.all():
+        writer.write({"id": rack.id, "name": rack.name, "site": rack.site.name})
+"""
+import csv
+import json
+import sys
+import time
+
+OUR_VERSION = 100
+
+OUTPUT_FORMATS = ("table", "csv", "json")
+DEFAULT_OUTPUT_FORMAT = "table"
+
+# seconds
+FLUSH_INTERVAL = 0.2
+
+
+def row_writer(output_format, columns, stream=None):
+    """
+    Return a row writer for output_format (one of OUTPUT_FORMATS) that
+    writes columns to stream (default: sys.stdout)
+    """
+    writers = {"table": TableWriter, "csv": CsvWriter, "json": JsonLinesWriter}
+    if output_format not in writers:
+        raise ValueError(
+            f"Unknown output format {output_format}."
+            f" Expected one of {', '.join(OUTPUT_FORMATS)}"
+        )
+    return writers[output_format](columns, stream)
+
+
+class RowWriter:
+    """
+    Base class of the row writers.  Subclasses implement _write_header()
+    and _write_row().
+
+    columns: list of (name, width, align) tuples
+    stream: file-like object to write to.  Default: sys.stdout
+    """
+
+    def __init__(self, columns, stream=None):
+        self.columns = columns
+        self.stream = sys.stdout if stream is None else stream
+        self.rows = 0
+        self._last_flush = time.monotonic()
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def names(self):
+        """
+        return the column names
+        """
+        return [column[0] for column in self.columns]
+
+    def _write_header(self):
+        raise NotImplementedError
+
+    def _write_row(self, row):
+        raise NotImplementedError
+
+    def write(self, row):
+        """
+        Write row, a dictionary keyed on column name.
+        Columns missing from row are written as empty.
+        """
+        self._write_row(row)
+        self.rows += 1
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self.stream.flush()
+            self._last_flush = now
+
+    def write_all(self, rows):
+        """
+        Write each row in rows (an iterable of dictionaries).
+        Return the number of rows written.
+        """
+        count = 0
+        for row in rows:
+            self.write(row)
+            count += 1
+        return count
+
+    def close(self):
+        """
+        Flush any buffered output
+        """
+        self.stream.flush()
+
+
+class TableWriter(RowWriter):
+    """
+    Write rows as fixed-width columns, under a header and an underline
+    """
+
+    def __init__(self, columns, stream=None):
+        self._fmt = " ".join(f"{{:{align}{width}}}" for _, width, align in columns)
+        super().__init__(columns, stream)
+
+    def _write_header(self):
+        print(self._fmt.format(*self.names), file=self.stream)
+        print(
+            self._fmt.format(*["-" * width for _, width, _ in self.columns]),
+            file=self.stream,
+        )
+
+    def _write_row(self, row):
+        print(
+            self._fmt.format(*[str(row.get(name, "")) for name in self.names]),
+            file=self.stream,
+        )
+
+
+class CsvWriter(RowWriter):
+    """
+    Write rows as comma-separated values, under a header row
+    """
+
+    def __init__(self, columns, stream=None):
+        self._writer = None
+        super().__init__(columns, stream)
+
+    def _write_header(self):
+        self._writer = csv.DictWriter(
+            self.stream, fieldnames=self.names, extrasaction="ignore"
+        )
+        self._writer.writeheader()
+
+    def _write_row(self, row):
+        self._writer.writerow(row)
+
+
+class JsonLinesWriter(RowWriter):
+    """
+    Write rows as JSON objects, one per line.  Values that are not JSON
+    types (e.g. pynetbox records) are written as strings.
+    """
+
+    def _write_header(self):
+        pass
+
+    def _write_row(self, row):
+        values = {name: row.get(name) for name in self.names}
+        print(json.dumps(values, default=str), file=self.stream)
@@ -0,0 +1,90 @@
+"""
+Name: paginator.py
+Description: Fetch the pages of a large netbox listing in parallel
+
+pynetbox's endpoint.all() and endpoint.filter() fetch one page at a time,
+following each page's "next" link, so listing e.g. 200,000 interfaces
+takes one round trip per page, back to back.
+
+parallel_all() asks netbox how many objects match, then requests the
+pages by offset from a pool of worker threads.  Records are yielded in the
+same order as endpoint.all() would yield them, as soon as the page holding
+them (and all pages before it) has arrived.  At most workers pages are
+requested ahead of the caller, so memory use is bounded by workers *
+page_size records, however large the listing.
+
+If netbox caps the page size (MAX_PAGE_SIZE in netbox's configuration)
+below page_size, the first page reveals the cap and the remaining offsets
+use it.  Objects created while the listing is in progress are picked up by
+reading past the initial count until a short page is returned.  As with
+pynetbox, objects deleted while the listing is in progress can shift later
+objects to an earlier page, so a listing of a busy instance is not a
+consistent snapshot.
+
+Share one netbox instance between the workers.  Its http session is safe
+to share between threads (see transport.py).  Keep http_pool_maxsize in
+config.yml at least as large as workers.
+
+parallel_all() works with endpoints of the local mirror too (see mirror.py).
+
+Usage:
+
+from netbox_tools.common import netbox
+from netbox_tools.paginator import parallel_all
+
+netbox_instance = netbox()
+for interface in parallel_all(netbox_instance.dcim.interfaces, workers=8):
+    print(interface.name)
+for device in parallel_all(netbox_instance.dcim.devices, site_id=4):
+    print(device.name)
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+OUR_VERSION = 100
+
+DEFAULT_WORKERS = 4
+DEFAULT_PAGE_SIZE = 500
+
+
+def fetch_page(endpoint, filters, limit, offset):
+    """
+    Return a list of the records on the page of endpoint's listing that
+    starts at offset and holds up to limit records, with filters applied
+    """
+    if len(filters) == 0:
+        return list(endpoint.all(limit=limit, offset=offset))
+    return list(endpoint.filter(limit=limit, offset=offset, **filters))
+
+
+def parallel_all(
+    endpoint, workers=DEFAULT_WORKERS, page_size=DEFAULT_PAGE_SIZE, **filters
+):
+    """
+    Yield every record of endpoint (a pynetbox, or mirror, endpoint) that
+    matches filters (e.g. site_id=4), fetching pages in parallel from up to
+    workers threads.  See the module docstring.
+    """
+    workers = max(workers, 1)
+    count = endpoint.count(**filters)
+    page = fetch_page(endpoint, filters, page_size, 0)
+    yield from page
+    if 0 < len(page) < min(page_size, count):
+        # netbox caps the page size at its MAX_PAGE_SIZE
+        page_size = len(page)
+    offset = len(page)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while offset < count or len(pending) != 0:
+            while offset < count and len(pending) < workers:
+                pending.append(
+                    executor.submit(fetch_page, endpoint, filters, page_size, offset)
+                )
+                offset += page_size
+            page = pending.popleft().result()
+            yield from page
+    # objects created after count was read
+    while len(page) == page_size:
+        page = fetch_page(endpoint, filters, page_size, offset)
+        offset += page_size
+        yield from page
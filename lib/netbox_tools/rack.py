@@ -2,13 +2,16 @@
 Name: rack.py
 Description: create, update, and delete operations on netbox rack
 """
-from inspect import stack
 import sys
-from netbox_tools.common import location_id, site_id, tag_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, location_id, site_id, tag_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 102
+OUR_VERSION = 112
 
-class Rack:
+class Rack(AsyncEntity):
     """
     create, update, and delete operations on netbox rack
     """
@@ -17,6 +20,7 @@ class Rack:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._rack_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_delete_keys = set()
@@ -34,9 +38,7 @@ class Rack:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_delete_keys(self):
         """
@@ -117,6 +119,23 @@ class Rack:
         self._set_tags()
         self._set_u_height()
 
+    def refresh(self):
+        """
+        Discard the cached netbox rack object so that the next access
+        to rack_obj retrieves it from netbox.  Called after each write.
+        """
+        self._rack_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this rack so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("rack", self.name)
+        self.refresh()
+
     def delete(self):
         """
         delete a rack
@@ -134,6 +153,8 @@ class Rack:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -148,24 +169,52 @@ class Rack:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a rack
         """
+        changes = changed_fields(self._args, self.rack_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. rack {self.name} is unchanged.")
+            return
         if self.rack_id is None:
             self.log(f"Skipping. rack {self.name} does not exist in Netbox")
             return
         self.log(f"{self.name}")
         self._args["id"] = self.rack_id
         try:
-            self.rack_obj.update(self._args)
+            self.rack_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"Exiting. Unable to update rack {self.name}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this rack
+        """
+        return record.name == self.name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_update()
+        self._generate_args_create_update()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_delete_keys()
 
     def create_or_update(self):
         """
@@ -178,6 +227,30 @@ class Rack:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for racks
+        """
+        return self._netbox_obj.dcim.racks
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this rack.
+        netbox_tools.bulk.Bulk merges these to retrieve many racks per request.
+        """
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this rack's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the rack.
+        """
+        return ("rack", self.name)
+
     @property
     def comments(self):
         """
@@ -208,7 +281,10 @@ class Rack:
         Return the rack object assocated with rack name.
         Netbox will return None if the rack name does not exist.
         """
-        return self._netbox_obj.dcim.racks.get(name=self.name)
+        if self._rack_obj is not NOT_FETCHED:
+            return self._rack_obj
+        self._rack_obj = self._netbox_obj.dcim.racks.get(name=self.name)
+        return self._rack_obj
 
     @property
     def rack_id(self):
@@ -0,0 +1,217 @@
+"""
+Name: reconcile.py
+Description: State of the last reconcile of a YAML inventory with netbox
+
+entity_create_update_all.py reconciles every entity in a YAML inventory
+with netbox.  In a large inventory, most entities have not changed since
+the last run, and reconciling them costs a lookup each, in bulk, for no
+change.
+
+ReconcileState records, per entity (e.g. devices: leaf_1), a hash of its
+normalized YAML block (see entity_hash()), and the id of the netbox object
+that reconciling it produced.  On the next run, only entities whose hash
+has changed, that are new, or whose last reconcile failed, need to be
+reconciled (plus the entities that refer to them, which the caller works
+out with identity_tokens() and block_values()).
+
+The state only reflects what this library sent to netbox.  Changes made in
+netbox by other means are not detected.  To reconcile everything, ignore
+the state (entity_create_update_all.py --full), and the state is rewritten.
+
+A state file holds the state of one YAML file against one netbox.  If the
+netbox url recorded in it differs, or the file cannot be read, the state is
+empty, and everything is reconciled.  The default state file (see
+state_file()) is under ~/.netbox_tools/reconcile, named for the YAML file.
+
+Usage:
+
+from netbox_tools.reconcile import ReconcileState, entity_hash, state_file
+
+state = ReconcileState(state_file("info.yml"), netbox_obj.base_url)
+digest = entity_hash(info["sites"]["mysite"])
+if state.changed("sites", "mysite", digest):
+    ...reconcile mysite...
+    state.record("sites", "mysite", digest, netbox_id)
+state.save()
+"""
+import hashlib
+import json
+import os
+from netbox_tools.logger import log_message
+
+OUR_VERSION = 101
+
+STATE_FORMAT = 1
+
+DEFAULT_STATE_DIR = os.path.join("~", ".netbox_tools", "reconcile")
+
+# fields of a YAML block that name the entity, e.g. model for device_types
+IDENTITY_FIELDS = ("name", "model", "device", "virtual_machine", "vid", "prefix")
+
+
+def state_file(yaml_file):
+    """
+    Return the path of the default state file of yaml_file
+    """
+    yaml_file = os.path.abspath(yaml_file)
+    digest = hashlib.sha256(yaml_file.encode("utf-8")).hexdigest()[:12]
+    name = f"{os.path.basename(yaml_file)}-{digest}.json"
+    return os.path.expanduser(os.path.join(DEFAULT_STATE_DIR, name))
+
+
+def entity_hash(*blocks):
+    """
+    Return a hash of blocks (the YAML blocks, i.e. dictionaries, that
+    describe an entity).  Key order and formatting of the YAML do not
+    affect the hash.
+    """
+    normalized = json.dumps(blocks, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def identity_tokens(key, block):
+    """
+    Return the set of values (as strings) by which other YAML blocks may
+    refer to the entity described by block, under key: the key itself, and
+    its IDENTITY_FIELDS
+    """
+    tokens = {str(key)}
+    if isinstance(block, dict):
+        for field in IDENTITY_FIELDS:
+            if block.get(field) is not None:
+                tokens.add(str(block[field]))
+    return tokens
+
+
+def block_values(block):
+    """
+    Return the set of scalar values (as strings) in block, including those
+    in nested lists and dictionaries
+    """
+    values = set()
+    if isinstance(block, dict):
+        for value in block.values():
+            values.update(block_values(value))
+    elif isinstance(block, list):
+        for value in block:
+            values.update(block_values(value))
+    elif block is not None:
+        values.add(str(block))
+    return values
+
+
+class ReconcileState:
+    """
+    Hash and netbox id of each entity of a YAML inventory, as of the last
+    time it was reconciled with netbox.  See the module docstring.
+    Entity keys are stored as strings (e.g. vlan 5 as "5").
+
+    path: the state file.  It is read if it exists.
+    netbox_url: url of the netbox being reconciled
+    """
+
+    def __init__(self, path, netbox_url):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        self.path = path
+        self.netbox_url = netbox_url
+        # entity type: {entity key: {"hash": hash, "netbox_id": id}}
+        self.entities = {}
+        self.load()
+
+    def log(self, *args):
+        """
+        simple logger
+        """
+        log_message(args, self._classname, self.lib_version)
+
+    def load(self):
+        """
+        Read the state file.  If it does not exist, cannot be read, or holds
+        the state of another netbox, start from an empty state.
+        """
+        self.entities = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                contents = json.load(handle)
+        except (OSError, ValueError) as _general_exception:
+            self.log(
+                f"WARNING. Ignoring unreadable state file {self.path}.",
+                f"Exception detail: {_general_exception}",
+            )
+            return
+        if contents.get("format") != STATE_FORMAT:
+            self.log(f"WARNING. Ignoring state file {self.path} of another format.")
+            return
+        if contents.get("netbox_url") != self.netbox_url:
+            self.log(
+                f"Ignoring state file {self.path}.",
+                f"It records the state of {contents.get('netbox_url')}",
+                f"rather than {self.netbox_url}.",
+            )
+            return
+        self.entities = contents.get("entities", {})
+
+    def save(self):
+        """
+        Write the state file.  The file is replaced atomically, so an
+        interrupted save leaves the previous state intact.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        contents = {
+            "format": STATE_FORMAT,
+            "netbox_url": self.netbox_url,
+            "entities": self.entities,
+        }
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(contents, handle, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def changed(self, entity_type, key, digest):
+        """
+        Return True if entity key of entity_type needs to be reconciled:
+        it is new, its hash differs from digest, or its last reconcile
+        did not produce a netbox object
+        """
+        entry = self.entities.get(entity_type, {}).get(str(key))
+        if entry is None:
+            return True
+        return entry.get("hash") != digest or entry.get("netbox_id") is None
+
+    def netbox_id(self, entity_type, key):
+        """
+        Return the id of the netbox object that entity key of entity_type
+        produced when it was last reconciled, or None
+        """
+        entry = self.entities.get(entity_type, {}).get(str(key), {})
+        return entry.get("netbox_id")
+
+    def record(self, entity_type, key, digest, netbox_id):
+        """
+        Record that entity key of entity_type, whose hash is digest, was
+        reconciled and produced the netbox object with id netbox_id
+        """
+        self.entities.setdefault(entity_type, {})[str(key)] = {
+            "hash": digest,
+            "netbox_id": netbox_id,
+        }
+
+    def forget(self, entity_type, key):
+        """
+        Discard the state of entity key of entity_type, so that it is
+        reconciled on the next run
+        """
+        self.entities.get(entity_type, {}).pop(str(key), None)
+
+    def prune(self, entity_type, keys):
+        """
+        Discard the state of entities of entity_type that are not in keys
+        (e.g. entities removed from the YAML file)
+        """
+        keys = {str(key) for key in keys}
+        entries = self.entities.get(entity_type, {})
+        for key in [key for key in entries if key not in keys]:
+            entries.pop(key)
@@ -0,0 +1,336 @@
+"""
+Name: resolver.py
+Description: Cache of netbox name to id mappings used by the lookup helpers in common.py
+
+A Resolver holds one map per object type (site, role, tag, device_type, etc).
+Each map is keyed on the value the corresponding common.py helper looks up by
+(e.g. name for site, model for device_type, (device, interface) for interface)
+and its values are netbox IDs.
+
+Names that do not exist in netbox are cached as None (negative caching) so that
+repeated lookups of a missing name do not cost a request each.
+
+The entity classes in this library call invalidate() after they create or delete
+an object, so that the next lookup of that object goes back to netbox.
+
+The common.py helpers look up a key with claim(), which coalesces concurrent
+misses of the same key: the first thread to miss queries netbox, and other
+threads that miss the same key meanwhile wait for, and reuse, its result.
+
+preload() fetches the reference tables (sites, roles, tags, vlans, etc) with
+one paginated request sequence each and indexes them.  Once an object type
+has been preloaded, a name that is not in its index is known not to exist,
+so lookups of that type never need to query netbox.  Names that match more
+than one object (e.g. a rack name used in two locations) are left out of the
+index, and are looked up in netbox as before.
+
+Usage:
+
+from netbox_tools.common import netbox, site_id
+from netbox_tools.resolver import get_resolver
+
+netbox_instance = netbox()
+site_id(netbox_instance, "mysite")  # request sent to netbox
+site_id(netbox_instance, "mysite")  # answered from the cache
+get_resolver(netbox_instance).print_stats()
+
+# or, to fetch all reference tables up front
+get_resolver(netbox_instance).preload(netbox_instance)
+"""
+import threading
+from contextlib import contextmanager
+from netbox_tools.logger import log_message
+
+OUR_VERSION = 104
+
+_attach_lock = threading.Lock()
+
+# object_type, netbox app, netbox endpoint, attribute the common.py helper looks up by
+PRELOAD_TABLES = [
+    ("site", "dcim", "sites", "name"),
+    ("location", "dcim", "locations", "name"),
+    ("rack", "dcim", "racks", "name"),
+    ("role", "dcim", "device_roles", "name"),
+    ("manufacturer", "dcim", "manufacturers", "name"),
+    ("device_type", "dcim", "device_types", "model"),
+    ("tag", "extras", "tags", "name"),
+    ("vlan_group", "ipam", "vlan_groups", "name"),
+    ("vlan_vid", "ipam", "vlans", "vid"),
+    ("vlan_name", "ipam", "vlans", "name"),
+    ("cluster", "virtualization", "clusters", "name"),
+    ("cluster_group", "virtualization", "cluster_groups", "name"),
+    ("cluster_type", "virtualization", "cluster_types", "name"),
+]
+
+
+def get_resolver(netbox_instance):
+    """
+    Return the Resolver attached to netbox_instance.
+    common.netbox() attaches one when it creates the instance.  For netbox
+    instances created some other way, attach a new Resolver on first use.
+    """
+    resolver = getattr(netbox_instance, "resolver", None)
+    if resolver is not None:
+        return resolver
+    with _attach_lock:
+        resolver = getattr(netbox_instance, "resolver", None)
+        if resolver is None:
+            resolver = Resolver()
+            netbox_instance.resolver = resolver
+    return resolver
+
+
+class Resolver:
+    """
+    Per-object-type cache of netbox name to id mappings, with negative
+    caching, explicit invalidation, and hit/miss counters.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        self._lock = threading.Lock()
+        self._maps = {}
+        self._hits = {}
+        self._misses = {}
+        # object types whose map holds every object in netbox (see preload())
+        self._complete = set()
+        # per complete object type, keys that must still be looked up in netbox
+        self._unresolved = {}
+        # (object_type, key) -> (threading.Event, owner thread ident) for
+        # keys currently being queried in netbox (see claim())
+        self._in_flight = {}
+
+    def log(self, *args):
+        """
+        simple logger
+        """
+        log_message(args, self._classname, self.lib_version)
+
+    def lookup(self, object_type, key):
+        """
+        Return a tuple (found, netbox_id) for key in the object_type map.
+
+        found is False if key has not been resolved yet, in which case the
+        caller should query netbox and call store() with the result.
+        netbox_id is None if key is known not to exist in netbox.
+        """
+        with self._lock:
+            found, netbox_id = self._find(object_type, key)
+            self._count(object_type, found)
+            return found, netbox_id
+
+    @contextmanager
+    def claim(self, object_type, key):
+        """
+        Context manager form of lookup() that coalesces concurrent misses.
+
+        Yields a tuple (found, netbox_id), as lookup() returns.  If found is
+        False, the calling thread owns key until the with block exits, and
+        should query netbox and call store() within the block.  Other threads
+        that claim key meanwhile wait until the block exits, then look key up
+        again.  If the owner did not store key (e.g. its request failed), the
+        next waiter becomes the owner and queries netbox itself.
+        """
+        flight_key = (object_type, key)
+        owner = threading.get_ident()
+        while True:
+            with self._lock:
+                found, netbox_id = self._find(object_type, key)
+                flight = self._in_flight.get(flight_key)
+                if found or flight is None or flight[1] == owner:
+                    self._count(object_type, found)
+                    if not found and flight is None:
+                        event = threading.Event()
+                        self._in_flight[flight_key] = (event, owner)
+                    else:
+                        event = None
+                    break
+            flight[0].wait()
+        if event is None:
+            yield found, netbox_id
+            return
+        try:
+            yield False, None
+        finally:
+            with self._lock:
+                self._in_flight.pop(flight_key, None)
+            event.set()
+
+    def _find(self, object_type, key):
+        """
+        lookup() without locking or counting.  Caller holds self._lock.
+        """
+        object_map = self._maps.get(object_type, {})
+        if key in object_map:
+            return True, object_map[key]
+        if object_type in self._complete and key not in self._unresolved[object_type]:
+            return True, None
+        return False, None
+
+    def _count(self, object_type, found):
+        """
+        Count a hit or a miss for object_type.  Caller holds self._lock.
+        """
+        counts = self._hits if found else self._misses
+        counts[object_type] = counts.get(object_type, 0) + 1
+
+    def store(self, object_type, key, netbox_id):
+        """
+        Cache netbox_id for key in the object_type map and return netbox_id.
+        Store None to record that key does not exist in netbox.
+        """
+        with self._lock:
+            self._maps.setdefault(object_type, {})[key] = netbox_id
+            if object_type in self._complete:
+                self._unresolved[object_type].discard(key)
+        return netbox_id
+
+    def invalidate(self, object_type=None, key=None):
+        """
+        Discard cached mappings.
+
+        object_type and key set: discard the mapping for key
+        object_type set, key None: discard the whole object_type map
+        both None: discard everything
+        """
+        with self._lock:
+            if object_type is None:
+                self._maps = {}
+                self._complete = set()
+                self._unresolved = {}
+            elif key is None:
+                self._maps.pop(object_type, None)
+                self._complete.discard(object_type)
+                self._unresolved.pop(object_type, None)
+            else:
+                self._maps.get(object_type, {}).pop(key, None)
+                if object_type in self._complete:
+                    self._unresolved[object_type].add(key)
+
+    def invalidate_where(self, object_type, predicate):
+        """
+        Discard the mappings in the object_type map whose key satisfies
+        predicate (a callable taking a key and returning a bool).
+
+        e.g. discard the interfaces of device leaf_1, which are keyed on
+        (device, interface):
+
+        resolver.invalidate_where("interface", lambda key: key[0] == "leaf_1")
+        """
+        with self._lock:
+            object_map = self._maps.get(object_type, {})
+            for key in [key for key in object_map if predicate(key)]:
+                object_map.pop(key)
+                if object_type in self._complete:
+                    self._unresolved[object_type].add(key)
+
+    def preload(self, netbox_instance, object_types=None):
+        """
+        Fetch each reference table in PRELOAD_TABLES once and index it.
+
+        object_types: optional list of object types (first column of
+        PRELOAD_TABLES) to preload.  If None, preload all of them.
+
+        Tables that share an endpoint (vlan_vid and vlan_name) are fetched once.
+        If a table cannot be fetched, log a warning and leave that object type
+        to be resolved on demand.
+        """
+        records = {}
+        for object_type, app, endpoint, attribute in PRELOAD_TABLES:
+            if object_types is not None and object_type not in object_types:
+                continue
+            if (app, endpoint) not in records:
+                try:
+                    records[(app, endpoint)] = list(
+                        getattr(getattr(netbox_instance, app), endpoint).all()
+                    )
+                except Exception as _general_exception:
+                    self.log(
+                        f"WARNING. Unable to preload {app}.{endpoint}.",
+                        f"Exception detail: {_general_exception}",
+                    )
+                    records[(app, endpoint)] = None
+            if records[(app, endpoint)] is None:
+                continue
+            self._index(object_type, attribute, records[(app, endpoint)])
+
+    def entries(self, object_type):
+        """
+        Return a copy of the object_type map, without the keys known not to
+        exist in netbox.  Once object_type has been preloaded, this holds
+        every object of that type (other than those sharing a key).
+        """
+        with self._lock:
+            object_map = self._maps.get(object_type, {})
+            return {
+                key: value for key, value in object_map.items() if value is not None
+            }
+
+    def _index(self, object_type, attribute, records):
+        """
+        Replace the object_type map with an index of records keyed on attribute
+        and mark object_type complete.  Keys shared by more than one record are
+        left unresolved so that lookups of them go to netbox.
+        """
+        object_map = {}
+        duplicates = set()
+        for record in records:
+            key = getattr(record, attribute, None)
+            if key is None:
+                continue
+            if key in object_map:
+                duplicates.add(key)
+            object_map[key] = record.id
+        for key in duplicates:
+            object_map.pop(key)
+        with self._lock:
+            self._maps[object_type] = object_map
+            self._complete.add(object_type)
+            self._unresolved[object_type] = duplicates
+
+    @property
+    def hits(self):
+        """
+        Return the total number of lookups answered from the cache
+        """
+        return sum(self._hits.values())
+
+    @property
+    def misses(self):
+        """
+        Return the total number of lookups that had to go to netbox
+        """
+        return sum(self._misses.values())
+
+    def stats(self):
+        """
+        Return a dictionary, keyed on object type, of hit, miss, and entry counts
+        """
+        result = {}
+        with self._lock:
+            object_types = set(self._maps) | set(self._hits) | set(self._misses)
+            for object_type in sorted(object_types):
+                result[object_type] = {
+                    "hits": self._hits.get(object_type, 0),
+                    "misses": self._misses.get(object_type, 0),
+                    "entries": len(self._maps.get(object_type, {})),
+                }
+        return result
+
+    def print_stats(self):
+        """
+        Print a table of hit, miss, and entry counts per object type
+        """
+        fmt = "{:<20} {:>8} {:>8} {:>8}"
+        print(fmt.format("object_type", "hits", "misses", "entries"))
+        print(fmt.format("-" * 20, "-" * 8, "-" * 8, "-" * 8))
+        for object_type, counts in self.stats().items():
+            print(
+                fmt.format(
+                    object_type, counts["hits"], counts["misses"], counts["entries"]
+                )
+            )
+        print(fmt.format("total", self.hits, self.misses, ""))
@@ -2,15 +2,18 @@
 Name: role.py
 Description: create, update, and delete operations on netbox device roles
 """
-from inspect import stack
 import sys
-from netbox_tools.common import create_slug, tag_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, create_slug, tag_id
 from netbox_tools.colors import color_to_rgb
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 103
+OUR_VERSION = 113
 
 
-class Role:
+class Role(AsyncEntity):
     """
     create, update, and delete operations on netbox device roles
     """
@@ -19,6 +22,7 @@ class Role:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._role_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_keys = set()
@@ -33,9 +37,7 @@ class Role:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys(self):
         """
@@ -106,6 +108,23 @@ class Role:
         self._set_tags()
         self._set_vm_role()
 
+    def refresh(self):
+        """
+        Discard the cached netbox role object so that the next access
+        to role_obj retrieves it from netbox.  Called after each write.
+        """
+        self._role_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this role so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("role", self.name)
+        self.refresh()
+
     def delete(self):
         """
         delete a role
@@ -122,6 +141,8 @@ class Role:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -136,24 +157,51 @@ class Role:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a role
         """
+        changes = changed_fields(self._args, self.role_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. role {self.name} is unchanged.")
+            return
         if self.role_id is None:
             self.log(f"Skipping. role {self.name} does not exist in Netbox")
             return
         self.log(f"{self.name}")
         self._args["id"] = self.role_id
         try:
-            self.role_obj.update(self._args)
+            self.role_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"Exiting. Unable to update role {self.name}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this role
+        """
+        return record.name == self.name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys()
+        self._generate_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -166,6 +214,30 @@ class Role:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for roles
+        """
+        return self._netbox_obj.dcim.device_roles
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this role.
+        netbox_tools.bulk.Bulk merges these to retrieve many roles per request.
+        """
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this role's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the role.
+        """
+        return ("role", self.name)
+
     @property
     def color(self):
         """
@@ -202,7 +274,10 @@ class Role:
         """
         Return role object associated with name set by the caller.
         """
-        return self._netbox_obj.dcim.device_roles.get(name=self.name)
+        if self._role_obj is not NOT_FETCHED:
+            return self._role_obj
+        self._role_obj = self._netbox_obj.dcim.device_roles.get(name=self.name)
+        return self._role_obj
 
     @property
     def role_id(self):
@@ -3,15 +3,18 @@ Name: site.py
 Description: create, update, and delete operations on netbox site
 """
 
-from inspect import stack
 import sys
-from netbox_tools.common import tag_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, tag_id
 from netbox_tools.common import create_slug
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 102
+OUR_VERSION = 112
 
 
-class Site:
+class Site(AsyncEntity):
     """
     create, update, and delete operations on netbox site
     """
@@ -20,6 +23,7 @@ class Site:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._site_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_keys_create_update = set()
@@ -34,9 +38,7 @@ class Site:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys_create_update(self):
         """
@@ -101,6 +103,23 @@ class Site:
         self._set_slug()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox site object so that the next access
+        to site_obj retrieves it from netbox.  Called after each write.
+        """
+        self._site_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this site so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("site", self.name)
+        self.refresh()
+
     def delete(self):
         """
         delete a site
@@ -118,6 +137,8 @@ class Site:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -132,24 +153,52 @@ class Site:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a site
         """
+        changes = changed_fields(self._args, self.site_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. site {self.name} is unchanged.")
+            return
         if self.site_id is None:
             self.log(f"Skipping. site {self.name} does not exist in Netbox")
             return
         self.log(f"{self.name}")
         self._args["id"] = self.site_id
         try:
-            self.site_obj.update(self._args)
+            self.site_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"Exiting. Unable to update site {self.name}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this site
+        """
+        return record.name == self.name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_update()
+        self._generate_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_delete()
 
     def create_or_update(self):
         """
@@ -162,6 +211,30 @@ class Site:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for sites
+        """
+        return self._netbox_obj.dcim.sites
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this site.
+        netbox_tools.bulk.Bulk merges these to retrieve many sites per request.
+        """
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this site's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the site.
+        """
+        return ("site", self.name)
+
     @property
     def name(self):
         """
@@ -185,7 +258,10 @@ class Site:
         Return site object associated with name set by the caller.
         Netbox will return None if the site does not exist.
         """
-        return self._netbox_obj.dcim.sites.get(name=self.name)
+        if self._site_obj is not NOT_FETCHED:
+            return self._site_obj
+        self._site_obj = self._netbox_obj.dcim.sites.get(name=self.name)
+        return self._site_obj
 
     @property
     def site_id(self):
@@ -2,15 +2,18 @@
 Name: tag.py
 Description: create, update, and delete operations on netbox tags
 """
-from inspect import stack
 import sys
+from netbox_tools.aio import AsyncEntity
 from netbox_tools.colors import color_to_rgb
-from netbox_tools.common import create_slug
+from netbox_tools.common import NOT_FETCHED, create_slug
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 101
+OUR_VERSION = 111
 
 
-class Tag:
+class Tag(AsyncEntity):
     """
     create, update, and delete operations on netbox tags
     """
@@ -19,6 +22,7 @@ class Tag:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._tag_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_keys = set()
@@ -31,9 +35,7 @@ class Tag:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys(self):
         """
@@ -81,6 +83,23 @@ class Tag:
         self._set_name()
         self._set_slug()
 
+    def refresh(self):
+        """
+        Discard the cached netbox tag object so that the next access
+        to tag_obj retrieves it from netbox.  Called after each write.
+        """
+        self._tag_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this tag so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("tag", self.name)
+        self.refresh()
+
     def delete(self):
         """
         delete a tag
@@ -97,6 +116,8 @@ class Tag:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -111,24 +132,51 @@ class Tag:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a tag
         """
+        changes = changed_fields(self._args, self.tag_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. tag {self.name} is unchanged.")
+            return
         if self.tag_id is None:
             self.log(f"Skipping. tag {self.name} does not exist in Netbox")
             return
         self.log(f"{self.name}")
         self._args["id"] = self.tag_id
         try:
-            self.tag_obj.update(self._args)
+            self.tag_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"Exiting. Unable to update tag {self.name}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this tag
+        """
+        return record.name == self.name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys()
+        self._generate_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -141,6 +189,30 @@ class Tag:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for tags
+        """
+        return self._netbox_obj.extras.tags
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this tag.
+        netbox_tools.bulk.Bulk merges these to retrieve many tags per request.
+        """
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this tag's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the tag.
+        """
+        return ("tag", self.name)
+
     @property
     def color(self):
         """
@@ -179,7 +251,10 @@ class Tag:
         """
         Return tag object associated with name set by the caller.
         """
-        return self._netbox_obj.extras.tags.get(name=self.name)
+        if self._tag_obj is not NOT_FETCHED:
+            return self._tag_obj
+        self._tag_obj = self._netbox_obj.extras.tags.get(name=self.name)
+        return self._tag_obj
 
     @property
     def tag_id(self):
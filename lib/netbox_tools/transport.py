@@ -0,0 +1,422 @@
+"""
+Name: transport.py
+Description: HTTP session used by common.netbox() to send requests to netbox
+
+make_session() returns a requests.Session whose connection pool, retry
+policy, timeouts, and compression are read from config.yml.  All settings
+are optional.  The defaults are shown below.
+
+http_pool_connections: 10   # number of hosts to keep connection pools for
+http_pool_maxsize: 32       # connections kept open per host
+http_max_retries: 3         # retries on connection errors and 429/502/503/504
+http_backoff_factor: 0.5    # seconds; doubles after each retry
+http_connect_timeout: 10    # seconds
+http_read_timeout: 60       # seconds
+http_gzip: True             # ask netbox to compress responses
+http_adaptive_concurrency: True  # limit requests in flight, see below
+http_concurrency_min: 1     # lowest limit of requests in flight
+http_concurrency_max: None  # highest limit. None: http_pool_maxsize
+http_latency_tolerance: 2.0 # p95 latency, relative to its baseline, at
+                            # which netbox is considered overloaded
+http_metrics: False         # record every request, see metrics.py
+http_metrics_file: None     # also write the metrics here (.prom or JSON)
+
+Requests are retried only if it is safe to do so.  Connection errors are
+retried for all methods, since netbox never saw the request.  Retries on
+429/502/503/504 responses and read errors are limited to idempotent methods
+(GET, PUT, DELETE, HEAD, OPTIONS), so that a create is never sent twice.
+Retry-After headers sent with 429 responses are honored.
+
+When many threads send requests (bulk and parallel reconcile runs), netbox
+(mostly its database) can become the bottleneck, and each extra request
+in flight only adds latency.  A ConcurrencyGovernor then limits the number
+of requests the session has in flight, adjusting the limit with AIMD
+(additive increase, multiplicative decrease), as TCP does:
+
+- a request that receives 429 or 503 responses halves the limit, once
+  however often it is retried
+- when the p95 latency of the last WINDOW_SIZE responses exceeds
+  http_latency_tolerance times its baseline (the lowest p95 seen, which
+  slowly rises if latency stays high), the limit is cut by a quarter
+- otherwise, while requests are waiting for the limit, it grows by about
+  one per limit responses
+
+The limit is cut at most once per round of requests in flight.  It starts
+at, and never exceeds, http_concurrency_max, so that the governor only
+holds back requests once netbox shows signs of overload.  Requests beyond
+the limit wait.  A request waiting to be retried (during its backoff) does
+not count as in flight, and its latency is that of its last attempt.
+The current limit and the number of requests waiting
+(queue depth) are available from session.governor (see governor_stats()).
+
+The session is safe to share between threads.  Each thread checks out its
+own connection from the pool.  Set http_pool_maxsize to at least the number
+of worker threads (see entity_create_update_all.py --workers), otherwise
+connections beyond http_pool_maxsize are closed after each request.
+
+Usage:
+
+from netbox_tools.config.netbox_config import LoadConfig
+from netbox_tools.transport import make_session
+
+netbox_instance.http_session = make_session(LoadConfig().config)
+"""
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from netbox_tools.metrics import install, percentile
+
+OUR_VERSION = 103
+
+DEFAULT_SETTINGS = {
+    "http_pool_connections": 10,
+    "http_pool_maxsize": 32,
+    "http_max_retries": 3,
+    "http_backoff_factor": 0.5,
+    "http_connect_timeout": 10,
+    "http_read_timeout": 60,
+    "http_gzip": True,
+    "http_adaptive_concurrency": True,
+    "http_concurrency_min": 1,
+    "http_concurrency_max": None,
+    "http_latency_tolerance": 2.0,
+    "http_metrics": False,
+    "http_metrics_file": None,
+}
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# responses by which netbox signals that it is overloaded
+OVERLOAD_STATUS_CODES = (429, 503)
+
+# number of responses whose p95 latency is compared with the baseline
+WINDOW_SIZE = 50
+# factors applied to the limit on overload responses, and on high latency
+OVERLOAD_DECREASE = 0.5
+LATENCY_DECREASE = 0.75
+# factor by which the baseline rises after each window of high latency
+BASELINE_DRIFT = 1.05
+
+
+class ConcurrencyGovernor:
+    """
+    Adaptive limit on the number of requests in flight.
+    See the module docstring.
+
+    maximum: initial, and highest, limit
+    minimum: lowest limit
+    latency_tolerance: ratio of p95 latency to its baseline above which
+    netbox is considered overloaded
+    """
+
+    def __init__(self, maximum, minimum=1, latency_tolerance=2.0):
+        self.lib_version = OUR_VERSION
+        self._classname = __class__.__name__
+        self.maximum = max(maximum, 1)
+        self.minimum = min(max(minimum, 1), self.maximum)
+        self.latency_tolerance = latency_tolerance
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._limit = float(self.maximum)
+        self._latencies = []
+        # requests are numbered as they start.  A request that started
+        # before the last decrease cannot cause another one.
+        self._started = 0
+        self._decrease_from = 0
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.p95 = None
+        self.baseline = None
+        self.requests = 0
+        self.overloads = 0
+        self.decreases = 0
+        self.lowest_limit = self.maximum
+
+    @property
+    def limit(self):
+        """
+        Return the current limit of requests in flight
+        """
+        return int(self._limit)
+
+    def acquire(self):
+        """
+        Wait until fewer than limit requests are in flight, then count the
+        caller's request as in flight
+        """
+        with self._condition:
+            self._wait_for_slot()
+            self._started += 1
+            self._local.request = self._started
+            self._local.overloaded = False
+
+    def release(self, status=None):
+        """
+        Count the caller's request as complete, with response status (None
+        if no response was received)
+        """
+        with self._condition:
+            latency = time.monotonic() - self._local.start
+            self.in_flight -= 1
+            self.requests += 1
+            if status in OVERLOAD_STATUS_CODES:
+                self._overload()
+            elif status is not None:
+                self._observe(latency)
+                if self.queue_depth > 0 and self._limit < self.maximum:
+                    self._limit = min(self._limit + 1 / self._limit, self.maximum)
+            self._condition.notify_all()
+
+    def pause(self):
+        """
+        Stop counting the caller's request as in flight while it waits to
+        be retried.  Call resume() before retrying it.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def resume(self):
+        """
+        Wait until fewer than limit requests are in flight, then count the
+        caller's paused request as in flight again
+        """
+        with self._condition:
+            self._wait_for_slot()
+
+    def overloaded(self):
+        """
+        Signal that the caller's request received an overload response
+        """
+        with self._condition:
+            self._overload()
+
+    def _wait_for_slot(self):
+        self.queue_depth += 1
+        while self.in_flight >= self.limit:
+            self._condition.wait()
+        self.queue_depth -= 1
+        self.in_flight += 1
+        self._local.start = time.monotonic()
+
+    def _overload(self):
+        """
+        Decrease the limit, unless the caller's request already did so
+        """
+        if getattr(self._local, "overloaded", False):
+            return
+        self._local.overloaded = True
+        self.overloads += 1
+        self._decrease(OVERLOAD_DECREASE)
+
+    def _observe(self, latency):
+        """
+        Add latency to the window, and once it is full, compare its p95
+        latency with the baseline
+        """
+        self._latencies.append(latency)
+        if len(self._latencies) < WINDOW_SIZE:
+            return
+        self.p95 = percentile(self._latencies, 95)
+        self._latencies = []
+        if self.baseline is None or self.p95 < self.baseline:
+            self.baseline = self.p95
+        elif self.p95 > self.baseline * self.latency_tolerance:
+            self._decrease(LATENCY_DECREASE)
+            self.baseline *= BASELINE_DRIFT
+
+    def _decrease(self, factor):
+        """
+        Multiply the limit by factor, unless the caller's request started
+        before the last decrease
+        """
+        if getattr(self._local, "request", 0) < self._decrease_from:
+            return
+        self._limit = max(self._limit * factor, self.minimum)
+        self._decrease_from = self._started + 1
+        self.decreases += 1
+        self.lowest_limit = min(self.lowest_limit, self.limit)
+
+    def stats(self):
+        """
+        Return a dictionary of the governor's current state and counters
+        """
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "maximum": self.maximum,
+                "lowest_limit": self.lowest_limit,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "p95": self.p95,
+                "baseline": self.baseline,
+                "requests": self.requests,
+                "overloads": self.overloads,
+                "decreases": self.decreases,
+            }
+
+    def print_stats(self):
+        """
+        Print the governor's current state and counters
+        """
+        for key, value in self.stats().items():
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            print(f"{key:<14} {value}")
+
+
+def governor_stats(session):
+    """
+    Return the stats() of the ConcurrencyGovernor of session (e.g.
+    netbox_instance.http_session), or None if it has none
+    """
+    governor = getattr(session, "governor", None)
+    if governor is None:
+        return None
+    return governor.stats()
+
+
+class GovernedRetry(Retry):
+    """
+    Retry that signals overload responses to a ConcurrencyGovernor, and
+    frees the request's governor slot while it backs off
+    """
+
+    def __init__(self, *args, governor=None, **kwargs):
+        self.governor = governor
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.governor = self.governor
+        return retry
+
+    def increment(self, *args, **kwargs):
+        response = kwargs.get("response")
+        if response is None and len(args) > 2:
+            response = args[2]
+        if (
+            self.governor is not None
+            and response is not None
+            and response.status in OVERLOAD_STATUS_CODES
+        ):
+            self.governor.overloaded()
+        return super().increment(*args, **kwargs)
+
+    def sleep(self, response=None):
+        if self.governor is None:
+            super().sleep(response)
+            return
+        self.governor.pause()
+        try:
+            super().sleep(response)
+        finally:
+            self.governor.resume()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout to requests that do not
+    set one.  pynetbox never sets one, so without this a request to an
+    unresponsive netbox waits forever.
+
+    timeout: float, or tuple (connect_timeout, read_timeout)
+    governor: optional ConcurrencyGovernor limiting requests in flight
+    """
+
+    def __init__(self, *args, timeout=None, governor=None, **kwargs):
+        self.timeout = timeout
+        self.governor = governor
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        """
+        Send request, applying self.timeout if the caller did not set a
+        timeout, once self.governor (if any) allows it
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        if self.governor is None:
+            return super().send(request, **kwargs)
+        self.governor.acquire()
+        status = None
+        try:
+            response = super().send(request, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self.governor.release(status)
+
+
+def transport_settings(config):
+    """
+    Return a dictionary containing DEFAULT_SETTINGS, updated with any of
+    its keys that are set in config (the contents of config.yml)
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    for key in DEFAULT_SETTINGS:
+        if config.get(key) is not None:
+            settings[key] = config[key]
+    return settings
+
+
+def make_retry(settings, governor=None):
+    """
+    Return the urllib3 Retry policy described in the module docstring
+    """
+    return GovernedRetry(
+        governor=governor,
+        total=settings["http_max_retries"],
+        backoff_factor=settings["http_backoff_factor"],
+        status_forcelist=RETRY_STATUS_CODES,
+        respect_retry_after_header=True,
+        # Return the last response, rather than raising, once retries are
+        # exhausted, so that pynetbox can report netbox's error detail.
+        raise_on_status=False,
+    )
+
+
+def make_governor(settings):
+    """
+    Return the ConcurrencyGovernor described in the module docstring, or
+    None if http_adaptive_concurrency is False
+    """
+    if settings["http_adaptive_concurrency"] is not True:
+        return None
+    maximum = settings["http_concurrency_max"]
+    if maximum is None:
+        maximum = settings["http_pool_maxsize"]
+    return ConcurrencyGovernor(
+        maximum,
+        minimum=settings["http_concurrency_min"],
+        latency_tolerance=settings["http_latency_tolerance"],
+    )
+
+
+def make_session(config):
+    """
+    Return a requests.Session configured from config (the contents of
+    config.yml) as described in the module docstring
+    """
+    settings = transport_settings(config)
+    governor = make_governor(settings)
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=settings["http_pool_connections"],
+        pool_maxsize=settings["http_pool_maxsize"],
+        max_retries=make_retry(settings, governor),
+        timeout=(settings["http_connect_timeout"], settings["http_read_timeout"]),
+        governor=governor,
+    )
+    session = requests.Session()
+    session.governor = governor
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if settings["http_gzip"] is True:
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+    else:
+        session.headers["Accept-Encoding"] = "identity"
+    if settings["http_metrics"] is True:
+        install(session, settings["http_metrics_file"])
+    return session
@@ -2,14 +2,18 @@
 Name: virtual_interface.py
 Description: create, update, delete operations on netbox virtual_interfaces
 """
-from inspect import stack
 import sys
-from netbox_tools.common import vm_id, netbox_id_untagged_vlan
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.choices import get_choices
+from netbox_tools.common import NOT_FETCHED, vm_id, netbox_id_untagged_vlan
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 102
+OUR_VERSION = 113
 
 
-class VirtualInterface:
+class VirtualInterface(AsyncEntity):
     """
     create, update, delete operations on netbox virtual_interfaces
     """
@@ -18,6 +22,8 @@ class VirtualInterface:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._interface_object = NOT_FETCHED
+        self._vm_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_create_update_keys = set()
@@ -41,19 +47,15 @@ class VirtualInterface:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _populate_valid_choices(self):
         """
         retrieve valid ip address choices from the users netbox instance
         """
-        self.valid_choices = {}
-        choices_dict = self._netbox_obj.virtualization.interfaces.choices()
-        for item in choices_dict:
-            valid_values = choices_dict[item]
-            self.valid_choices[item] = [item["value"] for item in valid_values]
+        self.valid_choices = get_choices(
+            self._netbox_obj, "virtualization", "interfaces"
+        )
 
     def _validate_delete_keys(self):
         """
@@ -164,6 +166,25 @@ class VirtualInterface:
         self._set_untagged_vlan()
         self._set_virtual_machine()
 
+    def refresh(self):
+        """
+        Discard the cached netbox interface and virtual machine objects so
+        that the next access to interface_object or vm_obj retrieves them
+        from netbox.  Called after each write.
+        """
+        self._interface_object = NOT_FETCHED
+        self._vm_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this virtual interface so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("virtual_interface", (self.virtual_machine, self.interface))
+        self.refresh()
+
     def delete(self):
         """
         delete a virtual machine
@@ -183,6 +204,8 @@ class VirtualInterface:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -198,15 +221,23 @@ class VirtualInterface:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a virtual machine
         """
+        changes = changed_fields(self._args, self.interface_object)
+        if len(changes) == 0:
+            self.log(
+                f"Nothing to do. virtual_machine {self.virtual_machine} interface {self.interface} is unchanged."
+            )
+            return
         self.log(f"{self.virtual_machine} {self.interface}")
         self._args["id"] = self.interface_id
         try:
-            self.interface_object.update(self._args)
+            self.interface_object.update(changes)
         except Exception as _general_exception:
             self.log(
                 "Exiting. Unable to update:",
@@ -214,6 +245,31 @@ class VirtualInterface:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this virtual interface
+        """
+        return (
+            record.virtual_machine.name == self.virtual_machine
+            and record.name == self.interface
+        )
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_create_update_keys()
+        self._generate_create_update_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_delete_keys()
 
     def create_or_update(self):
         """
@@ -226,6 +282,30 @@ class VirtualInterface:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for virtual interfaces
+        """
+        return self._netbox_obj.virtualization.interfaces
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this virtual interface.
+        netbox_tools.bulk.Bulk merges these to retrieve many virtual interfaces per request.
+        """
+        return {"virtual_machine": self.virtual_machine, "name": self.interface}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this virtual interface's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the virtual interface.
+        """
+        return ("virtual_interface", (self.virtual_machine, self.interface))
+
     @property
     def description(self):
         """
@@ -255,9 +335,12 @@ class VirtualInterface:
         Other properties e.g. vm_id will exit with error
         if the caller did not set requisite parameters.
         """
-        return self._netbox_obj.virtualization.interfaces.get(
+        if self._interface_object is not NOT_FETCHED:
+            return self._interface_object
+        self._interface_object = self._netbox_obj.virtualization.interfaces.get(
             virtual_machine_id=self.vm_id, name=self.interface
         )
+        return self._interface_object
 
     @property
     def interface_enabled(self):
@@ -325,8 +408,10 @@ class VirtualInterface:
         Return the Netbox object associated with the virtual machine set by the caller.
         Exit with error if this object cannot be retrieved from Netbox.
         """
+        if self._vm_obj is not NOT_FETCHED:
+            return self._vm_obj
         try:
-            return self._netbox_obj.virtualization.virtual_machines.get(
+            self._vm_obj = self._netbox_obj.virtualization.virtual_machines.get(
                 name=self.virtual_machine
             )
         except Exception as _general_exception:
@@ -336,6 +421,7 @@ class VirtualInterface:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        return self._vm_obj
 
     @property
     def vm_id(self):
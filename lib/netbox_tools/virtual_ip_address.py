@@ -1,16 +1,26 @@
 """
 Name: virtual_ip_address.py
 Description: create, update, and delete operations on netbox ip_addresss for virtual machines
+
+For create and update operations, this class also assigns the ip address to
+the virtual machine interface and makes it the virtual machine's primary ip.
+The interface assignment is part of the ip address create/update arguments,
+and the virtual machine is updated only if its primary_ip4 is not already
+this address.
 """
-from inspect import stack
 import sys
-from netbox_tools.common import get_vm, vm_id, tag_id
-from netbox_tools.virtual_machine import make_vm_primary_ip, map_vm_primary_ip
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.choices import get_choices
+from netbox_tools.common import NOT_FETCHED, tag_id, virtual_interface_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.virtual_machine import release_vm_primary_ip, set_vm_primary_ip
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 105
+OUR_VERSION = 117
 
 
-class VirtualIpAddress:
+class VirtualIpAddress(AsyncEntity):
     """
     create, update, and delete operations on netbox ip_addresss for virtual machines
     netbox_obj = netbox instance
@@ -29,6 +39,7 @@ class VirtualIpAddress:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._ip_address_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_keys_create_update = set()
@@ -47,19 +58,13 @@ class VirtualIpAddress:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _populate_valid_choices(self):
         """
         retrieve valid ip address choices from the users netbox instance
         """
-        self._valid_choices = {}
-        choices_dict = self._netbox_obj.ipam.ip_addresses.choices()
-        for item in choices_dict:
-            valid_values = choices_dict[item]
-            self._valid_choices[item] = [item["value"] for item in valid_values]
+        self._valid_choices = get_choices(self._netbox_obj, "ipam", "ip_addresses")
 
     def _validate_keys_create_update(self):
         """
@@ -87,11 +92,22 @@ class VirtualIpAddress:
         """
         self._args["address"] = self.ip4
 
-    def _set_assigned_object_id(self):
+    def _set_assigned_object(self):
         """
-        Add assigned_object_id to args
+        Add the interface to which the ip address is assigned to args.
+        Exit with error if the interface does not exist in netbox.
         """
-        self._args["assigned_object_id"] = vm_id(self._netbox_obj, self.virtual_machine)
+        intf_id = virtual_interface_id(
+            self._netbox_obj, self.virtual_machine, self.interface
+        )
+        if intf_id is None:
+            self.log(
+                f"exiting. virtual_machine {self.virtual_machine}",
+                f"interface {self.interface} not found in netbox.",
+            )
+            sys.exit(1)
+        self._args["assigned_object_type"] = "virtualization.vminterface"
+        self._args["assigned_object_id"] = intf_id
 
     def _set_description(self):
         """
@@ -103,12 +119,6 @@ class VirtualIpAddress:
         else:
             self._args["description"] = self.description
 
-    def _set_interface(self):
-        """
-        Add interface to args; converting it to a netbox id
-        """
-        self._args["interface"] = vm_id(self._netbox_obj, self.virtual_machine)
-
     def _set_role(self):
         """
         Update args with the ip address role, if the user has set this.
@@ -162,29 +172,36 @@ class VirtualIpAddress:
         Generate all supported arguments for create and update methods
         """
         self._set_address()
-        self._set_assigned_object_id()
+        self._set_assigned_object()
         self._set_description()
-        self._set_interface()
         self._set_role()
         self._set_status()
         self._set_tags()
 
-    def _initialize_vm_primary_ip(self):
+    def refresh(self):
+        """
+        Discard the cached netbox ip address object so that the next access
+        to ip_address_obj retrieves it from netbox.  Called after each write.
+        """
+        self._ip_address_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
         """
-        Initialize primary_ip4 and primary_ip to avoid errors in map_vm_primary_ip()address.save()
+        Discard cached name to id mappings for this ip address so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
         """
-        vm_obj = get_vm(self._netbox_obj, self.virtual_machine)
-        vm_obj.primary_ip4 = None
-        vm_obj.primary_ip = None
-        vm_obj.save()
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("ip_address", self.ip4)
+        self.refresh()
 
     def create(self):
         """
-        create a virtual ip address
+        create a virtual ip address and return the new netbox ip address object
         """
         self.log(f"virtual_machine {self.virtual_machine}, address {self.ip4}")
         try:
-            self._netbox_obj.ipam.ip_addresses.create(self._args)
+            ip_address_obj = self._netbox_obj.ipam.ip_addresses.create(self._args)
         except Exception as _general_exception:
             self.log(
                 "exiting.",
@@ -192,15 +209,33 @@ class VirtualIpAddress:
                 f"Exception detail {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
+        return ip_address_obj
 
     def update(self):
         """
         update a virtual ip address
         """
+        self._update(self.ip_address_obj)
+
+    def _update(self, ip_address_obj):
+        """
+        update ip_address_obj with the arguments that differ from it.
+        If the ip address is moving from another virtual machine, on which
+        it is the primary ip, release it from that virtual machine first.
+        """
+        changes = changed_fields(self._args, ip_address_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. ip_address {self.ip4} is unchanged.")
+            return
         self.log(f"virtual_machine {self.virtual_machine}, address {self.ip4}")
-        self._args["id"] = self.ip_address_id
+        if "assigned_object_id" in changes:
+            release_vm_primary_ip(
+                self._netbox_obj, ip_address_obj, self.virtual_machine
+            )
         try:
-            self.ip_address_obj.update(self._args)
+            ip_address_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 "exiting.",
@@ -208,6 +243,7 @@ class VirtualIpAddress:
                 f"Exception detail {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
 
     def delete(self):
         """
@@ -227,6 +263,29 @@ class VirtualIpAddress:
                 f"Exception detail {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this ip address
+        """
+        return record.address == self.ip4
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_update()
+        self._generate_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_delete()
 
     def create_or_update(self):
         """
@@ -234,15 +293,45 @@ class VirtualIpAddress:
         """
         self._validate_keys_create_update()
         self._generate_args()
-        self._initialize_vm_primary_ip()
-        if self.ip_address_obj is None:
-            self.create()
+        ip_address_obj = self.ip_address_obj
+        if ip_address_obj is None:
+            ip_address_obj = self.create()
         else:
-            self.update()
-        map_vm_primary_ip(
-            self._netbox_obj, self.virtual_machine, self.interface, self.ip4
-        )
-        make_vm_primary_ip(self._netbox_obj, self.virtual_machine, self.ip4)
+            self._update(ip_address_obj)
+        set_vm_primary_ip(self._netbox_obj, self.virtual_machine, ip_address_obj.id)
+
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for ip addresses
+        """
+        return self._netbox_obj.ipam.ip_addresses
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this ip address.
+        netbox_tools.bulk.Bulk merges these to retrieve many ip addresses per request.
+        """
+        return {"address": self.ip4}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this ip address's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the ip address.
+        """
+        return ("ip_address", self.ip4)
+
+    @property
+    def primary_ip_parent(self):
+        """
+        Return the tuple (parent type, parent name) of the virtual machine whose
+        primary ip this ip address is made.  Used by
+        netbox_tools.aio.AsyncEntity.async_create_or_update()
+        """
+        return ("virtual_machine", self.virtual_machine)
 
     @property
     def description(self):
@@ -269,6 +358,8 @@ class VirtualIpAddress:
         """
         Return the Netbox ip address object associated with ip4 address set by the caller.
         """
+        if self._ip_address_obj is not NOT_FETCHED:
+            return self._ip_address_obj
         try:
             address, mask = self.ip4.split("/")
         except Exception as _general_exception:
@@ -277,7 +368,10 @@ class VirtualIpAddress:
                 f"Got {self.ip4}." f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
-        return self._netbox_obj.ipam.ip_addresses.get(address=address, mask=mask)
+        self._ip_address_obj = self._netbox_obj.ipam.ip_addresses.get(
+            address=address, mask=mask
+        )
+        return self._ip_address_obj
 
     @property
     def ip_address_enabled(self):
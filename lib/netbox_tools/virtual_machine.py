@@ -2,22 +2,23 @@
 Name: virtual_machine.py
 Description: create/update/delete operations on netbox virtual_machine
 """
-from inspect import stack, getframeinfo, currentframe
 import sys
-from netbox_tools.common import cluster_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, cluster_id
 from netbox_tools.common import create_slug
 from netbox_tools.common import device_id
 from netbox_tools.common import get_vm
-from netbox_tools.common import ip_address_id, get_ip_address
 from netbox_tools.common import role_id
 from netbox_tools.common import site_id
 from netbox_tools.common import tag_id
-from netbox_tools.common import virtual_interface_id
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 106
+OUR_VERSION = 119
 
 
-class VirtualMachine:
+class VirtualMachine(AsyncEntity):
     """
     create/update/delete operations on netbox virtual_machine
     """
@@ -26,6 +27,7 @@ class VirtualMachine:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._vm_object = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_keys_create_or_update = set()
@@ -38,9 +40,7 @@ class VirtualMachine:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys_delete(self):
         for key in self._mandatory_keys_delete:
@@ -138,7 +138,7 @@ class VirtualMachine:
             return
         try:
             vcpus = float(str(self.vcpus))
-        except ValueError as _value_error:
+        except ValueError:
             self.log(
                 "exiting. vcpus must be of type float. e.g. 1.01.", f"Got {self.vcpus}"
             )
@@ -164,6 +164,28 @@ class VirtualMachine:
         self._set_tags()
         self._set_vcpus()
 
+    def refresh(self):
+        """
+        Discard the cached netbox virtual machine object so that the next access
+        to vm_object retrieves it from netbox.  Called after each write.
+        """
+        self._vm_object = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this virtual machine so that
+        subsequent lookups are sent to netbox.
+        Also discard this virtual machine's cached virtual_interface mappings,
+        which may be affected by changes to it.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("vm", self.vm_name)
+        resolver.invalidate_where(
+            "virtual_interface", lambda key: key[0] == self.vm_name
+        )
+        self.refresh()
+
     def create(self):
         """
         create a virtual machine
@@ -177,21 +199,28 @@ class VirtualMachine:
                 f"Exception detail: {_general_exception}"
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update a virtual machine
         """
+        changes = changed_fields(self._args, self.vm_object)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. virtual_machine {self.vm_name} is unchanged.")
+            return
         self.log(f"{self.vm_name}")
         self._args["id"] = self.vm_id
         try:
-            self.vm_object.update(self._args)
+            self.vm_object.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"exiting. Unable to update vm {self.vm_name}."
                 f"Exception detail: {_general_exception}"
             )
             sys.exit(1)
+        self.refresh()
 
     def delete(self):
         """
@@ -210,6 +239,29 @@ class VirtualMachine:
                 f"Exception detail: {_general_exception}"
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this virtual machine
+        """
+        return record.name == self.vm_name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_create_or_update()
+        self._generate_args_create_or_update()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Validate caller input for delete.  Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys_delete()
 
     def create_or_update(self):
         """
@@ -222,6 +274,30 @@ class VirtualMachine:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for virtual machines
+        """
+        return self._netbox_obj.virtualization.virtual_machines
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this virtual machine.
+        netbox_tools.bulk.Bulk merges these to retrieve many virtual machines per request.
+        """
+        return {"name": self.vm_name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this virtual machine's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the virtual machine.
+        """
+        return ("vm", self.vm_name)
+
     @property
     def cluster(self):
         """
@@ -345,8 +421,10 @@ class VirtualMachine:
         """
         Return the netbox object associated with the virtual machine.
         """
+        if self._vm_object is not NOT_FETCHED:
+            return self._vm_object
         try:
-            return self._netbox_obj.virtualization.virtual_machines.get(
+            self._vm_object = self._netbox_obj.virtualization.virtual_machines.get(
                 name=self.vm_name
             )
         except Exception as _general_exception:
@@ -355,31 +433,50 @@ class VirtualMachine:
                 f"Exceptioin detail: {_general_exception}",
             )
             sys.exit(1)
-
+        return self._vm_object
 
 # utility functions related to virtual machines
 
 
-def initialize_vm_primary_ip(netbox_obj, vm_name):
+def _log(*args):
     """
-    Initialize primary_ip4 and primary_ip to avoid errors in map_vm_primary_ip()address.save()
+    simple logger
     """
-    vm_obj = get_vm(netbox_obj, vm_name)
-    vm_obj.primary_ip4 = None
-    vm_obj.primary_ip = None
-    vm_obj.save()
-    print(
-        "{}(v{}).{}: vm: {}".format(
-            __name__, OUR_VERSION, getframeinfo(currentframe()).function, vm_name
-        )
+    log_message(args, __name__, OUR_VERSION)
+
+
+def release_vm_primary_ip(netbox_obj, ip_address_obj, vm_name):
+    """
+    netbox will not move an ip address to another virtual machine while it
+    is the primary ip of the virtual machine it is assigned to.  If
+    ip_address_obj is assigned to a virtual machine other than vm_name, and
+    is that virtual machine's primary_ip4, clear its primary_ip4.
+
+    Sends no requests if ip_address_obj is unassigned, or is already
+    assigned to vm_name.
+    """
+    parent = getattr(ip_address_obj.assigned_object, "virtual_machine", None)
+    if parent is None or parent.name == vm_name:
+        return
+    vm_obj = netbox_obj.virtualization.virtual_machines.get(parent.id)
+    if vm_obj is None or vm_obj.primary_ip4 is None:
+        return
+    if vm_obj.primary_ip4.id != ip_address_obj.id:
+        return
+    vm_obj.update({"primary_ip4": None})
+    _log(
+        f"vm: {parent.name}",
+        f"released primary_ip4 {ip_address_obj.address}",
     )
 
 
-def map_vm_primary_ip(netbox_obj, vm_name, interface_name, ip_address):
+def set_vm_primary_ip(netbox_obj, vm_name, address_id):
     """
-    Map an existing IP address to an interface ID
+    Make the ip address with netbox id address_id the primary ip of a
+    virtual_machine.  The virtual_machine is updated only if its primary_ip4
+    is not already address_id.
 
-    args: nb, vm_name, interface_name, ip_address
+    args: netbox_obj, vm_name, address_id
 
     Where:
 
@@ -387,44 +484,28 @@ def map_vm_primary_ip(netbox_obj, vm_name, interface_name, ip_address):
 
         vm_name - str() name of a virtual machine
 
-        interface_name - str() name of an interface
-
-        ip_address - str() ip address in A.B.C.D/E format
-    """
-    address = get_ip_address(netbox_obj, ip_address)
-    address.assigned_object_id = virtual_interface_id(
-        netbox_obj, vm_name, interface_name
-    )
-    address.assigned_object_type = "virtualization.vminterface"
-    address.save()
-    print(
-        "{}(v{}).{}: vm: {}, interface: {}, address: {}".format(
-            __name__,
-            OUR_VERSION,
-            getframeinfo(currentframe()).function,
-            vm_name,
-            interface_name,
-            ip_address,
-        )
-    )
-
-
-def make_vm_primary_ip(netbox_obj, vm_name, ip_address):
-    """
-    Make an ip address the primary address for a virtual_machine by mapping
-    the address ID to a virtual_machines's primary_ip and primary_ip4.
+        address_id - int() netbox id of an ip address assigned to the virtual machine
     """
     vm_obj = get_vm(netbox_obj, vm_name)
-    address_id = ip_address_id(netbox_obj, ip_address)
-    vm_obj.primary_ip = address_id
-    vm_obj.primary_ip4 = address_id
-    vm_obj.save()
-    print(
-        "{}(v{}).{}: vm: {}, ip: {}".format(
-            __name__,
-            OUR_VERSION,
-            getframeinfo(currentframe()).function,
-            vm_name,
-            ip_address,
+    if vm_obj is None:
+        _log(
+            "exiting.",
+            f"vm {vm_name} not found in netbox.",
         )
-    )
+        sys.exit(1)
+    if vm_obj.primary_ip4 is not None and vm_obj.primary_ip4.id == address_id:
+        _log(
+            "Nothing to do.",
+            f"vm {vm_name} primary_ip4 is unchanged.",
+        )
+        return
+    try:
+        vm_obj.update({"primary_ip4": address_id})
+    except Exception as _general_exception:
+        _log(
+            "exiting.",
+            f"Unable to set vm {vm_name} primary_ip4 to {address_id}.",
+            f"Exception detail: {_general_exception}",
+        )
+        sys.exit(1)
+    _log(f"vm: {vm_name}", f"primary_ip4 {address_id}")
@@ -2,14 +2,25 @@
 Name: vlan.py
 Description: create, update, and delete operations on netbox vlan
 """
-from inspect import stack
 import sys
-from netbox_tools.common import create_slug, role_id, site_id, tag_id, vlan_group_id
-
-OUR_VERSION = 102
-
-
-class Vlan:
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.choices import get_choices
+from netbox_tools.common import (
+    NOT_FETCHED,
+    create_slug,
+    role_id,
+    site_id,
+    tag_id,
+    vlan_group_id,
+)
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
+
+OUR_VERSION = 114
+
+
+class Vlan(AsyncEntity):
     """
     create, update, and delete operations on netbox vlan
     """
@@ -18,6 +29,7 @@ class Vlan:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._vlan_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self.mandatory_keys = set()
@@ -36,19 +48,13 @@ class Vlan:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _populate_valid_choices(self):
         """
         retrieve valid vlan choices from the users netbox instance
         """
-        self._valid_choices = {}
-        choices_dict = self._netbox_obj.ipam.vlans.choices()
-        for item in choices_dict:
-            valid_values = choices_dict[item]
-            self._valid_choices[item] = [item["value"] for item in valid_values]
+        self._valid_choices = get_choices(self._netbox_obj, "ipam", "vlans")
 
     def validate_keys(self):
         """
@@ -88,7 +94,7 @@ class Vlan:
             return
         try:
             self._args["role"] = role_id(self._netbox_obj, self.role)
-        except Exception as _general_exception:
+        except Exception:
             self.log(
                 f"exiting. Unable to set role ID for role {self.role}"
                 "Does this role exist in Netbox?"
@@ -162,6 +168,26 @@ class Vlan:
         self._set_tags()
         self._set_vid()
 
+    def refresh(self):
+        """
+        Discard the cached netbox vlan object so that the next access
+        to vlan_obj retrieves it from netbox.  Called after each write.
+        """
+        self._vlan_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this vlan so that
+        subsequent lookups are sent to netbox.
+        Also discard cached vlan_vid mappings, which may
+        be affected by changes to this vlan.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("vlan_name", self.vlan_name)
+        resolver.invalidate("vlan_vid")
+        self.refresh()
+
     def delete(self):
         """
         delete vlan
@@ -178,6 +204,8 @@ class Vlan:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -192,21 +220,49 @@ class Vlan:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update vlan
         """
+        changes = changed_fields(self._args, self.vlan_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. vlan {self.vlan_name} is unchanged.")
+            return
         self.log(f"{self.vlan_name}")
         self._args["id"] = self.vlan_id
         try:
-            self.vlan_obj.update(self._args)
+            self.vlan_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"exiting. Unable to update Vlan {self.vlan_name}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this vlan
+        """
+        return record.name == self.vlan_name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self.validate_keys()
+        self.generate_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -219,6 +275,30 @@ class Vlan:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for vlans
+        """
+        return self._netbox_obj.ipam.vlans
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this vlan.
+        netbox_tools.bulk.Bulk merges these to retrieve many vlans per request.
+        """
+        return {"name": self.vlan_name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this vlan's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the vlan.
+        """
+        return ("vlan_name", self.vlan_name)
+
     @property
     def description(self):
         """
@@ -295,8 +375,10 @@ class Vlan:
         Return the Netbox object associated with the vlan set by the caller.
         Exit with error if this object cannot be retrieved from Netbox.
         """
+        if self._vlan_obj is not NOT_FETCHED:
+            return self._vlan_obj
         try:
-            return self._netbox_obj.ipam.vlans.get(name=self.vlan_name)
+            self._vlan_obj = self._netbox_obj.ipam.vlans.get(name=self.vlan_name)
         except Exception as _general_exception:
             self.log(
                 "exiting. Unable to retrieve vlan object from Netbox",
@@ -304,6 +386,7 @@ class Vlan:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        return self._vlan_obj
 
     @property
     def vlan_id(self):
@@ -2,15 +2,18 @@
 Name: vlan_group.py
 Description: create, update, and delete operations on netbox vlan_group
 """
-from inspect import stack
 import sys
-from netbox_tools.common import tag_id
+from netbox_tools.aio import AsyncEntity
+from netbox_tools.common import NOT_FETCHED, tag_id
 from netbox_tools.common import create_slug
+from netbox_tools.diff import changed_fields
+from netbox_tools.logger import log_message
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 102
+OUR_VERSION = 112
 
 
-class VlanGroup:
+class VlanGroup(AsyncEntity):
     """
     create, update, and delete operations on netbox vlan_group
     """
@@ -19,6 +22,7 @@ class VlanGroup:
         self.lib_version = OUR_VERSION
         self._classname = __class__.__name__
         self._netbox_obj = netbox_obj
+        self._vlan_group_obj = NOT_FETCHED
         self._info = info
         self._args = {}
         self._mandatory_keys = set()
@@ -33,9 +37,7 @@ class VlanGroup:
         """
         simple logger
         """
-        print(
-            f"{self._classname}(v{self.lib_version}).{stack()[1].function}: {' '.join(args)}"
-        )
+        log_message(args, self._classname, self.lib_version)
 
     def _validate_keys(self):
         """
@@ -105,6 +107,23 @@ class VlanGroup:
         self._set_slug()
         self._set_tags()
 
+    def refresh(self):
+        """
+        Discard the cached netbox vlan group object so that the next access
+        to vlan_group_obj retrieves it from netbox.  Called after each write.
+        """
+        self._vlan_group_obj = NOT_FETCHED
+
+    def invalidate_resolver(self):
+        """
+        Discard cached name to id mappings for this vlan_group so that
+        subsequent lookups are sent to netbox.
+        Also discard the cached netbox object (see refresh()).
+        """
+        resolver = get_resolver(self._netbox_obj)
+        resolver.invalidate("vlan_group", self.vlan_group_name)
+        self.refresh()
+
     def delete(self):
         """
         delete vlan_group
@@ -123,6 +142,8 @@ class VlanGroup:
                 f"Exception detail: {_general_exception}",
             )
             return
+        self.invalidate_resolver()
+        self.refresh()
 
     def create(self):
         """
@@ -137,21 +158,48 @@ class VlanGroup:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.invalidate_resolver()
+        self.refresh()
 
     def update(self):
         """
         update vlan_group
         """
+        changes = changed_fields(self._args, self.vlan_group_obj)
+        if len(changes) == 0:
+            self.log(f"Nothing to do. vlan_group {self.vlan_group_name} is unchanged.")
+            return
         self.log(f"{self.vlan_group_name}")
         self._args["id"] = self.vlan_group_id
         try:
-            self.vlan_group_obj.update(self._args)
+            self.vlan_group_obj.update(changes)
         except Exception as _general_exception:
             self.log(
                 f"exiting. Unable to update VlanGroup {self.vlan_group_name}.",
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        self.refresh()
+
+    def bulk_match(self, record):
+        """
+        Return True if netbox record is this vlan_group
+        """
+        return record.name == self.vlan_group_name
+
+    def prepare_create_or_update(self):
+        """
+        Validate caller input, generate create/update arguments, and return them.
+        Used by netbox_tools.bulk.Bulk
+        """
+        self._validate_keys()
+        self._generate_args()
+        return self._args
+
+    def prepare_delete(self):
+        """
+        Nothing to validate for delete.  Used by netbox_tools.bulk.Bulk
+        """
 
     def create_or_update(self):
         """
@@ -164,6 +212,30 @@ class VlanGroup:
         else:
             self.update()
 
+    @property
+    def endpoint(self):
+        """
+        Return the netbox endpoint for vlan_groups
+        """
+        return self._netbox_obj.ipam.vlan_groups
+
+    @property
+    def bulk_filter(self):
+        """
+        Return netbox filter arguments that select this vlan_group.
+        netbox_tools.bulk.Bulk merges these to retrieve many vlan_groups per request.
+        """
+        return {"name": self.vlan_group_name}
+
+    @property
+    def resolver_key(self):
+        """
+        Return the tuple (object_type, key) under which the resolver caches
+        this vlan_group's netbox id.  netbox_tools.bulk.Bulk stores the id there
+        once it finds or creates the vlan_group.
+        """
+        return ("vlan_group", self.vlan_group_name)
+
     @property
     def max_vid(self):
         """
@@ -207,8 +279,12 @@ class VlanGroup:
         Return the Netbox object associated with the vlan_group set by the caller.
         Exit with error if this object cannot be retrieved from Netbox.
         """
+        if self._vlan_group_obj is not NOT_FETCHED:
+            return self._vlan_group_obj
         try:
-            return self._netbox_obj.ipam.vlan_groups.get(name=self.vlan_group_name)
+            self._vlan_group_obj = self._netbox_obj.ipam.vlan_groups.get(
+                name=self.vlan_group_name
+            )
         except Exception as _general_exception:
             self.log(
                 "exiting. Unable to retrieve vlan_group object from Netbox",
@@ -216,6 +292,7 @@ class VlanGroup:
                 f"Exception detail: {_general_exception}",
             )
             sys.exit(1)
+        return self._vlan_group_obj
 
     @property
     def vlan_group_id(self):
@@ -4,12 +4,13 @@ Name: cable_delete_all.py
 Description: Delete all cables defined in ``--yaml``
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import netbox, load_yaml
 from netbox_tools.cable import Cable
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 101
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -31,18 +32,44 @@ def get_parser():
         "--yaml", dest="yaml", required=True, help=help_yaml + ex_yaml
     )
 
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_device_from_interface_key(interface_key):
@@ -97,6 +124,13 @@ def make_args():
 cfg = get_parser()
 netbox_obj = netbox()
 info = load_yaml(cfg.yaml)
+cables = []
 for key in info["cables"]:
-    cable = Cable(netbox_obj, make_args())
-    cable.delete()
+    cables.append(Cable(netbox_obj, make_args()))
+bulk = Bulk(chunk_size=cfg.chunk_size, dry_run=cfg.plan)
+bulk.delete(cables)
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
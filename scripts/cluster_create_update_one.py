@@ -4,12 +4,12 @@ Name: cluster_create_update_one.py
 Description: Create/update cluster with key ``--key`` in file ``--yaml``
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import netbox, load_yaml
 from netbox_tools.cluster import Cluster
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 101
+OUR_VERSION = 102
 
 
 def get_parser():
@@ -39,14 +39,14 @@ def get_parser():
         "--version", action="version", version="%(prog)s {}".format(OUR_VERSION)
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 cfg = get_parser()
 netbox_obj = netbox()
@@ -4,10 +4,14 @@ Name: cluster_type_create_update_all.py
 Description: Create/update cluster_types defined in ``--yaml`
 """
 import argparse
+import sys
 from netbox_tools.common import netbox, load_yaml
 from netbox_tools.cluster_type import ClusterType
+from netbox_tools.logger import parse_args
+from netbox_tools.resolver import get_resolver
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
 
-OUR_VERSION = 101
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -29,16 +33,64 @@ def get_parser():
         "--yaml", dest="yaml", required=True, help=help_yaml + ex_yaml
     )
 
+    help_preload = "Fetch reference tables (sites, roles, tags, vlans, etc)"
+    help_preload += " once before processing, rather than looking up"
+    help_preload += " each reference in netbox individually."
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--preload",
+        dest="preload",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_preload,
+    )
+
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 cfg = get_parser()
 netbox_obj = netbox()
+if cfg.preload:
+    get_resolver(netbox_obj).preload(netbox_obj)
 info = load_yaml(cfg.yaml)
+cluster_types = []
 for key in info["cluster_types"]:
-    c = ClusterType(netbox_obj, info["cluster_types"][key])
-    c.create_or_update()
+    cluster_types.append(ClusterType(netbox_obj, info["cluster_types"][key]))
+bulk = Bulk(chunk_size=cfg.chunk_size, dry_run=cfg.plan)
+bulk.create_or_update(cluster_types)
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
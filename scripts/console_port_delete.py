@@ -6,8 +6,9 @@ Description: Delete console_port --port from netbox
 import argparse
 from netbox_tools.common import netbox
 from netbox_tools.console_port import ConsolePort
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 101
+OUR_VERSION = 102
 
 
 def get_parser():
@@ -38,7 +39,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
@@ -5,8 +5,9 @@ Description: Display information about all console_ports
 """
 import argparse
 from netbox_tools.common import netbox, get_console_ports
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 101
+OUR_VERSION = 102
 
 
 def get_parser():
@@ -21,7 +22,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def print_headers():
@@ -13,8 +13,9 @@ import argparse
 import re
 from netbox_tools.common import netbox
 from netbox_tools.console_server_port import ConsoleServerPort
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 106
+OUR_VERSION = 107
 
 
 def get_parser():
@@ -70,7 +71,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_args():
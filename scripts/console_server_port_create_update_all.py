@@ -4,10 +4,14 @@ Name: console_server_port_create_update_all.py
 Description: create/update netbox console-server-ports from information in a YAML file.
 """
 import argparse
+import sys
 from netbox_tools.common import netbox, load_yaml
 from netbox_tools.console_server_port import ConsoleServerPort
+from netbox_tools.logger import parse_args
+from netbox_tools.resolver import get_resolver
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
 
-OUR_VERSION = 102
+OUR_VERSION = 106
 
 
 def get_parser():
@@ -29,19 +33,66 @@ def get_parser():
         "--yaml", dest="yaml", required=True, help=f"{help_yaml} {ex_yaml}"
     )
 
+    help_preload = "Fetch reference tables (sites, roles, tags, vlans, etc)"
+    help_preload += " once before processing, rather than looking up"
+    help_preload += " each reference in netbox individually."
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--preload",
+        dest="preload",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_preload,
+    )
+
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 cfg = get_parser()
 netbox_obj = netbox()
+if cfg.preload:
+    get_resolver(netbox_obj).preload(netbox_obj)
 info = load_yaml(cfg.yaml)
+console_server_ports = []
 for key in info["console_server_ports"]:
-    console_server_port = ConsoleServerPort(
-        netbox_obj,
-        info["console_server_ports"][key]
+    console_server_ports.append(
+        ConsoleServerPort(netbox_obj, info["console_server_ports"][key])
     )
-    console_server_port.create_or_update()
+bulk = Bulk(chunk_size=cfg.chunk_size, dry_run=cfg.plan)
+bulk.create_or_update(console_server_ports)
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
@@ -6,8 +6,9 @@ Description: Delete console_server_port --port from netbox
 import argparse
 from netbox_tools.common import netbox
 from netbox_tools.console_server_port import ConsoleServerPort
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 102
+OUR_VERSION = 103
 
 
 def get_parser():
@@ -38,7 +39,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Name: credential_agent.py
+Description: Start, stop, or query the netbox-tools credential agent
+
+The agent decrypts your Ansible vault once, and serves the netbox url and
+token to netbox-tools scripts over a user-only Unix socket, so that they
+(and e.g. sshnb.bash) do not prompt for the vault password each run.
+See lib/netbox_tools/credential_agent.py for details.
+
+Example Usage:
+
+./credential_agent.py                       # start, exit after 1 hour idle
+./credential_agent.py --idle_timeout 28800  # start, exit after 8 hours idle
+./credential_agent.py --status
+./credential_agent.py --stop
+"""
+import argparse
+import os
+import sys
+from netbox_tools.config.netbox_config import LoadConfig
+from netbox_tools.credential_agent import (
+    DEFAULT_IDLE_TIMEOUT,
+    CredentialAgent,
+    query_agent,
+    socket_path,
+    stop_agent,
+)
+from netbox_tools.credentials import NetboxCredentials
+from netbox_tools.logger import log_message, parse_args
+
+OUR_VERSION = 101
+
+
+def get_parser():
+    """
+    return an argparse parser object
+    """
+    help_idle_timeout = "Seconds without a request after which the agent exits."
+    help_idle_timeout += " Default: credential_agent_idle_timeout in config.yml,"
+    help_idle_timeout += f" or {DEFAULT_IDLE_TIMEOUT} if not set."
+    help_foreground = "Run the agent in the foreground, rather than in the background."
+    help_status = "Print whether an agent is running, and exit."
+    help_stop = "Stop the running agent, and exit."
+
+    ex_prefix = "Example: "
+    ex_idle_timeout = f"{ex_prefix} --idle_timeout 28800"
+
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Start, stop, or query the netbox-tools credential agent"
+    )
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+
+    optional.add_argument(
+        "--idle_timeout",
+        dest="idle_timeout",
+        type=int,
+        required=False,
+        default=None,
+        help=f"{help_idle_timeout} {ex_idle_timeout}",
+    )
+    optional.add_argument(
+        "--foreground",
+        dest="foreground",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_foreground,
+    )
+    optional.add_argument(
+        "--status",
+        dest="status",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_status,
+    )
+    optional.add_argument(
+        "--stop",
+        dest="stop",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_stop,
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parse_args(parser)
+
+
+def log(*args):
+    """
+    simple logger
+    """
+    log_message(args, version=OUR_VERSION)
+
+
+def get_idle_timeout():
+    """
+    Return --idle_timeout if set, else credential_agent_idle_timeout
+    from config.yml if set, else DEFAULT_IDLE_TIMEOUT
+    """
+    if cfg.idle_timeout is not None:
+        return cfg.idle_timeout
+    return config.get("credential_agent_idle_timeout", DEFAULT_IDLE_TIMEOUT)
+
+
+def start_agent():
+    """
+    Read credentials from the vault, then serve them until idle.
+    Unless --foreground is set, serve from a background process, and
+    return once the agent is listening.
+    """
+    credentials = NetboxCredentials(use_agent=False)
+    agent = CredentialAgent(
+        {"netbox_url": credentials.url, "netbox_token": credentials.token},
+        path,
+        get_idle_timeout(),
+    )
+    try:
+        agent.bind()
+    except (OSError, RuntimeError) as _general_exception:
+        log(f"exiting. Unable to start agent. Exception detail: {_general_exception}")
+        sys.exit(1)
+    log(f"agent listening on {path}, idle timeout {agent.idle_timeout} seconds")
+    if cfg.foreground is True:
+        agent.serve()
+        return
+    if os.fork() != 0:
+        # parent: the child owns the socket now
+        os._exit(0)
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for descriptor in (0, 1, 2):
+        os.dup2(devnull, descriptor)
+    agent.serve()
+
+
+cfg = get_parser()
+config = LoadConfig().config
+path = socket_path(config)
+if cfg.status is True:
+    if query_agent(path) is None:
+        log(f"no agent is listening on {path}")
+        sys.exit(1)
+    log(f"agent is listening on {path}")
+elif cfg.stop is True:
+    if stop_agent(path) is False:
+        log(f"no agent is listening on {path}")
+        sys.exit(1)
+    log(f"agent on {path} stopped")
+else:
+    start_agent()
@@ -7,16 +7,12 @@ Example Usage
 ./device_assign_primary_ip.py --device bgw_1 --ipv4 192.168.1.6/24 --status active
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import interface_id, ip_address_id, netbox
-from netbox_tools.device import (
-    initialize_device_primary_ip,
-    map_device_primary_ip,
-    make_device_primary_ip,
-)
+from netbox_tools.device import assign_device_primary_ip
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 106
 
 
 def get_parser():
@@ -61,14 +57,14 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def assign_primary_ip_to_device():
@@ -89,9 +85,7 @@ def assign_primary_ip_to_device():
             f"Interface {cfg.interface} not found at {netbox_obj.base_url}",
         )
         sys.exit(1)
-    initialize_device_primary_ip(netbox_obj, cfg.device)
-    map_device_primary_ip(netbox_obj, cfg.device, cfg.interface, cfg.ipv4)
-    make_device_primary_ip(netbox_obj, cfg.device, cfg.ipv4)
+    assign_device_primary_ip(netbox_obj, cfg.device, cfg.interface, cfg.ipv4)
 
 
 cfg = get_parser()
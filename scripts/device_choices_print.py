@@ -5,8 +5,9 @@ Description: Display choices associated with Netbox endpoint dcim.devices
 """
 import argparse
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 103
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -21,7 +22,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s v{OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def print_header():
@@ -43,8 +44,8 @@ def print_choices():
         print(FMT.format(item, ", ".join(choices)))
 
 
-netbox_obj = netbox()
 cfg = get_parser()
+netbox_obj = netbox()
 
 items = netbox_obj.dcim.devices.choices()
 
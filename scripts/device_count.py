@@ -17,14 +17,62 @@ Vault password:
 Count: 10
 (py310) netbox-tools %
 
+With --group_by, print a matrix of counts, one row per combination of the
+given dimensions (site, role, model), within any filters.  For example:
+
+(py310) netbox-tools % ./device_count.py --site S03-1-155 --group_by role,model
+Vault password:
+role            model                   count
+--------------- -------------------- --------
+leaf            N9K-C93108TC-FX             1
+leaf            N9K-C93180YC-EX             9
+spine           N9K-C93108TC-FX             0
+spine           N9K-C93180YC-EX             0
+spine           N9K-C9336C-FX2              2
+...
+
+The values of each dimension are read from netbox's reference tables, and
+cached (see netbox_tools/resolver.py).  The matrix is then counted in one of
+two ways (--strategy):
+
+count: one count request per cell, sent in parallel (--workers)
+scan:  one pass over the matching devices, fetching only the fields
+       needed, with pages fetched in parallel (see netbox_tools/paginator.py)
+
+By default (auto), the strategy needing fewer requests is used.  Model
+numbers shared by device types of different manufacturers are left out of
+the cached index, and are counted only by the scan strategy.
 """
 import argparse
-from inspect import stack
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+import math
 import sys
 import pprint
-from netbox_tools.common import netbox
-
-OUR_VERSION = 104
+from netbox_tools.common import (
+    brief_query,
+    device_type_id,
+    netbox,
+    netbox_version,
+    role_id,
+    site_id,
+)
+from netbox_tools.logger import log_message, parse_args
+from netbox_tools.mirror import netbox_mirror
+from netbox_tools.output import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, row_writer
+from netbox_tools.paginator import DEFAULT_PAGE_SIZE, DEFAULT_WORKERS, parallel_all
+from netbox_tools.resolver import get_resolver
+
+OUR_VERSION = 107
+
+# dimension: (resolver object type, device filter, table column)
+DIMENSIONS = {
+    "site": ("site", "site_id", ("site", 20, "<")),
+    "role": ("role", "role_id", ("role", 15, "<")),
+    "model": ("device_type", "device_type_id", ("model", 20, "<")),
+}
+STRATEGIES = ("auto", "count", "scan")
 
 
 def get_parser():
@@ -34,11 +82,26 @@ def get_parser():
     help_role = "Filter on role."
     help_site = "Filter on site."
     help_model = "Filter on model number (e.g. N9K-C93180YC-EX)."
+    help_from_mirror = "Read from the local mirror of netbox (see mirror_snapshot.py)"
+    help_from_mirror += " rather than from netbox."
+    help_group_by = "Comma-separated list (no spaces) of dimensions to count by:"
+    help_group_by += f" {', '.join(DIMENSIONS)}.  Prints one count per combination."
+    help_strategy = "With --group_by, count with one request per combination"
+    help_strategy += " (count), or with one pass over the devices (scan)."
+    help_strategy += " Default: auto (whichever needs fewer requests)."
+    help_output = "Output format of --group_by: table, csv, or json (one JSON"
+    help_output += f" object per line). Default: {DEFAULT_OUTPUT_FORMAT}."
+    help_workers = "Maximum number of requests sent to netbox in parallel."
+    help_workers += f" Default: {DEFAULT_WORKERS}."
 
     ex_prefix = "Example: "
     ex_role = f"{ex_prefix} --role leaf"
     ex_site = f"{ex_prefix} --site f1"
     ex_model = f"{ex_prefix} --type N9K-C93180YC-EX"
+    ex_group_by = f"{ex_prefix} --group_by site,role"
+    ex_strategy = f"{ex_prefix} --strategy scan"
+    ex_output = f"{ex_prefix} --output csv"
+    ex_workers = f"{ex_prefix} --workers 8"
 
     description = (
         "DESCRIPTION: Netbox: Count devices matching filters [role, site, model]."
@@ -72,18 +135,58 @@ def get_parser():
         help=f"{help_model} {ex_model}",
     )
 
+    default.add_argument(
+        "--from_mirror",
+        dest="from_mirror",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_from_mirror,
+    )
+    default.add_argument(
+        "--group_by",
+        dest="group_by",
+        required=False,
+        default=None,
+        help=f"{help_group_by} {ex_group_by}",
+    )
+    default.add_argument(
+        "--strategy",
+        dest="strategy",
+        required=False,
+        default="auto",
+        choices=STRATEGIES,
+        help=f"{help_strategy} {ex_strategy}",
+    )
+    default.add_argument(
+        "--output",
+        dest="output",
+        required=False,
+        default=DEFAULT_OUTPUT_FORMAT,
+        choices=OUTPUT_FORMATS,
+        help=f"{help_output} {ex_output}",
+    )
+    default.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=DEFAULT_WORKERS,
+        help=f"{help_workers} {ex_workers}",
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_args():
@@ -102,110 +205,200 @@ def get_args():
     return args
 
 
-def verify_model():
+def get_filters():
     """
-    return a dictionary of existing netbox device types.
-    key is device type name, value is netbox device type id.
-    dictionary will be empty if the user didn't specify --model
+    return a dictionary of netbox device filters for the user's query.
+    site, role, and model are given by name, and are resolved to the ids
+    that netbox filters on.
 
-    Exit with error if the device type does not exist in netbox.
+    Exit with error if a site, role, or model does not exist in netbox.
+    """
+    lookups = [
+        ("site_id", cfg.site, site_id, "Site"),
+        ("role_id", cfg.role, role_id, "Role"),
+        ("device_type_id", cfg.model, device_type_id, "Model"),
+    ]
+    filters = {}
+    for key, name, lookup, label in lookups:
+        if name is None:
+            continue
+        filters[key] = lookup(netbox_obj, name)
+        if filters[key] is None:
+            log(f"exiting. {label} {name} is not present in Netbox.")
+            sys.exit(1)
+    return filters
+
+
+def get_device_count(filters):
+    """
+    return the number of devices matching filters
+    """
+    try:
+        return netbox_obj.dcim.devices.count(**filters)
+    except Exception as general_exception:
+        log("Unable to get count.", f"Exception detail: {general_exception}")
+        sys.exit(1)
+
+
+def get_dimensions():
+    """
+    return the list of dimensions given with --group_by
 
-    NOTES:
-    1. 'device_type' does not work with count() for some reason.
-       We're using device_type.id as a workaround for now.
+    Exit with error if a dimension is unknown.
     """
-    models = {}
-    if cfg.model is None:
-        return models
-    items = netbox_obj.dcim.device_types.all()
-    for item in items:
-        models[item.model] = item.id
-    if cfg.model in models:
-        return models
-    log(
-        f"exiting. Model {cfg.model} is not present in Netbox.",
-        f"Valid models: {', '.join(sorted(models))}",
+    dimensions = [dimension.strip() for dimension in cfg.group_by.split(",")]
+    for dimension in dimensions:
+        if dimension not in DIMENSIONS:
+            log(
+                f"exiting. Unknown --group_by dimension {dimension}.",
+                f"Valid dimensions: {', '.join(DIMENSIONS)}",
+            )
+            sys.exit(1)
+    return list(dict.fromkeys(dimensions))
+
+
+def preload_dimensions(dimensions):
+    """
+    read the reference tables of dimensions once, into the resolver's cache,
+    so that the user's filters, and the values of each dimension, are
+    answered from it
+    """
+    get_resolver(netbox_obj).preload(
+        netbox_obj, [DIMENSIONS[dimension][0] for dimension in dimensions]
     )
-    sys.exit(1)
 
 
-def verify_role():
+def get_dimension_values(dimensions, filters):
     """
-    return a dictionary of existing netbox device roles.
-    key is device role name, value is netbox device role id.
-    dictionary will be empty if the user didn't specify --role
+    return a dictionary, keyed on dimension, of dictionaries mapping the
+    names of that dimension's values to their netbox ids.  A dimension
+    the user also filters on holds only the filtered value.
 
-    Exit with error if the device role does not exist in netbox.
+    The dimensions' reference tables must have been preloaded into the
+    resolver's cache (see preload_dimensions()).
+    """
+    resolver = get_resolver(netbox_obj)
+    values = {}
+    for dimension in dimensions:
+        object_type, key, _ = DIMENSIONS[dimension]
+        entries = resolver.entries(object_type)
+        if key in filters:
+            entries = {
+                name: value for name, value in entries.items() if value == filters[key]
+            }
+        values[dimension] = dict(sorted(entries.items()))
+    return values
+
+
+def count_cells(dimensions, values, filters):
+    """
+    return a Counter, keyed on tuples of dimension values, of the devices
+    matching filters, with one count request per cell
+    """
+    cells = list(product(*[values[dimension] for dimension in dimensions]))
+
+    def count_cell(cell):
+        cell_filters = dict(filters)
+        for dimension, name in zip(dimensions, cell):
+            cell_filters[DIMENSIONS[dimension][1]] = values[dimension][name]
+        return get_device_count(cell_filters)
 
-    NOTES:
-    1. 'role' does not work with count() for some reason.
-       We're using role.id as a workaround for now.
+    with ThreadPoolExecutor(max_workers=max(cfg.workers, 1)) as executor:
+        return Counter(dict(zip(cells, executor.map(count_cell, cells))))
+
+
+def device_value(device, dimension, role_field):
+    """
+    return the name of device's value of dimension
     """
-    roles = {}
-    if cfg.role is None:
-        return roles
-    items = netbox_obj.dcim.device_roles.all()
-    for item in items:
-        roles[item.name] = item.id
-    if cfg.role in roles:
-        return roles
-    log(
-        f"exiting. Role {cfg.role} is not present in Netbox.",
-        f"Valid roles: {', '.join(sorted(roles))}",
+    if dimension == "site":
+        return str(device.site or "")
+    if dimension == "role":
+        return str(getattr(device, role_field, None) or "")
+    if device.device_type is None:
+        return ""
+    return device.device_type.model
+
+
+def scan_cells(dimensions, filters):
+    """
+    return a Counter, keyed on tuples of dimension values, of the devices
+    matching filters, from one pass over the devices
+    """
+    if int(netbox_version(netbox_obj).split(".")[0]) >= 4:
+        role_field = "role"
+    else:
+        role_field = "device_role"
+    fields = ["site", role_field, "device_type"]
+    devices = parallel_all(
+        netbox_obj.dcim.devices,
+        workers=cfg.workers,
+        **brief_query(netbox_obj, fields),
+        **filters,
     )
-    sys.exit(1)
+    counts = Counter()
+    for device in devices:
+        cell = [device_value(device, dimension, role_field) for dimension in dimensions]
+        counts[tuple(cell)] += 1
+    return counts
 
 
-def verify_site():
+def get_strategy(values, filters):
+    """
+    return the strategy (count or scan) to count the matrix with.
+    The count strategy sends one request per cell.  The scan strategy sends
+    one per page of matching devices, plus one to count them.
     """
-    return a dictionary of existing netbox sites.
-    key is site name, value is netbox site id.
-    dictionary will be empty if the user didn't specify --site
+    if cfg.strategy != "auto":
+        return cfg.strategy
+    cells = math.prod(len(value) for value in values.values())
+    pages = math.ceil(get_device_count(filters) / DEFAULT_PAGE_SIZE) + 1
+    if cells <= pages:
+        return "count"
+    return "scan"
 
-    Exit with error if the device type does not exist in netbox.
 
-    NOTES:
-    1. 'site' does not work with count() for some reason.
-       We're using site.id as a workaround for now.
+def get_rows(dimensions, values, counts):
     """
-    sites = {}
-    if cfg.site is None:
-        return sites
-    items = netbox_obj.dcim.sites.all()
-    for item in items:
-        sites[item.name] = item.id
-    if cfg.site in sites:
-        return sites
-    log(
-        f"exiting. Site {cfg.site} is not present in Netbox.",
-        f"Valid sites: {', '.join(sorted(sites))}",
-    )
-    sys.exit(1)
+    yield one row (a dictionary keyed on column name) per cell of the
+    matrix.  Every combination of dimension values is included, with a
+    count of 0 if no device matches it.
+    """
+    cells = set(product(*[values[dimension] for dimension in dimensions]))
+    cells.update(counts)
+    for cell in sorted(cells):
+        row = dict(zip([DIMENSIONS[dimension][2][0] for dimension in dimensions], cell))
+        row["count"] = counts[cell]
+        yield row
 
 
-def get_device_count():
+def print_matrix(dimensions, filters):
     """
-    return the number of devices matching a given query
+    print the number of devices matching filters, per combination of the
+    values of dimensions
     """
-    models = verify_model()
-    role_ids = verify_role()
-    site_ids = verify_site()
-    args = {}
-    try:
-        if len(site_ids) != 0:
-            args["site_id"] = site_ids[cfg.site]
-        if len(role_ids) != 0:
-            args["role_id"] = role_ids[cfg.role]
-        if len(models.keys()) != 0:
-            args["device_type_id"] = models[cfg.model]
-        return netbox_obj.dcim.devices.count(**args)
-    except Exception as general_exception:
-        log("Unable to get count.", f"Exception detail: {general_exception}")
-        sys.exit(1)
+    values = get_dimension_values(dimensions, filters)
+    if get_strategy(values, filters) == "count":
+        counts = count_cells(dimensions, values, filters)
+    else:
+        counts = scan_cells(dimensions, filters)
+    columns = [DIMENSIONS[dimension][2] for dimension in dimensions]
+    columns.append(("count", 8, ">"))
+    with row_writer(cfg.output, columns) as writer:
+        writer.write_all(get_rows(dimensions, values, counts))
 
 
 cfg = get_parser()
-netbox_obj = netbox()
-count = get_device_count()
-pprint.pprint(f"Query: {get_args()}")
-print(f"Count: {count}")
+if cfg.from_mirror:
+    netbox_obj = netbox_mirror()
+else:
+    netbox_obj = netbox()
+if cfg.group_by is not None:
+    group_by = get_dimensions()
+    preload_dimensions(group_by)
+    print_matrix(group_by, get_filters())
+else:
+    device_filters = get_filters()
+    count = get_device_count(device_filters)
+    pprint.pprint(f"Query: {get_args()}")
+    print(f"Count: {count}")
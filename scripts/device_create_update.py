@@ -16,12 +16,12 @@ Example usage:
         --type N9K-C9336C-FX2
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import netbox
 from netbox_tools.device import Device
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -58,14 +58,14 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_info():
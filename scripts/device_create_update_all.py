@@ -6,7 +6,6 @@ Description: Create/update devices defined in ``--yaml``
 create/update device, device mgmt interface, and device primary_ip
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import (
     netbox,
@@ -16,8 +15,11 @@ from netbox_tools.common import (
 from netbox_tools.device import Device
 from netbox_tools.interface import Interface
 from netbox_tools.ip_address import IpAddress
+from netbox_tools.logger import log_message, parse_args
+from netbox_tools.resolver import get_resolver
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
 
-OUR_VERSION = 103
+OUR_VERSION = 107
 
 
 def get_parser():
@@ -39,17 +41,56 @@ def get_parser():
         "--yaml", dest="yaml", required=True, help=f"{help_yaml} {ex_yaml}"
     )
 
+    help_preload = "Fetch reference tables (sites, roles, tags, vlans, etc)"
+    help_preload += " once before processing, rather than looking up"
+    help_preload += " each reference in netbox individually."
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--preload",
+        dest="preload",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_preload,
+    )
+
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_interface_dict(device_dict, interfaces_dict):
@@ -78,12 +119,15 @@ def get_interface_dict(device_dict, interfaces_dict):
 
 cfg = get_parser()
 netbox_obj = netbox()
+if cfg.preload:
+    get_resolver(netbox_obj).preload(netbox_obj)
 info = load_yaml(cfg.yaml)
 
+devices = []
+interfaces = []
+ip_address_dicts = []
 for key in info["devices"]:
-    print("---")
-    device_obj = Device(netbox_obj, info["devices"][key])
-    device_obj.create_or_update()
+    devices.append(Device(netbox_obj, info["devices"][key]))
     interface_dict = get_interface_dict(info["devices"][key], info["interfaces"])
     if "ip4" not in interface_dict:
         device_name = interface_dict["device"]
@@ -93,9 +137,30 @@ for key in info["devices"]:
             "skipping ipv4 address processing since ip4 key is missing",
         )
         continue
-    interface_obj = Interface(netbox_obj, interface_dict)
-    interface_obj.create_or_update()
+    interfaces.append(interface_dict)
     ip_addresses_dict = info["ip4_addresses"]
-    ip_address_dict = make_ip_address_dict(ip_addresses_dict, interface_dict)
-    ip_address_obj = IpAddress(netbox_obj, ip_address_dict)
-    ip_address_obj.create_or_update()
+    ip_address_dicts.append(make_ip_address_dict(ip_addresses_dict, interface_dict))
+
+bulk = Bulk(chunk_size=cfg.chunk_size, dry_run=cfg.plan)
+bulk.create_or_update(devices)
+# Interfaces are instantiated only after their devices exist in netbox
+bulk.create_or_update(
+    [Interface(netbox_obj, interface_dict) for interface_dict in interfaces]
+)
+# IP addresses are processed individually, since each is also made its
+# device's primary ip.
+if cfg.plan:
+    # Plan only; primary_ip assignment writes are skipped
+    bulk.create_or_update(
+        [IpAddress(netbox_obj, ip_address_dict) for ip_address_dict in ip_address_dicts]
+    )
+else:
+    for ip_address_dict in ip_address_dicts:
+        print("---")
+        ip_address_obj = IpAddress(netbox_obj, ip_address_dict)
+        ip_address_obj.create_or_update()
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
@@ -6,7 +6,6 @@ Description: Create/update device with key ``--key`` in file ``--yaml``
 This script creates/updates device, device mgmt interface, and device primary_ip
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import (
     netbox,
@@ -16,8 +15,9 @@ from netbox_tools.common import (
 from netbox_tools.device import Device
 from netbox_tools.interface import Interface
 from netbox_tools.ip_address import IpAddress
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 101
+OUR_VERSION = 102
 
 
 def get_parser():
@@ -46,14 +46,14 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s v{OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_interface_dict(device_dict, interfaces_dict):
@@ -24,15 +24,14 @@ example_dict usage:
 
 """
 import argparse
-from inspect import stack
-import pynetbox
 
+from netbox_tools.common import netbox
 from netbox_tools.device import Device
 from netbox_tools.interface import Interface
 from netbox_tools.ip_address import IpAddress
-from netbox_tools.credentials import NetboxCredentials
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 106
 
 
 def get_parser():
@@ -146,14 +145,14 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_tags():
@@ -220,10 +219,7 @@ def get_ip_address_info():
 
 
 cfg = get_parser()
-netbox_credentials_obj = NetboxCredentials()
-netbox_obj = pynetbox.api(
-    netbox_credentials_obj.url, token=netbox_credentials_obj.token
-)
+netbox_obj = netbox()
 
 device_info_dict = get_device_info()
 interface_info_dict = get_interface_info()
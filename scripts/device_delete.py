@@ -7,8 +7,9 @@ Description: Delete device --device from netbox
 import argparse
 from netbox_tools.common import netbox
 from netbox_tools.device import Device
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -30,7 +31,7 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
@@ -8,11 +8,14 @@ Be careful!  This will not ask for confirmation.
 
 """
 import argparse
+import sys
 from netbox_tools.common import netbox
 from netbox_tools.common import load_yaml
 from netbox_tools.device import Device
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 103
+OUR_VERSION = 106
 
 
 def get_parser():
@@ -34,17 +37,50 @@ def get_parser():
         "--yaml", dest="yaml", required=True, help=f"{help_yaml} {ex_yaml}"
     )
 
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 cfg = get_parser()
 netbox_obj = netbox()
 
 info = load_yaml(cfg.yaml)
+devices = []
 for key in info["devices"]:
-    device_obj = Device(netbox_obj, info["devices"][key])
-    device_obj.delete()
+    devices.append(Device(netbox_obj, info["devices"][key]))
+bulk = Bulk(chunk_size=cfg.chunk_size, dry_run=cfg.plan)
+bulk.delete(devices)
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
@@ -4,12 +4,13 @@ Name: device_print.py
 Description: Print information about a device
 """
 import argparse
-from inspect import stack
 import sys
 import json
 from netbox_tools.common import netbox
+from netbox_tools.logger import log_message, parse_args
+from netbox_tools.mirror import netbox_mirror
 
-OUR_VERSION = 103
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -18,6 +19,8 @@ def get_parser():
     """
     help_name = "Name of device to retrieve."
     help_detail = "Optional. If present, print detailed info about device."
+    help_from_mirror = "Read from the local mirror of netbox (see mirror_snapshot.py)"
+    help_from_mirror += " rather than from netbox."
 
     ex_prefix = "Example: "
     ex_name = f"{ex_prefix} --name leaf_3"
@@ -41,17 +44,26 @@ def get_parser():
         action="store_true",
         help=f"{help_detail} {ex_detail}",
     )
+    default.add_argument(
+        "--from_mirror",
+        dest="from_mirror",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_from_mirror,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_device():
@@ -84,7 +96,10 @@ def print_headers():
 FMT = "{:>5} {:<20} {:<30}"
 
 cfg = get_parser()
-netbox_obj = netbox()
+if cfg.from_mirror:
+    netbox_obj = netbox_mirror()
+else:
+    netbox_obj = netbox()
 device_obj = get_device()
 if cfg.detail:
     print_detail()
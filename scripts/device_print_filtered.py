@@ -11,6 +11,10 @@ If --location is provided, print devices that match device location.
 If --role is provided, print devices that match device role.
 If all arguments are provided, print devices that match the boolean ANDed result of all searches.
 
+The search is done by netbox (or the local mirror, with --from_mirror).  With
+--graphql, all devices are fetched, with the fields printed, in one GraphQL
+query, and searched here.
+
 For example:
 
    --tags foo,bar,baz --model N9K-C9336C-FX2 --location row-v --role spine
@@ -19,9 +23,15 @@ Would match N9K-C9336C-FX2 that are spines, and contain all three tags foo, bar,
 that are located in row-v.
 """
 import argparse
-from netbox_tools.common import netbox
+import sys
+from netbox_tools.common import brief_query, get_tag, netbox, netbox_version
+from netbox_tools.graphql import device_report, graphql_client
+from netbox_tools.logger import parse_args
+from netbox_tools.mirror import netbox_mirror
+from netbox_tools.output import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, row_writer
+from netbox_tools.paginator import DEFAULT_WORKERS, parallel_all
 
-OUR_VERSION = 105
+OUR_VERSION = 112
 
 
 def get_parser():
@@ -34,12 +44,23 @@ def get_parser():
     help_tags = "Comma-separated list of tags (no spaces)."
     help_tags += " If present, only devices containing tag(s) are printed."
     help_tags += " Else, all devices are printed."
+    help_from_mirror = "Read from the local mirror of netbox (see mirror_snapshot.py)"
+    help_from_mirror += " rather than from netbox."
+    help_output = "Output format: table, csv, or json (one JSON object per line)."
+    help_output += f" Default: {DEFAULT_OUTPUT_FORMAT}."
+    help_workers = "Maximum number of pages fetched from netbox in parallel."
+    help_workers += f" Default: {DEFAULT_WORKERS}."
+    help_graphql = "Fetch all devices, with the nested fields printed, in one"
+    help_graphql += " GraphQL query, and filter them here, rather than"
+    help_graphql += " filtering with the REST API."
 
     ex_prefix = " Example: "
     ex_location = f"{ex_prefix} --model N9K-C9336C-FX2"
     ex_model = f"{ex_prefix} --model N9K-C9336C-FX2"
     ex_role = f"{ex_prefix} --role leaf"
     ex_tags = f"{ex_prefix} --tags deathstar,admin"
+    ex_output = f"{ex_prefix} --output csv"
+    ex_workers = f"{ex_prefix} --workers 8"
 
     parser = argparse.ArgumentParser(
         description="DESCRIPTION: Netbox: Print list of devices filtered by model, role, or tag(s)"
@@ -63,45 +84,44 @@ def get_parser():
         "--model", dest="model", required=False, help=f"{help_model} {ex_model}"
     )
 
+    default.add_argument(
+        "--from_mirror",
+        dest="from_mirror",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_from_mirror,
+    )
+    default.add_argument(
+        "--output",
+        dest="output",
+        required=False,
+        default=DEFAULT_OUTPUT_FORMAT,
+        choices=OUTPUT_FORMATS,
+        help=f"{help_output} {ex_output}",
+    )
+    default.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=DEFAULT_WORKERS,
+        help=f"{help_workers} {ex_workers}",
+    )
+    default.add_argument(
+        "--graphql",
+        dest="graphql",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_graphql,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
-
-
-def print_header():
-    """
-    print table header
-    """
-    print(
-        FMT.format(
-            "device_id",
-            "name",
-            "role",
-            "location",
-            "model",
-            "serial",
-            "primary_ip4",
-            "ip4_id",
-            "status",
-            "tags",
-        )
-    )
-    print(
-        FMT.format(
-            "-" * 9,
-            "-" * 18,
-            "-" * 15,
-            "-" * 9,
-            "-" * 18,
-            "-" * 12,
-            "-" * 22,
-            "-" * 6,
-            "-" * 10,
-            "-" * 15,
-        )
-    )
+    return parse_args(parser)
 
 
 def get_primary_ip(device_obj):
@@ -136,123 +156,112 @@ def get_tags(device_obj):
     return ",".join([tag.name for tag in device_obj.tags])
 
 
-def print_matches(matches_dict):
-    """
-    given a dictionary of matches, keyed on device_name,
-    print info associated with the matching device(s)
-    """
-    print_header()
-    for device_name in matches_dict:
-        if matches_dict[device_name] is False:
-            continue
-        device = matches_dict[device_name]
-        print(
-            FMT.format(
-                device.id,
-                device.name,
-                str(device.device_role),
-                str(device.location),
-                device.device_type.model,
-                device.serial,
-                get_primary_ip(device),
-                get_primary_ip_id(device),
-                str(device.status),
-                get_tags(device),
-            )
-        )
-
-
-def unfiltered():
+def get_rows(devices):
     """
-    given a Netbox RecordSet of all devices return a dictionary, keyed on device name,
-    whose values are the associated device objects.
+    yield one row (a dictionary keyed on column name) per device in devices
     """
-    matches_dict = {}
     for device in devices:
-        matches_dict[device.name] = device
-    return matches_dict
-
-
-def filtered_on_location():
+        yield {
+            "device_id": device.id,
+            "name": device.name,
+            "role": str(device.device_role),
+            "location": str(device.location),
+            "model": device.device_type.model,
+            "serial": device.serial,
+            "primary_ip4": get_primary_ip(device),
+            "ip4_id": get_primary_ip_id(device),
+            "status": str(device.status),
+            "tags": get_tags(device),
+        }
+
+
+def matching_ids(endpoint, **filters):
     """
-    Given the full set of devices from unfiltered(), return a dictionary, keyed on device name,
-    whose values are set to False for all devices that do not match the device.location the user
-    is searching for.  If the value is already False, skip it since this means it didn't
-    match a previous search (e.g. filtered_on_model()).
+    Return the list of ids of the objects of endpoint that match filters.
+    Location names and models are not unique in netbox (a location name
+    can be reused in another site, and a model can be made by two
+    manufacturers), so there may be several.
     """
-    for device in matches:
-        if matches[device] is False:
-            continue
-        if str(matches[device].location) != cfg.location:
-            matches[device] = False
-    return matches
+    return [item.id for item in endpoint.filter(**filters, **brief_query(nb))]
 
 
-def filtered_on_model():
+def get_filters():
     """
-    Given the full set of devices from unfiltered(), return a dictionary, keyed on device name,
-    whose values are set to False for all devices that do not match the device_type.model the user
-    is searching for.  If the value is already False, skip it since this means it didn't
-    match a previous search (e.g. filtered_on_model()).
+    Translate the user's search into netbox device filters, so that netbox
+    returns only the matching devices.  Location, model, role, and tags are
+    given by name, and are resolved to the ids (or, for tags, the slugs)
+    that netbox filters on.  A device matches a location, model, or role
+    filter if it matches any of the ids with that name.  netbox ANDs the
+    filters, and ANDs multiple tags.
+
+    Return a dictionary of filters, or None if a location, model, role, or
+    tag does not exist in netbox, in which case no device can match.
     """
-    for device in matches:
-        if matches[device] is False:
-            continue
-        if matches[device].device_type.model != cfg.model:
-            matches[device] = False
-    return matches
-
-
-def filtered_on_role():
+    filters = {}
+    if cfg.location is not None:
+        filters["location_id"] = matching_ids(nb.dcim.locations, name=cfg.location)
+    if cfg.model is not None:
+        filters["device_type_id"] = matching_ids(nb.dcim.device_types, model=cfg.model)
+    if cfg.role is not None:
+        filters["role_id"] = matching_ids(nb.dcim.device_roles, name=cfg.role)
+    if [] in filters.values():
+        return None
+    if cfg.tags is not None:
+        tags = [get_tag(nb, name) for name in cfg.tags.split(",")]
+        if None in tags:
+            return None
+        filters["tag"] = [tag.slug for tag in tags]
+    return filters
+
+
+def graphql_matches():
     """
-    Given the full set of devices from unfiltered(), return a dictionary, keyed on device name,
-    whose values are set to False for all devices that do not match the device.device_role the user
-    is searching for.  If the value is already False, skip it since this means it didn't
-    match a previous search (e.g. filtered_on_model()).
+    Fetch every device with one GraphQL query (see netbox_tools.graphql),
+    and yield those matching the user's search.  Location, role, and tags
+    are compared by name, as given by the user.
     """
-    for device in matches:
-        if matches[device] is False:
+    user_tags = set(cfg.tags.split(",")) if cfg.tags is not None else set()
+    for device in device_report(graphql_client(nb), netbox_version(nb)):
+        if cfg.location is not None and str(device.location) != cfg.location:
             continue
-        if str(matches[device].device_role) != cfg.role:
-            matches[device] = False
-    return matches
-
-
-def filtered_on_tag():
-    """
-    Given the full set of devices from unfiltered(), return a dictionary, keyed on device name,
-    whose values are set to False for all devices that do not contain one of tags the user
-    is searching for.  If the value is already False, skip it since this means it didn't
-    match a previous search (filtered_on_model()).
-    """
-    user_tags = set(cfg.tags.split(","))
-    for device in matches:
-        if matches[device] is False:
+        if cfg.model is not None and device.device_type.model != cfg.model:
             continue
-        device_tag_objects = matches[device].tags
-        device_tags = set()
-        for device_tag_object in device_tag_objects:
-            device_tags.add(device_tag_object.name)
-        if user_tags.issubset(device_tags):
+        if cfg.role is not None and str(device.device_role) != cfg.role:
             continue
-        matches[device] = False
-    return matches
-
-
-FMT = "{:<9} {:<18} {:<15} {:<9} {:<18} {:<12} {:<22} {:<6} {:<10} {:<15}"
+        if not user_tags.issubset({tag.name for tag in device.tags}):
+            continue
+        yield device
+
+
+COLUMNS = [
+    ("device_id", 9, "<"),
+    ("name", 18, "<"),
+    ("role", 15, "<"),
+    ("location", 9, "<"),
+    ("model", 18, "<"),
+    ("serial", 12, "<"),
+    ("primary_ip4", 22, "<"),
+    ("ip4_id", 6, "<"),
+    ("status", 10, "<"),
+    ("tags", 15, "<"),
+]
 
 cfg = get_parser()
-nb = netbox()
-devices = nb.dcim.devices.all()
-
-matches = unfiltered()
-if cfg.location is not None:
-    matches = filtered_on_location()
-if cfg.model is not None:
-    matches = filtered_on_model()
-if cfg.role is not None:
-    matches = filtered_on_role()
-if cfg.tags is not None:
-    matches = filtered_on_tag()
-
-print_matches(matches)
+if cfg.from_mirror and cfg.graphql:
+    print("exiting. --from_mirror and --graphql are mutually exclusive.")
+    sys.exit(1)
+if cfg.from_mirror:
+    nb = netbox_mirror()
+else:
+    nb = netbox()
+if cfg.graphql:
+    matches = graphql_matches()
+else:
+    device_filters = get_filters()
+    if device_filters is None:
+        matches = []
+    else:
+        matches = parallel_all(nb.dcim.devices, workers=cfg.workers, **device_filters)
+
+with row_writer(cfg.output, COLUMNS) as writer:
+    writer.write_all(get_rows(matches))
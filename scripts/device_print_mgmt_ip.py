@@ -14,8 +14,9 @@ ssh admin@`${SCRIPT} --device $1`
 import argparse
 import sys
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 103
+OUR_VERSION = 106
 
 
 def get_parser():
@@ -40,7 +41,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_device_obj():
@@ -55,8 +56,6 @@ def get_device_obj():
     return obj
 
 
-FMT = "{:>5} {:<20} {:<30}"
-
 cfg = get_parser()
 netbox_obj = netbox()
 device_obj = get_device_obj()
@@ -6,8 +6,9 @@ Description: Create or update a Netbox device type using command line options
 import argparse
 from netbox_tools.common import netbox
 from netbox_tools.device_type import DeviceType
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 105
+OUR_VERSION = 106
 
 
 def get_parser():
@@ -62,7 +63,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s v{OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 cfg = get_parser()
@@ -7,8 +7,9 @@ import argparse
 
 from netbox_tools.common import netbox
 from netbox_tools.device_type import DeviceType
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -32,7 +33,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
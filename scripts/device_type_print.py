@@ -4,12 +4,12 @@ Name: device_type_print.py
 Description: Display information about a device type
 """
 import argparse
-from inspect import stack
 import sys
 import json
 from netbox_tools.common import netbox
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -47,14 +47,14 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def error():
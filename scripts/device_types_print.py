@@ -4,11 +4,11 @@ Name: device_types_print.py
 Description: Display summary information about all device types
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import netbox
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -23,14 +23,14 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 
@@ -9,11 +9,41 @@ This script creates (if not present in Netbox) or updates (if present in Netbox)
 all entities within the YAML file pointed to with --yaml
 
 See info.yml in the top-level directory of this repo for the YAML structure this script assumes.
+
+Entities are processed in tiers.  Each entity type in get_runner_dict() lists
+the entity types it depends on, and a tier contains the entity types whose
+dependencies were all processed in earlier tiers.  Tiers are processed one
+after the other.  Within a tier, all entities are processed in parallel on a
+pool of --workers threads, so at most --workers requests are sent to netbox
+at a time.  Raising --workers helps until netbox, rather than the round trip,
+becomes the bottleneck.  Keep http_pool_maxsize in config.yml at least as
+large as --workers, so that connections are reused.  The concurrency
+governor (see lib/netbox_tools/transport.py) may further limit the number
+of requests in flight while netbox is slow or overloaded.
+
+Only entities that changed since the last run are processed.  A state file
+(--state, see lib/netbox_tools/reconcile.py) records a hash of each entity's
+YAML block (for devices and virtual machines, including their interface and
+ip address blocks), and the netbox id it produced.  An entity is processed if
+its hash changed, it is new, or it failed last time, and so is every entity
+that refers to one of those (e.g. the devices of a changed site).  With
+--full, all entities are processed, and the state file is rewritten.  With
+--plan, the state file is not updated.
+
+With --async, requests are sent from one thread with the asyncio client of
+lib/netbox_tools/aio.py rather than from the --workers pool, and up to
+--concurrency requests are in flight at a time, so that hundreds can be.
+Entity types in a tier, the chunks of each bulk operation, and the ip
+addresses of devices and virtual machines are processed concurrently.
+--async needs httpx (pip install httpx), and implies --preload.
 """
 import argparse
-from inspect import stack
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import sys
+import time
 
+from netbox_tools.aio import AsyncNetbox, DEFAULT_CONCURRENCY
 from netbox_tools.cluster import Cluster
 from netbox_tools.cluster_type import ClusterType
 from netbox_tools.common import (
@@ -21,6 +51,7 @@ from netbox_tools.common import (
     load_yaml,
     make_ip_address_dict,
 )
+from netbox_tools.config.netbox_config import LoadConfig
 from netbox_tools.console_port import ConsolePort
 from netbox_tools.console_server_port import ConsoleServerPort
 from netbox_tools.device import Device
@@ -29,18 +60,31 @@ from netbox_tools.interface import Interface
 from netbox_tools.ip_address import IpAddress
 from netbox_tools.ip_prefix import IpPrefix
 from netbox_tools.location import Location
+from netbox_tools.logger import log_message, parse_args
 from netbox_tools.manufacturer import Manufacturer
 from netbox_tools.rack import Rack
 from netbox_tools.role import Role
 from netbox_tools.site import Site
 from netbox_tools.tag import Tag
+from netbox_tools.transport import transport_settings
 from netbox_tools.virtual_interface import VirtualInterface
 from netbox_tools.virtual_ip_address import VirtualIpAddress
 from netbox_tools.virtual_machine import VirtualMachine
 from netbox_tools.vlan import Vlan
 from netbox_tools.vlan_group import VlanGroup
+from netbox_tools.resolver import get_resolver
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
+from netbox_tools.reconcile import (
+    ReconcileState,
+    block_values,
+    entity_hash,
+    identity_tokens,
+    state_file,
+)
 
-OUR_VERSION = 106
+OUR_VERSION = 116
+
+DEFAULT_WORKERS = 4
 
 
 def get_parser():
@@ -60,18 +104,121 @@ def get_parser():
         "--yaml", dest="yaml", required=True, help=help_yaml + ex_yaml
     )
 
+    help_preload = "Fetch reference tables (sites, roles, tags, vlans, etc)"
+    help_preload += " once before processing, rather than looking up"
+    help_preload += " each reference in netbox individually."
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--preload",
+        dest="preload",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_preload,
+    )
+
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_workers = "Maximum number of requests sent to netbox in parallel."
+    help_workers += " Keep http_pool_maxsize in config.yml at least this large."
+    help_workers += f" Default: {DEFAULT_WORKERS}."
+    ex_workers = f"{ex_prefix} --workers 8"
+
+    optional.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=DEFAULT_WORKERS,
+        help=f"{help_workers} {ex_workers}",
+    )
+
+    help_async = "Send requests with an asyncio client (needs httpx), rather"
+    help_async += " than from a pool of --workers threads. Implies --preload."
+
+    optional.add_argument(
+        "--async",
+        dest="use_async",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_async,
+    )
+
+    help_concurrency = "With --async, maximum number of requests sent to netbox"
+    help_concurrency += f" in parallel. Default: {DEFAULT_CONCURRENCY}."
+    ex_concurrency = f"{ex_prefix} --concurrency 200"
+
+    optional.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        type=int,
+        required=False,
+        default=DEFAULT_CONCURRENCY,
+        help=f"{help_concurrency} {ex_concurrency}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
+    help_full = "Process all entities, rather than only those that changed"
+    help_full += " since the last run (see --state)."
+
+    optional.add_argument(
+        "--full",
+        dest="full",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_full,
+    )
+
+    help_state = "File recording the hash and netbox id of each entity as of"
+    help_state += " the last run. Default: a file under ~/.netbox_tools/reconcile"
+    help_state += " named for --yaml."
+    ex_state = f"{ex_prefix} --state /my/yaml/file.state.json"
+
+    optional.add_argument(
+        "--state",
+        dest="state",
+        required=False,
+        default=None,
+        help=f"{help_state} {ex_state}",
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"{'%(prog)s'} {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def fix_deprecations():
@@ -115,16 +262,57 @@ def get_interface_dict(device_dict, interfaces_dict):
     return interfaces_dict[interface_key]
 
 
-def devices_create_update(
-    interfaces_dict, ip_addresses_dict, devices_dict, device_class
-):
+def track(entity_type, entity, items):
     """
-    create or update device and set the device's primary_ip to
-    its management interface ipv4 address
+    Record that items (objects passed to bulk) were built from entity of
+    entity_type.  The first item is the object the entity produces.
     """
+    entity_items[(entity_type, entity)] = items
+
+
+def run_parallel(function, items):
+    """
+    Call function on each of items on the worker pool.
+    Wait for all calls to complete.
+    """
+    futures = [executor.submit(function, item) for item in items]
+    for future in futures:
+        future.result()
+
+
+def create_or_update(item):
+    """
+    create or update item, an entity object, on its own
+    """
+    item.create_or_update()
+
+
+def ip_address_operation():
+    """
+    Return the operation (see entity_stages()) for device and virtual_machine
+    ip addresses.  These are processed individually, since each is also made
+    its device's primary ip.  With --plan, they are planned in bulk, and
+    primary_ip assignment writes are skipped.
+    """
+    if bulk.dry_run:
+        return "bulk"
+    return "each"
+
+
+def devices_stages(interfaces_dict, ip_addresses_dict, devices_dict, device_class):
+    """
+    Return the stages (see entity_stages()) that create or update devices,
+    their management interfaces, and set each device's primary_ip to its
+    management interface ipv4 address
+
+    Devices and interfaces are sent to netbox in bulk.
+    """
+    devices = []
+    interface_dicts = []
+    interfaces = []
     for device_key in devices_dict:
-        device_obj = device_class(netbox_obj, devices_dict[device_key])
-        device_obj.create_or_update()
+        devices.append(device_class(netbox_obj, devices_dict[device_key]))
+        track("devices", device_key, [devices[-1]])
         interface_dict = get_interface_dict(devices_dict[device_key], interfaces_dict)
         if "ip4" not in interface_dict:
             log(
@@ -132,24 +320,36 @@ def devices_create_update(
                 "skipping ipv4 address processing since ip4 key is missing",
             )
             continue
-        intf_obj = Interface(netbox_obj, interface_dict)
-        intf_obj.create_or_update()
-        ip_address_dict = make_ip_address_dict(ip_addresses_dict, interface_dict)
-        ip4_obj = IpAddress(netbox_obj, ip_address_dict)
-        ip4_obj.create_or_update()
-        log("---")
+        interface_dicts.append(interface_dict)
+        interfaces.append(Interface(netbox_obj, interface_dict))
+        track("devices", device_key, [devices[-1], interfaces[-1]])
+    ip_addresses = [
+        IpAddress(netbox_obj, make_ip_address_dict(ip_addresses_dict, interface_dict))
+        for interface_dict in interface_dicts
+    ]
+    return [
+        ("bulk", devices),
+        ("bulk", interfaces),
+        (ip_address_operation(), ip_addresses),
+    ]
 
 
-def virtual_machines_create_update(
+def virtual_machines_stages(
     interfaces_dict, ip_addresses_dict, vm_dict, virtual_machine_class
 ):
     """
-    create or update virtual_machine and set the virtual_machine's
+    Return the stages (see entity_stages()) that create or update
+    virtual_machines, their interfaces, and set each virtual_machine's
     primary_ip to its management interface ipv4 address
+
+    Virtual machines and interfaces are sent to netbox in bulk.
     """
+    virtual_machines = []
+    interface_dicts = []
+    interfaces = []
     for vm_key in vm_dict:
-        vm_obj = virtual_machine_class(netbox_obj, vm_dict[vm_key])
-        vm_obj.create_or_update()
+        virtual_machines.append(virtual_machine_class(netbox_obj, vm_dict[vm_key]))
+        track("virtual_machines", vm_key, [virtual_machines[-1]])
         interface_dict = get_interface_dict(vm_dict[vm_key], interfaces_dict)
         if "ip4" not in interface_dict:
             log(
@@ -158,68 +358,434 @@ def virtual_machines_create_update(
                 f"interface {interface_dict['interface']}",
             )
             continue
-        intf_obj = VirtualInterface(netbox_obj, interface_dict)
-        intf_obj.create_or_update()
-        ip_address_dict = make_ip_address_dict(ip_addresses_dict, interface_dict)
-        vip_obj = VirtualIpAddress(netbox_obj, ip_address_dict)
-        vip_obj.create_or_update()
-        print("---")
+        interface_dicts.append(interface_dict)
+        interfaces.append(VirtualInterface(netbox_obj, interface_dict))
+        track("virtual_machines", vm_key, [virtual_machines[-1], interfaces[-1]])
+    ip_addresses = [
+        VirtualIpAddress(
+            netbox_obj, make_ip_address_dict(ip_addresses_dict, interface_dict)
+        )
+        for interface_dict in interface_dicts
+    ]
+    return [
+        ("bulk", virtual_machines),
+        ("bulk", interfaces),
+        (ip_address_operation(), ip_addresses),
+    ]
 
 
 def get_runner_dict():
     """
     return a dictionary, keyed on int(), that contains all the
-    Netbox objects to create/update.  We key this on int() since
-    the ordering of object creation matters.  For example, you
-    cannot add tags to an object if the tag does not already exist
-    in Netbox.
+    Netbox objects to create/update, and the objects each of
+    them depends on.  For example, you cannot add tags to an
+    object if the tag does not already exist in Netbox, so
+    most objects depend on tags.
+
+    get_tiers() uses depends to order processing.  Entries
+    are keyed on int() to keep the order of processing within
+    a tier stable.
     """
     runner = {}
-    runner[1] = {"key": "tags", "object": Tag}
-    runner[2] = {"key": "sites", "object": Site}
-    runner[3] = {"key": "locations", "object": Location}
-    runner[4] = {"key": "manufacturers", "object": Manufacturer}
-    runner[5] = {"key": "device_types", "object": DeviceType}
-    runner[6] = {"key": "device_roles", "object": Role}
-    runner[7] = {"key": "racks", "object": Rack}
-    runner[8] = {"key": "prefixes", "object": IpPrefix}
-    runner[9] = {"key": "vlan_groups", "object": VlanGroup}
-    runner[10] = {"key": "vlans", "object": Vlan}
-    runner[11] = {"key": "cluster_types", "object": ClusterType}
-    runner[12] = {"key": "clusters", "object": Cluster}
-    runner[13] = {"key": "devices", "object": Device}
-    runner[14] = {"key": "console_server_ports", "object": ConsoleServerPort}
-    runner[15] = {"key": "console_ports", "object": ConsolePort}
-    runner[16] = {"key": "virtual_machines", "object": VirtualMachine}
+    runner[1] = {"key": "tags", "object": Tag, "depends": []}
+    runner[2] = {"key": "sites", "object": Site, "depends": ["tags"]}
+    runner[3] = {
+        "key": "locations",
+        "object": Location,
+        "depends": ["sites", "tags"],
+    }
+    runner[4] = {"key": "manufacturers", "object": Manufacturer, "depends": []}
+    runner[5] = {
+        "key": "device_types",
+        "object": DeviceType,
+        "depends": ["manufacturers", "tags"],
+    }
+    runner[6] = {"key": "device_roles", "object": Role, "depends": ["tags"]}
+    runner[7] = {
+        "key": "racks",
+        "object": Rack,
+        "depends": ["locations", "sites", "tags"],
+    }
+    runner[8] = {"key": "prefixes", "object": IpPrefix, "depends": ["sites", "vlans"]}
+    runner[9] = {"key": "vlan_groups", "object": VlanGroup, "depends": ["tags"]}
+    runner[10] = {
+        "key": "vlans",
+        "object": Vlan,
+        "depends": ["device_roles", "sites", "tags", "vlan_groups"],
+    }
+    runner[11] = {"key": "cluster_types", "object": ClusterType, "depends": ["tags"]}
+    runner[12] = {
+        "key": "clusters",
+        "object": Cluster,
+        "depends": ["cluster_types", "sites", "tags"],
+    }
+    runner[13] = {
+        "key": "devices",
+        "object": Device,
+        "depends": [
+            "clusters",
+            "device_roles",
+            "device_types",
+            "locations",
+            "racks",
+            "sites",
+            "tags",
+            "vlans",
+        ],
+    }
+    runner[14] = {
+        "key": "console_server_ports",
+        "object": ConsoleServerPort,
+        "depends": ["devices", "tags"],
+    }
+    runner[15] = {
+        "key": "console_ports",
+        "object": ConsolePort,
+        "depends": ["devices", "tags"],
+    }
+    runner[16] = {
+        "key": "virtual_machines",
+        "object": VirtualMachine,
+        "depends": ["clusters", "device_roles", "devices", "sites", "tags", "vlans"],
+    }
     return runner
 
 
-cfg = get_parser()
-netbox_obj = netbox()
-info = load_yaml(cfg.yaml)
-fix_deprecations()
-runner_dict = get_runner_dict()
-for item in sorted(runner_dict):
-    print(f'--- {runner_dict[item]["key"]} ---')
-    key = runner_dict[item]["key"]
+def get_tiers(runner):
+    """
+    Return a list of tiers.  Each tier is a list of runner keys (see
+    get_runner_dict()) whose dependencies are all in earlier tiers.
+    Entities within a tier do not depend on each other.
+
+    Exit with error if an entity depends on an entity that is not in
+    runner, or if dependencies are circular.
+    """
+    keys = {runner[item]["key"] for item in runner}
+    for item in runner:
+        for depend in runner[item]["depends"]:
+            if depend not in keys:
+                log(
+                    f"exiting. {runner[item]['key']} depends on {depend},",
+                    "which is not in the runner dictionary.",
+                )
+                sys.exit(1)
+    tiers = []
+    done = set()
+    remaining = sorted(runner)
+    while len(remaining) != 0:
+        tier = [item for item in remaining if set(runner[item]["depends"]) <= done]
+        if len(tier) == 0:
+            circular = [runner[item]["key"] for item in remaining]
+            log(f"exiting. Circular dependencies between {', '.join(circular)}")
+            sys.exit(1)
+        tiers.append(tier)
+        done.update(runner[item]["key"] for item in tier)
+        remaining = [item for item in remaining if item not in tier]
+    return tiers
+
+
+def entity_stages(runner_item):
+    """
+    Return the stages that create or update the entities, selected by
+    select_entities(), of the type described by runner_item (see
+    get_runner_dict()).
+
+    Stages are a list of tuples (operation, objects), processed in order.
+    operation is bulk (objects are sent to netbox in bulk) or each (objects
+    are created or updated individually).
+    """
+    key = runner_item["key"]
+    entities = {entity: info[key][entity] for entity in selected[key]}
+    if len(entities) == 0:
+        return []
     if key == "devices":
         # special case for devices
-        devices_create_update(
+        return devices_stages(
             info["interfaces"],
             info["ip4_addresses"],
-            info[key],
-            runner_dict[item]["object"],
+            entities,
+            runner_item["object"],
         )
-        continue
     if key == "virtual_machines":
         # special case for virtual_machines
-        virtual_machines_create_update(
+        return virtual_machines_stages(
             info["virtual_interfaces"],
             info["ip4_addresses"],
-            info[key],
-            runner_dict[item]["object"],
+            entities,
+            runner_item["object"],
         )
-        continue
-    for entity in info[key]:
-        obj = runner_dict[item]["object"](netbox_obj, info[key][entity])
-        obj.create_or_update()
+    objects = []
+    for entity in entities:
+        objects.append(runner_item["object"](netbox_obj, entities[entity]))
+        track(key, entity, [objects[-1]])
+    return [("bulk", objects)]
+
+
+def run_entity(runner_item):
+    """
+    create or update the entities of the type described by runner_item
+    on the worker pool.  Return the number of objects processed.
+    """
+    stages = entity_stages(runner_item)
+    for operation, objects in stages:
+        if operation == "bulk":
+            bulk.create_or_update(objects)
+        else:
+            run_parallel(create_or_update, objects)
+    return sum(len(objects) for _, objects in stages)
+
+
+def run_tier(tier_number, tier):
+    """
+    Process all entities in tier in parallel.
+    Return a dictionary of statistics for the tier.
+
+    Each entity type in the tier is driven from its own thread, which
+    submits its requests to the shared worker pool and waits on them.
+    This keeps the number of parallel requests bounded by --workers,
+    however many entity types are in the tier.
+    """
+    keys = [runner_dict[item]["key"] for item in tier]
+    print(f"--- tier {tier_number}: {', '.join(keys)} ---")
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(tier)) as tier_executor:
+        futures = [tier_executor.submit(run_entity, runner_dict[item]) for item in tier]
+        objects = sum(future.result() for future in futures)
+    elapsed = time.monotonic() - start
+    return {"tier": tier_number, "keys": keys, "objects": objects, "elapsed": elapsed}
+
+
+async def async_run_entity(runner_item, client):
+    """
+    asyncio counterpart of run_entity(), sending requests with client (an
+    AsyncNetbox).  Return the number of objects processed.
+    """
+    stages = entity_stages(runner_item)
+    for operation, objects in stages:
+        if operation == "bulk":
+            await bulk.async_create_or_update(objects, client)
+        else:
+            await asyncio.gather(
+                *[item.async_create_or_update(client) for item in objects]
+            )
+    return sum(len(objects) for _, objects in stages)
+
+
+async def async_run_tier(tier_number, tier, client):
+    """
+    asyncio counterpart of run_tier().  The entity types in tier are
+    processed concurrently, sending requests with client (an AsyncNetbox).
+    """
+    keys = [runner_dict[item]["key"] for item in tier]
+    print(f"--- tier {tier_number}: {', '.join(keys)} ---")
+    start = time.monotonic()
+    counts = await asyncio.gather(
+        *[async_run_entity(runner_dict[item], client) for item in tier]
+    )
+    objects = sum(counts)
+    elapsed = time.monotonic() - start
+    return {"tier": tier_number, "keys": keys, "objects": objects, "elapsed": elapsed}
+
+
+async def async_run_tiers(tiers, client):
+    """
+    Process tiers one after the other, sending requests with client (an
+    AsyncNetbox).  Return the list of statistics of each tier.
+    """
+    async with client:
+        return [
+            await async_run_tier(index, tier, client)
+            for index, tier in enumerate(tiers)
+        ]
+
+
+def check_workers():
+    """
+    Warn if --workers exceeds the maximum number of requests in flight
+    allowed by the session's concurrency governor, in which case requests
+    beyond it wait, or, without a governor, the http connection pool size,
+    in which case connections beyond the pool size are closed after each
+    request
+    """
+    governor = getattr(netbox_obj.http_session, "governor", None)
+    if governor is not None:
+        if cfg.workers > governor.maximum:
+            log(
+                f"WARNING. --workers {cfg.workers} exceeds the maximum",
+                f"of {governor.maximum} requests in flight (http_concurrency_max,",
+                "default http_pool_maxsize, in config.yml).",
+                "Requests beyond it wait.",
+            )
+        return
+    pool_maxsize = transport_settings(LoadConfig().config)["http_pool_maxsize"]
+    if cfg.workers <= pool_maxsize:
+        return
+    log(
+        f"WARNING. --workers {cfg.workers} exceeds http_pool_maxsize",
+        f"{pool_maxsize} in config.yml.  Raise http_pool_maxsize to at least",
+        f"{cfg.workers} to reuse connections.",
+    )
+
+
+def entity_blocks(key, entity):
+    """
+    Return the list of YAML blocks that describe entity of type key.
+    For devices and virtual_machines, this includes the blocks of their
+    management interface and its ip address.
+    """
+    blocks = [info[key][entity]]
+    interfaces_key = {"devices": "interfaces", "virtual_machines": "virtual_interfaces"}
+    if key not in interfaces_key or not isinstance(blocks[0], dict):
+        return blocks
+    interfaces_dict = info.get(interfaces_key[key]) or {}
+    interface_dict = interfaces_dict.get(blocks[0].get("interface"))
+    blocks.append(interface_dict)
+    if isinstance(interface_dict, dict) and "ip4" in interface_dict:
+        blocks.append((info.get("ip4_addresses") or {}).get(interface_dict["ip4"]))
+    return blocks
+
+
+def select_entities(tiers):
+    """
+    Return a dictionary, keyed on runner key (e.g. devices), of the list of
+    entities to process, and a dictionary, keyed on (runner key, entity), of
+    each entity's hash.
+
+    An entity is selected if --full is set, if state holds no successful
+    reconcile of its current hash, or if it refers to an entity (of a type
+    it depends on) that is selected.
+    """
+    selected = {}
+    hashes = {}
+    tokens = {}
+    for tier in tiers:
+        for item in tier:
+            key = runner_dict[item]["key"]
+            selected[key] = []
+            tokens[key] = set()
+            depends_tokens = set()
+            for depend in runner_dict[item]["depends"]:
+                depends_tokens.update(tokens.get(depend, set()))
+            for entity in info.get(key) or {}:
+                blocks = entity_blocks(key, entity)
+                hashes[(key, entity)] = entity_hash(*blocks)
+                if not (
+                    cfg.full
+                    or state.changed(key, entity, hashes[(key, entity)])
+                    or len(block_values(blocks) & depends_tokens) != 0
+                ):
+                    continue
+                selected[key].append(entity)
+                tokens[key].update(identity_tokens(entity, blocks[0]))
+    total = sum(len(info.get(key) or {}) for key in selected)
+    count = sum(len(entities) for entities in selected.values())
+    if cfg.full:
+        log(f"--full set. Processing all {total} entities.")
+    else:
+        log(
+            f"Processing {count} of {total} entities: those that changed",
+            f"since the last run (see {state.path}), and those that refer to them.",
+        )
+    return selected, hashes
+
+
+def update_state():
+    """
+    Record in state the hash and netbox id of each processed entity whose
+    objects were all sent to netbox successfully.  Forget the others, so
+    that they are processed on the next run.  Then save state.
+    """
+    failed = {item for item, _, _ in bulk.failed}
+    for key, entities in selected.items():
+        for entity in entities:
+            items = entity_items.get((key, entity), [])
+            netbox_id = bulk.netbox_id(items[0]) if len(items) != 0 else None
+            if netbox_id is None or len(failed.intersection(items)) != 0:
+                state.forget(key, entity)
+                continue
+            state.record(key, entity, hashes[(key, entity)], netbox_id)
+        state.prune(key, info.get(key) or {})
+    try:
+        state.save()
+    except OSError as _os_error:
+        log(
+            f"WARNING. Unable to save state file {state.path}.",
+            f"Exception detail: {_os_error}",
+        )
+
+
+def print_tier_stats(tier_stats):
+    """
+    Print the wall-clock time and throughput of each tier
+    """
+    fmt = "{:<6} {:>8} {:>10} {:>10}  {}"
+    print(fmt.format("tier", "objects", "seconds", "objects/s", "entities"))
+    total_objects = 0
+    total_elapsed = 0
+    for stats in tier_stats:
+        total_objects += stats["objects"]
+        total_elapsed += stats["elapsed"]
+        print(
+            fmt.format(
+                stats["tier"],
+                stats["objects"],
+                f"{stats['elapsed']:.2f}",
+                f"{stats['objects'] / max(stats['elapsed'], 0.001):.1f}",
+                ", ".join(stats["keys"]),
+            )
+        )
+    print(
+        fmt.format(
+            "total",
+            total_objects,
+            f"{total_elapsed:.2f}",
+            f"{total_objects / max(total_elapsed, 0.001):.1f}",
+            "",
+        )
+    )
+
+
+cfg = get_parser()
+netbox_obj = netbox()
+if cfg.use_async:
+    async_client = AsyncNetbox(netbox_obj, cfg.concurrency, LoadConfig().config)
+if cfg.preload or cfg.use_async:
+    get_resolver(netbox_obj).preload(netbox_obj)
+info = load_yaml(cfg.yaml)
+fix_deprecations()
+if cfg.use_async:
+    executor = None
+else:
+    check_workers()
+    executor = ThreadPoolExecutor(max_workers=max(cfg.workers, 1))
+bulk = Bulk(chunk_size=cfg.chunk_size, executor=executor, dry_run=cfg.plan)
+runner_dict = get_runner_dict()
+runner_tiers = get_tiers(runner_dict)
+state = ReconcileState(cfg.state or state_file(cfg.yaml), netbox_obj.base_url)
+selected, hashes = select_entities(runner_tiers)
+# (runner key, entity): objects passed to bulk, see track()
+entity_items = {}
+if cfg.use_async:
+    tier_stats = asyncio.run(async_run_tiers(runner_tiers, async_client))
+else:
+    tier_stats = []
+    for index, runner_tier in enumerate(runner_tiers):
+        tier_stats.append(run_tier(index, runner_tier))
+    executor.shutdown()
+if not cfg.plan:
+    update_state()
+print("--- tiers ---")
+print_tier_stats(tier_stats)
+print("--- name to id resolver cache ---")
+get_resolver(netbox_obj).print_stats()
+if cfg.use_async:
+    print("--- asyncio client ---")
+    async_client.print_stats()
+elif getattr(netbox_obj.http_session, "governor", None) is not None:
+    print("--- concurrency governor ---")
+    netbox_obj.http_session.governor.print_stats()
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
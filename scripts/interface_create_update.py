@@ -16,8 +16,9 @@ Example Usage:
 import argparse
 from netbox_tools.common import netbox
 from netbox_tools.interface import Interface
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 108
+OUR_VERSION = 109
 
 
 def get_parser():
@@ -155,7 +156,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_args():
@@ -5,84 +5,117 @@ Description: Display information about all interfaces
 """
 import argparse
 import sys
-from netbox_tools.common import netbox
+from netbox_tools.common import brief_query, netbox
+from netbox_tools.logger import parse_args
+from netbox_tools.mirror import netbox_mirror
+from netbox_tools.output import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, row_writer
+from netbox_tools.paginator import DEFAULT_WORKERS, parallel_all
 
-OUR_VERSION = 102
+OUR_VERSION = 108
 
 
 def get_parser():
     """
     return an argparse parser object
     """
+    help_from_mirror = "Read from the local mirror of netbox (see mirror_snapshot.py)"
+    help_from_mirror += " rather than from netbox."
+    help_output = "Output format: table, csv, or json (one JSON object per line)."
+    help_output += f" Default: {DEFAULT_OUTPUT_FORMAT}."
+    help_workers = "Maximum number of pages fetched from netbox in parallel."
+    help_workers += f" Default: {DEFAULT_WORKERS}."
+
+    ex_prefix = "Example: "
+    ex_output = f"{ex_prefix} --output csv"
+    ex_workers = f"{ex_prefix} --workers 8"
+
     parser = argparse.ArgumentParser(
         description="DESCRIPTION: Print information about all interfaces"
     )
 
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--from_mirror",
+        dest="from_mirror",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_from_mirror,
+    )
+    optional.add_argument(
+        "--output",
+        dest="output",
+        required=False,
+        default=DEFAULT_OUTPUT_FORMAT,
+        choices=OUTPUT_FORMATS,
+        help=f"{help_output} {ex_output}",
+    )
+    optional.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=DEFAULT_WORKERS,
+        help=f"{help_workers} {ex_workers}",
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s v{OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
-def get_fmt():
-    """
-    return the output format string
-    """
-    return "{:>5} {:<20} {:<18} {:<17} {:<15} {:<7} {:<9}"
-
+COLUMNS = [
+    ("id", 5, ">"),
+    ("device_name", 20, "<"),
+    ("interface", 18, "<"),
+    ("mac_address", 17, "<"),
+    ("type", 15, "<"),
+    ("enabled", 7, "<"),
+    ("mgmt_only", 9, "<"),
+]
 
-def print_headers():
-    """
-    print the table headers
-    """
-    fmt = get_fmt()
-    print(
-        fmt.format(
-            "id",
-            "device_name",
-            "interface",
-            "mac_address",
-            "type",
-            "enabled",
-            "mgmt_only",
-        )
-    )
-    print(fmt.format("-" * 5, "-" * 20, "-" * 18, "-" * 17, "-" * 15, "-" * 7, "-" * 9))
+# fields of each interface that get_rows() uses
+FIELDS = ["device", "name", "mac_address", "type", "enabled", "mgmt_only"]
 
 
-def print_items(items):
+def get_rows(items):
     """
-    print the table items
+    yield one row (a dictionary keyed on column name) per interface in items
     """
-    fmt = get_fmt()
     for item in items:
-        print(
-            fmt.format(
-                item.id,
-                item.device.name,
-                item.name,
-                str(item.mac_address),
-                item.type.value,
-                str(item.enabled),
-                str(item.mgmt_only),
-            )
-        )
+        yield {
+            "id": item.id,
+            "device_name": item.device.name,
+            "interface": item.name,
+            "mac_address": item.mac_address,
+            "type": item.type.value,
+            "enabled": item.enabled,
+            "mgmt_only": item.mgmt_only,
+        }
 
 
 def get_interfaces():
     """
     return all Netbox interface objects
     """
-    result = netbox_obj.dcim.interfaces.all()
+    result = parallel_all(
+        netbox_obj.dcim.interfaces,
+        workers=cfg.workers,
+        **brief_query(netbox_obj, FIELDS),
+    )
     if result is None:
         print("Exiting: no interfaces")
         sys.exit(1)
     return result
 
 
-netbox_obj = netbox()
 cfg = get_parser()
+if cfg.from_mirror:
+    netbox_obj = netbox_mirror()
+else:
+    netbox_obj = netbox()
 response = get_interfaces()
-print_headers()
-print_items(response)
+with row_writer(cfg.output, COLUMNS) as writer:
+    writer.write_all(get_rows(response))
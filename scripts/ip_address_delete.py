@@ -7,8 +7,9 @@ import argparse
 
 from netbox_tools.common import netbox
 from netbox_tools.ip_address import IpAddress
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 101
+OUR_VERSION = 102
 
 
 def get_parser():
@@ -28,7 +29,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
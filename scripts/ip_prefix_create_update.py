@@ -6,8 +6,9 @@ Description: Create/update an ip prefix using command line options
 import argparse
 from netbox_tools.common import netbox
 from netbox_tools.ip_prefix import IpPrefix
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -60,7 +61,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 cfg = get_parser()
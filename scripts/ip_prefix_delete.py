@@ -3,11 +3,12 @@
 Name: ip_prefix_delete.py
 Description: Delete ip prefix ``--prefix`` from netbox
 '''
-OUR_VERSION = 102
+OUR_VERSION = 103
 import argparse
 
 from netbox_tools.common import netbox
 from netbox_tools.ip_prefix import IpPrefix
+from netbox_tools.logger import parse_args
 
 def get_parser():
     help_prefix = 'IP prefix to delete. Specify with format A.B.C.D/E'
@@ -29,7 +30,7 @@ def get_parser():
                         action='version',
                         version='%(prog)s {}'.format(OUR_VERSION))
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 def get_info():
     info = dict()
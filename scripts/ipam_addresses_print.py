@@ -3,25 +3,85 @@
 Name: ipam_addresses_print.py
 Description: Display all ip addresses
 """
+import argparse
 import sys
-from netbox_tools.common import netbox
+from netbox_tools.common import brief_query, netbox
+from netbox_tools.logger import parse_args
+from netbox_tools.mirror import netbox_mirror
+from netbox_tools.output import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, row_writer
+from netbox_tools.paginator import DEFAULT_WORKERS, parallel_all
 
+OUR_VERSION = 105
 
-def get_fmt():
+
+def get_parser():
     """
-    return a format string
+    return an argparse parser object
     """
-    return "{id:>5} {address:<18} {device:<18} {type:>6} {description:<30}"
+    help_from_mirror = "Read from the local mirror of netbox (see mirror_snapshot.py)"
+    help_from_mirror += " rather than from netbox."
+    help_output = "Output format: table, csv, or json (one JSON object per line)."
+    help_output += f" Default: {DEFAULT_OUTPUT_FORMAT}."
+    help_workers = "Maximum number of pages fetched from netbox in parallel."
+    help_workers += f" Default: {DEFAULT_WORKERS}."
 
+    ex_prefix = "Example: "
+    ex_output = f"{ex_prefix} --output csv"
+    ex_workers = f"{ex_prefix} --workers 8"
 
-def print_ip_addresses():
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Display all ip addresses"
+    )
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--from_mirror",
+        dest="from_mirror",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_from_mirror,
+    )
+    optional.add_argument(
+        "--output",
+        dest="output",
+        required=False,
+        default=DEFAULT_OUTPUT_FORMAT,
+        choices=OUTPUT_FORMATS,
+        help=f"{help_output} {ex_output}",
+    )
+    optional.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=DEFAULT_WORKERS,
+        help=f"{help_workers} {ex_workers}",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parse_args(parser)
+
+
+COLUMNS = [
+    ("id", 5, ">"),
+    ("address", 18, "<"),
+    ("name", 18, "<"),
+    ("type", 6, ">"),
+    ("description", 30, "<"),
+]
+
+# fields of each ip address that get_rows() uses
+FIELDS = ["address", "assigned_object", "description"]
+
+
+def get_rows(items):
     """
-    print column values
+    yield one row (a dictionary keyed on column name) per ip address in items
     """
-    items = nb.ipam.ip_addresses.all()
-    if items is None:
-        sys.exit(0)
-    fmt = get_fmt()
     for item in items:
         if "device" in dict(item.assigned_object):
             name = item.assigned_object.device.name
@@ -32,42 +92,31 @@ def print_ip_addresses():
         else:
             name = "na"
             device_type = "na"
-        print(
-            fmt.format(
-                id=item.id,
-                address=item.address,
-                device=name,
-                type=device_type,
-                description=item.description,
-            )
-        )
-
-
-def print_headers():
+        yield {
+            "id": item.id,
+            "address": item.address,
+            "name": name,
+            "type": device_type,
+            "description": item.description,
+        }
+
+
+def print_ip_addresses():
     """
-    print column headers
+    print one row per ip address
     """
-    fmt = get_fmt()
-    print(
-        fmt.format(
-            id="id",
-            address="address",
-            device="name",
-            type="type",
-            description="description",
-        )
-    )
-    print(
-        fmt.format(
-            id="-" * 5,
-            address="-" * 18,
-            device="-" * 18,
-            type="-" * 6,
-            description="-" * 30,
-        )
+    items = parallel_all(
+        nb.ipam.ip_addresses, workers=cfg.workers, **brief_query(nb, FIELDS)
     )
+    if items is None:
+        sys.exit(0)
+    with row_writer(cfg.output, COLUMNS) as writer:
+        writer.write_all(get_rows(items))
 
 
-nb = netbox()
-print_headers()
+cfg = get_parser()
+if cfg.from_mirror:
+    nb = netbox_mirror()
+else:
+    nb = netbox()
 print_ip_addresses()
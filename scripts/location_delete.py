@@ -6,8 +6,9 @@ Description: Delete location ``--location`` from netbox
 import argparse
 from netbox_tools.common import netbox
 from netbox_tools.location import Location
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -36,7 +37,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
@@ -5,9 +5,10 @@ Description: Create/update Netbox manufacturer ``--manufacturer``
 """
 import argparse
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 from netbox_tools.manufacturer import Manufacturer
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -34,7 +35,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
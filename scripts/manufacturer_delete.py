@@ -5,9 +5,10 @@ Description: Delete Netbox manufacturer ``--manufacturer``
 """
 import argparse
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 from netbox_tools.manufacturer import Manufacturer
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -36,7 +37,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
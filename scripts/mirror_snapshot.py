@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Name: mirror_snapshot.py
+Description: Snapshot netbox into the local mirror used by --from_mirror
+
+Once a full snapshot exists, later runs refresh the mirror incrementally
+from netbox's change log, falling back to a full snapshot if the change
+log has been pruned past the last change applied.  --full and --tables
+always take a full snapshot.
+
+Read-only scripts that accept --from_mirror (device_print.py,
+device_print_filtered.py, device_count.py, interfaces_print.py,
+ipam_addresses_print.py, racks_print.py) answer from this snapshot rather
+than from netbox.  The mirror file is set with mirror_file in config.yml.
+See lib/netbox_tools/mirror.py for details.
+
+Example Usage:
+
+./mirror_snapshot.py                        # refresh all mirrored tables
+./mirror_snapshot.py --full                 # full snapshot of all tables
+./mirror_snapshot.py --tables devices,racks # full snapshot of these tables
+./mirror_snapshot.py --status               # print snapshot age per table
+"""
+import argparse
+import sys
+from netbox_tools.common import netbox
+from netbox_tools.logger import log_message, parse_args
+from netbox_tools.mirror import MIRROR_TABLES, Mirror, mirror_file
+from netbox_tools.paginator import DEFAULT_WORKERS
+
+OUR_VERSION = 103
+
+
+def get_parser():
+    """
+    return an argparse parser object
+    """
+    help_tables = "Comma-separated list of tables to snapshot (no spaces)."
+    help_tables += f" Default: all tables: {','.join(MIRROR_TABLES)}."
+    help_tables += " Implies --full."
+    help_full = "Take a full snapshot, rather than applying netbox's change log."
+    help_status = "Print when each table was last snapshotted, and exit."
+    help_workers = "Maximum number of pages fetched from netbox in parallel"
+    help_workers += f" during a full snapshot. Default: {DEFAULT_WORKERS}."
+
+    ex_prefix = "Example: "
+    ex_tables = f"{ex_prefix} --tables devices,racks"
+    ex_workers = f"{ex_prefix} --workers 8"
+
+    parser = argparse.ArgumentParser(
+        description="DESCRIPTION: Snapshot netbox into the local mirror"
+    )
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--tables",
+        dest="tables",
+        required=False,
+        default=None,
+        help=f"{help_tables} {ex_tables}",
+    )
+    optional.add_argument(
+        "--full",
+        dest="full",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_full,
+    )
+    optional.add_argument(
+        "--status",
+        dest="status",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_status,
+    )
+    optional.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=DEFAULT_WORKERS,
+        help=f"{help_workers} {ex_workers}",
+    )
+
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
+    )
+
+    return parse_args(parser)
+
+
+def log(*args):
+    """
+    simple logger
+    """
+    log_message(args, version=OUR_VERSION)
+
+
+def get_tables():
+    """
+    Return the list of tables to snapshot.
+    Exit with error if the user requested a table that is not mirrored.
+    """
+    if cfg.tables is None:
+        return list(MIRROR_TABLES)
+    tables = cfg.tables.split(",")
+    for table in tables:
+        if table not in MIRROR_TABLES:
+            log(
+                f"exiting. Table {table} is not mirrored.",
+                f"Valid tables: {', '.join(MIRROR_TABLES)}",
+            )
+            sys.exit(1)
+    return tables
+
+
+def print_status():
+    """
+    print when each table was last snapshotted
+    """
+    for table in MIRROR_TABLES:
+        print(f"{table:<15} {mirror.freshness(table)}")
+
+
+cfg = get_parser()
+mirror = Mirror(mirror_file())
+if cfg.status:
+    print_status()
+    sys.exit(0)
+requested_tables = get_tables()
+netbox_obj = netbox()
+if cfg.full or cfg.tables is not None:
+    counts = mirror.snapshot(netbox_obj, requested_tables, workers=cfg.workers)
+else:
+    counts = mirror.refresh(netbox_obj, workers=cfg.workers)
+for table_name, count in counts.items():
+    log(f"{table_name}: {count} objects")
+log(mirror.freshness())
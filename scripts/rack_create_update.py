@@ -15,9 +15,10 @@ Example Usage:
 import argparse
 import re
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 from netbox_tools.rack import Rack
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -84,7 +85,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
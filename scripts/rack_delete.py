@@ -6,9 +6,10 @@ Description: Delete Netbox rack ``--rack``
 import argparse
 
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 from netbox_tools.rack import Rack
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -34,7 +35,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
@@ -7,8 +7,9 @@ import argparse
 import json
 import sys
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -45,7 +46,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def error():
@@ -5,23 +5,52 @@ Description: Display information about all racks
 """
 import argparse
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
+from netbox_tools.mirror import netbox_mirror
+from netbox_tools.output import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, row_writer
 
-OUR_VERSION = 104
+OUR_VERSION = 107
 
 
 def get_parser():
     """
     return an argparse parser object
     """
+    help_from_mirror = "Read from the local mirror of netbox (see mirror_snapshot.py)"
+    help_from_mirror += " rather than from netbox."
+    help_output = "Output format: table, csv, or json (one JSON object per line)."
+    help_output += f" Default: {DEFAULT_OUTPUT_FORMAT}."
+
+    ex_prefix = "Example: "
+    ex_output = f"{ex_prefix} --output csv"
+
     parser = argparse.ArgumentParser(
         description="DESCRIPTION: Display information about all racks"
     )
 
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--from_mirror",
+        dest="from_mirror",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_from_mirror,
+    )
+    optional.add_argument(
+        "--output",
+        dest="output",
+        required=False,
+        default=DEFAULT_OUTPUT_FORMAT,
+        choices=OUTPUT_FORMATS,
+        help=f"{help_output} {ex_output}",
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_racks():
@@ -31,20 +60,22 @@ def get_racks():
     return nb.dcim.racks.all()
 
 
-def print_headers():
+def get_rows(items):
     """
-    print column headers
+    yield one row (a dictionary keyed on column name) per rack in items
     """
-    print(FMT.format(id="id", name="name", site="site"))
-    print(FMT.format(id="-" * 5, name="-" * 15, site="-" * 15))
+    for item in items:
+        yield {"id": item.id, "name": item.name, "site": item.site.name}
 
 
 cfg = get_parser()
-nb = netbox()
+if cfg.from_mirror:
+    nb = netbox_mirror()
+else:
+    nb = netbox()
 racks = get_racks()
 
-FMT = "{id:>5} {name:>15} {site:>15}"
+COLUMNS = [("id", 5, ">"), ("name", 15, ">"), ("site", 15, ">")]
 
-print_headers()
-for rack in racks:
-    print(FMT.format(rack.id, rack.name, rack.site.name))
+with row_writer(cfg.output, COLUMNS) as writer:
+    writer.write_all(get_rows(racks))
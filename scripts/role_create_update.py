@@ -17,9 +17,10 @@ Notes:
 import argparse
 import re
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 from netbox_tools.role import Role
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -79,7 +80,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
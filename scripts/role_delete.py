@@ -5,9 +5,10 @@ Description: Delete Netbox device role ``--role``
 """
 import argparse
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 from netbox_tools.role import Role
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -33,7 +34,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
@@ -8,8 +8,9 @@ import json
 import sys
 from netbox_tools.common import netbox
 from netbox_tools.colors import rgb_to_color
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -46,7 +47,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def error():
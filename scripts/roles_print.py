@@ -7,8 +7,9 @@ import argparse
 import sys
 from netbox_tools.common import netbox
 from netbox_tools.colors import rgb_to_color
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 103
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -23,7 +24,7 @@ def get_parser():
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
 
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_fmt():
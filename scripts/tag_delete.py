@@ -5,9 +5,10 @@ Description: Delete Netbox tag ``--tag``
 """
 import argparse
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 from netbox_tools.tag import Tag
 
-OUR_VERSION = 106
+OUR_VERSION = 107
 
 
 def get_parser():
@@ -29,7 +30,7 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_info():
@@ -6,8 +6,9 @@ Description: Display information about all tags
 import argparse
 from netbox_tools.colors import color
 from netbox_tools.common import netbox
+from netbox_tools.logger import parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -20,7 +21,7 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def get_fmt():
@@ -5,9 +5,11 @@ Description: Create/update all Netbox virtual_ip_addresses (vm IPs) defined in `
 """
 import argparse
 from netbox_tools.common import netbox, load_yaml, make_ip_address_dict
+from netbox_tools.logger import parse_args
 from netbox_tools.virtual_ip_address import VirtualIpAddress
+from netbox_tools.resolver import get_resolver
 
-OUR_VERSION = 101
+OUR_VERSION = 103
 
 
 def get_parser():
@@ -26,15 +28,31 @@ def get_parser():
     mandatory.add_argument(
         "--yaml", dest="yaml", required=True, help=f"{help_yaml} {ex_yaml}"
     )
+    help_preload = "Fetch reference tables (sites, roles, tags, vlans, etc)"
+    help_preload += " once before processing, rather than looking up"
+    help_preload += " each reference in netbox individually."
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--preload",
+        dest="preload",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_preload,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 cfg = get_parser()
 info = load_yaml(cfg.yaml)
 nb = netbox()
+if cfg.preload:
+    get_resolver(nb).preload(nb)
 for key in info["virtual_interfaces"]:
     if "ip4" not in info["virtual_interfaces"][key]:
         continue
@@ -4,10 +4,13 @@ Name: virtual_ip_address_delete_all.py
 Description: Delete all virtual_ip_addresses (vm IPs) defined in ``--yaml``
 """
 import argparse
+import sys
 from netbox_tools.common import netbox, load_yaml
+from netbox_tools.logger import parse_args
 from netbox_tools.virtual_ip_address import VirtualIpAddress
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
 
-OUR_VERSION = 101
+OUR_VERSION = 104
 
 
 def get_parser():
@@ -27,18 +30,51 @@ def get_parser():
     mandatory.add_argument(
         "--yaml", dest="yaml", required=True, help=f"{help_yaml} {ex_yaml}"
     )
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 cfg = get_parser()
 info = load_yaml(cfg.yaml)
 nb = netbox()
 print("---")
+virtual_ip_addresses = []
 for key in info["virtual_interfaces"]:
     if "ip4" not in info["virtual_interfaces"][key]:
         continue
-    vip_obj = VirtualIpAddress(nb, info["virtual_interfaces"][key])
-    vip_obj.delete()
+    virtual_ip_addresses.append(VirtualIpAddress(nb, info["virtual_interfaces"][key]))
+bulk = Bulk(chunk_size=cfg.chunk_size, dry_run=cfg.plan)
+bulk.delete(virtual_ip_addresses)
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
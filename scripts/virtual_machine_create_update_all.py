@@ -4,14 +4,16 @@ Name: virtual_machine_create_update_all.py
 Description: Create/update virtual_machines defined in ``--yaml``
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import netbox, load_yaml, make_ip_address_dict
+from netbox_tools.logger import log_message, parse_args
 from netbox_tools.virtual_machine import VirtualMachine
 from netbox_tools.virtual_interface import VirtualInterface
 from netbox_tools.virtual_ip_address import VirtualIpAddress
+from netbox_tools.resolver import get_resolver
+from netbox_tools.bulk import Bulk, DEFAULT_CHUNK_SIZE
 
-OUR_VERSION = 103
+OUR_VERSION = 107
 
 
 def get_parser():
@@ -30,17 +32,56 @@ def get_parser():
     mandatory.add_argument(
         "--yaml", dest="yaml", required=True, help=f"{help_yaml} {ex_yaml}"
     )
+    help_preload = "Fetch reference tables (sites, roles, tags, vlans, etc)"
+    help_preload += " once before processing, rather than looking up"
+    help_preload += " each reference in netbox individually."
+
+    optional = parser.add_argument_group(title="OPTIONAL SCRIPT ARGS")
+    optional.add_argument(
+        "--preload",
+        dest="preload",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_preload,
+    )
+
+    help_chunk_size = "Maximum number of objects sent to netbox per request."
+    help_chunk_size += f" Default: {DEFAULT_CHUNK_SIZE}."
+    ex_chunk_size = f"{ex_prefix} --chunk_size 250"
+
+    optional.add_argument(
+        "--chunk_size",
+        dest="chunk_size",
+        type=int,
+        required=False,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"{help_chunk_size} {ex_chunk_size}",
+    )
+
+    help_plan = "Print the changes that would be made in netbox, without"
+    help_plan += " making them."
+
+    optional.add_argument(
+        "--plan",
+        dest="plan",
+        required=False,
+        default=False,
+        action="store_true",
+        help=help_plan,
+    )
+
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def get_interface_dict(vm_dict, interfaces_dict):
@@ -59,22 +100,6 @@ def get_interface_dict(vm_dict, interfaces_dict):
     return interfaces_dict[interface_key]
 
 
-def make_virtual_machine(netbox_object, info_dict, key):
-    """
-    create a virtual machine
-    """
-    obj = VirtualMachine(netbox_object, info_dict["virtual_machines"][key])
-    obj.create_or_update()
-
-
-def make_virtual_interface(netbox_object, interface_dict):
-    """
-    create a virtual interface
-    """
-    obj = VirtualInterface(netbox_object, interface_dict)
-    obj.create_or_update()
-
-
 def make_virtual_ip_address(netbox_object, interface_dict, info_dict):
     """
     create an ip address for a virtual machine
@@ -84,13 +109,21 @@ def make_virtual_ip_address(netbox_object, interface_dict, info_dict):
     obj.create_or_update()
 
 
-def make_virtual_machines(netbox_object, info_dict):
+def make_virtual_machines(netbox_object, info_dict, bulk):
     """
-    create all virtual machines defined in info_dict
+    create all virtual machines defined in info_dict, followed by their
+    interfaces, followed by their ip addresses.
+
+    Virtual machines and interfaces are sent to netbox in bulk.  IP addresses
+    are processed individually, since each is also made its virtual machine's
+    primary ip.
     """
+    virtual_machines = []
+    interface_dicts = []
     for key in info_dict["virtual_machines"]:
-        print("---")
-        make_virtual_machine(netbox_object, info, key)
+        virtual_machines.append(
+            VirtualMachine(netbox_object, info_dict["virtual_machines"][key])
+        )
         interface_dict = get_interface_dict(
             info_dict["virtual_machines"][key], info_dict["virtual_interfaces"]
         )
@@ -100,14 +133,43 @@ def make_virtual_machines(netbox_object, info_dict):
             msg += " since ip4 key is missing"
             log(msg)
             continue
-        make_virtual_interface(netbox_object, interface_dict)
+        interface_dicts.append(interface_dict)
+    bulk.create_or_update(virtual_machines)
+    bulk.create_or_update(
+        [
+            VirtualInterface(netbox_object, interface_dict)
+            for interface_dict in interface_dicts
+        ]
+    )
+    if bulk.dry_run:
+        # Plan only; primary_ip assignment writes are skipped
+        bulk.create_or_update(
+            [
+                VirtualIpAddress(
+                    netbox_object,
+                    make_ip_address_dict(info_dict["ip4_addresses"], interface_dict),
+                )
+                for interface_dict in interface_dicts
+            ]
+        )
+        return
+    for interface_dict in interface_dicts:
+        print("---")
         make_virtual_ip_address(netbox_object, interface_dict, info_dict)
 
 
 cfg = get_parser()
 netbox_obj = netbox()
+if cfg.preload:
+    get_resolver(netbox_obj).preload(netbox_obj)
 info = load_yaml(cfg.yaml)
 if "virtual_machines" not in info:
     log(f"Exiting. virtual_machines are not defined in {cfg.yaml}")
     sys.exit(1)
-make_virtual_machines(netbox_obj, info)
+bulk = Bulk(chunk_size=cfg.chunk_size, dry_run=cfg.plan)
+make_virtual_machines(netbox_obj, info, bulk)
+if cfg.plan:
+    bulk.print_plan()
+bulk.print_summary()
+if len(bulk.failed) != 0:
+    sys.exit(1)
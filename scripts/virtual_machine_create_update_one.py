@@ -4,14 +4,14 @@ Name: virtual_machine_create_update_one.py
 Description: Create/update virtual_machine with key ``--key`` in file ``--yaml``
 """
 import argparse
-from inspect import stack
 import sys
 from netbox_tools.common import netbox, load_yaml, make_ip_address_dict
+from netbox_tools.logger import log_message, parse_args
 from netbox_tools.virtual_machine import VirtualMachine
 from netbox_tools.virtual_interface import VirtualInterface
 from netbox_tools.virtual_ip_address import VirtualIpAddress
 
-OUR_VERSION = 102
+OUR_VERSION = 103
 
 
 def get_parser():
@@ -38,14 +38,14 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def make_virtual_machine(netbox_object, vm_info):
@@ -4,12 +4,12 @@ Name: vlan_group_print.py
 Description: Display information about Netbox vlan_group ``--vlan_group``
 """
 import argparse
-from inspect import stack
 import json
 import sys
 from netbox_tools.common import netbox
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 104
+OUR_VERSION = 105
 
 
 def get_parser():
@@ -47,14 +47,14 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def error(netbox_object):
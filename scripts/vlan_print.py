@@ -4,13 +4,15 @@ Name: vlan_group_print.py
 Description: Display information about Netbox vlan_group ``--vlan_group``
 """
 import argparse
-from inspect import stack
 import json
 import sys
-import pynetbox
 from netbox_tools.common import netbox
+from netbox_tools.lazy import lazy_import
+from netbox_tools.logger import log_message, parse_args
 
-OUR_VERSION = 100
+OUR_VERSION = 102
+
+pynetbox = lazy_import("pynetbox")
 
 
 def get_parser():
@@ -50,14 +52,14 @@ def get_parser():
     parser.add_argument(
         "--version", action="version", version=f"%(prog)s {OUR_VERSION}"
     )
-    return parser.parse_args()
+    return parse_args(parser)
 
 
 def log(*args):
     """
     simple logger
     """
-    print(f"{stack()[1].function}(v{OUR_VERSION}): {' '.join(args)}")
+    log_message(args, version=OUR_VERSION)
 
 
 def error(netbox_object):
@@ -0,0 +1,109 @@
+"""
+Name: conftest.py
+Description: pytest configuration for the netbox_tools unit tests
+
+Puts lib on sys.path so that the tests import the netbox_tools in this
+repository, rather than any installed copy.
+
+The netbox_stub fixture runs the scripts of this repository against a
+local netbox stand-in (benchmarks/netbox_stub.py), as benchmarks/suite.py
+does.
+
+Example Usage:
+
+python -m pytest -q tests
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB = os.path.join(ROOT, "lib")
+BENCHMARKS = os.path.join(ROOT, "benchmarks")
+SCRIPTS = os.path.join(ROOT, "scripts")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+
+class ScriptRunner:
+    """
+    Run the scripts of this repository against stub, a NetboxStub, with
+    a config.yml and credential agent pointing them at it.
+
+    work_dir: directory holding config.yml, and the scripts' home directory
+    (so that their caches and state files start empty)
+    """
+
+    def __init__(self, stub, work_dir, agent_socket):
+        self.stub = stub
+        self.work_dir = work_dir
+        self.config = os.path.join(work_dir, "config.yml")
+        mirror_file = os.path.join(work_dir, "mirror.sqlite3")
+        with open(self.config, "w", encoding="utf-8") as handle:
+            handle.write("vault: /nonexistent\n")
+            handle.write(f"credential_agent_socket: {agent_socket}\n")
+            handle.write(f"mirror_file: {mirror_file}\n")
+
+    def create(self, path, **fields):
+        """
+        Create an object of path (e.g. dcim/sites) in the stub, and return
+        its id
+        """
+        return self.stub.store.create(path, fields)["id"]
+
+    def run(self, script, *args, returncode=0):
+        """
+        Run script (e.g. device_count.py) with args, and return its
+        subprocess.CompletedProcess.  Fail if it does not exit with
+        returncode.
+        """
+        env = dict(os.environ, HOME=self.work_dir)
+        env["PYTHONPATH"] = os.pathsep.join([LIB] + sys.path)
+        result = subprocess.run(
+            [
+                sys.executable,
+                os.path.join(BENCHMARKS, "launch.py"),
+                self.config,
+                os.path.join(SCRIPTS, script),
+                *args,
+            ],
+            env=env,
+            cwd=self.work_dir,
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=False,
+        )
+        assert result.returncode == returncode, result.stderr
+        return result
+
+
+@pytest.fixture
+def netbox_stub(tmp_path):
+    """
+    Yield a ScriptRunner, running scripts against an empty NetboxStub
+    """
+    if BENCHMARKS not in sys.path:
+        sys.path.insert(0, BENCHMARKS)
+    from netbox_stub import NetboxStub
+    from netbox_tools.credential_agent import CredentialAgent, stop_agent
+
+    # Unix socket paths are limited to about 100 characters, so keep it short
+    agent_dir = tempfile.mkdtemp(prefix="nbt")
+    agent_socket = os.path.join(agent_dir, "agent.sock")
+    with NetboxStub() as stub:
+        agent = CredentialAgent(
+            {"netbox_url": stub.url, "netbox_token": "0" * 40}, agent_socket
+        )
+        agent.bind()
+        thread = threading.Thread(target=agent.serve, daemon=True)
+        thread.start()
+        try:
+            yield ScriptRunner(stub, str(tmp_path), agent_socket)
+        finally:
+            stop_agent(agent_socket)
+            thread.join(timeout=5)
+            os.rmdir(agent_dir)
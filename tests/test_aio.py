@@ -0,0 +1,172 @@
+"""
+Name: test_aio.py
+Description: Tests of netbox_tools.aio, the asyncio netbox client, and of the
+--async mode of entity_create_update_all.py
+
+These need httpx, and are skipped if it is not installed.
+"""
+import asyncio
+import importlib.util
+import pynetbox
+import pytest
+from netbox_tools import aio
+from netbox_tools.aio import AsyncNetbox, AsyncRequestError
+from netbox_tools.bulk import Bulk
+from netbox_tools.colors import color_to_rgb
+from netbox_tools.resolver import Resolver
+from netbox_tools.tag import Tag
+from test_reconcile import Inventory, writes
+
+requires_httpx = pytest.mark.skipif(
+    importlib.util.find_spec("httpx") is None, reason="httpx is not installed"
+)
+
+
+def test_missing_httpx_exits(monkeypatch):
+    def missing(name):
+        raise ModuleNotFoundError(name)
+
+    monkeypatch.setattr(aio, "lazy_import", missing)
+    with pytest.raises(SystemExit):
+        aio.import_httpx()
+
+
+def api(netbox_stub):
+    """
+    Return a pynetbox instance pointing at netbox_stub
+    """
+    netbox_obj = pynetbox.api(netbox_stub.stub.url.rstrip("/"), token="0" * 40)
+    netbox_obj.resolver = Resolver()
+    return netbox_obj
+
+
+async def endpoint_operations(client, endpoint):
+    async with client:
+        created = await endpoint.create(
+            [{"name": f"tag_{index}", "slug": f"tag_{index}"} for index in range(3)]
+        )
+        await endpoint.update([{"id": created[0].id, "color": "ff0000"}])
+        await endpoint.delete([created[2].id])
+        return created, await endpoint.filter(name=["tag_0", "tag_1", "tag_2"])
+
+
+@requires_httpx
+def test_endpoint_operations(netbox_stub):
+    netbox_obj = api(netbox_stub)
+    client = AsyncNetbox(netbox_obj)
+    endpoint = client.endpoint(netbox_obj.extras.tags)
+    created, records = asyncio.run(endpoint_operations(client, endpoint))
+    assert [record.name for record in created] == ["tag_0", "tag_1", "tag_2"]
+    assert [(record.name, record.color) for record in records] == [
+        ("tag_0", "ff0000"),
+        ("tag_1", "9e9e9e"),
+    ]
+    assert client.requests == 4
+
+
+async def failed_create(client, endpoint):
+    async with client:
+        await endpoint.create([{"slug": "no_name"}])
+
+
+@requires_httpx
+def test_rejected_request_raises(netbox_stub):
+    netbox_obj = api(netbox_stub)
+    client = AsyncNetbox(netbox_obj)
+    endpoint = client.endpoint(netbox_obj.extras.tags)
+    with pytest.raises(AsyncRequestError) as error:
+        asyncio.run(failed_create(client, endpoint))
+    assert error.value.status == 400
+    # a create is not retried
+    assert client.requests == 1
+
+
+async def many_filters(client, endpoint, count):
+    async with client:
+        await asyncio.gather(*[endpoint.filter(name=f"tag_{n}") for n in range(count)])
+
+
+@requires_httpx
+def test_requests_in_flight_are_bounded(netbox_stub):
+    netbox_stub.stub.latency_ms = 50
+    netbox_obj = api(netbox_stub)
+    client = AsyncNetbox(netbox_obj, concurrency=3)
+    endpoint = client.endpoint(netbox_obj.extras.tags)
+    asyncio.run(many_filters(client, endpoint, 12))
+    assert client.requests == 12
+    assert client.peak_in_flight == 3
+    assert client.in_flight == 0
+
+
+async def bulk_create_or_update(client, bulk, items):
+    async with client:
+        await bulk.async_create_or_update(items, client)
+
+
+@requires_httpx
+def test_bulk_async_create_or_update(netbox_stub):
+    netbox_obj = api(netbox_stub)
+    bulk = Bulk(chunk_size=2)
+
+    def tags(color):
+        infos = [{"name": f"tag_{index}", "color": "blue"} for index in range(5)]
+        infos[0]["color"] = color
+        return [Tag(netbox_obj, info) for info in infos]
+
+    items = tags("blue")
+    asyncio.run(bulk_create_or_update(AsyncNetbox(netbox_obj), bulk, items))
+    assert bulk.created == 5
+    assert all(bulk.netbox_id(item) is not None for item in items)
+    asyncio.run(bulk_create_or_update(AsyncNetbox(netbox_obj), bulk, tags("red")))
+    assert (bulk.created, bulk.updated, bulk.unchanged) == (5, 1, 4)
+    assert len(bulk.failed) == 0
+
+
+async def tag_create_or_update(client, tag):
+    async with client:
+        return await tag.async_create_or_update(client)
+
+
+@requires_httpx
+def test_entity_async_create_or_update(netbox_stub):
+    netbox_obj = api(netbox_stub)
+    record = asyncio.run(
+        tag_create_or_update(AsyncNetbox(netbox_obj), Tag(netbox_obj, {"name": "prod"}))
+    )
+    assert record.name == "prod"
+    tag = Tag(netbox_obj, {"name": "prod", "color": "red"})
+    client = AsyncNetbox(netbox_obj)
+    assert asyncio.run(tag_create_or_update(client, tag)).id == record.id
+    # one lookup, one update
+    assert client.requests == 2
+    assert tag.tag_obj.color == color_to_rgb("red")
+
+
+def primary_ips(netbox_stub):
+    """
+    Return a dictionary of device name: address of its primary_ip4
+    """
+    store = netbox_stub.stub.store
+    addresses = store.objects["ipam/ip-addresses"]
+    return {
+        raw["name"]: addresses[raw["primary_ip4"]]["address"]
+        for raw in store.objects["dcim/devices"].values()
+        if raw.get("primary_ip4") is not None
+    }
+
+
+@requires_httpx
+def test_async_mode(netbox_stub):
+    inventory = Inventory(netbox_stub)
+    assert inventory.run("--async", "--concurrency", "8") == 10
+    assert primary_ips(netbox_stub) == {
+        f"leaf_{index}": f"192.168.0.{index + 1}/24" for index in range(4)
+    }
+    assert all(entry["netbox_id"] for entry in inventory.saved()["devices"].values())
+    # a full run of an unchanged inventory changes nothing
+    before = writes(netbox_stub)
+    assert inventory.run("--async", "--full") == 10
+    assert writes(netbox_stub) == before
+    inventory.info["devices"]["leaf_3"]["serial"] = "SN3-changed"
+    assert inventory.run("--async") == 1
+    assert writes(netbox_stub) == before + 1
@@ -0,0 +1,177 @@
+"""
+Name: test_bulk.py
+Description: Unit tests for netbox_tools.bulk
+"""
+from types import SimpleNamespace
+from netbox_tools.bulk import Bulk
+from netbox_tools.resolver import get_resolver
+
+
+class Record(dict):
+    """
+    Stand-in for a pynetbox Record: a dictionary whose keys are also attributes
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError as _key_error:
+            raise AttributeError(name) from _key_error
+
+
+class Endpoint:
+    """
+    Stand-in for a pynetbox endpoint holding records keyed on name.
+    Requests that contain a name in reject fail, as netbox fails a whole
+    bulk request if any object in it is invalid.
+    """
+
+    def __init__(self, records=None, reject=None):
+        self.name = "tags"
+        self.api = SimpleNamespace()
+        self.records = records or {}
+        self.reject = reject or set()
+        self.requests = []
+        self._next_id = 100
+
+    def _check(self, operation, payloads):
+        self.requests.append((operation, len(payloads)))
+        for payload in payloads:
+            if isinstance(payload, dict) and payload.get("name") in self.reject:
+                raise ValueError(f"invalid name {payload['name']}")
+
+    def filter(self, name=None):
+        self.requests.append(("filter", len(name)))
+        return [self.records[key] for key in name if key in self.records]
+
+    def create(self, payloads):
+        self._check("create", payloads)
+        created = []
+        for payload in payloads:
+            self._next_id += 1
+            record = Record(payload, id=self._next_id)
+            self.records[payload["name"]] = record
+            created.append(record)
+        return created
+
+    def update(self, payloads):
+        self._check("update", payloads)
+        return True
+
+    def delete(self, ids):
+        self._check("delete", ids)
+        for name in [name for name, record in self.records.items() if record.id in ids]:
+            self.records.pop(name)
+        return True
+
+
+class Item:
+    """
+    Stand-in for an entity class (Tag, Device, etc) as Bulk expects it
+    """
+
+    def __init__(self, endpoint, name, color="ff0000", recreate=False):
+        self.endpoint = endpoint
+        self.name = name
+        self.color = color
+        self.bulk_recreate = recreate
+        self.invalidated = 0
+
+    @property
+    def bulk_filter(self):
+        return {"name": self.name}
+
+    @property
+    def resolver_key(self):
+        return ("tag", self.name)
+
+    def bulk_match(self, record):
+        return record["name"] == self.name
+
+    def prepare_create_or_update(self):
+        return {"name": self.name, "color": self.color}
+
+    def prepare_delete(self):
+        pass
+
+    def invalidate_resolver(self):
+        self.invalidated += 1
+
+
+def test_partition_into_create_update_unchanged():
+    endpoint = Endpoint(
+        {
+            "same": Record(id=1, name="same", color="ff0000"),
+            "other": Record(id=2, name="other", color="00ff00"),
+        }
+    )
+    items = [Item(endpoint, name) for name in ("same", "other", "new")]
+    bulk = Bulk(chunk_size=10)
+    bulk.create_or_update(items)
+    assert (bulk.created, bulk.updated, bulk.unchanged) == (1, 1, 1)
+    assert endpoint.requests == [("filter", 3), ("create", 1), ("update", 1)]
+    assert [bulk.netbox_id(item) for item in items] == [1, 2, 101]
+
+
+def test_rejected_chunk_is_retried_one_object_at_a_time():
+    endpoint = Endpoint(reject={"bad"})
+    items = [Item(endpoint, name) for name in ("a", "bad", "b")]
+    bulk = Bulk(chunk_size=10)
+    bulk.create_or_update(items)
+    assert bulk.created == 2
+    assert [(item.name, operation) for item, operation, _ in bulk.failed] == [
+        ("bad", "create")
+    ]
+    assert endpoint.requests[1:] == [("create", 3)] + [("create", 1)] * 3
+    assert bulk.netbox_id(items[1]) is None
+
+
+def test_recreate_deletes_then_creates():
+    endpoint = Endpoint({"cable": Record(id=1, name="cable", color="00ff00")})
+    item = Item(endpoint, "cable", recreate=True)
+    bulk = Bulk()
+    bulk.create_or_update([item])
+    assert endpoint.requests == [("filter", 1), ("delete", 1), ("create", 1)]
+    assert bulk.created == 1
+    assert bulk.netbox_id(item) == 101
+
+
+def test_rejected_recreate_delete_is_reported_as_delete():
+    endpoint = Endpoint({"cable": Record(id=1, name="cable", color="00ff00")})
+
+    def delete(_ids):
+        raise ValueError("protected")
+
+    endpoint.delete = delete
+    item = Item(endpoint, "cable", recreate=True)
+    bulk = Bulk()
+    bulk.create_or_update([item])
+    assert [operation for _, operation, _ in bulk.failed] == ["delete"]
+    assert bulk.created == 0
+
+
+def test_ids_found_or_created_are_stored_in_resolver():
+    endpoint = Endpoint({"old": Record(id=1, name="old", color="ff0000")})
+    bulk = Bulk(chunk_size=1)
+    bulk.create_or_update([Item(endpoint, "old"), Item(endpoint, "new")])
+    resolver = get_resolver(endpoint.api)
+    assert resolver.lookup("tag", "old") == (True, 1)
+    assert resolver.lookup("tag", "new") == (True, 101)
+
+
+def test_dry_run_sends_nothing():
+    endpoint = Endpoint({"other": Record(id=2, name="other", color="00ff00")})
+    bulk = Bulk(dry_run=True)
+    bulk.create_or_update([Item(endpoint, "other"), Item(endpoint, "new")])
+    assert endpoint.requests == [("filter", 2)]
+    assert sorted(action for action, _, _ in bulk.plan) == ["create", "update"]
+
+
+def test_delete_skips_objects_not_in_netbox():
+    endpoint = Endpoint({"old": Record(id=1, name="old", color="ff0000")})
+    items = [Item(endpoint, "old"), Item(endpoint, "missing")]
+    bulk = Bulk()
+    bulk.delete(items)
+    assert (bulk.deleted, bulk.not_found) == (1, 1)
+    assert items[0].invalidated == 1
+    assert endpoint.records == {}
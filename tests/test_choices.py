@@ -0,0 +1,112 @@
+"""
+Name: test_choices.py
+Description: Unit tests for netbox_tools.choices
+"""
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from netbox_tools import choices
+from netbox_tools.choices import clear_choices, get_choices
+
+CHOICES = {"status": [{"value": "active", "display": "Active"}]}
+
+
+class Endpoint:
+    """
+    Stand-in for a pynetbox endpoint.  choices() waits for release (if
+    set), then returns CHOICES, and counts calls.
+    """
+
+    def __init__(self, release=None):
+        self.release = release
+        self.calls = 0
+
+    def choices(self):
+        self.calls += 1
+        if self.release is not None:
+            assert self.release.wait(timeout=5)
+        return CHOICES
+
+
+class FakeNetbox:
+    """
+    Stand-in for a pynetbox api instance, counting version requests
+    """
+
+    def __init__(self, release=None):
+        self.base_url = "http://netbox.example/api"
+        self.version_requests = 0
+        self.ipam = SimpleNamespace(
+            vlans=Endpoint(release), prefixes=Endpoint(), ip_addresses=Endpoint()
+        )
+
+    @property
+    def version(self):
+        self.version_requests += 1
+        return "3.7"
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(choices, "_cache_settings", lambda: (None, 0))
+    clear_choices()
+    yield
+    clear_choices()
+
+
+def test_choices_retrieved_once_per_endpoint():
+    netbox_instance = FakeNetbox()
+    assert get_choices(netbox_instance, "ipam", "vlans") == {"status": ["active"]}
+    assert get_choices(netbox_instance, "ipam", "vlans") is get_choices(
+        netbox_instance, "ipam", "vlans"
+    )
+    assert netbox_instance.ipam.vlans.calls == 1
+
+
+def test_concurrent_callers_share_one_request_without_blocking_others():
+    release = threading.Event()
+    netbox_instance = FakeNetbox(release)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(get_choices(netbox_instance, "ipam", "vlans"))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    # ipam.vlans is in flight.  Other endpoints must not wait for it.
+    time.sleep(0.05)
+    get_choices(netbox_instance, "ipam", "prefixes")
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4
+    assert netbox_instance.ipam.vlans.calls == 1
+
+
+def test_failed_retrieval_is_retried_by_next_caller():
+    netbox_instance = FakeNetbox()
+
+    def fail():
+        raise RuntimeError("netbox unavailable")
+
+    netbox_instance.ipam.vlans.choices = fail
+    with pytest.raises(RuntimeError):
+        get_choices(netbox_instance, "ipam", "vlans")
+    netbox_instance.ipam.vlans = Endpoint()
+    assert get_choices(netbox_instance, "ipam", "vlans") == {"status": ["active"]}
+
+
+def test_disk_cache_avoids_version_request(monkeypatch, tmp_path):
+    cache_file = str(tmp_path / "choices.json")
+    monkeypatch.setattr(choices, "_cache_settings", lambda: (cache_file, 3600))
+    first = FakeNetbox()
+    get_choices(first, "ipam", "vlans")
+    assert first.version_requests == 1
+    clear_choices()
+    second = FakeNetbox()
+    assert get_choices(second, "ipam", "vlans") == {"status": ["active"]}
+    assert second.version_requests == 0
+    assert second.ipam.vlans.calls == 0
@@ -0,0 +1,96 @@
+"""
+Name: test_credential_agent.py
+Description: Unit tests for netbox_tools.credential_agent
+"""
+import os
+import socket
+import stat
+import threading
+import pytest
+from netbox_tools.credential_agent import (
+    CredentialAgent,
+    _send,
+    query_agent,
+    stop_agent,
+)
+
+CREDENTIALS = {"netbox_url": "https://netbox.example", "netbox_token": "abc123"}
+
+
+@pytest.fixture
+def socket_dir(tmp_path):
+    # Unix socket paths are limited to about 100 characters, so keep it short
+    return tmp_path / "a"
+
+
+def start_agent(path):
+    agent = CredentialAgent(CREDENTIALS, str(path), idle_timeout=10)
+    agent.bind()
+    thread = threading.Thread(target=agent.serve, daemon=True)
+    thread.start()
+    return agent, thread
+
+
+def test_get_and_stop(socket_dir):
+    path = socket_dir / "agent.sock"
+    _, thread = start_agent(path)
+    assert stat.S_IMODE(os.stat(socket_dir).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert query_agent(str(path)) == CREDENTIALS
+    assert _send(str(path), {"command": "bogus"}) == {"error": "unknown command bogus"}
+    assert stop_agent(str(path)) is True
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert not path.exists()
+    assert query_agent(str(path)) is None
+
+
+def test_malformed_request_is_ignored(socket_dir):
+    path = socket_dir / "agent.sock"
+    _, thread = start_agent(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(5)
+        client.connect(str(path))
+        client.sendall(b"not json\n")
+        assert client.recv(4096) == b""
+    assert query_agent(str(path)) == CREDENTIALS
+    stop_agent(str(path))
+    thread.join(timeout=5)
+
+
+def test_refuses_to_start_when_agent_is_listening(socket_dir):
+    path = socket_dir / "agent.sock"
+    _, thread = start_agent(path)
+    with pytest.raises(RuntimeError):
+        CredentialAgent(CREDENTIALS, str(path)).bind()
+    stop_agent(str(path))
+    thread.join(timeout=5)
+
+
+def test_stale_socket_is_replaced(socket_dir):
+    path = socket_dir / "agent.sock"
+    socket_dir.mkdir(mode=0o700)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    _, thread = start_agent(path)
+    assert query_agent(str(path)) == CREDENTIALS
+    stop_agent(str(path))
+    thread.join(timeout=5)
+
+
+def test_existing_directory_permissions_are_not_changed(socket_dir):
+    socket_dir.mkdir()
+    os.chmod(socket_dir, 0o755)
+    agent = CredentialAgent(CREDENTIALS, str(socket_dir / "agent.sock"))
+    agent.bind()
+    agent.close()
+    assert stat.S_IMODE(os.stat(socket_dir).st_mode) == 0o755
+
+
+def test_refuses_group_or_world_writable_directory(socket_dir):
+    socket_dir.mkdir()
+    os.chmod(socket_dir, 0o777)
+    with pytest.raises(RuntimeError, match="writable by group or others"):
+        CredentialAgent(CREDENTIALS, str(socket_dir / "agent.sock")).bind()
+    assert stat.S_IMODE(os.stat(socket_dir).st_mode) == 0o777
@@ -0,0 +1,149 @@
+"""
+Name: test_device_scripts.py
+Description: Tests of the device scripts, run against a netbox stub
+"""
+import csv
+import io
+import json
+import pytest
+
+
+def seed(netbox_stub):
+    """
+    Create two devices in netbox_stub, whose location names and models are
+    the same, in different sites and from different manufacturers
+    """
+    role = netbox_stub.create("dcim/device-roles", name="leaf", slug="leaf")
+    for index in (1, 2):
+        site = netbox_stub.create(
+            "dcim/sites", name=f"site_{index}", slug=f"site_{index}"
+        )
+        location = netbox_stub.create(
+            "dcim/locations", name="row-v", slug="row-v", site=site
+        )
+        manufacturer = netbox_stub.create(
+            "dcim/manufacturers", name=f"vendor_{index}", slug=f"vendor_{index}"
+        )
+        device_type = netbox_stub.create(
+            "dcim/device-types", model="X-1", slug="x-1", manufacturer=manufacturer
+        )
+        netbox_stub.create(
+            "dcim/devices",
+            name=f"leaf_{index}",
+            site=site,
+            location=location,
+            device_type=device_type,
+            role=role,
+        )
+
+
+def printed_devices(netbox_stub, *args):
+    result = netbox_stub.run("device_print_filtered.py", "--output", "csv", *args)
+    return sorted(row["name"] for row in csv.DictReader(io.StringIO(result.stdout)))
+
+
+def test_print_filtered_matches_every_location_with_the_name(netbox_stub):
+    seed(netbox_stub)
+    assert printed_devices(netbox_stub, "--location", "row-v") == ["leaf_1", "leaf_2"]
+
+
+def test_print_filtered_matches_every_device_type_with_the_model(netbox_stub):
+    seed(netbox_stub)
+    assert printed_devices(netbox_stub, "--model", "X-1") == ["leaf_1", "leaf_2"]
+    assert printed_devices(netbox_stub, "--model", "X-1", "--role", "leaf") == [
+        "leaf_1",
+        "leaf_2",
+    ]
+
+
+def test_print_filtered_unknown_name_matches_nothing(netbox_stub):
+    seed(netbox_stub)
+    assert printed_devices(netbox_stub, "--location", "row-w") == []
+
+
+def seed_counts(netbox_stub):
+    """
+    Create devices in two sites, with two roles and two models
+    """
+    manufacturer = netbox_stub.create("dcim/manufacturers", name="cisco", slug="cisco")
+    models = {
+        model: netbox_stub.create(
+            "dcim/device-types",
+            model=model,
+            slug=model.lower(),
+            manufacturer=manufacturer,
+        )
+        for model in ("N9K-A", "N9K-B")
+    }
+    roles = {
+        role: netbox_stub.create("dcim/device-roles", name=role, slug=role)
+        for role in ("leaf", "spine")
+    }
+    # site: [(role, model, number of devices)]
+    devices = {
+        "f1": [("leaf", "N9K-A", 3), ("leaf", "N9K-B", 1), ("spine", "N9K-B", 2)],
+        "f2": [("leaf", "N9K-A", 2)],
+    }
+    for site_name, groups in devices.items():
+        site = netbox_stub.create("dcim/sites", name=site_name, slug=site_name)
+        for role, model, number in groups:
+            for index in range(number):
+                netbox_stub.create(
+                    "dcim/devices",
+                    name=f"{site_name}_{role}_{model}_{index}",
+                    site=site,
+                    role=roles[role],
+                    device_type=models[model],
+                )
+
+
+def test_count(netbox_stub):
+    seed_counts(netbox_stub)
+    result = netbox_stub.run("device_count.py")
+    assert result.stdout.splitlines()[-1] == "Count: 8"
+    result = netbox_stub.run("device_count.py", "--site", "f1", "--role", "leaf")
+    assert result.stdout.splitlines()[-1] == "Count: 4"
+    result = netbox_stub.run(
+        "device_count.py", "--site", "f1", "--role", "spine", "--model", "N9K-A"
+    )
+    assert result.stdout.splitlines()[-1] == "Count: 0"
+
+
+def test_count_unknown_site_exits_with_error(netbox_stub):
+    seed_counts(netbox_stub)
+    result = netbox_stub.run("device_count.py", "--site", "f3", returncode=1)
+    assert "Site f3 is not present in Netbox" in result.stdout + result.stderr
+
+
+EXPECTED_MATRIX = [
+    {"role": "leaf", "model": "N9K-A", "count": "3"},
+    {"role": "leaf", "model": "N9K-B", "count": "1"},
+    {"role": "spine", "model": "N9K-A", "count": "0"},
+    {"role": "spine", "model": "N9K-B", "count": "2"},
+]
+
+
+@pytest.mark.parametrize("strategy", ["auto", "count", "scan"])
+def test_count_group_by(netbox_stub, strategy):
+    seed_counts(netbox_stub)
+    result = netbox_stub.run(
+        "device_count.py",
+        "--site",
+        "f1",
+        "--group_by",
+        "role,model",
+        "--strategy",
+        strategy,
+        "--output",
+        "csv",
+    )
+    assert list(csv.DictReader(io.StringIO(result.stdout))) == EXPECTED_MATRIX
+
+
+def test_count_group_by_site(netbox_stub):
+    seed_counts(netbox_stub)
+    result = netbox_stub.run(
+        "device_count.py", "--group_by", "site", "--output", "json"
+    )
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    assert rows == [{"site": "f1", "count": 6}, {"site": "f2", "count": 2}]
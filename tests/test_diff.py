@@ -0,0 +1,52 @@
+"""
+Name: test_diff.py
+Description: Unit tests for netbox_tools.diff
+"""
+from netbox_tools.diff import changed_fields, is_equal, normalize
+
+
+def test_normalize_reduces_nested_objects_choices_and_terminations():
+    assert normalize({"id": 4, "name": "dc1"}) == 4
+    assert normalize({"value": "active", "label": "Active"}) == "active"
+    assert normalize({"object_type": "dcim.interface", "object_id": 7}) == (
+        "dcim.interface",
+        7,
+    )
+    assert normalize([{"id": 3}, {"id": 1}]) == [1, 3]
+
+
+def test_is_equal_rules():
+    assert is_equal("description", None, "")
+    assert is_equal("length", 1, "1.0")
+    assert is_equal("color", "AABBCC", "aabbcc")
+    assert not is_equal("name", "AABBCC", "aabbcc")
+    assert is_equal("tags", [1, 3], [{"id": 3}, {"id": 1}])
+    assert not is_equal("tags", [1], [{"id": 3}, {"id": 1}])
+    assert is_equal("custom_fields", {"a": 1}, {"a": 1, "b": 2})
+    assert not is_equal("custom_fields", {"a": 1}, {"a": 2})
+
+
+def test_changed_fields_returns_only_differences():
+    record = {
+        "id": 9,
+        "site": {"id": 4, "name": "dc1"},
+        "status": {"value": "active", "label": "Active"},
+        "tags": [{"id": 3}, {"id": 1}],
+    }
+    args = {"id": 1, "site": 4, "status": "planned", "tags": [1, 3], "extra": "x"}
+    assert changed_fields(args, record) == {"status": "planned"}
+
+
+def test_changed_fields_without_record_returns_copy_of_args():
+    args = {"name": "leaf_1"}
+    changes = changed_fields(args, None)
+    assert changes == args
+    assert changes is not args
+
+
+def test_device_role_compared_with_renamed_role_field():
+    netbox_4_record = {"role": {"id": 2, "name": "leaf"}}
+    assert changed_fields({"device_role": 2}, netbox_4_record) == {}
+    assert changed_fields({"device_role": 5}, netbox_4_record) == {"device_role": 5}
+    netbox_3_record = {"device_role": {"id": 2}, "role": None}
+    assert changed_fields({"device_role": 5}, netbox_3_record) == {"device_role": 5}
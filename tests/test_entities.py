@@ -0,0 +1,71 @@
+"""
+Name: test_entities.py
+Description: Unit tests for the netbox objects cached by the entity classes
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from types import SimpleNamespace
+from netbox_tools.tag import Tag
+
+
+class Endpoint:
+    """
+    Stand-in for a pynetbox endpoint whose get() takes delay seconds, and
+    returns a record with the filters it was called with, or None if found
+    is False
+    """
+
+    def __init__(self, delay=0, found=True):
+        self.delay = delay
+        self.found = found
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, **filters):
+        with self._lock:
+            self.requests.append(filters)
+        time.sleep(self.delay)
+        if not self.found:
+            return None
+        return SimpleNamespace(id=len(self.requests), **filters)
+
+
+def fake_netbox(delay=0):
+    return SimpleNamespace(
+        extras=SimpleNamespace(tags=Endpoint(delay)),
+    )
+
+
+def test_object_is_retrieved_once_until_refreshed():
+    netbox_obj = fake_netbox()
+    tag = Tag(netbox_obj, {"name": "prod"})
+    assert tag.tag_obj.name == "prod"
+    assert tag.tag_id == tag.tag_obj.id
+    assert len(netbox_obj.extras.tags.requests) == 1
+    tag.refresh()
+    tag.tag_obj
+    assert len(netbox_obj.extras.tags.requests) == 2
+    tag.invalidate_resolver()
+    tag.tag_obj
+    assert len(netbox_obj.extras.tags.requests) == 3
+
+
+def test_absent_object_is_cached():
+    netbox_obj = fake_netbox()
+    netbox_obj.extras.tags.found = False
+    tag = Tag(netbox_obj, {"name": "absent"})
+    assert tag.tag_obj is None
+    assert tag.tag_id is None
+    assert len(netbox_obj.extras.tags.requests) == 1
+
+
+def test_instances_retrieve_objects_concurrently():
+    netbox_obj = fake_netbox(delay=0.2)
+    tags = [Tag(netbox_obj, {"name": f"tag_{index}"}) for index in range(8)]
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        records = list(executor.map(lambda tag: tag.tag_obj, tags))
+    # serialized retrieval would take 8 * 0.2 seconds
+    assert time.monotonic() - start < 0.8
+    assert [record.name for record in records] == [tag.name for tag in tags]
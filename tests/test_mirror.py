@@ -0,0 +1,196 @@
+"""
+Name: test_mirror.py
+Description: Unit tests for netbox_tools.mirror
+"""
+import time
+from types import SimpleNamespace
+import pytest
+from netbox_tools.mirror import MIRROR_TABLES, DictRecord, Mirror
+
+
+def device(device_id, name, site_id=1, tags=()):
+    return {
+        "id": device_id,
+        "name": name,
+        "site": {"id": site_id, "slug": f"site{site_id}", "name": f"Site {site_id}"},
+        "role": {"id": 3, "slug": "leaf"},
+        "status": {"value": "active", "label": "Active"},
+        "tags": [{"id": index, "slug": slug} for index, slug in enumerate(tags)],
+    }
+
+
+def load(mirror, table, records):
+    """
+    Replace table in mirror with records, as snapshot() does
+    """
+    with mirror.connection:
+        mirror._create_table(table)
+        mirror.store(table, records)
+        mirror.set_meta(f"{table}.snapshot_time", time.time())
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = Mirror(str(tmp_path / "mirror.sqlite3"))
+    load(
+        mirror,
+        "devices",
+        [
+            device(1, "leaf_1", tags=["a_b", "prod"]),
+            device(2, "leaf_2", tags=["axb"]),
+            device(3, "leaf_3", site_id=2, tags=["100%", "prod"]),
+            device(4, "leaf_4", site_id=2, tags=["back\\slash"]),
+        ],
+    )
+    return mirror
+
+
+def names(records):
+    return [record.name for record in records]
+
+
+def test_filter_get_count(mirror):
+    devices = mirror.dcim.devices
+    assert names(devices.all()) == ["leaf_1", "leaf_2", "leaf_3", "leaf_4"]
+    assert names(devices.filter(site_id=2)) == ["leaf_3", "leaf_4"]
+    assert names(devices.filter(name=["leaf_1", "leaf_4"])) == ["leaf_1", "leaf_4"]
+    assert devices.get(name="leaf_2").site.slug == "site1"
+    assert devices.get(name="absent") is None
+    assert devices.count(site_id=1) == 2
+    assert names(devices.all(limit=2, offset=1)) == ["leaf_2", "leaf_3"]
+    with pytest.raises(ValueError):
+        devices.get(site_id=1)
+
+
+def test_tag_filter_matches_all_tags(mirror):
+    devices = mirror.dcim.devices
+    assert names(devices.filter(tag="prod")) == ["leaf_1", "leaf_3"]
+    assert names(devices.filter(tag=["prod", "a_b"])) == ["leaf_1"]
+
+
+def test_tag_filter_treats_like_wildcards_literally(mirror):
+    devices = mirror.dcim.devices
+    assert names(devices.filter(tag="a_b")) == ["leaf_1"]
+    assert names(devices.filter(tag="100%")) == ["leaf_3"]
+    assert names(devices.filter(tag="back\\slash")) == ["leaf_4"]
+    assert devices.filter(tag="%") == []
+    assert devices.filter(tag="_xb") == []
+
+
+def test_unsupported_filter_exits(mirror):
+    with pytest.raises(SystemExit):
+        mirror.dcim.devices.filter(serial="1234")
+
+
+def test_query_without_snapshot_exits(mirror):
+    assert "racks" in MIRROR_TABLES
+    with pytest.raises(SystemExit):
+        mirror.dcim.racks.all()
+
+
+class Endpoint:
+    """
+    Stand-in for a pynetbox endpoint over records (dictionaries) keyed on id
+    """
+
+    def __init__(self, records=()):
+        self.records = {record["id"]: record for record in records}
+        self.requests = []
+
+    def filter(self, id=None, id__gt=None, ordering=None, limit=None, offset=None):
+        self.requests.append({"id": id, "id__gt": id__gt, "ordering": ordering})
+        records = sorted(self.records.values(), key=lambda record: record["id"])
+        if id is not None:
+            records = [record for record in records if record["id"] in id]
+        if id__gt is not None:
+            records = [record for record in records if record["id"] > id__gt]
+        if ordering == "-id":
+            records.reverse()
+        if limit is not None:
+            records = records[offset : offset + limit]
+        return [DictRecord(record) for record in records]
+
+
+def change(change_id, object_type, object_id, action):
+    return {
+        "id": change_id,
+        "changed_object_type": object_type,
+        "changed_object_id": object_id,
+        "action": {"value": action, "label": action.title()},
+    }
+
+
+def fake_netbox(devices, sites, changes):
+    return SimpleNamespace(
+        base_url="http://netbox.example/api",
+        version="3.7",
+        dcim=SimpleNamespace(devices=Endpoint(devices), sites=Endpoint(sites)),
+        extras=SimpleNamespace(object_changes=Endpoint(changes)),
+    )
+
+
+@pytest.fixture
+def synced_mirror(mirror):
+    """
+    mirror, with every table snapshotted from fake_netbox, up to change 10
+    """
+    for table in MIRROR_TABLES:
+        if table != "devices":
+            load(mirror, table, [])
+    load(mirror, "sites", [{"id": 1, "slug": "site1"}, {"id": 2, "slug": "site2"}])
+    with mirror.connection:
+        mirror.set_meta("netbox_url", "http://netbox.example/api")
+        mirror.set_meta("last_change_id", 10)
+    return mirror
+
+
+def test_refresh_applies_changes_and_dependents(synced_mirror):
+    renamed = device(3, "leaf_3", site_id=2)
+    renamed["site"]["slug"] = "renamed"
+    netbox_instance = fake_netbox(
+        devices=[
+            device(2, "leaf_2"),
+            renamed,
+            dict(device(4, "leaf_4", site_id=2), site=renamed["site"]),
+            device(5, "leaf_5"),
+        ],
+        sites=[{"id": 1, "slug": "site1"}, {"id": 2, "slug": "renamed"}],
+        changes=[
+            change(9, "dcim.device", 2, "update"),
+            change(11, "dcim.site", 2, "update"),
+            change(12, "dcim.device", 1, "delete"),
+            change(13, "dcim.device", 5, "create"),
+        ],
+    )
+    counts = synced_mirror.refresh(netbox_instance)
+    devices = synced_mirror.dcim.devices
+    assert names(devices.all()) == ["leaf_2", "leaf_3", "leaf_4", "leaf_5"]
+    assert names(devices.filter(site="renamed")) == ["leaf_3", "leaf_4"]
+    assert synced_mirror.dcim.sites.get(id=2).slug == "renamed"
+    assert (counts["devices"], counts["sites"]) == (4, 1)
+    assert synced_mirror.get_meta("last_change_id") == "13"
+    # only the changed site, and the devices that embed it, were re-fetched
+    assert netbox_instance.dcim.devices.requests == [
+        {"id": [3, 4, 5], "id__gt": None, "ordering": None}
+    ]
+
+
+def test_refresh_without_changes_stores_nothing(synced_mirror):
+    netbox_instance = fake_netbox(
+        devices=[], sites=[], changes=[change(10, "dcim.device", 2, "update")]
+    )
+    counts = synced_mirror.refresh(netbox_instance)
+    assert set(counts.values()) == {0}
+    assert len(synced_mirror.dcim.devices.all()) == 4
+
+
+def test_resync_needed_when_change_log_pruned_or_other_netbox(synced_mirror):
+    netbox_instance = fake_netbox(
+        devices=[], sites=[], changes=[change(12, "dcim.device", 2, "update")]
+    )
+    change_log = netbox_instance.extras.object_changes
+    reason = synced_mirror._resync_reason(netbox_instance, change_log)
+    assert "pruned past change 10" in reason
+    netbox_instance.base_url = "http://other.example/api"
+    reason = synced_mirror._resync_reason(netbox_instance, change_log)
+    assert "not of http://other.example/api" in reason
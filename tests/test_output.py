@@ -0,0 +1,121 @@
+"""
+Name: test_output.py
+Description: Tests of netbox_tools.output, and of the scripts' csv and json
+output
+"""
+import csv
+import io
+import json
+import pytest
+from netbox_tools.output import row_writer
+
+COLUMNS = [("id", 3, ">"), ("name", 6, "<")]
+ROWS = [{"id": 1, "name": "r1"}, {"id": 22, "name": "rack,2", "extra": "x"}]
+
+
+def written(output_format, rows=ROWS):
+    stream = io.StringIO()
+    with row_writer(output_format, COLUMNS, stream) as writer:
+        assert writer.write_all(rows) == len(rows)
+    return stream.getvalue()
+
+
+def test_table():
+    assert written("table").splitlines() == [
+        " id name  ",
+        "--- ------",
+        "  1 r1    ",
+        " 22 rack,2",
+    ]
+
+
+def test_csv():
+    assert written("csv").splitlines() == ["id,name", "1,r1", '22,"rack,2"']
+
+
+def test_json_lines():
+    lines = written("json").splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "name": "r1"},
+        {"id": 22, "name": "rack,2"},
+    ]
+
+
+def test_missing_columns_are_empty():
+    rows = [{"id": 1}]
+    assert written("table", rows).splitlines()[2:] == ["  1       "]
+    assert written("csv", rows).splitlines() == ["id,name", "1,"]
+    assert json.loads(written("json", rows)) == {"id": 1, "name": None}
+
+
+def test_json_writes_other_values_as_strings():
+    class Record:
+        def __str__(self):
+            return "site_1"
+
+    output = written("json", [{"id": 1, "name": Record()}])
+    assert json.loads(output) == {"id": 1, "name": "site_1"}
+
+
+def test_empty_output_has_header_only():
+    assert written("table", []).splitlines() == [" id name  ", "--- ------"]
+    assert written("csv", []) == "id,name\r\n"
+    assert written("json", []) == ""
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        row_writer("xml", COLUMNS, io.StringIO())
+
+
+def seed_racks(netbox_stub):
+    site = netbox_stub.create("dcim/sites", name="site_1", slug="site_1")
+    for name in ("rack_1", "rack_2"):
+        netbox_stub.create("dcim/racks", name=name, site=site)
+
+
+def test_racks_print_csv(netbox_stub):
+    seed_racks(netbox_stub)
+    result = netbox_stub.run("racks_print.py", "--output", "csv")
+    assert list(csv.DictReader(io.StringIO(result.stdout))) == [
+        {"id": "1", "name": "rack_1", "site": "site_1"},
+        {"id": "2", "name": "rack_2", "site": "site_1"},
+    ]
+
+
+def test_racks_print_json(netbox_stub):
+    seed_racks(netbox_stub)
+    result = netbox_stub.run("racks_print.py", "--output", "json")
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        {"id": 1, "name": "rack_1", "site": "site_1"},
+        {"id": 2, "name": "rack_2", "site": "site_1"},
+    ]
+
+
+def test_device_print_filtered_json(netbox_stub):
+    site = netbox_stub.create("dcim/sites", name="site_1", slug="site_1")
+    manufacturer = netbox_stub.create(
+        "dcim/manufacturers", name="vendor_1", slug="vendor_1"
+    )
+    device_type = netbox_stub.create(
+        "dcim/device-types", model="X-1", slug="x-1", manufacturer=manufacturer
+    )
+    role = netbox_stub.create("dcim/device-roles", name="leaf", slug="leaf")
+    netbox_stub.create(
+        "dcim/devices",
+        name="leaf_1",
+        serial="S1",
+        site=site,
+        device_type=device_type,
+        role=role,
+    )
+    result = netbox_stub.run("device_print_filtered.py", "--output", "json")
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(rows) == 1
+    assert {key: rows[0][key] for key in ("name", "role", "model", "serial")} == {
+        "name": "leaf_1",
+        "role": "leaf",
+        "model": "X-1",
+        "serial": "S1",
+    }
+    assert rows[0]["primary_ip4"] == "na"
@@ -0,0 +1,89 @@
+"""
+Name: test_paginator.py
+Description: Unit tests for netbox_tools.paginator
+"""
+import itertools
+import threading
+from types import SimpleNamespace
+from netbox_tools.paginator import parallel_all
+
+
+class Endpoint:
+    """
+    Stand-in for a pynetbox endpoint listing total records (with id and
+    site_id), capping pages at max_page_size as netbox's MAX_PAGE_SIZE does.
+    """
+
+    def __init__(self, total, max_page_size=1000):
+        self.records = [
+            SimpleNamespace(id=index, site_id=index % 3)
+            for index in range(1, total + 1)
+        ]
+        self.max_page_size = max_page_size
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def _matching(self, filters):
+        return [
+            record
+            for record in self.records
+            if all(getattr(record, key) == value for key, value in filters.items())
+        ]
+
+    def count(self, **filters):
+        return len(self._matching(filters))
+
+    def filter(self, limit=None, offset=None, **filters):
+        limit = min(limit, self.max_page_size)
+        with self._lock:
+            self.pages.append((offset, limit))
+        return self._matching(filters)[offset : offset + limit]
+
+    def all(self, limit=None, offset=None):
+        return self.filter(limit=limit, offset=offset)
+
+
+def ids(records):
+    return [record.id for record in records]
+
+
+def test_records_yielded_in_order():
+    endpoint = Endpoint(1003)
+    records = list(parallel_all(endpoint, workers=4, page_size=100))
+    assert ids(records) == list(range(1, 1004))
+    assert sorted(offset for offset, _ in endpoint.pages) == list(range(0, 1001, 100))
+
+
+def test_filters_are_applied():
+    endpoint = Endpoint(100)
+    records = list(parallel_all(endpoint, workers=2, page_size=10, site_id=1))
+    assert ids(records) == list(range(1, 101, 3))
+
+
+def test_page_size_capped_by_netbox():
+    endpoint = Endpoint(250, max_page_size=40)
+    records = list(parallel_all(endpoint, workers=3, page_size=100))
+    assert ids(records) == list(range(1, 251))
+    assert {limit for _, limit in endpoint.pages} == {40}
+
+
+def test_objects_created_during_listing_are_included():
+    endpoint = Endpoint(95)
+    count = endpoint.count
+    endpoint.count = lambda **filters: count(**filters) - 20
+    records = list(parallel_all(endpoint, workers=2, page_size=10))
+    assert ids(records) == list(range(1, 96))
+
+
+def test_empty_listing():
+    endpoint = Endpoint(0)
+    assert list(parallel_all(endpoint)) == []
+    assert endpoint.pages == [(0, 500)]
+
+
+def test_pages_requested_ahead_are_bounded_by_workers():
+    endpoint = Endpoint(10000)
+    records = parallel_all(endpoint, workers=3, page_size=10)
+    list(itertools.islice(records, 11))
+    # the first page, and at most workers pages ahead of the second
+    assert len(endpoint.pages) <= 1 + 3
@@ -0,0 +1,238 @@
+"""
+Name: test_reconcile.py
+Description: Tests of netbox_tools.reconcile, and of the incremental runs of
+entity_create_update_all.py that it drives
+"""
+import copy
+import json
+import os
+import re
+import pytest
+import yaml
+from netbox_tools import reconcile
+from netbox_tools.reconcile import (
+    STATE_FORMAT,
+    ReconcileState,
+    block_values,
+    entity_hash,
+    identity_tokens,
+    state_file,
+)
+
+URL = "http://netbox.example.com/"
+
+
+def test_entity_hash_ignores_key_order():
+    assert entity_hash({"name": "a", "tags": ["t"]}) == entity_hash(
+        {"tags": ["t"], "name": "a"}
+    )
+    assert entity_hash({"name": "a"}) != entity_hash({"name": "b"})
+    assert entity_hash({"name": "a"}) != entity_hash({"name": "a"}, {"ip4": "1"})
+
+
+def test_identity_tokens_and_block_values():
+    block = {"device": "leaf_1", "site": "f1", "tags": ["t1", "t2"], "slot": 3}
+    assert identity_tokens("leaf_1_key", block) == {"leaf_1_key", "leaf_1"}
+    assert identity_tokens(5, {"vid": 5}) == {"5"}
+    assert block_values([block, None]) == {"leaf_1", "f1", "t1", "t2", "3"}
+
+
+def test_state_file_is_per_yaml_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    path = state_file("info.yml")
+    assert path.startswith(str(tmp_path))
+    assert os.path.basename(path).startswith("info.yml-")
+    assert path != state_file(os.path.join("other", "info.yml"))
+
+
+def test_changed_record_forget(tmp_path):
+    state = ReconcileState(str(tmp_path / "state.json"), URL)
+    assert state.changed("vlans", 5, "h1")
+    state.record("vlans", 5, "h1", 17)
+    assert not state.changed("vlans", "5", "h1")
+    assert state.changed("vlans", 5, "h2")
+    assert state.netbox_id("vlans", 5) == 17
+    state.record("vlans", 5, "h1", None)
+    assert state.changed("vlans", 5, "h1")
+    state.forget("vlans", 5)
+    assert state.netbox_id("vlans", 5) is None
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "reconcile" / "state.json")
+    state = ReconcileState(path, URL)
+    state.record("sites", "f1", "h1", 1)
+    state.save()
+    assert os.listdir(os.path.dirname(path)) == ["state.json"]
+    with open(path, encoding="utf-8") as handle:
+        assert json.load(handle)["format"] == STATE_FORMAT
+    assert not ReconcileState(path, URL).changed("sites", "f1", "h1")
+    # the state of another netbox is ignored
+    assert ReconcileState(path, "http://other/").entities == {}
+
+
+def test_save_is_atomic(tmp_path, monkeypatch):
+    path = str(tmp_path / "state.json")
+    state = ReconcileState(path, URL)
+    state.record("sites", "f1", "h1", 1)
+    state.save()
+
+    def interrupted(*args, **kwargs):
+        raise OSError("disk full")
+
+    state.record("sites", "f1", "h2", 1)
+    monkeypatch.setattr(reconcile.json, "dump", interrupted)
+    with pytest.raises(OSError):
+        state.save()
+    monkeypatch.undo()
+    assert not ReconcileState(path, URL).changed("sites", "f1", "h1")
+
+
+def test_unreadable_state_is_empty(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert ReconcileState(str(path), URL).entities == {}
+
+
+def test_prune(tmp_path):
+    state = ReconcileState(str(tmp_path / "state.json"), URL)
+    for key in ("f1", "f2", "f3"):
+        state.record("sites", key, "h", 1)
+    state.prune("sites", ["f1", "f3"])
+    assert sorted(state.entities["sites"]) == ["f1", "f3"]
+
+
+INFO = {
+    "tags": {"tag_1": {"name": "tag_1", "color": "blue"}},
+    "sites": {
+        "f1": {"name": "f1", "status": "active", "tags": ["tag_1"]},
+        "f2": {"name": "f2", "status": "active"},
+    },
+    "manufacturers": {"cisco": {"name": "cisco"}},
+    "device_types": {"N9K-A": {"model": "N9K-A", "manufacturer": "cisco"}},
+    "device_roles": {"leaf": {"name": "leaf", "color": "blue"}},
+    "devices": {
+        f"leaf_{index}": {
+            "device": f"leaf_{index}",
+            "role": "leaf",
+            "type": "N9K-A",
+            "serial": f"SN{index}",
+            "site": "f1" if index < 2 else "f2",
+            "interface": f"leaf_{index}_mgmt0",
+        }
+        for index in range(4)
+    },
+    "interfaces": {
+        f"leaf_{index}_mgmt0": {
+            "device": f"leaf_{index}",
+            "interface": "mgmt0",
+            "ip4": f"192.168.0.{index + 1}/24",
+            "interface_mode": "access",
+            "interface_type": "1000base-t",
+            "mgmt_only": True,
+        }
+        for index in range(4)
+    },
+    "ip4_addresses": {
+        f"192.168.0.{index + 1}/24": {
+            "ip4": f"192.168.0.{index + 1}/24",
+            "status": "active",
+        }
+        for index in range(4)
+    },
+}
+
+
+class Inventory:
+    """
+    Run entity_create_update_all.py against netbox_stub, with the YAML
+    file info, and a state file in work_dir
+    """
+
+    def __init__(self, netbox_stub):
+        self.netbox_stub = netbox_stub
+        self.info = copy.deepcopy(INFO)
+        self.yaml = os.path.join(netbox_stub.work_dir, "info.yml")
+        self.state = os.path.join(netbox_stub.work_dir, "state.json")
+
+    def run(self, *args):
+        """
+        Return the number of entities processed
+        """
+        with open(self.yaml, "w", encoding="utf-8") as handle:
+            yaml.safe_dump(self.info, handle)
+        result = self.netbox_stub.run(
+            "entity_create_update_all.py",
+            "--yaml",
+            self.yaml,
+            "--state",
+            self.state,
+            *args,
+        )
+        match = re.search(r"Processing (all )?(\d+) ", result.stderr)
+        assert match is not None, result.stderr
+        return int(match.group(2))
+
+    def saved(self):
+        with open(self.state, encoding="utf-8") as handle:
+            return json.load(handle)["entities"]
+
+
+@pytest.fixture
+def inventory(netbox_stub):
+    inventory = Inventory(netbox_stub)
+    assert inventory.run() == 10
+    return inventory
+
+
+def test_first_run_records_every_entity(inventory):
+    entities = inventory.saved()
+    assert sorted(entities["devices"]) == ["leaf_0", "leaf_1", "leaf_2", "leaf_3"]
+    assert all(entry["netbox_id"] for entry in entities["devices"].values())
+
+
+def writes(netbox_stub):
+    """
+    Return the number of requests that wrote to netbox_stub
+    """
+    methods = netbox_stub.stub.stats()["methods"]
+    return sum(methods.get(method, 0) for method in ("POST", "PATCH", "DELETE"))
+
+
+def test_unchanged_entities_are_skipped(inventory):
+    before = writes(inventory.netbox_stub)
+    saved = inventory.saved()
+    assert inventory.run() == 0
+    assert writes(inventory.netbox_stub) == before
+    assert inventory.saved() == saved
+
+
+def test_changed_entities_are_selected(inventory):
+    inventory.info["devices"]["leaf_3"]["serial"] = "SN3-changed"
+    hashes = inventory.saved()["devices"]
+    assert inventory.run() == 1
+    assert inventory.saved()["devices"]["leaf_3"] != hashes["leaf_3"]
+    # a change to the management interface changes the device's hash
+    inventory.info["interfaces"]["leaf_0_mgmt0"]["mgmt_only"] = False
+    assert inventory.run() == 1
+    assert inventory.run() == 0
+
+
+def test_dependents_of_changed_entities_are_selected(inventory):
+    inventory.info["sites"]["f1"]["status"] = "planned"
+    # f1, and leaf_0 and leaf_1 in it
+    assert inventory.run() == 3
+    inventory.info["tags"]["tag_1"]["color"] = "red"
+    # tag_1, and f1, which it tags, and f1's devices
+    assert inventory.run() == 4
+
+
+def test_full_ignores_the_state(inventory):
+    assert inventory.run("--full") == 10
+    assert inventory.run() == 0
+
+
+def test_removed_entities_are_pruned(inventory):
+    del inventory.info["devices"]["leaf_3"]
+    assert inventory.run() == 0
+    assert sorted(inventory.saved()["devices"]) == ["leaf_0", "leaf_1", "leaf_2"]
@@ -0,0 +1,144 @@
+"""
+Name: test_resolver.py
+Description: Unit tests for netbox_tools.resolver and the common.py lookup helpers
+"""
+import threading
+import time
+from types import SimpleNamespace
+from netbox_tools.common import get_device, site_id
+from netbox_tools.resolver import Resolver, get_resolver
+
+
+class Endpoint:
+    """
+    Stand-in for a pynetbox endpoint.  get() returns the record whose name
+    matches, or None, after delay seconds, and counts calls.
+    """
+
+    def __init__(self, records, delay=0):
+        self.records = records
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, name=None, **_kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.records.get(name)
+
+    def all(self):
+        return list(self.records.values())
+
+
+def record(name, netbox_id):
+    return SimpleNamespace(name=name, id=netbox_id)
+
+
+def fake_netbox(sites=None, devices=None, delay=0):
+    return SimpleNamespace(
+        base_url="http://netbox.example/api",
+        dcim=SimpleNamespace(
+            sites=Endpoint(sites or {}, delay),
+            devices=Endpoint(devices or {}, delay),
+        ),
+    )
+
+
+def test_lookup_store_and_negative_cache():
+    resolver = Resolver()
+    assert resolver.lookup("site", "s1") == (False, None)
+    assert resolver.store("site", "s1", 7) == 7
+    assert resolver.store("site", "s2", None) is None
+    assert resolver.lookup("site", "s1") == (True, 7)
+    assert resolver.lookup("site", "s2") == (True, None)
+    assert resolver.hits == 2
+    assert resolver.misses == 1
+
+
+def test_invalidate_where_discards_matching_keys_only():
+    resolver = Resolver()
+    resolver.store("interface", ("leaf_1", "Eth1/1"), 1)
+    resolver.store("interface", ("leaf_1", "Eth1/2"), 2)
+    resolver.store("interface", ("leaf_2", "Eth1/1"), 3)
+    resolver.invalidate_where("interface", lambda key: key[0] == "leaf_1")
+    assert resolver.entries("interface") == {("leaf_2", "Eth1/1"): 3}
+
+
+def test_preload_marks_type_complete_and_skips_duplicates():
+    netbox_instance = fake_netbox(sites={"s1": record("s1", 1)})
+    netbox_instance.dcim.sites.all = lambda: [
+        record("s1", 1),
+        record("dup", 2),
+        record("dup", 3),
+    ]
+    resolver = Resolver()
+    resolver.preload(netbox_instance, object_types=["site"])
+    assert resolver.lookup("site", "s1") == (True, 1)
+    assert resolver.lookup("site", "absent") == (True, None)
+    assert resolver.lookup("site", "dup") == (False, None)
+    resolver.invalidate("site", "s1")
+    assert resolver.lookup("site", "s1") == (False, None)
+
+
+def test_claim_coalesces_concurrent_misses():
+    netbox_instance = fake_netbox(sites={"s1": record("s1", 1)}, delay=0.05)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(site_id(netbox_instance, "s1")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 8
+    assert netbox_instance.dcim.sites.calls == 1
+    stats = get_resolver(netbox_instance).stats()["site"]
+    assert (stats["hits"], stats["misses"]) == (7, 1)
+
+
+def test_claim_hands_key_to_waiter_when_owner_does_not_store():
+    resolver = Resolver()
+    owner_has_key = threading.Event()
+    waiter_result = []
+
+    def owner():
+        with resolver.claim("site", "s1") as (found, _):
+            assert not found
+            owner_has_key.set()
+            time.sleep(0.05)
+
+    def waiter():
+        owner_has_key.wait()
+        with resolver.claim("site", "s1") as (found, cached_id):
+            if not found:
+                cached_id = resolver.store("site", "s1", 5)
+            waiter_result.append(cached_id)
+
+    threads = [threading.Thread(target=owner), threading.Thread(target=waiter)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert waiter_result == [5]
+    assert resolver.lookup("site", "s1") == (True, 5)
+
+
+def test_claim_is_reentrant_within_a_thread():
+    resolver = Resolver()
+    with resolver.claim("site", "s1") as (found, _):
+        assert not found
+        with resolver.claim("site", "s1") as (found, _):
+            assert not found
+            resolver.store("site", "s1", 1)
+    assert resolver.lookup("site", "s1") == (True, 1)
+
+
+def test_get_helper_consults_negative_cache():
+    netbox_instance = fake_netbox(devices={"d1": record("d1", 10)})
+    assert get_device(netbox_instance, "d1").id == 10
+    assert get_device(netbox_instance, "missing") is None
+    assert get_device(netbox_instance, "missing") is None
+    assert netbox_instance.dcim.devices.calls == 2
+    assert get_resolver(netbox_instance).lookup("device", "d1") == (True, 10)
@@ -0,0 +1,47 @@
+"""
+Name: test_scripts.py
+Description: Smoke tests for the scripts in scripts/
+
+Runs each script that parses arguments with --help, which imports every
+netbox_tools module the script uses without contacting netbox.  Scripts
+that take no arguments connect to netbox as soon as they run, so those
+are only compiled.
+"""
+import glob
+import os
+import py_compile
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB = os.path.join(ROOT, "lib")
+SCRIPTS = os.path.join(ROOT, "scripts")
+
+
+def scripts():
+    return sorted(glob.glob(os.path.join(SCRIPTS, "*.py")))
+
+
+def parses_arguments(script):
+    with open(script, encoding="utf-8") as handle:
+        return "ArgumentParser" in handle.read()
+
+
+@pytest.mark.parametrize("script", scripts(), ids=os.path.basename)
+def test_script(script, tmp_path):
+    if not parses_arguments(script):
+        py_compile.compile(script, cfile=str(tmp_path / "script.pyc"), doraise=True)
+        return
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([LIB] + sys.path))
+    result = subprocess.run(
+        [sys.executable, script, "--help"],
+        env=env,
+        cwd=str(tmp_path),
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("usage:")
@@ -0,0 +1,170 @@
+"""
+Name: test_transport.py
+Description: Unit tests for netbox_tools.transport
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import pytest
+from urllib3.util import retry
+from netbox_tools import transport
+from netbox_tools.transport import WINDOW_SIZE, ConcurrencyGovernor, make_session
+
+
+def test_acquire_waits_at_limit():
+    governor = ConcurrencyGovernor(2)
+    governor.acquire()
+    governor.acquire()
+    acquired = threading.Event()
+
+    def third_request():
+        governor.acquire()
+        acquired.set()
+        governor.release(200)
+
+    thread = threading.Thread(target=third_request, daemon=True)
+    thread.start()
+    assert not acquired.wait(timeout=0.2)
+    assert governor.queue_depth == 1
+    governor.release(200)
+    assert acquired.wait(timeout=5)
+    thread.join(timeout=5)
+    governor.release(200)
+    assert governor.in_flight == 0
+
+
+def test_overload_halves_limit_once_per_request():
+    governor = ConcurrencyGovernor(16)
+    governor.acquire()
+    governor.overloaded()
+    governor.overloaded()
+    governor.release(503)
+    assert (governor.limit, governor.overloads, governor.decreases) == (8, 1, 1)
+
+
+def test_overload_decreases_once_per_round():
+    governor = ConcurrencyGovernor(16)
+
+    def request(started, overload):
+        governor.acquire()
+        started.set()
+        overload.wait(timeout=5)
+        governor.release(429)
+
+    overloads = []
+    for _ in range(4):
+        started, overload = threading.Event(), threading.Event()
+        thread = threading.Thread(target=request, args=(started, overload))
+        thread.start()
+        started.wait(timeout=5)
+        overloads.append((thread, overload))
+    for thread, overload in overloads:
+        overload.set()
+        thread.join(timeout=5)
+    # the four requests were in flight together, so only one decrease
+    assert (governor.limit, governor.overloads, governor.decreases) == (8, 4, 1)
+    governor.acquire()
+    governor.release(429)
+    assert governor.limit == 4
+
+
+def test_limit_grows_while_requests_wait():
+    governor = ConcurrencyGovernor(4)
+    governor.acquire()
+    governor.release(503)
+    assert governor.limit == 2
+    governor.queue_depth = 1
+    for _ in range(4):
+        governor.acquire()
+        governor.release(200)
+    assert governor.limit == 3
+    governor.queue_depth = 0
+
+
+def test_high_latency_decreases_limit(monkeypatch):
+    governor = ConcurrencyGovernor(8, latency_tolerance=2.0)
+    clock = [0.0]
+    monkeypatch.setattr(transport, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    for latency in (0.1, 0.5):
+        for _ in range(WINDOW_SIZE):
+            governor.acquire()
+            clock[0] += latency
+            governor.release(200)
+    assert governor.baseline == pytest.approx(0.1 * 1.05)
+    assert (governor.limit, governor.decreases) == (6, 1)
+
+
+class Server(ThreadingHTTPServer):
+    """
+    HTTP server answering each GET with the next of statuses, then 200
+    """
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        super().__init__(("127.0.0.1", 0), Handler)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(statuses):
+        server = Server(statuses)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """
+    Record requests in flight during each backoff, instead of sleeping
+    """
+    in_flight = []
+    session = make_session({"http_concurrency_max": 4})
+
+    def sleep(seconds):
+        in_flight.append(session.governor.in_flight)
+
+    monkeypatch.setattr(retry, "time", SimpleNamespace(sleep=sleep))
+    return session, in_flight
+
+
+def test_retried_overload_signalled_once(serve, backoffs):
+    session, in_flight = backoffs
+    response = session.get(serve([503, 503]), timeout=5)
+    assert response.status_code == 200
+    stats = session.governor.stats()
+    assert (stats["limit"], stats["overloads"], stats["requests"]) == (2, 1, 1)
+
+
+def test_final_overload_after_retries_signalled_once(serve, backoffs):
+    session, _ = backoffs
+    response = session.get(serve([429] * 4), timeout=5)
+    assert response.status_code == 429
+    stats = session.governor.stats()
+    assert (stats["limit"], stats["overloads"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_slot_is_free_during_backoff(serve, backoffs):
+    session, in_flight = backoffs
+    session.get(serve([503, 503]), timeout=5)
+    assert in_flight == [0, 0]
+    assert session.governor.in_flight == 0